@@ -20,54 +20,66 @@ if ( ! defined( 'PD_DB_SCHEMA' ) ) {
     define( 'PD_DB_SCHEMA', 'beta_2' );
 }
 
-require_once $plugin_dir . 'includes/functions.php' ;
-require_once $plugin_dir . 'includes/short_code_metaData.php' ;
-require_once $plugin_dir . 'includes/short_code_client.php' ;
-require_once $plugin_dir . 'includes/ar_member_usrID.php' ;
-require_once $plugin_dir . 'includes/rest-presenters.php';
-require_once $plugin_dir . 'includes/rest-sessions.php';
-require_once $plugin_dir . 'includes/REST/membershome.php';
-require_once $plugin_dir . 'includes/REST/memberspage.php';
-require_once $plugin_dir . 'includes/REST/sessionhome.php';
-require_once $plugin_dir . 'includes/REST/sessionhome2.php';
-require_once $plugin_dir . 'includes/REST/sessionhome3.php';
-require_once $plugin_dir . 'includes/REST/sessionhome4.php';
-require_once $plugin_dir . 'includes/REST/sessionhome5.php';
-require_once $plugin_dir . 'includes/REST/sessionhome6.php';
-require_once $plugin_dir . 'includes/REST/sessionhome7.php';
-require_once $plugin_dir . 'includes/REST/sessionhome12.php';
-require_once $plugin_dir . 'includes/REST/sessionhome13.php';
-require_once $plugin_dir . 'includes/REST/sessionhome8.php';
-require_once $plugin_dir . 'includes/REST/sessionhome9.php';
-require_once $plugin_dir . 'includes/REST/sessionhome11.php';
-require_once $plugin_dir . 'includes/REST/sessionhome10.php';
-require_once $plugin_dir . 'includes/REST/GET_presenters_table.php';
-require_once $plugin_dir . 'includes/REST/GET_presenter_table_count.php';
-require_once $plugin_dir . 'includes/REST/GET_attendee_table_count.php';
-require_once $plugin_dir . 'includes/REST/GET_attendees_table.php';
-require_once $plugin_dir . 'includes/REST/GET_session_table_count.php';
-require_once $plugin_dir . 'includes/REST/POST_presenter.php';
-require_once $plugin_dir . 'includes/REST/POST_attendee.php';
-require_once $plugin_dir . 'includes/REST/GET_presenter_sessions.php';
-require_once $plugin_dir . 'includes/REST/GET_member_admin_service.php';
-require_once $plugin_dir . 'includes/REST/GET_member_me.php';
-require_once $plugin_dir . 'includes/REST/PUT_session.php';
-require_once $plugin_dir . 'includes/REST/PUT_session_presenters.php';
-require_once $plugin_dir . 'includes/REST/PUT_member_mark_attendee.php';
-require_once $plugin_dir . 'includes/REST/PUT_member_mark_presenter.php';
-require_once $plugin_dir . 'includes/REST/PUT_member_link_wp.php';
-require_once $plugin_dir . 'admin/main-page.php' ;
-require_once $plugin_dir . 'admin/members-table.php' ;
-require_once $plugin_dir . 'admin/member-page.php' ;
-require_once $plugin_dir . 'admin/sessions-table.php' ;
-require_once $plugin_dir . 'admin/session-page.php' ;
-require_once $plugin_dir . 'admin/presenters-table.php' ;
-// Presenter profile page retired; loader kept in tools/admin/presenters-table.php.retired
-
-// Utility/test admin helper
-require_once $plugin_dir . 'admin/skeleton2.php' ;
-
-require_once $plugin_dir . 'includes/ApiRequestSigner.php' ;
+// Plugin files in load order. With PD_LAZY_LOAD defined as true, includes/load-plan.php
+// loads only the subset this request needs (includes/load-manifest.php, regenerated
+// with `make include-graph`); by default every file is loaded.
+$pd_plugin_files = [
+    'includes/functions.php',
+    'includes/short_code_metaData.php',
+    'includes/short_code_client.php',
+    'includes/ar_member_usrID.php',
+    'includes/rest-presenters.php',
+    'includes/rest-sessions.php',
+    'includes/asset-bundles.php',
+    'includes/REST/membershome.php',
+    'includes/REST/memberspage.php',
+    'includes/REST/sessionhome.php',
+    'includes/REST/sessionhome2.php',
+    'includes/REST/sessionhome3.php',
+    'includes/REST/sessionhome4.php',
+    'includes/REST/sessionhome5.php',
+    'includes/REST/sessionhome6.php',
+    'includes/REST/sessionhome7.php',
+    'includes/REST/sessionhome12.php',
+    'includes/REST/sessionhome13.php',
+    'includes/REST/sessionhome8.php',
+    'includes/REST/sessionhome9.php',
+    'includes/REST/sessionhome11.php',
+    'includes/REST/sessionhome10.php',
+    'includes/REST/GET_presenters_table.php',
+    'includes/REST/GET_presenter_table_count.php',
+    'includes/REST/GET_attendee_table_count.php',
+    'includes/REST/GET_attendees_table.php',
+    'includes/REST/GET_session_table_count.php',
+    'includes/REST/POST_presenter.php',
+    'includes/REST/POST_attendee.php',
+    'includes/REST/GET_presenter_sessions.php',
+    'includes/REST/GET_member_admin_service.php',
+    'includes/REST/GET_member_me.php',
+    'includes/REST/PUT_session.php',
+    'includes/REST/PUT_session_presenters.php',
+    'includes/REST/PUT_member_mark_attendee.php',
+    'includes/REST/PUT_member_mark_presenter.php',
+    'includes/REST/PUT_member_link_wp.php',
+    'admin/main-page.php',
+    'admin/members-table.php',
+    'admin/member-page.php',
+    'admin/sessions-table.php',
+    'admin/session-page.php',
+    'admin/presenters-table.php',
+    // Presenter profile page retired; loader kept in tools/admin/presenters-table.php.retired
+
+    // Utility/test admin helper
+    'admin/skeleton2.php',
+
+    'includes/ApiRequestSigner.php',
+];
+
+require_once $plugin_dir . 'includes/load-plan.php';
+foreach (pd_load_plan($pd_plugin_files) as $pd_plugin_file) {
+    require_once $plugin_dir . $pd_plugin_file;
+}
+unset($pd_plugin_file);
 
 
 // define( 'ASLTA_API_BASE_URL', 'https://aslta.parallelsolvit.com' );
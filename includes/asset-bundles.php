@@ -0,0 +1,127 @@
+<?php
+// includes/asset-bundles.php
+if (!defined('ABSPATH')) exit;
+
+/*
+ * Serve the per-page bundles built by `python3 tools/asset_weights.py --build`
+ * (dist/asset-manifest.json) instead of the individual scripts and styles.
+ *
+ * The enqueue callbacks in Professional_Development.php stay the source of
+ * truth. After they have run, each bundle whose handles are all registered,
+ * whose entry handles are enqueued and whose source files are unchanged since
+ * the build takes over: the bundle is registered with the external
+ * dependencies, every original handle becomes a source-less alias depending
+ * on it (so other scripts depending on those handles keep working), and the
+ * wp_localize_script() data moves to the bundle so it prints before the code.
+ *
+ * Nothing changes when the manifest is missing, with SCRIPT_DEBUG on, or when
+ * the 'pd_use_asset_bundles' filter returns false.
+ *
+ * A bundle runs its sources as one script: an uncaught exception at the top
+ * level of one source stops the sources after it in the same bundle, where
+ * separate <script> tags would have run them anyway.
+ */
+
+function pd_asset_bundle_manifest() {
+    static $bundles = null;
+    if ($bundles === null) {
+        $path = dirname(__DIR__) . '/dist/asset-manifest.json';
+        $doc  = is_readable($path) ? json_decode((string) file_get_contents($path), true) : null;
+        $bundles = (is_array($doc) && isset($doc['bundles']) && is_array($doc['bundles'])) ? $doc['bundles'] : [];
+    }
+    return $bundles;
+}
+
+function pd_asset_bundle_is_current(array $bundle) {
+    $root = dirname(__DIR__) . '/';
+    if (!is_readable($root . $bundle['file'])) {
+        return false;
+    }
+    // Same size and mtime: unchanged, nothing to read. A moved mtime alone (checkout,
+    // rsync, unzip) is not an edit, so the content decides, which also catches
+    // same-length edits. The outcome is kept in a transient keyed on the sizes and
+    // mtimes seen, so the sources are hashed once per deploy, not on every request.
+    $moved = [];
+    foreach ($bundle['sources'] as $source) {
+        $path = $root . $source['path'];
+        if (!isset($source['mtime'], $source['sha1']) || @filesize($path) !== (int) $source['size']) {
+            return false;
+        }
+        $mtime = @filemtime($path);
+        if ($mtime !== (int) $source['mtime']) {
+            $moved[] = $source['path'] . '|' . $source['sha1'] . '|' . $mtime;
+        }
+    }
+    if (!$moved) {
+        return true;
+    }
+
+    $cache_key = 'pd_asset_bundle_' . md5($bundle['file'] . '|' . implode('|', $moved));
+    $cached    = get_transient($cache_key);
+    if ($cached === 'current' || $cached === 'stale') {
+        return $cached === 'current';
+    }
+    $current = true;
+    foreach ($bundle['sources'] as $source) {
+        $path = $root . $source['path'];
+        if (@filemtime($path) !== (int) $source['mtime'] && @sha1_file($path) !== $source['sha1']) {
+            $current = false;
+            break;
+        }
+    }
+    set_transient($cache_key, $current ? 'current' : 'stale', WEEK_IN_SECONDS);
+    return $current;
+}
+
+function pd_apply_asset_bundles() {
+    if ((defined('SCRIPT_DEBUG') && SCRIPT_DEBUG) || !apply_filters('pd_use_asset_bundles', true)) {
+        return;
+    }
+
+    $swapped = [];
+    foreach (pd_asset_bundle_manifest() as $bundle) {
+        $deps = $bundle['kind'] === 'js' ? wp_scripts() : wp_styles();
+
+        $usable = true;
+        foreach ($bundle['handles'] as $handle) {
+            $item = isset($deps->registered[$handle]) ? $deps->registered[$handle] : null;
+            if ($item === null || !$item->src || isset($swapped[$bundle['kind'] . ':' . $handle])
+                || !empty($item->extra['before']) || !empty($item->extra['after'])) {
+                $usable = false;
+                break;
+            }
+        }
+        foreach ($bundle['entries'] as $handle) {
+            if (!$deps->query($handle, 'enqueued')) {
+                $usable = false;
+            }
+        }
+        if (!$usable || !pd_asset_bundle_is_current($bundle)) {
+            continue;
+        }
+
+        $url = plugin_dir_url(__DIR__) . $bundle['file'];
+        if ($bundle['kind'] === 'js') {
+            wp_register_script($bundle['handle'], $url, $bundle['deps'], null, (bool) $bundle['in_footer']);
+        } else {
+            wp_register_style($bundle['handle'], $url, $bundle['deps'], null, $bundle['media']);
+        }
+
+        $data = [];
+        foreach ($bundle['handles'] as $handle) {
+            $item = $deps->registered[$handle];
+            if (!empty($item->extra['data'])) {
+                $data[] = $item->extra['data'];
+                unset($item->extra['data']);
+            }
+            $item->src  = false;
+            $item->deps = [$bundle['handle']];
+            $swapped[$bundle['kind'] . ':' . $handle] = true;
+        }
+        if ($data) {
+            $deps->add_data($bundle['handle'], 'data', implode("\n", $data));
+        }
+    }
+}
+add_action('admin_enqueue_scripts', 'pd_apply_asset_bundles', PHP_INT_MAX);
+add_action('wp_enqueue_scripts', 'pd_apply_asset_bundles', PHP_INT_MAX);
@@ -0,0 +1,336 @@
+<?php
+// includes/load-manifest.php
+// Generated by `python3 tools/include_graph.py --write` (make include-graph); do not edit.
+// The plugin files each request type needs, in bootstrap order (see includes/load-plan.php).
+if (!defined('ABSPATH')) exit;
+
+return [
+    'version' => 1,
+    'files' => [
+        'includes/functions.php',
+        'includes/short_code_metaData.php',
+        'includes/short_code_client.php',
+        'includes/ar_member_usrID.php',
+        'includes/rest-presenters.php',
+        'includes/rest-sessions.php',
+        'includes/asset-bundles.php',
+        'includes/REST/membershome.php',
+        'includes/REST/memberspage.php',
+        'includes/REST/sessionhome.php',
+        'includes/REST/sessionhome2.php',
+        'includes/REST/sessionhome3.php',
+        'includes/REST/sessionhome4.php',
+        'includes/REST/sessionhome5.php',
+        'includes/REST/sessionhome6.php',
+        'includes/REST/sessionhome7.php',
+        'includes/REST/sessionhome12.php',
+        'includes/REST/sessionhome13.php',
+        'includes/REST/sessionhome8.php',
+        'includes/REST/sessionhome9.php',
+        'includes/REST/sessionhome11.php',
+        'includes/REST/sessionhome10.php',
+        'includes/REST/GET_presenters_table.php',
+        'includes/REST/GET_presenter_table_count.php',
+        'includes/REST/GET_attendee_table_count.php',
+        'includes/REST/GET_attendees_table.php',
+        'includes/REST/GET_session_table_count.php',
+        'includes/REST/POST_presenter.php',
+        'includes/REST/POST_attendee.php',
+        'includes/REST/GET_presenter_sessions.php',
+        'includes/REST/GET_member_admin_service.php',
+        'includes/REST/GET_member_me.php',
+        'includes/REST/PUT_session.php',
+        'includes/REST/PUT_session_presenters.php',
+        'includes/REST/PUT_member_mark_attendee.php',
+        'includes/REST/PUT_member_mark_presenter.php',
+        'includes/REST/PUT_member_link_wp.php',
+        'admin/main-page.php',
+        'admin/members-table.php',
+        'admin/member-page.php',
+        'admin/sessions-table.php',
+        'admin/session-page.php',
+        'admin/presenters-table.php',
+        'admin/skeleton2.php',
+        'includes/ApiRequestSigner.php',
+    ],
+    'plans' => [
+        'admin' => [
+            'includes/functions.php',
+            'includes/short_code_metaData.php',
+            'includes/short_code_client.php',
+            'includes/ar_member_usrID.php',
+            'includes/asset-bundles.php',
+        ],
+        'ajax' => [
+            'includes/functions.php',
+            'includes/short_code_metaData.php',
+            'includes/short_code_client.php',
+            'includes/ar_member_usrID.php',
+        ],
+        'always' => [
+            'includes/functions.php',
+            'includes/short_code_metaData.php',
+            'includes/short_code_client.php',
+            'includes/ar_member_usrID.php',
+        ],
+        'front' => [
+            'includes/functions.php',
+            'includes/short_code_metaData.php',
+            'includes/short_code_client.php',
+            'includes/ar_member_usrID.php',
+            'includes/asset-bundles.php',
+        ],
+        'rest' => [
+            'includes/functions.php',
+            'includes/short_code_metaData.php',
+            'includes/short_code_client.php',
+            'includes/ar_member_usrID.php',
+        ],
+        'rest:all' => [
+            'includes/functions.php',
+            'includes/short_code_metaData.php',
+            'includes/short_code_client.php',
+            'includes/ar_member_usrID.php',
+            'includes/rest-presenters.php',
+            'includes/rest-sessions.php',
+            'includes/REST/membershome.php',
+            'includes/REST/memberspage.php',
+            'includes/REST/sessionhome.php',
+            'includes/REST/sessionhome2.php',
+            'includes/REST/sessionhome3.php',
+            'includes/REST/sessionhome4.php',
+            'includes/REST/sessionhome5.php',
+            'includes/REST/sessionhome6.php',
+            'includes/REST/sessionhome7.php',
+            'includes/REST/sessionhome12.php',
+            'includes/REST/sessionhome13.php',
+            'includes/REST/sessionhome8.php',
+            'includes/REST/sessionhome9.php',
+            'includes/REST/sessionhome11.php',
+            'includes/REST/sessionhome10.php',
+            'includes/REST/GET_presenters_table.php',
+            'includes/REST/GET_presenter_table_count.php',
+            'includes/REST/GET_attendee_table_count.php',
+            'includes/REST/GET_attendees_table.php',
+            'includes/REST/GET_session_table_count.php',
+            'includes/REST/POST_presenter.php',
+            'includes/REST/POST_attendee.php',
+            'includes/REST/GET_presenter_sessions.php',
+            'includes/REST/GET_member_admin_service.php',
+            'includes/REST/GET_member_me.php',
+            'includes/REST/PUT_session.php',
+            'includes/REST/PUT_session_presenters.php',
+            'includes/REST/PUT_member_mark_attendee.php',
+            'includes/REST/PUT_member_mark_presenter.php',
+            'includes/REST/PUT_member_link_wp.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+    ],
+    'admin_pages' => [
+        'profdef_home' => ['admin/main-page.php'],
+        'profdef_member_page' => [
+            'admin/member-page.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        'profdef_members_table' => ['admin/members-table.php'],
+        'profdef_presenters_table' => ['admin/presenters-table.php'],
+        'profdef_session_page' => ['admin/session-page.php'],
+        'profdef_sessions_table' => ['admin/sessions-table.php'],
+        'testing_connection_to_db' => ['admin/skeleton2.php', 'includes/ApiRequestSigner.php'],
+    ],
+    'ajax_actions' => [
+        'check_db_connection' => [],
+    ],
+    'rest_namespaces' => [
+        'profdef/v1' => true,
+        'profdef/v2' => true,
+    ],
+    'rest_routes' => [
+        '/profdef/v1/presenters' => ['includes/rest-presenters.php'],
+        '/profdef/v1/sessions' => ['includes/rest-sessions.php'],
+        '/profdef/v1/sessions/(?P<id>\\d+)' => ['includes/rest-sessions.php'],
+        '/profdef/v2/attendee' => [
+            'includes/rest-presenters.php',
+            'includes/REST/POST_attendee.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/attendees/ct' => [
+            'includes/rest-presenters.php',
+            'includes/REST/GET_attendee_table_count.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/attendees_table' => [
+            'includes/rest-presenters.php',
+            'includes/REST/GET_attendees_table.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/member/administrative_service' => [
+            'includes/rest-presenters.php',
+            'includes/REST/GET_member_admin_service.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/member/link_wp' => [
+            'includes/rest-presenters.php',
+            'includes/REST/PUT_member_link_wp.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/member/mark_attendee' => [
+            'includes/rest-presenters.php',
+            'includes/REST/PUT_member_mark_attendee.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/member/mark_presenter' => [
+            'includes/rest-presenters.php',
+            'includes/REST/PUT_member_mark_presenter.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/member/me' => [
+            'includes/REST/memberspage.php',
+            'includes/REST/GET_member_admin_service.php',
+            'includes/REST/GET_member_me.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/membershome' => [
+            'includes/rest-presenters.php',
+            'includes/REST/membershome.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/memberspage' => [
+            'includes/rest-presenters.php',
+            'includes/REST/memberspage.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/presenter' => [
+            'includes/rest-presenters.php',
+            'includes/REST/POST_presenter.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/presenter/sessions' => [
+            'includes/rest-presenters.php',
+            'includes/REST/GET_presenter_sessions.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/presenters/ct' => [
+            'includes/rest-presenters.php',
+            'includes/REST/GET_presenter_table_count.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/presenters_table' => [
+            'includes/rest-presenters.php',
+            'includes/REST/GET_presenters_table.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/session' => [
+            'includes/rest-presenters.php',
+            'includes/REST/PUT_session.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/session/presenters' => [
+            'includes/rest-presenters.php',
+            'includes/REST/PUT_session_presenters.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/sessionhome' => [
+            'includes/rest-presenters.php',
+            'includes/REST/sessionhome.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/sessionhome10' => [
+            'includes/rest-presenters.php',
+            'includes/REST/sessionhome10.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/sessionhome11' => [
+            'includes/rest-presenters.php',
+            'includes/REST/sessionhome11.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/sessionhome12' => [
+            'includes/rest-presenters.php',
+            'includes/REST/sessionhome12.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/sessionhome13' => [
+            'includes/rest-presenters.php',
+            'includes/REST/sessionhome13.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/sessionhome2' => [
+            'includes/rest-presenters.php',
+            'includes/REST/sessionhome2.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/sessionhome3' => [
+            'includes/rest-presenters.php',
+            'includes/REST/sessionhome3.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/sessionhome4' => [
+            'includes/rest-presenters.php',
+            'includes/REST/sessionhome4.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/sessionhome5' => [
+            'includes/rest-presenters.php',
+            'includes/REST/sessionhome5.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/sessionhome6' => [
+            'includes/rest-presenters.php',
+            'includes/REST/sessionhome6.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/sessionhome7' => [
+            'includes/rest-presenters.php',
+            'includes/REST/sessionhome7.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/sessionhome8' => [
+            'includes/rest-presenters.php',
+            'includes/REST/sessionhome8.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/sessionhome9' => [
+            'includes/rest-presenters.php',
+            'includes/REST/sessionhome9.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+        '/profdef/v2/sessions/ct' => [
+            'includes/rest-presenters.php',
+            'includes/REST/GET_session_table_count.php',
+            'admin/skeleton2.php',
+            'includes/ApiRequestSigner.php',
+        ],
+    ],
+];
@@ -0,0 +1,98 @@
+<?php
+// includes/load-plan.php
+if (!defined('ABSPATH')) exit;
+
+/*
+ * Pick the plugin files this request needs from includes/load-manifest.php
+ * (generated by `python3 tools/include_graph.py --write`).
+ *
+ * $pd_plugin_files in Professional_Development.php stays the full list and
+ * the load order; the manifest only says which of those files each request
+ * type needs: the front end, wp-admin (plus the file behind the current
+ * ?page=), admin-ajax.php (plus the current action's handler) and REST (only
+ * the handler of the matched route for the plugin's own namespaces, every
+ * handler for the REST index, batch requests and unmatched plugin routes).
+ *
+ * Lazy loading is opt-in: every file is loaded unless PD_LAZY_LOAD is
+ * defined as true (e.g. `define('PD_LAZY_LOAD', true);` in wp-config.php).
+ * Keep it off until the plans have been exercised on a real install. Even
+ * then every file is loaded when the manifest is missing or lists other
+ * files than $pd_plugin_files, and for cron and WP-CLI.
+ */
+
+function pd_load_plan(array $files) {
+    if (!defined('PD_LAZY_LOAD') || !PD_LAZY_LOAD || wp_doing_cron() || (defined('WP_CLI') && WP_CLI)) {
+        return $files;
+    }
+    if (!is_file(__DIR__ . '/load-manifest.php')) {
+        return $files;
+    }
+    $manifest = include __DIR__ . '/load-manifest.php';
+    if (!is_array($manifest) || !isset($manifest['files']) || $manifest['files'] !== $files) {
+        return $files;
+    }
+
+    $plans = $manifest['plans'];
+    if (wp_doing_ajax()) {
+        $action = isset($_REQUEST['action']) && is_string($_REQUEST['action']) ? $_REQUEST['action'] : '';
+        $wanted = isset($manifest['ajax_actions'][$action])
+            ? array_merge($plans['ajax'], $manifest['ajax_actions'][$action]) : $plans['ajax'];
+    } elseif (is_admin()) {
+        $page = isset($_GET['page']) && is_string($_GET['page']) ? $_GET['page'] : '';
+        $wanted = isset($manifest['admin_pages'][$page])
+            ? array_merge($plans['admin'], $manifest['admin_pages'][$page]) : $plans['admin'];
+    } elseif (($route = pd_load_plan_rest_route()) !== null) {
+        $wanted = pd_load_plan_rest($manifest, $route);
+    } else {
+        $wanted = $plans['front'];
+    }
+
+    $wanted = array_flip($wanted);
+    $plan = [];
+    foreach ($files as $file) {
+        if (isset($wanted[$file])) {
+            $plan[] = $file;
+        }
+    }
+    return $plan;
+}
+
+// REST route of the current request ('/profdef/v2/sessionhome3'), or null if it is not a REST request.
+function pd_load_plan_rest_route() {
+    if (isset($_GET['rest_route']) && is_string($_GET['rest_route'])) {
+        return '/' . trim($_GET['rest_route'], '/');
+    }
+    if (!isset($_SERVER['REQUEST_URI'])) {
+        return null;
+    }
+    $path = rawurldecode((string) parse_url($_SERVER['REQUEST_URI'], PHP_URL_PATH));
+    $prefix = rtrim((string) parse_url(home_url(), PHP_URL_PATH), '/') . '/' . trim(rest_get_url_prefix(), '/');
+    if ($path !== $prefix && strpos($path, $prefix . '/') !== 0) {
+        return null;
+    }
+    return '/' . trim(substr($path, strlen($prefix)), '/');
+}
+
+function pd_load_plan_rest(array $manifest, $route) {
+    $plans = $manifest['plans'];
+    if ($route === '/' || strpos($route, '/batch/') === 0) {
+        return $plans['rest:all'];  // the index lists every route; a batch may call any of them
+    }
+    foreach ($manifest['rest_namespaces'] as $namespace => $narrowed) {
+        if ($route !== '/' . $namespace && strpos($route, '/' . $namespace . '/') !== 0) {
+            continue;
+        }
+        if (!$narrowed) {
+            return $plans['rest:all'];
+        }
+        $wanted = null;
+        foreach ($manifest['rest_routes'] as $pattern => $route_files) {
+            // the same match WP_REST_Server::match_request_to_handler() makes
+            if (preg_match('@^' . $pattern . '$@i', $route)) {
+                $wanted = array_merge($wanted === null ? $plans['rest'] : $wanted, $route_files);
+            }
+        }
+        return $wanted === null ? $plans['rest:all'] : $wanted;
+    }
+    return $plans['rest'];
+}
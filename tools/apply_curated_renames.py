@@ -34,26 +34,69 @@ cover additional cases as needed.
 Usage:
   - Dry run (default):
       python3 tools/apply_curated_renames.py
-  - Apply changes in place:
+  - Apply changes in place (each edited file is written to a temp file next to
+    it and renamed over the original; files without edits are never rewritten):
       python3 tools/apply_curated_renames.py --apply
+  - Write the edits as a unified diff instead, leaving the tree untouched:
+      python3 tools/apply_curated_renames.py --patch --output renames.patch
+      git apply renames.patch
   - Limit to extensions:
       python3 tools/apply_curated_renames.py -e .php,.js,.css,.md,.txt
+  - Use 4 worker processes (output identical to a serial run):
+      python3 tools/apply_curated_renames.py --jobs 4
+  - Ignore the per-file result cache (.tools-cache/):
+      python3 tools/apply_curated_renames.py --no-cache
+  - Dry run over files staged for commit / changed since a ref (git contents):
+      python3 tools/apply_curated_renames.py --staged
+      python3 tools/apply_curated_renames.py --since origin/main
+  - Stream the edits as JSON Lines or SARIF (e.g. for CI annotations):
+      python3 tools/apply_curated_renames.py --format jsonl --output renames.jsonl
+      python3 tools/apply_curated_renames.py --format sarif --output renames.sarif
+  - Per-phase timings, slowest files and per-rule hits as JSON (tools/tool_profile.py):
+      python3 tools/apply_curated_renames.py --profile /tmp/renames-profile.json
 
 Exit code: 0 on success, 1 if any error occurs during processing.
 """
 
 from __future__ import annotations
 import argparse
+import io
 import os
 from pathlib import Path
 import re
+import shutil
 import sys
-from typing import List, Tuple
+import tempfile
+import time
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+import tool_profile
+from git_source import GitError, add_git_arguments, changed_files
+from repo_index import filter_files, get_index
+from result_cache import add_cache_arguments, cached_imap_chunks, fingerprint, open_cache
+from stream_output import add_format_argument, open_stream, open_writer, sarif_location, sarif_rule
+from tool_pool import FileRef, add_jobs_argument
+from tool_profile import add_profile_arguments, phase, profile_session
 
 
 ROOT = Path(__file__).resolve().parents[1]
 DEFAULT_EXTS = {'.php', '.js', '.css', '.md', '.txt', '.html'}
-IGNORE_DIRS = {'.git', 'node_modules', '.venv', '__pycache__'}
+IGNORE_DIRS = {'.git', 'node_modules', '.venv', '__pycache__', '.tools-cache'}
+
+# Bump when the rewrite engine's behaviour changes (invalidates cached per-file edits)
+RENAMES_CACHE_VERSION = 2
+
+SARIF_RULE_ID = 'curated-rename'
+
+# Context lines around each --patch hunk
+PATCH_CONTEXT = 3
+
+# Files are streamed in blocks of about this many characters (see iter_edits)
+BLOCK_CHARS = 1 << 20
+
+# (line_no, line before, line after), line endings stripped
+Change = Tuple[int, str, str]
 
 
 class Rule:
@@ -106,127 +149,435 @@ CURATED_RULES: List[Rule] = [
 ]
 
 
+QUOTED_RE = re.compile(r"""(["'`])((?:\\.|(?!\1)[^\\])*)(\1)?""", re.DOTALL)
+
+
 def find_quoted_spans(line: str) -> List[Tuple[int, int]]:
     """Return a list of (start, end) indices for single/double/backtick-quoted ranges.
-    Simple state machine, handles escaped quotes. End index is exclusive.
+    Handles escaped quotes; an unclosed quote runs to the end of the line. End index is exclusive.
     """
     spans = []
-    i = 0
     n = len(line)
-    while i < n:
-        ch = line[i]
-        if ch in ('"', "'", '`'):
-            q = ch
-            start = i + 1
-            i += 1
-            while i < n:
-                if line[i] == '\\':
-                    i += 2
-                    continue
-                if line[i] == q:
-                    spans.append((start, i))
-                    i += 1
-                    break
-                i += 1
-            else:
-                # No closing quote; treat rest of line as quoted
-                spans.append((start, n))
-                break
-        else:
-            i += 1
+    for m in QUOTED_RE.finditer(line):
+        if m.group(3) is None:
+            # No closing quote; treat rest of line as quoted
+            spans.append((m.start(2), n))
+            break
+        spans.append(m.span(2))
     return spans
 
 
-def apply_rules_to_line(line: str, rules: List[Rule]) -> Tuple[str, bool]:
+class CompiledRules:
+    """All rules folded into one alternation plus a dispatch table.
+
+    The combined regex finds the leftmost position where any rule matches;
+    `m.lastgroup` names the first rule (in list order) matching there. If that
+    rule is 'quoted' and the match is not inside a quoted span, the remaining
+    rules that can start with the same character are tried at that position.
+    Rule patterns must not define named groups of their own.
+    """
+
+    def __init__(self, rules: List[Rule]):
+        self.rules = list(rules)
+        self.has_quoted = any(r.mode == 'quoted' for r in self.rules)
+        # first literal character -> indices of rules that may start with it
+        self._any_start: List[int] = []
+        self._by_first: Dict[str, List[int]] = {}
+        for i, r in enumerate(self.rules):
+            first = r.pattern[:1]
+            if first and (first.isalnum() or first in '_- '):
+                self._by_first.setdefault(first, []).append(i)
+            else:
+                self._any_start.append(i)
+        source = '|'.join(f'(?P<r{i}>{r.pattern})' for i, r in enumerate(self.rules)) or r'(?!)'
+        if self._by_first and not self._any_start:
+            # Cheap first-character gate so most positions fail before the alternation
+            source = '(?=[' + re.escape(''.join(sorted(self._by_first))) + '])(?:' + source + ')'
+        self.regex = re.compile(source)
+
+    def candidates_after(self, idx: int, ch: str) -> List[int]:
+        """Rule indices > idx that could match at a position starting with `ch`."""
+        cands = [i for i in self._by_first.get(ch, ()) if i > idx]
+        if self._any_start:
+            cands = sorted(cands + [i for i in self._any_start if i > idx])
+        return cands
+
+
+def _in_spans(spans: List[Tuple[int, int]], span_starts: List[int], s: int, e: int) -> bool:
+    k = bisect_right(span_starts, s) - 1
+    return k >= 0 and e <= spans[k][1]
+
+
+def apply_rules_to_line(line: str, rules: CompiledRules,
+                        hits: Optional[Dict[int, int]] = None) -> Tuple[str, bool]:
+    """Rewrite `line` in one left-to-right pass; all offsets refer to the original line.
+
+    `hits`, when given, counts applied replacements per rule index (profiling).
+    """
+    m = rules.regex.search(line)
+    if not m:
+        return line, False
+
+    spans = find_quoted_spans(line) if rules.has_quoted else []
+    span_starts = [a for a, _ in spans]
+    out: List[str] = []
+    last = 0
     changed = False
-    new_line = line
-    # Pre-compute quoted spans once per original line
-    spans = find_quoted_spans(line)
-    if spans:
-        # Build a mask for quoted positions
-        mask = [False] * len(line)
-        for a, b in spans:
-            for i in range(a, min(b, len(mask))):
-                mask[i] = True
-    else:
-        mask = None
-
-    for rule in rules:
-        if rule.mode == 'quoted' and not spans:
+    while m:
+        s = m.start()
+        idx = int(m.lastgroup[1:])
+        rule, e = rules.rules[idx], m.end()
+        if rule.mode == 'quoted' and not _in_spans(spans, span_starts, s, e):
+            rule = None
+            for j in rules.candidates_after(idx, line[s]):
+                alt = rules.rules[j]
+                m2 = alt.regex.match(line, s)
+                if m2 and m2.end() > s and (alt.mode == 'all' or _in_spans(spans, span_starts, s, m2.end())):
+                    rule, e, idx = alt, m2.end(), j
+                    break
+        if rule is None:
+            m = rules.regex.search(line, s + 1)
             continue
+        out.append(line[last:s])
+        out.append(rule.repl)
+        last = e
+        changed = True
+        if hits is not None:
+            hits[idx] = hits.get(idx, 0) + 1
+        m = rules.regex.search(line, e if e > s else s + 1)
+
+    if not changed:
+        return line, False
+    out.append(line[last:])
+    return ''.join(out), True
+
+
+def _open_source(path: Path, text: Optional[str]) -> TextIO:
+    """Line stream over the file (or the supplied contents), line endings kept as-is."""
+    if text is not None:
+        return io.StringIO(text, newline='')
+    return path.open('r', encoding='utf-8', errors='ignore', newline='')
 
-        # Walk matches left-to-right avoiding overlap issues
-        pos = 0
-        while True:
-            m = rule.regex.search(new_line, pos)
-            if not m:
-                break
-            s, e = m.span()
-            if rule.mode == 'quoted':
-                # Ensure match is entirely within a quoted region of the ORIGINAL line
-                # Map span to original indices by assuming unchanged up to s (safe enough for our limited rules)
-                # For robustness, fall back to checking any quoted region contains the substring in current new_line.
-                in_quote = False
-                if mask and s < len(mask):
-                    in_quote = all(mask[i] if i < len(mask) else False for i in range(s, min(e, len(mask))))
-                if not in_quote:
-                    pos = e
-                    continue
-            # Replace
-            new_line = new_line[:s] + rule.repl + new_line[e:]
-            pos = s + len(rule.repl)
-            changed = True
-    return new_line, changed
-
-
-def process_file(path: Path, rules: List[Rule], apply: bool) -> int:
+
+def _blocks(stream: TextIO, prof: Optional['tool_profile.Profiler'] = None) -> Iterator[List[str]]:
+    """Lists of lines of about BLOCK_CHARS characters each."""
+    while True:
+        t0 = time.perf_counter() if prof is not None else 0.0
+        lines = stream.readlines(BLOCK_CHARS)
+        if prof is not None and lines:
+            prof.read(sum(len(line) for line in lines), time.perf_counter() - t0)
+        if not lines:
+            return
+        yield lines
+
+
+def iter_edits(stream: TextIO, rules: CompiledRules, hits: Optional[Dict[int, int]] = None,
+               prof: Optional['tool_profile.Profiler'] = None) -> Iterator[Tuple[int, str, str]]:
+    """(line_no, old line, new line) for every line the rules change, line endings included.
+
+    The stream is read block by block; a block with no match at all is
+    skipped with a single search, so memory stays bounded by BLOCK_CHARS.
+    """
+    line_no = 0
+    for block in _blocks(stream, prof):
+        if not rules.regex.search(''.join(block)):
+            line_no += len(block)
+            continue
+        for line in block:
+            line_no += 1
+            new_line, changed = apply_rules_to_line(line, rules, hits)
+            if changed:
+                yield line_no, line, new_line
+
+
+def _stat_key(st: os.stat_result) -> Tuple[int, int]:
+    return st.st_size, st.st_mtime_ns
+
+
+def rewrite_atomically(path: Path, edits: Dict[int, str], expect: Optional[Tuple[int, int]] = None) -> None:
+    """Stream `path` into a temp file in the same directory with `edits` (line_no ->
+    new line) applied, then swap it in with os.replace(). An interrupted run leaves
+    either the old or the new file, never a half-written one.
+
+    `expect` is the (size, mtime_ns) seen when the edits were computed; the
+    rewrite is refused if the file changed since.
+    """
+    fd, tmp = tempfile.mkstemp(prefix=f'.{path.name}.', suffix='.tmp', dir=str(path.parent))
     try:
-        text = path.read_text(encoding='utf-8', errors='ignore')
-    except Exception as e:
-        print(f"[ERR] Cannot read {path}: {e}", file=sys.stderr)
-        return 0
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as dst, \
+                path.open('r', encoding='utf-8', errors='ignore', newline='') as src:
+            if expect is not None and _stat_key(os.fstat(src.fileno())) != expect:
+                raise OSError(f'{path} changed while renames were being computed')
+            for line_no, line in enumerate(src, start=1):
+                dst.write(edits.get(line_no, line))
+            dst.flush()
+            os.fsync(dst.fileno())
+        shutil.copymode(str(path), tmp)
+        os.replace(tmp, str(path))
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
 
-    lines = text.splitlines(True)
-    out_lines: List[str] = []
+def process_file(path: Path, rules: CompiledRules, apply: bool,
+                 out: Optional[TextIO] = None, err: Optional[TextIO] = None,
+                 text: Optional[str] = None, changes: Optional[List[Change]] = None) -> int:
+    """Report (and with `apply`, write) the edits for one file.
+
+    Edited lines are printed to `out`, or appended to `changes` as
+    (line_no, before, after) without line endings when a list is given.
+    `text` supplies contents not read from the working tree (e.g. a git blob);
+    such files are only reported, never written.
+
+    The file is streamed, never loaded whole. With `apply`, only files that
+    have at least one edit are read a second time and rewritten atomically
+    (see rewrite_atomically); files without edits are never opened for writing.
+    """
+    out = out or sys.stdout
+    err = err or sys.stderr
+    if text is not None:
+        apply = False
+    prof = tool_profile.ACTIVE
+    t0 = time.perf_counter() if prof is not None else 0.0
+    hits: Optional[Dict[int, int]] = {} if prof is not None else None
+
+    edits: Dict[int, str] = {}
     total_changes = 0
-    for idx, line in enumerate(lines, start=1):
-        new_line, changed = apply_rules_to_line(line, rules)
-        if changed:
-            print(f"{path}:{idx}: {line.rstrip()}\n    -> {new_line.rstrip()}")
-            total_changes += 1
-        out_lines.append(new_line)
-
-    if apply and total_changes:
+    try:
+        with _open_source(path, text) as src:
+            before = _stat_key(os.fstat(src.fileno())) if apply else None
+            for line_no, line, new_line in iter_edits(src, rules, hits, prof if text is None else None):
+                if changes is None:
+                    print(render_change(path, line_no, line, new_line), end='', file=out)
+                else:
+                    changes.append((line_no, line.rstrip('\r\n'), new_line.rstrip('\r\n')))
+                if apply:
+                    edits[line_no] = new_line
+                total_changes += 1
+    except OSError as e:
+        print(f"[ERR] Cannot read {path}: {e}", file=err)
+        return 0
+
+    if prof is not None:
+        _profile_file(prof, path, rules, hits, time.perf_counter() - t0)
+
+    if apply and edits:
         try:
-            path.write_text(''.join(out_lines), encoding='utf-8')
-        except Exception as e:
-            print(f"[ERR] Cannot write {path}: {e}", file=sys.stderr)
+            rewrite_atomically(path, edits, before)
+        except OSError as e:
+            print(f"[ERR] Cannot write {path}: {e}", file=err)
             return 0
     return total_changes
 
 
+def _profile_file(prof: 'tool_profile.Profiler', path: Path, rules: CompiledRules,
+                  hits: Dict[int, int], elapsed: float) -> None:
+    """process_file under --profile: per-file time, combined-regex time and per-rule hits."""
+    try:
+        size = path.stat().st_size
+    except OSError:
+        size = 0
+    prof.file(str(path), elapsed, size)
+    # The rules run as one alternation; its time is reported once, hits per rule
+    prof.pattern(f'rules: combined ({len(rules.rules)} rules)', elapsed, sum(hits.values()))
+    for k, count in hits.items():
+        r = rules.rules[k]
+        prof.pattern(f'rule: {r.pattern} -> {r.repl} ({r.mode})', 0.0, count, calls=0)
+
+
+_COMPILED: Optional[CompiledRules] = None
+
+
+def compiled_rules() -> CompiledRules:
+    """CURATED_RULES compiled once per process."""
+    global _COMPILED
+    if _COMPILED is None:
+        _COMPILED = CompiledRules(CURATED_RULES)
+    return _COMPILED
+
+
+def process_files(refs: List[FileRef], apply: bool) -> List[Tuple[int, List[Change], str]]:
+    """Chunk function for tool_pool.map_chunks: (n, [(line_no, before, after)], stderr) per file, in order."""
+    rules = compiled_rules()
+    results = []
+    for ref in refs:
+        if isinstance(ref, str):
+            path, text = Path(ref), None
+        else:
+            path, text = ref.path, (None if ref.from_disk else ref.text)
+        err = io.StringIO()
+        changes: List[Change] = []
+        n = process_file(path, rules, apply, None, err, text, changes)
+        results.append((n, changes, err.getvalue()))
+    return results
+
+
+def render_change(path, line_no: int, before: str, after: str) -> str:
+    return f"{path}:{line_no}: {before.rstrip()}\n    -> {after.rstrip()}\n"
+
+
+def unified_diff(rel: str, src: TextIO, changes: List[Change], context: int = PATCH_CONTEXT) -> Iterator[str]:
+    """Unified diff lines (a/ and b/ prefixed, as `git apply` / `patch -p1` expect) for
+    one file's changes. Only the lines inside hunks are kept while `src` is streamed."""
+    if not changes:
+        return
+    groups: List[List[Change]] = [[changes[0]]]
+    for change in changes[1:]:
+        if change[0] - groups[-1][-1][0] > 2 * context:
+            groups.append([change])
+        else:
+            groups[-1].append(change)
+    spans = [(max(1, g[0][0] - context), g[-1][0] + context) for g in groups]
+    hunk_lines: List[List[str]] = [[] for _ in groups]
+    k = 0
+    for line_no, line in enumerate(src, start=1):
+        while k < len(spans) and line_no > spans[k][1]:
+            k += 1
+        if k == len(spans):
+            break
+        if line_no >= spans[k][0]:
+            hunk_lines[k].append(line)
+
+    def emit(prefix: str, line: str) -> str:
+        if line.endswith('\n') or line.endswith('\r'):
+            return prefix + line
+        return prefix + line + '\n\\ No newline at end of file\n'
+
+    yield f'--- a/{rel}\n'
+    yield f'+++ b/{rel}\n'
+    for (start, _), group, lines in zip(spans, groups, hunk_lines):
+        after = {line_no: new for line_no, _, new in group}
+        yield f'@@ -{start},{len(lines)} +{start},{len(lines)} @@\n'
+        for i, line in enumerate(lines):
+            new = after.get(start + i)
+            if new is None:
+                yield emit(' ', line)
+            else:
+                ending = line[len(line.rstrip('\r\n')):]
+                yield emit('-', line)
+                yield emit('+', new + ending)
+
+
+def write_patch(path: str, files: List[FileRef], results: Iterator[Tuple[int, List[Change], str]]) -> int:
+    """Stream a unified diff of every file's edits to `path` ('-' = stdout); returns the
+    number of changed lines. The tree is not modified."""
+    total = 0
+    out = open_stream(path)
+    try:
+        for f, (n, changes, err) in zip(files, results):
+            sys.stderr.write(err)
+            total += n
+            if not changes:
+                continue
+            with _open_source(f.path, None if f.from_disk else f.text) as src:
+                out.writelines(unified_diff(f.rel, src, changes))
+    finally:
+        out.flush()
+        if out is not sys.stdout:
+            out.close()
+    return total
+
+
+def _render_record(record: dict) -> str:
+    return render_change(record['path'], record['line'], record['before'], record['after'])
+
+
+def sarif_change(rel: str, line_no: int, before: str, after: str) -> dict:
+    """SARIF result for one edited line, with the whole-line replacement as a fix."""
+    return {
+        'ruleId': SARIF_RULE_ID,
+        'level': 'note',
+        'message': {'text': f'Curated rename: {after.strip()}'},
+        'locations': [sarif_location(rel, line_no, before)],
+        'fixes': [{
+            'description': {'text': 'Apply curated renames'},
+            'artifactChanges': [{
+                'artifactLocation': {'uri': rel, 'uriBaseId': 'SRCROOT'},
+                'replacements': [{
+                    'deletedRegion': {'startLine': line_no, 'startColumn': 1,
+                                      'endLine': line_no, 'endColumn': len(before) + 1},
+                    'insertedContent': {'text': after},
+                }],
+            }],
+        }],
+    }
+
+
 def main(argv: List[str]) -> int:
     ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
     ap.add_argument('--apply', action='store_true', help='Write changes to files (default is dry-run)')
+    ap.add_argument('--patch', action='store_true',
+                    help='Write the edits as a unified diff (apply with `git apply` or `patch -p1` from --root)')
     ap.add_argument('-e', '--ext', help=f'Comma-separated list of file extensions to include (default: {",".join(sorted(DEFAULT_EXTS))})')
     ap.add_argument('-r', '--root', default=str(ROOT), help='Root directory to scan (default: repo root)')
+    add_jobs_argument(ap)
+    add_cache_arguments(ap)
+    add_git_arguments(ap)
+    add_profile_arguments(ap)
+    add_format_argument(ap)
+    ap.add_argument('--output', default='-', help="Where to write the report (default: '-' = stdout)")
     args = ap.parse_args(argv)
+    if args.apply and (args.staged or args.since):
+        ap.error('--apply cannot be combined with --staged/--since (they read git contents, not the working tree)')
+    if args.patch and (args.apply or args.format != 'text'):
+        ap.error('--patch cannot be combined with --apply or --format')
+    with profile_session(args, 'apply_curated_renames'):
+        return run(args)
 
+
+def run(args: argparse.Namespace) -> int:
     exts = DEFAULT_EXTS
     if args.ext:
         exts = {e.strip().lower() for e in args.ext.split(',') if e.strip()}
 
     root = Path(args.root).resolve()
+    with phase('walk'):
+        if args.staged or args.since:
+            try:
+                files = filter_files(changed_files(root, args.since, args.staged), exts, IGNORE_DIRS)
+            except GitError as e:
+                print(f"[ERR] {e}", file=sys.stderr)
+                return 1
+        else:
+            files = get_index(root, IGNORE_DIRS).files(exts)
+    cache = open_cache(args.no_cache, args.cache)
+    version = fingerprint(RENAMES_CACHE_VERSION, [(r.pattern, r.repl, r.mode) for r in CURATED_RULES])
+
+    def reusable(result) -> bool:
+        # Errors are never cached; with --apply only files needing no edits may be skipped
+        n, _, err = result
+        return not err and (not args.apply or n == 0)
+
     total = 0
-    for dirpath, dirnames, filenames in os.walk(root):
-        dirnames[:] = [d for d in dirnames if d not in IGNORE_DIRS]
-        for fname in filenames:
-            p = Path(dirpath) / fname
-            if p.suffix.lower() not in exts:
-                continue
-            total += process_file(p, CURATED_RULES, args.apply)
+    results = cached_imap_chunks(cache, 'apply_curated_renames', version, process_files, files,
+                                 args.apply, jobs=args.jobs, reusable=reusable)
+    rules = [sarif_rule(SARIF_RULE_ID, 'Terminology covered by the curated rename rules')]
+    # Edits are reported as each window of files is processed, never collected
+    with phase('match'):
+        try:
+            if args.patch:
+                total = write_patch(args.output, files, results)
+            else:
+                with open_writer(args.format, args.output, 'apply_curated_renames', rules, root,
+                                 _render_record) as writer:
+                    for f, (n, changes, err) in zip(files, results):
+                        for line_no, before, after in changes:
+                            record = {'path': str(f.path), 'line': line_no, 'before': before, 'after': after}
+                            writer.write(record, sarif_change(f.rel, line_no, before, after) if writer.sarif else None)
+                        sys.stderr.write(err)
+                        total += n
+        except OSError as e:
+            print(f"[ERR] Cannot write {args.output}: {e}", file=sys.stderr)
+            return 1
 
-    print(f"\nSummary: {'APPLIED' if args.apply else 'DRY-RUN'} - {total} line(s) changed across project")
+    with phase('report'):
+        # Keep stdout for the report when it is a jsonl/sarif stream or a patch
+        summary = sys.stderr if args.output == '-' and (args.format != 'text' or args.patch) else sys.stdout
+        print(f"\nSummary: {'APPLIED' if args.apply else 'DRY-RUN'} - {total} line(s) changed across project",
+              file=summary)
     return 0
 
 
@@ -0,0 +1,653 @@
+#!/usr/bin/env python3
+"""
+Asset weight report and per-page bundles for the plugin's enqueued JS/CSS.
+
+Every admin_enqueue_scripts / wp_enqueue_scripts callback registered with
+add_action() (named function or closure) is scanned for wp_enqueue_*,
+wp_register_*, wp_localize_script and wp_add_inline_* calls. Each call is
+attributed to the pages its enclosing `if` conditions select:
+
+  $_GET['page'] === 'slug'            admin:slug
+  $hook === 'toplevel_page_slug'      admin:slug   (also '<parent>_page_slug')
+  has_shortcode(..., 'Name')          front:Name
+  no recognised condition             admin:* / front:* (every page)
+
+Sources written as plugin_dir_url(__FILE__) . 'js/x.js' or
+plugins_url('js/x.js', __FILE__) are resolved to files; dependencies on
+handles the plugin registers are followed the way WordPress does, and other
+dependencies (jquery, wp-api-fetch...) are listed as external.
+
+For every page the report gives the request count and the raw, gzip and
+minified+gzip bytes of its JS and CSS, with a rough first-load estimate for a
+slow connection (--rtt-ms round trip, --kbps bandwidth, 6 parallel HTTP/1.1
+connections): today and with one bundle per page and asset type.
+
+--build writes those bundles: the page's files in WordPress print order,
+minified (comments and indentation only, see js_scanner.minify_js; CSS
+comments and whitespace), named <page>.<content hash>.<js|css>, plus
+asset-manifest.json. includes/asset-bundles.php loads the manifest at run
+time and swaps the individual handles for the bundle when all of them are
+enqueued and unchanged since the build. Groups the bundler cannot merge
+safely (a file-level 'use strict' directive, CSS @import/@charset, mixed
+head/footer or media) are left unbundled with a warning. When node is on PATH
+each JS bundle is syntax-checked with `node --check` before it is written.
+Bundling changes failure isolation: an uncaught top-level exception in one
+source stops the later sources of its bundle, which separate <script> tags
+would still have run.
+
+Usage:
+  python3 tools/asset_weights.py [--root DIR] [--verbose] [--output report.json]
+                                 [--rtt-ms 150] [--kbps 1600]
+  python3 tools/asset_weights.py --build [--dist dist]
+
+Exit code: 0 on success; 1 if a bundle fails its syntax check or cannot be
+written.
+"""
+
+from __future__ import annotations
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from js_scanner import minify_js
+from lint_rest_perf import STRING_RE, blank_comments, match_bracket, php_structure, split_args
+from php_lexer import FunctionSpan
+from repo_index import IndexedFile, get_index
+from tool_profile import add_profile_arguments, phase, profile_session
+
+
+PLUGIN_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_DIST = 'dist'
+MANIFEST_NAME = 'asset-manifest.json'
+MANIFEST_VERSION = 2
+HOOKS = {'admin_enqueue_scripts': 'admin', 'wp_enqueue_scripts': 'front', 'login_enqueue_scripts': 'login'}
+# includes/asset-bundles.php hooks this into admin/wp_enqueue_scripts; it is not an asset source
+BUNDLE_LOADER = 'pd_apply_asset_bundles'
+# Browsers open this many HTTP/1.1 connections per host
+PARALLEL_REQUESTS = 6
+
+ADD_ACTION_RE = re.compile(r"""\badd_action\s*\(\s*(['"])(%s)\1\s*,\s*""" % '|'.join(HOOKS))
+ASSET_CALL_RE = re.compile(r'\b(wp_(?:enqueue|register)_(?:script|style)|wp_localize_script|wp_add_inline_(?:script|style))'
+                           r'\s*\(')
+MENU_RE = re.compile(r'\badd_(sub)?menu_page\s*\(')
+IF_RE = re.compile(r'\b(?:if|elseif)\s*\(')
+PAGE_EQ_RE = re.compile(r"""\$_GET\s*\[\s*['"]page['"]\s*\]\s*===?\s*(['"])([^'"]+)\1"""
+                        r"""|(['"])([^'"]+)\3\s*===?\s*\$_GET\s*\[\s*['"]page['"]\s*\]""")
+HOOK_EQ_RE = re.compile(r"""\$hook(?:_suffix)?\s*===?\s*(['"])([^'"]+)\1|(['"])([^'"]+)\3\s*===?\s*\$hook(?:_suffix)?\b""")
+SHORTCODE_RE = re.compile(r"""\bhas_shortcode\s*\([^;]*?,\s*(['"])([^'"]+)\1""")
+DIR_URL_RE = re.compile(r"""^plugin_dir_url\s*\(\s*(__FILE__|__DIR__|dirname\s*\(\s*__FILE__\s*\))\s*\)\s*\.\s*""")
+PLUGINS_URL_RE = re.compile(r"""^plugins_url\s*\(\s*(['"])([^'"]*)\1\s*,\s*(__FILE__|__DIR__|dirname\s*\(\s*__FILE__\s*\))\s*\)$""")
+USE_STRICT_RE = re.compile(r"""\A(?:/\*!.*?\*/\s*)*(['"])use strict\1""", re.DOTALL)
+CSS_TOKEN_RE = re.compile(r"""/\*.*?\*/|'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|url\(\s*([^)'"]*?)\s*\)""", re.DOTALL)
+CSS_SPACE_RE = re.compile(r'\s+')
+CSS_PUNCT_RE = re.compile(r'\s*([{};,])\s*')
+
+
+class Asset(NamedTuple):
+    kind: str                  # 'js' or 'css'
+    handle: str
+    src: Optional[str]         # file relative to the plugin root; None if external/unresolved
+    url: Optional[str]         # the source expression when src is None
+    deps: Tuple[str, ...]
+    footer: bool               # js: in_footer
+    media: str                 # css: media
+    enqueued: bool             # False for wp_register_*
+    contexts: Tuple[str, ...]  # 'admin:slug', 'admin:*', 'front:Name', 'front:*'
+    file: str                  # PHP file (relative)
+    line: int
+
+
+class Extras(NamedTuple):
+    localize: Dict[Tuple[str, str], List[str]]  # (kind, handle) -> JS object names
+    inline: Set[Tuple[str, str]]                # handles with wp_add_inline_*
+
+
+class Weight(NamedTuple):
+    raw: int
+    gzip: int
+    minified: int
+    minified_gzip: int
+
+
+class Group(NamedTuple):
+    """Assets of one page that can share a bundle."""
+    context: str
+    kind: str
+    footer: bool
+    media: str
+    assets: Tuple[Asset, ...]          # print order, dependencies first
+    entries: Tuple[str, ...]           # handles enqueued directly on the page
+    external: Tuple[str, ...]          # dependencies the plugin does not register
+
+
+# ---------------------------------------------------------------------------
+# PHP: enqueue calls and their conditions
+# ---------------------------------------------------------------------------
+
+def _literal(code: str, span: Tuple[int, int]) -> Optional[str]:
+    m = STRING_RE.fullmatch(code[span[0]:span[1]].strip())
+    if not m:
+        return None
+    return m.group(1) if m.group(1) is not None else m.group(2)
+
+
+def _hook_functions(php_files: List[IndexedFile]) -> Dict[str, str]:
+    """Function name -> area ('admin'/'front'/'login') for named enqueue callbacks."""
+    named: Dict[str, str] = {}
+    for f in php_files:
+        text = f.text
+        if 'add_action' not in text:
+            continue
+        for m in ADD_ACTION_RE.finditer(text):
+            lit = STRING_RE.match(text, m.end())
+            if lit:
+                name = lit.group(1) if lit.group(1) is not None else lit.group(2)
+                if name.lower() != BUNDLE_LOADER:
+                    named[name.lower()] = HOOKS[m.group(2)]
+    return named
+
+
+def _closure_callbacks(f: IndexedFile) -> List[Tuple[FunctionSpan, str]]:
+    php = php_structure(f)
+    out = []
+    for m in ADD_ACTION_RE.finditer(f.text):
+        fn = next((fn for fn in php.functions if not fn.name and fn.start >= m.end()
+                   and f.text[m.end():fn.start].strip() == ''), None)
+        if fn is not None:
+            out.append((fn, HOOKS[m.group(2)]))
+    return out
+
+
+def _page_of_hook(hook: str) -> Optional[str]:
+    i = hook.find('_page_')
+    return hook[i + len('_page_'):] if i >= 0 else None
+
+
+def _conditions(code: str) -> List[Tuple[int, int, str]]:
+    """(block start, block end, condition text) of every if/elseif in the code."""
+    out = []
+    for m in IF_RE.finditer(code):
+        cond_end = match_bracket(code, m.end() - 1)
+        i = cond_end
+        while i < len(code) and code[i].isspace():
+            i += 1
+        if i < len(code) and code[i] == '{':
+            end = match_bracket(code, i)
+        else:
+            end = code.find(';', i)
+            end = len(code) if end < 0 else end + 1
+        out.append((cond_end, end, code[m.end():cond_end - 1]))
+    return out
+
+
+def _contexts(area: str, conds: List[Tuple[int, int, str]], offset: int) -> Tuple[str, ...]:
+    """Pages selected by the innermost enclosing condition that names any."""
+    enclosing = sorted((c for c in conds if c[0] <= offset < c[1]), key=lambda c: c[0], reverse=True)
+    for _, _, cond in enclosing:
+        found = [m.group(2) or m.group(4) for m in PAGE_EQ_RE.finditer(cond)]
+        found += [p for p in (_page_of_hook(m.group(2) or m.group(4)) for m in HOOK_EQ_RE.finditer(cond)) if p]
+        found += [m.group(2) for m in SHORTCODE_RE.finditer(cond)]
+        if found:
+            return tuple(f'{area}:{name}' for name in dict.fromkeys(found))
+    return (f'{area}:*',)
+
+
+def _resolve_src(f: IndexedFile, root: Path, expr: str) -> Tuple[Optional[str], Optional[str]]:
+    """(file relative to root, None) for plugin files, else (None, expression)."""
+    expr = expr.strip()
+    base = f.path.parent
+    m = DIR_URL_RE.match(expr)
+    rel: Optional[str] = None
+    if m:
+        rel = _literal(expr, (m.end(), len(expr)))
+        if m.group(1).startswith('dirname'):
+            base = base.parent
+    else:
+        m = PLUGINS_URL_RE.match(expr)
+        if m:
+            rel = m.group(2)
+            if m.group(3).startswith('dirname'):
+                base = base.parent
+    if rel is None:
+        return None, expr
+    path = (base / rel.lstrip('/')).resolve()
+    try:
+        return path.relative_to(root).as_posix(), None
+    except ValueError:
+        return None, expr
+
+
+def _string_list(code: str, span: Optional[Tuple[int, int]]) -> Tuple[str, ...]:
+    if span is None:
+        return ()
+    text = code[span[0]:span[1]].strip()
+    m = re.match(r'(?:array\s*\(|\[)', text)
+    if not m:
+        return ()
+    inner_start = span[0] + (len(code[span[0]:span[1]]) - len(code[span[0]:span[1]].lstrip())) + m.end()
+    inner_end = span[0] + len(code[span[0]:span[1]].rstrip()) - 1
+    return tuple(v for v in (_literal(code, s) for s in split_args(code, inner_start, inner_end)) if v)
+
+
+def _truthy(code: str, span: Optional[Tuple[int, int]], default: bool) -> bool:
+    if span is None:
+        return default
+    value = code[span[0]:span[1]].strip().lower()
+    return value not in ('false', '0', "''", '""', 'null')
+
+
+def scan_enqueues(php_files: List[IndexedFile], root: Path) -> Tuple[List[Asset], Extras, List[str]]:
+    """Asset calls inside every enqueue callback, in source order."""
+    named = _hook_functions(php_files)
+    assets: List[Asset] = []
+    extras = Extras({}, set())
+    warnings: List[str] = []
+    for f in php_files:
+        if not ASSET_CALL_RE.search(f.text):
+            continue
+        php = php_structure(f)
+        callbacks = [(fn, named[fn.name.lower()]) for fn in php.functions if fn.name and fn.name.lower() in named]
+        callbacks += _closure_callbacks(f)
+        for fn, area in sorted(callbacks, key=lambda c: c[0].start):
+            code = php.code(fn)
+            conds = _conditions(code)
+            for m in ASSET_CALL_RE.finditer(code):
+                call, open_paren = m.group(1), m.end() - 1
+                args = split_args(code, open_paren + 1, match_bracket(code, open_paren) - 1)
+                arg = lambda i: args[i] if i < len(args) else None  # noqa: E731
+                handle = _literal(code, args[0]) if args else None
+                line = f.line_of(fn.body_start + m.start())
+                if handle is None:
+                    warnings.append(f'{f.rel}:{line}: {call}() with a non-literal handle skipped')
+                    continue
+                kind = 'js' if 'script' in call else 'css'
+                if call == 'wp_localize_script':
+                    name = _literal(code, args[1]) if len(args) > 1 else None
+                    extras.localize.setdefault((kind, handle), []).append(name or '?')
+                    continue
+                if call.startswith('wp_add_inline'):
+                    extras.inline.add((kind, handle))
+                    continue
+                src: Optional[str] = None
+                url: Optional[str] = None
+                if len(args) > 1:
+                    src, url = _resolve_src(f, root, code[args[1][0]:args[1][1]])
+                    if src is None:
+                        warnings.append(f'{f.rel}:{line}: source of {handle} not resolved: {url}')
+                elif call.startswith('wp_register'):
+                    continue
+                if src is not None and not (root / src).is_file():
+                    warnings.append(f'{f.rel}:{line}: {handle} points at missing file {src}')
+                    src, url = None, src
+                media = (_literal(code, args[4]) if len(args) > 4 else None) or 'all'
+                assets.append(Asset(kind, handle, src, url, _string_list(code, arg(2)),
+                                    kind == 'js' and _truthy(code, arg(4), False), media,
+                                    call.startswith('wp_enqueue'), _contexts(area, conds, m.start()),
+                                    f.rel, line))
+    return assets, extras, warnings
+
+
+def menu_pages(php_files: List[IndexedFile]) -> Dict[str, str]:
+    """Admin page slug -> menu title from add_menu_page / add_submenu_page."""
+    pages: Dict[str, str] = {}
+    for f in php_files:
+        if 'menu_page' not in f.text:
+            continue
+        code = blank_comments(f.text, php_structure(f).comments)
+        for m in MENU_RE.finditer(code):
+            args = split_args(code, m.end(), match_bracket(code, m.end() - 1) - 1)
+            title_i, slug_i = (1, 4) if m.group(1) else (0, 3)
+            if len(args) > slug_i:
+                slug = _literal(code, args[slug_i])
+                if slug:
+                    pages[slug] = _literal(code, args[title_i]) or slug
+    return pages
+
+
+# ---------------------------------------------------------------------------
+# Pages, weights and bundles
+# ---------------------------------------------------------------------------
+
+def page_groups(assets: List[Asset], contexts: List[str]) -> Dict[str, List[Group]]:
+    """For each context: its assets in WordPress print order, split into bundle groups."""
+    registered: Dict[Tuple[str, str], Asset] = {}
+    for a in assets:
+        registered.setdefault((a.kind, a.handle), a)
+    out: Dict[str, List[Group]] = {}
+    for ctx in contexts:
+        area = ctx.split(':', 1)[0]
+        groups: List[Group] = []
+        for kind in ('js', 'css'):
+            queue = [a for a in assets if a.kind == kind and a.enqueued
+                     and (ctx in a.contexts or f'{area}:*' in a.contexts)]
+            ordered: List[Asset] = []
+            external: List[str] = []
+            seen: Set[str] = set()
+
+            def visit(a: Asset) -> None:
+                if a.handle in seen:
+                    return
+                seen.add(a.handle)
+                for dep in a.deps:
+                    target = registered.get((kind, dep))
+                    if target is None:
+                        if dep not in external:
+                            external.append(dep)
+                    else:
+                        visit(target)
+                ordered.append(a)
+
+            for a in queue:
+                visit(a)
+            entries = tuple(dict.fromkeys(a.handle for a in queue))
+            # one bundle per print position (js) or media (css), keeping order
+            for key in dict.fromkeys((a.footer, a.media if kind == 'css' else 'all') for a in ordered):
+                members = tuple(a for a in ordered if (a.footer, a.media if kind == 'css' else 'all') == key)
+                groups.append(Group(ctx, kind, key[0], key[1], members,
+                                    tuple(h for h in entries if any(m.handle == h for m in members)),
+                                    tuple(external)))
+        out[ctx] = groups
+    return out
+
+
+def minify_css(text: str, src_dir: str = '', out_dir: str = '') -> str:
+    """Comments and redundant whitespace removed; relative url()s rebased from src_dir to out_dir."""
+    out: List[str] = []
+    pos = 0
+
+    def squeeze(segment: str) -> str:
+        return CSS_PUNCT_RE.sub(r'\1', CSS_SPACE_RE.sub(' ', segment))
+
+    for m in CSS_TOKEN_RE.finditer(text):
+        out.append(squeeze(text[pos:m.start()]))
+        tok = m.group(0)
+        if tok.startswith('/*'):
+            out.append(tok if tok.startswith('/*!') else ' ')
+        elif m.group(1) is not None:
+            url = m.group(1)
+            if url and src_dir != out_dir and not re.match(r'(?:[a-z][a-z0-9+.-]*:|/|#)', url, re.IGNORECASE):
+                url = os.path.relpath(os.path.join(src_dir, url), out_dir).replace(os.sep, '/')
+            out.append(f'url({url})')
+        else:
+            out.append(tok)
+        pos = m.end()
+    out.append(squeeze(text[pos:]))
+    return re.sub(r';}', '}', squeeze(''.join(out))).strip() + '\n'
+
+
+def _gzip_size(data: bytes) -> int:
+    return len(gzip.compress(data, 6, mtime=0))
+
+
+class Weigher:
+    """Sizes per source file, computed once."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._cache: Dict[str, Weight] = {}
+
+    def minified(self, kind: str, src: str, out_dir: str = '') -> str:
+        text = (self.root / src).read_text(encoding='utf-8', errors='replace')
+        if kind == 'js':
+            return minify_js(text)
+        return minify_css(text, os.path.dirname(src), out_dir or os.path.dirname(src))
+
+    def weight(self, kind: str, src: str) -> Weight:
+        w = self._cache.get(src)
+        if w is None:
+            raw = (self.root / src).read_bytes()
+            mini = self.minified(kind, src).encode('utf-8')
+            w = self._cache[src] = Weight(len(raw), _gzip_size(raw), len(mini), _gzip_size(mini))
+        return w
+
+
+def bundle_blocker(group: Group, weigher: Weigher) -> Optional[str]:
+    """Why a group cannot be merged into one file, or None."""
+    if any(a.src is None for a in group.assets):
+        return 'has assets outside the plugin'
+    for a in group.assets:
+        text = (weigher.root / a.src).read_text(encoding='utf-8', errors='replace')  # type: ignore[operator]
+        if group.kind == 'js' and USE_STRICT_RE.match(minify_js(text)):
+            return f"{a.src} starts with a file-level 'use strict' directive"
+        if group.kind == 'css' and re.search(r'@(?:import|charset)\b', text, re.IGNORECASE):
+            return f'{a.src} uses @import/@charset'
+    return None
+
+
+def estimate_ms(requests: int, gzip_bytes: int, rtt_ms: float, kbps: float) -> int:
+    if not requests:
+        return 0
+    return int(math.ceil(requests / PARALLEL_REQUESTS) * rtt_ms + gzip_bytes * 8 / kbps)
+
+
+def page_report(groups: List[Group], extras: Extras, weigher: Weigher, rtt_ms: float, kbps: float) -> Dict[str, object]:
+    totals = {'js': [0, 0, 0], 'css': [0, 0, 0]}   # requests, raw, gzip
+    bundled_requests = bundled_gzip = 0
+    assets = []
+    for g in groups:
+        local = [a for a in g.assets if a.src is not None]
+        for a in g.assets:
+            w = weigher.weight(a.kind, a.src) if a.src else None
+            totals[a.kind][0] += 1
+            if w:
+                totals[a.kind][1] += w.raw
+                totals[a.kind][2] += w.gzip
+            assets.append({'kind': a.kind, 'handle': a.handle, 'src': a.src or a.url,
+                           'bytes': w.raw if w else None, 'gzip': w.gzip if w else None,
+                           'min_gzip': w.minified_gzip if w else None, 'defined': f'{a.file}:{a.line}',
+                           'localize': extras.localize.get((a.kind, a.handle), [])})
+        if local:
+            bundled_requests += 1 + (len(g.assets) - len(local))
+            bundled_gzip += sum(weigher.weight(a.kind, a.src).minified_gzip for a in local)  # type: ignore[arg-type]
+    requests = totals['js'][0] + totals['css'][0]
+    gz = totals['js'][2] + totals['css'][2]
+    external = sorted({d for g in groups for d in g.external})
+    return {'js_requests': totals['js'][0], 'js_bytes': totals['js'][1], 'css_requests': totals['css'][0],
+            'css_bytes': totals['css'][1], 'requests': requests, 'gzip_bytes': gz,
+            'est_ms': estimate_ms(requests, gz, rtt_ms, kbps),
+            'bundled_requests': bundled_requests, 'bundled_gzip_bytes': bundled_gzip,
+            'bundled_est_ms': estimate_ms(bundled_requests, bundled_gzip, rtt_ms, kbps),
+            'external_deps': external, 'assets': assets}
+
+
+def _bundle_name(context: str) -> str:
+    area, _, page = context.partition(':')
+    return re.sub(r'[^A-Za-z0-9_.-]+', '-', f'{area}-{page}')
+
+
+def node_check(code: str) -> Optional[str]:
+    """Syntax error reported by `node --check`, or None (also when node is not installed)."""
+    node = shutil.which('node')
+    if node is None:
+        return None
+    fd, tmp = tempfile.mkstemp(suffix='.js')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            fh.write(code)
+        proc = subprocess.run([node, '--check', tmp], capture_output=True, text=True)
+        return proc.stderr.strip() if proc.returncode else None
+    finally:
+        os.unlink(tmp)
+
+
+def source_stamp(root: Path, src: str) -> dict:
+    """Manifest entry of a bundled source: includes/asset-bundles.php treats the bundle as
+    stale when the size differs, or when the mtime moved and the SHA-1 differs (checked
+    once per set of sizes and mtimes, the result is kept in a transient)."""
+    st = (root / src).stat()
+    return {'path': src, 'size': st.st_size, 'mtime': int(st.st_mtime),
+            'sha1': hashlib.sha1((root / src).read_bytes()).hexdigest()}
+
+
+def build_bundles(pages: Dict[str, List[Group]], weigher: Weigher, dist: Path) -> Tuple[List[dict], List[str]]:
+    """Write one bundle per page group into dist; returns (manifest entries, problems)."""
+    root = weigher.root
+    out_rel = dist.relative_to(root).as_posix()
+    entries: List[dict] = []
+    problems: List[str] = []
+    for ctx, groups in pages.items():
+        if ctx.endswith(':*'):
+            continue  # shared assets are folded into every page of the area
+        for g in groups:
+            if not g.assets:
+                continue
+            blocker = bundle_blocker(g, weigher)
+            if blocker:
+                print(f'[WARN] {ctx} {g.kind}: not bundled, {blocker}', file=sys.stderr)
+                continue
+            parts = [weigher.minified(g.kind, a.src, out_rel) for a in g.assets]  # type: ignore[arg-type]
+            code = (';\n' if g.kind == 'js' else '').join(parts)
+            if g.kind == 'js':
+                error = node_check(code)
+                if error:
+                    problems.append(f'{ctx} js bundle does not parse: {error.splitlines()[-1]}')
+                    continue
+            data = code.encode('utf-8')
+            digest = hashlib.sha256(data).hexdigest()[:10]
+            if g.kind == 'js':
+                suffix = '' if g.footer else '-head'
+            else:
+                suffix = '' if g.media == 'all' else '-' + re.sub(r'[^A-Za-z0-9]+', '-', g.media)
+            name = f'{_bundle_name(ctx)}{suffix}.{digest}.{g.kind}'
+            (dist / name).write_bytes(data)
+            entries.append({
+                'context': ctx, 'kind': g.kind,
+                'handle': f'pd-bundle-{_bundle_name(ctx)}{suffix}-{g.kind}'.lower(),
+                'file': f'{out_rel}/{name}', 'deps': list(g.external), 'in_footer': g.footer, 'media': g.media,
+                'handles': [a.handle for a in g.assets], 'entries': list(g.entries),
+                'sources': [source_stamp(root, a.src) for a in g.assets],  # type: ignore[arg-type]
+                'bytes': len(data), 'gzip_bytes': _gzip_size(data),
+            })
+    return entries, problems
+
+
+def write_manifest(dist: Path, entries: List[dict]) -> None:
+    """Write the manifest atomically and drop bundles the previous one listed but this one does not."""
+    path = dist / MANIFEST_NAME
+    keep = {Path(e['file']).name for e in entries}
+    try:
+        old = json.loads(path.read_text(encoding='utf-8')).get('bundles', [])
+    except (OSError, ValueError, AttributeError):
+        old = []
+    doc = {'version': MANIFEST_VERSION, 'generator': 'tools/asset_weights.py --build', 'bundles': entries}
+    fd, tmp = tempfile.mkstemp(prefix=MANIFEST_NAME + '.', suffix='.tmp', dir=str(dist))
+    with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+        json.dump(doc, fh, indent=2)
+        fh.write('\n')
+    os.replace(tmp, path)
+    for e in old:
+        name = Path(str(e.get('file', ''))).name
+        if name and name not in keep and (dist / name).is_file():
+            (dist / name).unlink()
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _kb(n: int) -> str:
+    return f'{n / 1024:.1f}'
+
+
+def render_report(report: Dict[str, Dict[str, object]], titles: Dict[str, str], verbose: bool) -> None:
+    head = (f"{'Page':<34} {'JS':>3} {'CSS':>3} {'raw KB':>8} {'gzip KB':>8} {'est ms':>7}   "
+            f"{'bundled: req':>12} {'gzip KB':>8} {'est ms':>7}")
+    print(head)
+    print('-' * len(head))
+    for ctx, r in report.items():
+        print(f"{ctx:<34} {r['js_requests']:>3} {r['css_requests']:>3} "
+              f"{_kb(r['js_bytes'] + r['css_bytes']):>8} {_kb(r['gzip_bytes']):>8} {r['est_ms']:>7}   "  # type: ignore[operator]
+              f"{r['bundled_requests']:>12} {_kb(r['bundled_gzip_bytes']):>8} {r['bundled_est_ms']:>7}")  # type: ignore[arg-type]
+        if verbose:
+            page = ctx.split(':', 1)[1]
+            if page in titles:
+                print(f'    "{titles[page]}"')
+            for a in r['assets']:  # type: ignore[attr-defined]
+                size = f"{_kb(a['bytes'])} KB" if a['bytes'] is not None else 'external'
+                objects = f"  (localize: {', '.join(a['localize'])})" if a['localize'] else ''
+                print(f"    {a['kind']:<3} {a['handle']:<36} {size:>10}  {a['src']}{objects}")
+            if r['external_deps']:
+                print(f"    external: {', '.join(r['external_deps'])}")  # type: ignore[arg-type]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('-r', '--root', default=str(PLUGIN_ROOT), help='Plugin root (default: repo root)')
+    ap.add_argument('-v', '--verbose', action='store_true', help='List the assets of every page')
+    ap.add_argument('--output', help='Also write the report as JSON to this path')
+    ap.add_argument('--rtt-ms', type=float, default=150.0, help='Round-trip time for the estimate (default: 150)')
+    ap.add_argument('--kbps', type=float, default=1600.0, help='Bandwidth in kbit/s for the estimate (default: 1600)')
+    ap.add_argument('--build', action='store_true', help='Write per-page bundles and the manifest')
+    ap.add_argument('--dist', default=DEFAULT_DIST, help=f'Bundle directory under the root (default: {DEFAULT_DIST})')
+    add_profile_arguments(ap)
+    args = ap.parse_args(argv if argv is not None else [])
+    with profile_session(args, 'asset_weights'):
+        return run(args)
+
+
+def run(args: argparse.Namespace) -> int:
+    root = Path(args.root).resolve()
+    with phase('walk'):
+        php_files = get_index(root).files(('.php',))
+    with phase('scan'):
+        assets, extras, warnings = scan_enqueues(php_files, root)
+        titles = menu_pages(php_files)
+    for w in warnings:
+        print(f'[WARN] {w}', file=sys.stderr)
+    for kind, handle in sorted(extras.inline):
+        print(f'[WARN] {handle} has inline {kind}; bundles containing it are skipped at run time', file=sys.stderr)
+
+    contexts = list(dict.fromkeys(c for a in assets for c in a.contexts))
+    pages = [f'admin:{slug}' for slug in titles]
+    contexts = list(dict.fromkeys(pages + [c for c in contexts if not c.endswith(':*')]
+                                  + [c for c in contexts if c.endswith(':*')]))
+    weigher = Weigher(root)
+    with phase('weigh'):
+        groups = page_groups(assets, contexts)
+        report = {ctx: page_report(g, extras, weigher, args.rtt_ms, args.kbps) for ctx, g in groups.items()}
+    render_report(report, titles, args.verbose)
+
+    if args.output:
+        doc = {'rtt_ms': args.rtt_ms, 'kbps': args.kbps, 'titles': titles, 'pages': report}
+        try:
+            Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+            Path(args.output).write_text(json.dumps(doc, indent=2) + '\n', encoding='utf-8')
+        except OSError as exc:
+            print(f'[ERR] cannot write {args.output}: {exc}', file=sys.stderr)
+            return 1
+
+    if not args.build:
+        return 0
+    dist = (root / args.dist).resolve()
+    if not dist.is_relative_to(root) or dist == root:
+        print(f'[ERR] --dist must be a directory inside {root} (the manifest paths are relative to it)',
+              file=sys.stderr)
+        return 1
+    with phase('build'):
+        try:
+            dist.mkdir(parents=True, exist_ok=True)
+            entries, problems = build_bundles(groups, weigher, dist)
+            for p in problems:
+                print(f'[ERR] {p}', file=sys.stderr)
+            if problems:
+                return 1
+            write_manifest(dist, entries)
+        except OSError as exc:
+            print(f'[ERR] cannot write bundles to {dist}: {exc}', file=sys.stderr)
+            return 1
+    print(f'\nWrote {len(entries)} bundle(s) and {MANIFEST_NAME} to {dist}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Benchmark the tools/ checks on synthetic plugin trees (see tools/synth_tree.py).
+
+For every scale, a tree is generated once (kept under the work directory and
+rebuilt only when the generator changes) and each tool is run as its own
+process with the result cache disabled:
+
+  scan_bad_keywords               terminology scan
+  apply_curated_renames           dry-run
+  check_ajax_nonces               nonce + form-encoding check
+  test_encryption_key_derivation  key derivation check
+
+Wall time is the median over --repeat runs; peak RSS is the largest maximum
+resident set size reported for the tool's process (wait4). files/s is the
+tree's file count divided by the median wall time. Exit status 1 is a tool's
+normal "found something" result (the scan exits 1 on hits). Any other status,
+or a Python traceback on stderr (an uncaught exception also exits 1), fails the
+benchmark; the tool's stderr is kept in the work directory.
+
+Usage:
+  python3 tools/bench_tools.py [--scales 50,500,5000] [--repeat 3] [--output PATH]
+  python3 tools/bench_tools.py --baseline PATH [--threshold 1.25]
+
+Options:
+  --scales LIST       Comma-separated tree sizes in files (default: 50,500,5000)
+  --repeat N          Runs per tool and scale (default: 3)
+  --tools LIST        Only run these tools (comma-separated names from above)
+  --jobs N, -j N      Forwarded to the tools that accept --jobs (default: 1)
+  --work DIR          Where generated trees live (default: .tools-cache/bench)
+  --output PATH       Write results as JSON (default: print only)
+  --baseline PATH     Compare with an earlier results file; a missing file is reported
+                      and the comparison skipped (baselines are machine-specific and
+                      not committed: record one with `make bench-baseline`)
+  --threshold X       Regression when wall time or peak RSS exceeds X * baseline
+                      (default: 1.25)
+  --min-wall S        Ignore wall-time regressions when both runs are under S seconds
+                      (default: 0.05; process start-up noise)
+
+Exit code:
+  - 0 on success (and no regression when --baseline is given)
+  - 1 if a tool crashed or exited with a status other than 0 or 1, a regression past the
+    threshold was found, or the baseline exists but cannot be read
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import synth_tree
+
+
+TOOLS_DIR = Path(__file__).resolve().parent
+ROOT = TOOLS_DIR.parent
+DEFAULT_WORK = ROOT / '.tools-cache' / 'bench'
+RESULTS_VERSION = 1
+# Exit statuses of a tool run that count as a result rather than a failure
+EXPECTED_EXIT_CODES = (0, 1)
+TRACEBACK_MARKER = b'Traceback (most recent call last):'
+
+# name -> (script, extra arguments, accepts --jobs)
+TOOLS: Dict[str, Tuple[str, List[str], bool]] = {
+    'scan_bad_keywords': ('scan_bad_keywords.py', ['--no-cache', '-e', '.php,.js,.css'], True),
+    'apply_curated_renames': ('apply_curated_renames.py', ['--no-cache'], True),
+    'check_ajax_nonces': ('check_ajax_nonces.py', ['--no-cache'], True),
+    'test_encryption_key_derivation': ('test_encryption_key_derivation.py', [], False),
+}
+
+
+def ensure_tree(work: Path, scale: int, seed: int = 1) -> Tuple[Path, int]:
+    """Generated tree for `scale` (reused when the generator version matches) and its file count."""
+    tree = work / f'tree-{scale}-s{seed}'
+    stamp = tree / '.synth-version'
+    if not stamp.is_file() or stamp.read_text().strip() != str(synth_tree.GENERATOR_VERSION):
+        if tree.exists():
+            shutil.rmtree(tree)
+        synth_tree.generate(tree, scale, seed)
+        stamp.write_text(f'{synth_tree.GENERATOR_VERSION}\n')
+    n = sum(len(files) for _, _, files in os.walk(tree)) - 1
+    return tree, n
+
+
+def run_tool(argv: List[str], cwd: Path, stderr: Path) -> Tuple[float, int, int]:
+    """Run one tool process with its stderr written to `stderr`; return (wall seconds,
+    peak RSS in KiB, exit code)."""
+    start = time.perf_counter()
+    with open(stderr, 'wb') as err:
+        proc = subprocess.Popen(argv, cwd=str(cwd), stdout=subprocess.DEVNULL, stderr=err)
+        _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    rss = usage.ru_maxrss
+    if sys.platform == 'darwin':
+        rss //= 1024  # bytes on macOS, KiB on Linux
+    return wall, rss, proc.returncode
+
+
+def bench(tree: Path, n_files: int, scale: int, tools: List[str], repeat: int, jobs: int,
+          work: Path) -> Tuple[List[dict], List[str]]:
+    """(results, failures): one result per tool, and a message per tool that crashed or
+    exited with a status outside EXPECTED_EXIT_CODES (its runs are not timed further)."""
+    results = []
+    failures = []
+    for name in tools:
+        script, extra, takes_jobs = TOOLS[name]
+        argv = [sys.executable, str(TOOLS_DIR / script), '-r', str(tree), *extra]
+        if takes_jobs:
+            argv += ['--jobs', str(jobs)]
+        if name == 'scan_bad_keywords':
+            argv += ['--output', str(work / 'scan-output.txt')]
+        stderr = work / f'{name}-{scale}.stderr'
+        walls: List[float] = []
+        peak = 0
+        code = 0
+        failed = False
+        for _ in range(repeat):
+            wall, rss, code = run_tool(argv, work, stderr)
+            errors = stderr.read_bytes()
+            failed = code not in EXPECTED_EXIT_CODES or TRACEBACK_MARKER in errors
+            if failed:
+                break
+            walls.append(wall)
+            peak = max(peak, rss)
+        if failed:
+            tail = errors.decode('utf-8', errors='replace').strip().splitlines()[-1:]
+            failures.append(f"{name} @ {scale} files: exit code {code}"
+                            + (f" ({tail[0].strip()})" if tail else '') + f", stderr in {stderr}")
+            print(f'  {name:<32} FAILED (exit code {code})', flush=True)
+            continue
+        wall = statistics.median(walls)
+        results.append({
+            'tool': name,
+            'scale': scale,
+            'files': n_files,
+            'wall_s': round(wall, 4),
+            'peak_rss_kb': peak,
+            'files_per_s': round(n_files / wall, 1) if wall > 0 else None,
+            'exit_code': code,
+        })
+        print(f'  {name:<32} {wall:8.3f}s {peak / 1024:8.1f} MiB {n_files / wall:10.0f} files/s', flush=True)
+    return results, failures
+
+
+def compare(results: List[dict], baseline: List[dict], threshold: float, min_wall: float) -> List[str]:
+    """Human-readable regressions of `results` against `baseline` (matched by tool and scale)."""
+    base = {(r['tool'], r['scale']): r for r in baseline}
+    problems = []
+    for r in results:
+        b = base.get((r['tool'], r['scale']))
+        if b is None:
+            continue
+        if r['wall_s'] > b['wall_s'] * threshold and max(r['wall_s'], b['wall_s']) >= min_wall:
+            problems.append(f"{r['tool']} @ {r['scale']} files: wall {b['wall_s']:.3f}s -> {r['wall_s']:.3f}s "
+                            f"(x{r['wall_s'] / b['wall_s']:.2f})")
+        if r['peak_rss_kb'] > b['peak_rss_kb'] * threshold:
+            problems.append(f"{r['tool']} @ {r['scale']} files: peak RSS {b['peak_rss_kb']} KiB -> "
+                            f"{r['peak_rss_kb']} KiB (x{r['peak_rss_kb'] / b['peak_rss_kb']:.2f})")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--scales', default='50,500,5000', help='Comma-separated tree sizes (default: 50,500,5000)')
+    ap.add_argument('--repeat', type=int, default=3, help='Runs per tool and scale (default: 3)')
+    ap.add_argument('--tools', help=f"Comma-separated subset of: {', '.join(TOOLS)}")
+    ap.add_argument('-j', '--jobs', type=int, default=1, help='Forwarded to tools that accept --jobs (default: 1)')
+    ap.add_argument('--work', default=str(DEFAULT_WORK), help='Directory for generated trees')
+    ap.add_argument('--output', help='Write results as JSON to this file')
+    ap.add_argument('--baseline', help='Compare against an earlier results file')
+    ap.add_argument('--threshold', type=float, default=1.25, help='Regression factor (default: 1.25)')
+    ap.add_argument('--min-wall', type=float, default=0.05, help='Ignore wall regressions below this many seconds')
+    args = ap.parse_args(argv if argv is not None else [])
+
+    try:
+        scales = [int(s) for s in args.scales.split(',') if s.strip()]
+    except ValueError:
+        ap.error(f'invalid --scales: {args.scales}')
+    tools = [t.strip() for t in args.tools.split(',')] if args.tools else list(TOOLS)
+    unknown = [t for t in tools if t not in TOOLS]
+    if unknown:
+        ap.error(f"unknown tool(s): {', '.join(unknown)}")
+
+    baseline: Optional[List[dict]] = None
+    if args.baseline and not Path(args.baseline).exists():
+        print(f'[SKIP] no baseline at {args.baseline}; not comparing (record one with `make bench-baseline`)')
+    elif args.baseline:
+        try:
+            baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))['results']
+        except (OSError, ValueError, KeyError) as exc:
+            print(f'[ERR] cannot read baseline {args.baseline}: {exc}', file=sys.stderr)
+            return 1
+
+    work = Path(args.work).resolve()
+    work.mkdir(parents=True, exist_ok=True)
+    results: List[dict] = []
+    failures: List[str] = []
+    for scale in scales:
+        tree, n_files = ensure_tree(work, scale)
+        print(f'Scale {scale}: {n_files} files in {tree}', flush=True)
+        scale_results, scale_failures = bench(tree, n_files, scale, tools, args.repeat, args.jobs, work)
+        results.extend(scale_results)
+        failures.extend(scale_failures)
+
+    if args.output:
+        doc = {
+            'version': RESULTS_VERSION,
+            'generator_version': synth_tree.GENERATOR_VERSION,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'jobs': args.jobs,
+            'repeat': args.repeat,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'results': results,
+        }
+        out = Path(args.output)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(doc, indent=2) + '\n', encoding='utf-8')
+        print(f'Results saved to {out}')
+
+    rc = 0
+    if failures:
+        print('\nTool failures:')
+        for p in failures:
+            print(' -', p)
+        rc = 1
+    if baseline is not None:
+        problems = compare(results, baseline, args.threshold, args.min_wall)
+        if problems:
+            print(f'\nPerformance regressions (threshold x{args.threshold}):')
+            for p in problems:
+                print(' -', p)
+            return 1
+        print(f'\nNo regressions against {args.baseline} (threshold x{args.threshold}).')
+    return rc
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
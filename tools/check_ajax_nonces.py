@@ -6,20 +6,31 @@ Static check for WordPress AJAX endpoints in this plugin to ensure the
 What it checks:
 1) Server (PHP):
    - Finds add_action('wp_ajax_<slug>', 'callback') hooks
-   - Locates the callback function and checks it calls check_ajax_referer(..., 'nonce', ...)
+   - Locates the callback function and checks its body (brace-matched, comments
+     skipped; see tools/php_lexer.py) calls check_ajax_referer(..., 'nonce', ...)
 
 2) Client (JS):
    - Searches JS files for requests using that action slug
    - Verifies a 'nonce' is sent in the payload (e.g., object with nonce: ..., or URLSearchParams.set('nonce', ...))
    - Heuristically checks the request is form-encoded (either via jQuery.post or fetch with
-     Content-Type: application/x-www-form-urlencoded and a URLSearchParams body)
+     method POST and Content-Type: application/x-www-form-urlencoded). Request calls come
+     from one scan per file that skips strings, comments and regex literals (see
+     tools/js_scanner.py), so commented-out calls no longer count.
 
 Exit code:
  - 0 if all discovered endpoints pass both checks
  - 1 if any endpoint fails a check
 
 Usage:
-  python3 tools/check_ajax_nonces.py
+  python3 tools/check_ajax_nonces.py [--jobs N] [--root DIR] [--no-cache] [--staged | --since REF]
+                                     [--profile [PATH]] [--cprofile PATH]
+
+--profile writes per-phase timings (walk, index, server, client), the slowest
+files and per-regex time as JSON (see tools/tool_profile.py).
+
+With --staged / --since only hooks touched by the changed files are checked
+(registration, callback or JS usage). The cross-file tables still cover the
+whole tree, so a change to only a JS or only a PHP file is analysed correctly.
 
 Notes:
  - This is a static heuristic. It may produce false positives/negatives in complex setups
@@ -27,105 +38,315 @@ Notes:
 """
 
 from __future__ import annotations
+import argparse
 import re
 import sys
+import time
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
+
+import tool_profile
+
+from git_source import GitError, add_git_arguments, changed_files, overlay
+from js_scanner import JsStructure, scan_js
+from php_lexer import FunctionSpan, PhpStructure, parse_php
+from repo_index import DEFAULT_IGNORES, IndexedFile, RawLines, filter_files, get_index, is_binary
+from result_cache import ResultCache, add_cache_arguments, cached_map_chunks, fingerprint, open_cache
+from tool_pool import FileRef, add_jobs_argument, load_files
+from tool_profile import add_profile_arguments, phase, profile_session
 
 
 PLUGIN_ROOT = Path(__file__).resolve().parents[1]
 
 
-PHP_HOOK_RE = re.compile(r"add_action\(\s*'wp_ajax_([^']+)'\s*,\s*'([^']+)'\s*\)")
-PHP_FUNC_DEF_RE_TMPL = r"function\s+{name}\s*\("
+# The per-file fact extractors (PHP_HOOK_RE, PHP_FUNC_DEF_RE, JS_ACTION_PAIR_RE) are byte
+# patterns run on the undecoded file (see IndexedFile.raw); only matched names are decoded
+PHP_HOOK_RE = re.compile(rb"add_action\(\s*'wp_ajax_([^']+)'\s*,\s*'([^']+)'\s*\)")
+PHP_FUNC_DEF_RE = re.compile(rb"function\s+([A-Za-z_\x80-\xff][\w\x80-\xff]*)\s*\(")
 PHP_CHECK_NONCE_RE = re.compile(r"check_ajax_referer\s*\(.*?[,)]", re.IGNORECASE)
 PHP_CHECK_NONCE_FIELD_NONCE_RE = re.compile(r"check_ajax_referer\s*\(.*?['\"]nonce['\"]", re.IGNORECASE)
 
-JS_ACTION_PAIR_RE_TMPL = r"action\s*[:=]\s*['\"]{slug}['\"]"
+JS_ACTION_PAIR_RE = re.compile(rb"action\s*[:=]\s*['\"]([^'\"\n]*)['\"]")
 JS_NONCE_PRESENT_RE = re.compile(r"\bnonce\b\s*[:=]|URLSearchParams\s*\(\)|params\.set\(\s*['\"]nonce['\"]", re.IGNORECASE)
-JS_FETCH_POST_FORM_URLENCODED_RE = re.compile(
-    r"fetch\s*\(.*?\{[\s\S]*?method\s*:\s*['\"]POST['\"][\s\S]*?Content-Type[\s\S]*?application/x-www-form-urlencoded",
-    re.IGNORECASE,
-)
-
-
-def read_files_with_suffix(root: Path, suffixes: Tuple[str, ...]) -> List[Path]:
-    return [p for p in root.rglob('*') if p.is_file() and p.suffix in suffixes]
-
-
-def find_ajax_hooks(php_files: List[Path]) -> List[Tuple[str, str, Path, int]]:
-    hooks = []
-    for f in php_files:
-        try:
-            text = f.read_text(encoding='utf-8', errors='ignore')
-        except Exception:
-            continue
-        for m in PHP_HOOK_RE.finditer(text):
-            slug, cb = m.group(1), m.group(2)
-            line = text.count('\n', 0, m.start()) + 1
-            hooks.append((slug, cb, f, line))
-    return hooks
-
-
-def locate_function_definition(callback: str, php_files: List[Path]) -> Optional[Tuple[Path, int, str]]:
-    pattern = re.compile(PHP_FUNC_DEF_RE_TMPL.format(name=re.escape(callback)))
-    for f in php_files:
-        try:
-            text = f.read_text(encoding='utf-8', errors='ignore')
-        except Exception:
-            continue
-        m = pattern.search(text)
-        if m:
-            line = text.count('\n', 0, m.start()) + 1
-            return f, line, text
+JS_METHOD_POST_RE = re.compile(r"^['\"`]POST['\"`]$", re.IGNORECASE)
+JS_FORM_URLENCODED_RE = re.compile(r"Content-Type['\"]?\s*[:,]\s*['\"`]application/x-www-form-urlencoded", re.IGNORECASE)
+JS_IDENTIFIER_RE = re.compile(r"^[A-Za-z_$][\w$.]*$")
+# +/- lines around an `action` literal searched for the matching request
+JS_USAGE_WINDOW = 30
+
+# Fingerprints of the per-file fact extractors; cached facts are invalidated when these change
+PHP_FACTS_VERSION = fingerprint(2, PHP_HOOK_RE.pattern, PHP_FUNC_DEF_RE.pattern)
+JS_FACTS_VERSION = fingerprint(2, JS_ACTION_PAIR_RE.pattern)
+
+
+def read_files_with_suffix(root: Path, suffixes: Tuple[str, ...]) -> List[IndexedFile]:
+    return get_index(root).files(suffixes)
+
+
+def _decode(b: bytes) -> str:
+    return b.decode('utf-8', errors='ignore')
+
+
+def php_file_facts(refs: List[FileRef]) -> List[Tuple[List[Tuple[str, str, int]], List[Tuple[str, int, int]]]]:
+    """Chunk function: ([(slug, callback, line)], [(function, line, byte offset)]) per PHP file, in order."""
+    out = []
+    prof = tool_profile.ACTIVE
+    for f in load_files(refs):
+        with f.raw() as buf:
+            if is_binary(buf):
+                out.append(([], []))
+                continue
+            lines = RawLines(buf)
+            t0 = time.perf_counter() if prof is not None else 0.0
+            hooks = [(_decode(m.group(1)), _decode(m.group(2)), lines.line_of(m.start()))
+                     for m in PHP_HOOK_RE.finditer(buf)]
+            t1 = time.perf_counter() if prof is not None else 0.0
+            defs = [(_decode(m.group(1)), lines.line_of(m.start()), m.start())
+                    for m in PHP_FUNC_DEF_RE.finditer(buf)]
+        if prof is not None:
+            t2 = time.perf_counter()
+            prof.pattern('PHP_HOOK_RE', t1 - t0, len(hooks))
+            prof.pattern('PHP_FUNC_DEF_RE', t2 - t1, len(defs))
+            prof.file(str(f.path), t2 - t0, f.size)
+        out.append((hooks, defs))
+    return out
+
+
+def index_php_files(php_files: List[IndexedFile], jobs: int = 1,
+                    cache: Optional[ResultCache] = None) -> Tuple[List[Tuple[str, str, Path, int]], Dict[str, List[Tuple[IndexedFile, int, int]]]]:
+    """One pass over the PHP files: (hooks, function table).
+
+    The table keeps every `function name(` match in file order: a match may sit
+    in a comment or string, which only the lexer can tell (see locate_function_definition).
+    """
+    hooks: List[Tuple[str, str, Path, int]] = []
+    functions: Dict[str, List[Tuple[IndexedFile, int, int]]] = {}
+    facts = cached_map_chunks(cache, 'check_ajax_nonces.php', PHP_FACTS_VERSION, php_file_facts, php_files, jobs=jobs)
+    for f, (file_hooks, defs) in zip(php_files, facts):
+        for slug, cb, line in file_hooks:
+            hooks.append((slug, cb, f.path, line))
+        for name, line, offset in defs:
+            functions.setdefault(name, []).append((f, line, offset))
+    return hooks, functions
+
+
+def find_ajax_hooks(php_files: List[IndexedFile], jobs: int = 1) -> List[Tuple[str, str, Path, int]]:
+    return index_php_files(php_files, jobs)[0]
+
+
+def build_function_table(php_files: List[IndexedFile], jobs: int = 1) -> Dict[str, List[Tuple[IndexedFile, int, int]]]:
+    """Map every PHP `function name(` to its (file, line, byte offset) candidates in one pass."""
+    return index_php_files(php_files, jobs)[1]
+
+
+def locate_function_definition(callback: str, functions: Dict[str, List[Tuple[IndexedFile, int, int]]]
+                               ) -> Optional[Tuple[IndexedFile, int, int, FunctionSpan]]:
+    """The first candidate definition of `callback` that the lexer confirms as a function."""
+    for f, line, offset in functions.get(callback, ()):
+        fn = function_span(f, offset)
+        if fn is not None:
+            return f, line, offset, fn
     return None
 
 
-def has_check_ajax_referer(func_text: str, start_index: int) -> Tuple[bool, bool]:
-    """Return (has_check, uses_nonce_field_name) scanning from start_index forward."""
-    # Scan forward a reasonable window (10k chars) from the function definition
-    window = func_text[start_index:start_index + 10000]
-    has_check = PHP_CHECK_NONCE_RE.search(window) is not None
-    uses_nonce_field = PHP_CHECK_NONCE_FIELD_NONCE_RE.search(window) is not None
+def affected_hooks(hooks: List[Tuple[str, str, Path, int]],
+                   functions: Dict[str, List[Tuple[IndexedFile, int, int]]],
+                   actions: Dict[str, List[Tuple[IndexedFile, int]]],
+                   changed: Set[Path]) -> List[Tuple[str, str, Path, int]]:
+    """Hooks whose registration, callback definition or JS usages live in a changed file."""
+    selected = []
+    for hook in hooks:
+        slug, cb, f, _ = hook
+        if (f in changed
+                or any(df.path in changed for df, _, _ in functions.get(cb, ()))
+                or any(uf.path in changed for uf, _ in actions.get(slug, ()))):
+            selected.append(hook)
+    return selected
+
+
+_PHP_STRUCTURES: Dict[Tuple[Path, str], PhpStructure] = {}
+
+
+def php_structure(f: IndexedFile) -> PhpStructure:
+    """parse_php() result for `f`, computed once per file version."""
+    key = (f.path, f.digest)
+    php = _PHP_STRUCTURES.get(key)
+    if php is None:
+        prof = tool_profile.ACTIVE
+        text = f.text
+        t0 = time.perf_counter() if prof is not None else 0.0
+        php = _PHP_STRUCTURES[key] = parse_php(text)
+        if prof is not None:
+            prof.pattern('php_lexer.parse_php', time.perf_counter() - t0, len(php.functions))
+    return php
+
+
+def function_span(func_src: IndexedFile, byte_offset: int) -> Optional[FunctionSpan]:
+    """The lexer's span of the function defined at byte_offset (as recorded by php_file_facts),
+    or None when that match is inside a comment or string."""
+    start_index = func_src.char_offset(byte_offset)
+    return next((fn for fn in php_structure(func_src).functions if fn.start == start_index), None)
+
+
+def has_check_ajax_referer(func_src: IndexedFile, fn: FunctionSpan) -> Tuple[bool, bool]:
+    """Return (has_check, uses_nonce_field_name) for the function `fn` of func_src.
+
+    Only the function's own body is searched (exact brace-matched span, comments
+    blanked), so the result does not depend on where the function sits in the file.
+    """
+    code = php_structure(func_src).code(fn)
+    has_check = PHP_CHECK_NONCE_RE.search(code) is not None
+    uses_nonce_field = PHP_CHECK_NONCE_FIELD_NONCE_RE.search(code) is not None
     return has_check, uses_nonce_field
 
 
-def find_js_usages_for_action(slug: str, js_files: List[Path]) -> List[Tuple[Path, int, str]]:
-    results = []
-    action_re = re.compile(JS_ACTION_PAIR_RE_TMPL.format(slug=re.escape(slug)))
-    for f in js_files:
-        try:
-            text = f.read_text(encoding='utf-8', errors='ignore')
-        except Exception:
-            continue
-        for m in action_re.finditer(text):
-            line = text.count('\n', 0, m.start()) + 1
-            results.append((f, line, text))
-    return results
-
-
-def js_usage_has_nonce_and_form_encoding(text: str, anchor_line: int) -> Tuple[bool, bool]:
-    """Heuristically check within +/- 30 lines of the anchor if nonce is present and form-encoded POST is used."""
-    lines = text.splitlines()
-    i = max(0, anchor_line - 31)
-    j = min(len(lines), anchor_line + 30)
-    snippet = "\n".join(lines[i:j])
+def js_file_facts(refs: List[FileRef]) -> List[List[Tuple[str, int]]]:
+    """Chunk function: [(action slug, line)] per JS file, in order."""
+    prof = tool_profile.ACTIVE
+    out = []
+    for f in load_files(refs):
+        with f.raw() as buf:
+            if is_binary(buf):
+                out.append([])
+                continue
+            lines = RawLines(buf)
+            t0 = time.perf_counter() if prof is not None else 0.0
+            actions = [(_decode(m.group(1)), lines.line_of(m.start())) for m in JS_ACTION_PAIR_RE.finditer(buf)]
+        if prof is not None:
+            elapsed = time.perf_counter() - t0
+            prof.pattern('JS_ACTION_PAIR_RE', elapsed, len(actions))
+            prof.file(str(f.path), elapsed, f.size)
+        out.append(actions)
+    return out
+
+
+def build_js_action_table(js_files: List[IndexedFile], jobs: int = 1,
+                          cache: Optional[ResultCache] = None) -> Dict[str, List[Tuple[IndexedFile, int]]]:
+    """Map every JS `action: '<slug>'` / `action = '<slug>'` literal to its (file, line) locations."""
+    table: Dict[str, List[Tuple[IndexedFile, int]]] = {}
+    facts = cached_map_chunks(cache, 'check_ajax_nonces.js', JS_FACTS_VERSION, js_file_facts, js_files, jobs=jobs)
+    for f, actions in zip(js_files, facts):
+        for slug, line in actions:
+            table.setdefault(slug, []).append((f, line))
+    return table
+
+
+def find_js_usages_for_action(slug: str, actions: Dict[str, List[Tuple[IndexedFile, int]]]) -> List[Tuple[IndexedFile, int]]:
+    return list(actions.get(slug, []))
+
+
+_JS_STRUCTURES: Dict[Tuple[Path, str], JsStructure] = {}
+
+
+def js_structure(f: IndexedFile) -> JsStructure:
+    """Scanned call structure of a JS file, shared by every usage in it."""
+    key = (f.path, f.digest)
+    js = _JS_STRUCTURES.get(key)
+    if js is None:
+        prof = tool_profile.ACTIVE
+        text = f.text
+        t0 = time.perf_counter() if prof is not None else 0.0
+        js = _JS_STRUCTURES[key] = scan_js(text)
+        if prof is not None:
+            prof.pattern('js_scanner.scan_js', time.perf_counter() - t0, len(js.calls))
+    return js
+
+
+def forget(paths: Set[Path]) -> None:
+    """Drop the cached structures of `paths` (for long-running callers, see tools/watch_checks.py)."""
+    for structures in (_PHP_STRUCTURES, _JS_STRUCTURES):
+        for key in [k for k in structures if k[0] in paths]:
+            del structures[key]
+
+
+def js_usage_has_nonce_and_form_encoding(f: IndexedFile, anchor_line: int) -> Tuple[bool, bool]:
+    """Check within +/- JS_USAGE_WINDOW lines of the anchor if a nonce is sent and a form-encoded POST is used.
+
+    The window is sliced by line offsets; request calls inside it come from the
+    file's one-pass scan (see tools/js_scanner.py), so nothing is re-split or
+    re-searched per usage.
+    """
+    starts = f.line_starts
+    first = max(1, anchor_line - JS_USAGE_WINDOW)
+    last = anchor_line + JS_USAGE_WINDOW
+    a = starts[first - 1] if first - 1 < len(starts) else len(f.text)
+    b = starts[last] if last < len(starts) else len(f.text)
+
+    has_nonce = JS_NONCE_PRESENT_RE.search(f.text, a, b) is not None
+
+    js = js_structure(f)
+    has_form_encoded = False
+    for call in js.calls_between(a, b):
+        # Consider jQuery.post as form-encoded by convention
+        if call.callee.endswith('.post'):
+            has_form_encoded = True
+            break
+        if call.callee == 'fetch':
+            opts = js.options(call)
+            if not JS_METHOD_POST_RE.match(opts.get('method', '')):
+                continue
+            headers = opts.get('headers', '')
+            if JS_IDENTIFIER_RE.match(headers):
+                # `headers` built in a variable nearby: look for the content type in the window
+                found = JS_FORM_URLENCODED_RE.search(f.text, a, b) is not None
+            else:
+                found = JS_FORM_URLENCODED_RE.search(headers) is not None
+            if found:
+                has_form_encoded = True
+                break
+    return has_nonce, has_form_encoded
 
-    has_nonce = JS_NONCE_PRESENT_RE.search(snippet) is not None
 
-    # Consider jQuery.post as form-encoded by convention
-    is_jquery_post = '.post(' in snippet or 'jQuery.post(' in snippet
-    is_fetch_post_form = JS_FETCH_POST_FORM_URLENCODED_RE.search(snippet) is not None
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('-r', '--root', default=str(PLUGIN_ROOT), help='Plugin root to check (default: repo root)')
+    add_jobs_argument(ap)
+    add_cache_arguments(ap)
+    add_git_arguments(ap)
+    add_profile_arguments(ap)
+    args = ap.parse_args(argv if argv is not None else [])
+    with profile_session(args, 'check_ajax_nonces'):
+        return run(args)
 
-    has_form_encoded = is_jquery_post or is_fetch_post_form
-    return has_nonce, has_form_encoded
 
+def run(args: argparse.Namespace) -> int:
+    cache = open_cache(args.no_cache, args.cache)
 
-def main() -> int:
-    php_files = read_files_with_suffix(PLUGIN_ROOT, ('.php',))
-    js_files = read_files_with_suffix(PLUGIN_ROOT, ('.js',))
+    root = Path(args.root).resolve()
+    with phase('walk'):
+        php_files = read_files_with_suffix(root, ('.php',))
+        js_files = read_files_with_suffix(root, ('.js',))
 
-    hooks = find_ajax_hooks(php_files)
+    changed: Optional[Set[Path]] = None
+    if args.staged or args.since:
+        try:
+            git_files = filter_files(changed_files(root, args.since, args.staged), ('.php', '.js'), DEFAULT_IGNORES)
+        except GitError as exc:
+            print(f"[ERR] {exc}", file=sys.stderr)
+            return 1
+        if not git_files:
+            print('No changed PHP/JS files. Nothing to check.')
+            return 0
+        # The analysis is cross-file: keep the whole tree (facts for unchanged
+        # files come from the result cache) with the changed files swapped in.
+        php_files = overlay(php_files, [f for f in git_files if f.suffix == '.php'])
+        js_files = overlay(js_files, [f for f in git_files if f.suffix == '.js'])
+        changed = {f.path for f in git_files}
+    return check(php_files, js_files, changed, args.jobs, cache)
+
+
+def check(php_files: List[IndexedFile], js_files: List[IndexedFile], changed: Optional[Set[Path]] = None,
+          jobs: int = 1, cache: Optional[ResultCache] = None) -> int:
+    """Check every hook, or with `changed` only hooks touched by those paths (see affected_hooks)."""
+    with phase('index'):
+        hooks, functions = index_php_files(php_files, jobs, cache)
+        actions = build_js_action_table(js_files, jobs, cache)
+    if changed is not None:
+        total = len(hooks)
+        hooks = affected_hooks(hooks, functions, actions, changed)
+        print(f'Checking {len(hooks)} of {total} AJAX hook(s) affected by changed files.')
+        if not hooks:
+            return 0
     if not hooks:
         print('No wp_ajax_* hooks found. Nothing to check.')
         return 0
@@ -135,49 +356,53 @@ def main() -> int:
     for slug, cb, f, line in hooks:
         print(f" - {slug} -> {cb} ({f}:{line})")
 
-    print('\nChecking server-side nonce usage...')
-    server_results: Dict[str, Tuple[bool, bool]] = {}
-    for slug, cb, f, line in hooks:
-        loc = locate_function_definition(cb, php_files)
-        if not loc:
-            print(f"[FAIL] {slug}: callback '{cb}' definition not found")
-            server_results[slug] = (False, False)
-            any_fail = True
-            continue
-        func_file, func_line, func_text = loc
-        has_check, uses_nonce_field = has_check_ajax_referer(func_text, func_text.find(f'function {cb}('))
-        server_results[slug] = (has_check, uses_nonce_field)
-        if has_check and uses_nonce_field:
-            print(f"[OK]   {slug}: check_ajax_referer present with 'nonce' field ({func_file}:{func_line})")
-        elif has_check:
-            print(f"[WARN] {slug}: check_ajax_referer present but 'nonce' field name not detected ({func_file}:{func_line})")
-        else:
-            print(f"[FAIL] {slug}: check_ajax_referer NOT found in callback ({func_file}:{func_line})")
-            any_fail = True
-
-    print('\nChecking client-side nonce + form-encoded POST...')
-    for slug, _, _, _ in hooks:
-        usages = find_js_usages_for_action(slug, js_files)
-        if not usages:
-            print(f"[WARN] {slug}: No JS usage found for action '{slug}'.")
-            # Not strictly a failure — might be server-only
-            continue
-        # Evaluate all usages; all must pass
-        js_ok = True
-        for uf, uline, utext in usages:
-            has_nonce, has_form = js_usage_has_nonce_and_form_encoding(utext, uline)
-            if has_nonce and has_form:
-                print(f"[OK]   {slug}: JS includes nonce and form-encoded POST near {uf}:{uline}")
+    with phase('server'):
+        print('\nChecking server-side nonce usage...')
+        server_results: Dict[str, Tuple[bool, bool]] = {}
+        for slug, cb, f, line in hooks:
+            loc = locate_function_definition(cb, functions)
+            if not loc:
+                print(f"[FAIL] {slug}: callback '{cb}' definition not found")
+                server_results[slug] = (False, False)
+                any_fail = True
+                continue
+            func_src, func_line, _, fn = loc
+            func_file = func_src.path
+            has_check, uses_nonce_field = has_check_ajax_referer(func_src, fn)
+            server_results[slug] = (has_check, uses_nonce_field)
+            if has_check and uses_nonce_field:
+                print(f"[OK]   {slug}: check_ajax_referer present with 'nonce' field ({func_file}:{func_line})")
+            elif has_check:
+                print(f"[WARN] {slug}: check_ajax_referer present but 'nonce' field name not detected ({func_file}:{func_line})")
             else:
-                js_ok = False
-                if not has_nonce and not has_form:
-                    print(f"[FAIL] {slug}: JS missing nonce and not form-encoded near {uf}:{uline}")
-                elif not has_nonce:
-                    print(f"[FAIL] {slug}: JS missing nonce near {uf}:{uline}")
+                print(f"[FAIL] {slug}: check_ajax_referer NOT found in callback ({func_file}:{func_line})")
+                any_fail = True
+
+    with phase('client'):
+        print('\nChecking client-side nonce + form-encoded POST...')
+        for slug, _, _, _ in hooks:
+            usages = find_js_usages_for_action(slug, actions)
+            if not usages:
+                print(f"[WARN] {slug}: No JS usage found for action '{slug}'.")
+                # Not strictly a failure — might be server-only
+                continue
+            # Evaluate all usages; all must pass
+            js_ok = True
+            for usage_file, uline in usages:
+                uf = usage_file.path
+                has_nonce, has_form = js_usage_has_nonce_and_form_encoding(usage_file, uline)
+                if has_nonce and has_form:
+                    print(f"[OK]   {slug}: JS includes nonce and form-encoded POST near {uf}:{uline}")
                 else:
-                    print(f"[FAIL] {slug}: JS not detected as form-encoded POST near {uf}:{uline}")
-        if not js_ok:
-            any_fail = True
+                    js_ok = False
+                    if not has_nonce and not has_form:
+                        print(f"[FAIL] {slug}: JS missing nonce and not form-encoded near {uf}:{uline}")
+                    elif not has_nonce:
+                        print(f"[FAIL] {slug}: JS missing nonce near {uf}:{uline}")
+                    else:
+                        print(f"[FAIL] {slug}: JS not detected as form-encoded POST near {uf}:{uline}")
+            if not js_ok:
+                any_fail = True
 
     print('\nSummary:')
     if any_fail:
@@ -188,5 +413,5 @@ def main() -> int:
 
 
 if __name__ == '__main__':
-    sys.exit(main())
+    sys.exit(main(sys.argv[1:]))
 
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Git-native file selection for the tools/ checks (--staged / --since REF).
+
+Paths come from `git diff --name-only`; their contents are streamed through a
+single `git cat-file --batch` process instead of being read from the working
+tree one file at a time:
+
+  --staged     files staged for commit; contents are the index versions (`:path`)
+  --since REF  files changed between REF and HEAD (merge-base, as a PR diff);
+               contents are the HEAD versions (`HEAD:path`)
+
+Deleted files are skipped. Entries are returned as IndexedFile objects with
+`from_disk = False`, so they flow through the same scan code as a full walk.
+"""
+
+from __future__ import annotations
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from repo_index import IndexedFile
+
+
+class GitError(RuntimeError):
+    pass
+
+
+def add_git_arguments(ap) -> None:
+    group = ap.add_mutually_exclusive_group()
+    group.add_argument('--staged', action='store_true', help='Only check files staged for commit (index contents)')
+    group.add_argument('--since', metavar='REF', help='Only check files changed between REF and HEAD (HEAD contents)')
+
+
+def _git(root: Path, *args: str) -> bytes:
+    try:
+        proc = subprocess.run(['git', *args], cwd=str(root), stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    except OSError as exc:
+        raise GitError(f'cannot run git: {exc}') from exc
+    if proc.returncode != 0:
+        raise GitError(proc.stderr.decode('utf-8', errors='replace').strip() or f"git {' '.join(args)} failed")
+    return proc.stdout
+
+
+def toplevel(root: Path) -> Path:
+    return Path(_git(root, 'rev-parse', '--show-toplevel').decode('utf-8').strip()).resolve()
+
+
+def changed_paths(root: Path, since: Optional[str] = None, staged: bool = False) -> List[str]:
+    """Top-level-relative paths of added/copied/modified/renamed files, sorted."""
+    args = ['diff', '--name-only', '-z', '--diff-filter=ACMRT']
+    if staged:
+        args.append('--cached')
+    elif since:
+        args.append(f'{since}...HEAD')
+    out = _git(root, *args)
+    return sorted(p for p in out.decode('utf-8', errors='surrogateescape').split('\0') if p)
+
+
+class BlobReader:
+    """One long-running `git cat-file --batch`; read() fetches one object by spec."""
+
+    def __init__(self, root: Path):
+        try:
+            self._proc = subprocess.Popen(['git', 'cat-file', '--batch'], cwd=str(root),
+                                          stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        except OSError as exc:
+            raise GitError(f'cannot run git: {exc}') from exc
+
+    def read(self, spec: str) -> Optional[bytes]:
+        proc = self._proc
+        proc.stdin.write(spec.encode('utf-8', errors='surrogateescape') + b'\n')
+        proc.stdin.flush()
+        header = proc.stdout.readline()
+        if not header or header.rstrip().endswith(b' missing') or header.rstrip().endswith(b' ambiguous'):
+            return None
+        size = int(header.split()[2])
+        data = proc.stdout.read(size)
+        proc.stdout.read(1)  # trailing newline after each object
+        return data
+
+    def close(self) -> None:
+        if self._proc.stdin:
+            self._proc.stdin.close()
+        self._proc.wait()
+
+    def __enter__(self) -> 'BlobReader':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+_CHANGED: Dict[Tuple[Path, Optional[str], bool], List[IndexedFile]] = {}
+
+
+def changed_files(root: Path, since: Optional[str] = None, staged: bool = False) -> List[IndexedFile]:
+    """Changed files under `root`, with contents loaded from git (see module docstring).
+
+    Memoised per process, so several checks run together share one diff and one read.
+    """
+    root = Path(root).resolve()
+    key = (root, since, staged)
+    if key not in _CHANGED:
+        _CHANGED[key] = _load_changed_files(root, since, staged)
+    return list(_CHANGED[key])
+
+
+def _load_changed_files(root: Path, since: Optional[str], staged: bool) -> List[IndexedFile]:
+    top = toplevel(root)
+    rev = '' if staged else 'HEAD'
+    out: List[IndexedFile] = []
+    paths = changed_paths(root, since, staged)
+    if not paths:
+        return out
+    with BlobReader(top) as reader:
+        for rel_top in paths:
+            path = top / rel_top
+            try:
+                rel = path.relative_to(root).as_posix()
+            except ValueError:
+                continue  # outside the tree being checked
+            data = reader.read(f'{rev}:{rel_top}')
+            if data is None:
+                continue
+            out.append(IndexedFile.from_bytes(path, rel, data))
+    return out
+
+
+def overlay(files: List[IndexedFile], changed: List[IndexedFile]) -> List[IndexedFile]:
+    """`files` with entries replaced by their git versions (order kept), followed
+    by changed files missing from the working tree."""
+    by_path: Dict[Path, IndexedFile] = {f.path: f for f in changed}
+    merged = [by_path.pop(f.path, f) for f in files]
+    merged.extend(sorted(by_path.values(), key=lambda f: f.rel))
+    return merged
@@ -0,0 +1,690 @@
+#!/usr/bin/env python3
+"""
+Include graph of the plugin and the lazy-loading manifest read by the
+bootstrap (includes/load-plan.php; used only when PD_LAZY_LOAD is defined as
+true, every file is loaded otherwise).
+
+Professional_Development.php lists the files it loads in `$pd_plugin_files`
+(plain require/include statements are read too). For every PHP file the tool
+records:
+
+  - the files it includes, at file scope or lazily inside a function
+  - what it registers: hooks (add_action/add_filter), shortcodes, REST routes,
+    admin pages (add_menu_page/add_submenu_page) and activation hooks
+  - the functions and classes it defines, and the ones its code refers to
+    (calls, `new X`, `X::`, and string callbacks such as 'callback' => 'fn')
+
+Each registration's callbacks are followed through the functions and classes
+defined in the tree (see tools/route_deps.py for the same walk), and the
+files they reach are the files that registration needs. Registrations map to
+request types:
+
+  rest_api_init                     REST requests; each register_rest_route()
+                                    only needs its own file and callbacks
+  admin_menu, admin_enqueue_scripts wp-admin pages; a menu page's callback
+                                    only on that ?page=
+  wp_ajax_<action>                  admin-ajax.php with that action
+  admin_init                        wp-admin and admin-ajax.php
+  wp_enqueue_scripts, wp_head, ...  front-end pages
+  init, plugins_loaded, shortcodes  every request (shortcodes and the_content
+  and anything else                 also render in REST, AJAX and previews)
+
+The manifest (includes/load-manifest.php) lists, in bootstrap order, the
+files each request type needs. It is PHP returning an array, not JSON, so
+that opcache keeps it compiled instead of decoding it on every request. It is
+generated with --write and checked in; the check fails when it is out of date.
+Bootstrap files that no registration reaches are reported as never reached,
+and PHP files nothing includes are reported as not loaded.
+
+Usage:
+  python3 tools/include_graph.py [--root DIR] [--entry FILE] [--manifest PATH]
+                                 [--write | --graph [PATH]] [--verbose] [--profile [PATH]]
+
+Options:
+  --root DIR, -r DIR   Plugin root (default: repo root)
+  --entry FILE         Bootstrap file, relative to the root (default: Professional_Development.php)
+  --manifest PATH      Load manifest (default: includes/load-manifest.php)
+  --write              Regenerate the manifest instead of checking it
+  --graph [PATH]       Print the include/registration graph as JSON ('-' = stdout)
+  --verbose, -v        Also list the files of each plan and what each file serves
+  --profile [PATH]     Per-phase timings as JSON (see tools/tool_profile.py)
+
+Exit code:
+  - 0 if the manifest is current
+  - 1 if it is out of date or missing, or if the bootstrap cannot be read
+"""
+
+from __future__ import annotations
+import argparse
+import difflib
+import json
+import os
+import posixpath
+import re
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from lint_rest_perf import (CALL_SITE_RE, NOT_CALLS, STRING_RE, blank_comments, match_bracket, php_structure,
+                            split_args, _argument_value)
+from repo_index import IndexedFile, get_index
+from tool_profile import add_profile_arguments, phase, profile_session
+
+
+PLUGIN_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_ENTRY = 'Professional_Development.php'
+DEFAULT_MANIFEST = PLUGIN_ROOT / 'includes' / 'load-manifest.php'
+MANIFEST_VERSION = 1
+BOOTSTRAP_LIST_VAR = 'pd_plugin_files'
+
+INCLUDE_RE = re.compile(r'\b(require_once|require|include_once|include)\b\s*([^;]+);')
+BOOTSTRAP_LIST_RE = re.compile(r'\$' + BOOTSTRAP_LIST_VAR + r'\s*=\s*(\[|array\s*\()')
+REGISTRATION_RE = re.compile(r'\b(add_action|add_filter|add_shortcode|register_rest_route|add_menu_page|'
+                             r'add_submenu_page|add_options_page|add_management_page|register_activation_hook|'
+                             r'register_deactivation_hook)\s*\(')
+CLASS_DEF_RE = re.compile(r'\b(?:class|interface|trait)\s+([A-Za-z_]\w*)[^{;]*\{')
+CLASS_REF_RE = re.compile(r'\bnew\s+\\?([A-Za-z_]\w*)|\b([A-Za-z_]\w*)\s*::|\b(?:instanceof|extends|implements)\s+\\?'
+                          r'([A-Za-z_]\w*)')
+IDENTIFIER_RE = re.compile(r'[A-Za-z_]\w*(?:::\w+)?')
+DIRNAME_RE = re.compile(r'\bdirname\s*\(')
+
+# (callback argument index, slug argument index) of the admin page functions
+PAGE_ARGS = {'add_menu_page': (4, 3), 'add_submenu_page': (5, 4), 'add_options_page': (4, 3),
+             'add_management_page': (4, 3)}
+ADMIN_HOOKS = {'admin_menu', 'network_admin_menu', 'admin_enqueue_scripts', 'admin_head', 'admin_footer',
+               'admin_notices', 'all_admin_notices', 'admin_print_scripts', 'admin_print_styles',
+               'admin_print_footer_scripts', 'current_screen', 'in_admin_header', 'in_admin_footer'}
+ADMIN_HOOK_PREFIXES = ('admin_post_', 'load-', 'admin_head-', 'admin_footer-', 'admin_print_scripts-',
+                       'admin_print_styles-', 'plugin_action_links')
+FRONT_HOOKS = {'wp_enqueue_scripts', 'wp_head', 'wp_footer', 'wp_body_open', 'template_redirect',
+               'template_include', 'body_class', 'login_enqueue_scripts', 'login_form', 'login_head'}
+CONTEXTS = ('front', 'admin', 'ajax', 'rest')
+
+
+class Include(NamedTuple):
+    source: str               # including file (relative to the root)
+    line: int
+    target: Optional[str]     # included file, None when the path is only known at runtime
+    lazy: Optional[str]       # enclosing function, None at file scope
+    expr: str
+
+
+class Registration(NamedTuple):
+    file: IndexedFile
+    line: int
+    kind: str                 # 'hook', 'shortcode', 'route', 'admin-page', 'activation'
+    name: str                 # hook name, shortcode tag, 'namespace/route' or menu slug ('?' if not a literal)
+    contexts: Tuple[str, ...]  # 'always', CONTEXTS, or 'route' / 'admin-page' / 'ajax-action' for the per-name plans
+    span: Tuple[int, int]     # argument list, parentheses included
+    roots: Tuple[int, int]    # part of it naming the callbacks
+    namespace: str = ''       # REST namespace of a route
+
+    @property
+    def key(self) -> str:
+        return f'{self.kind} {self.name}'
+
+
+class Symbol(NamedTuple):
+    file: IndexedFile
+    span: Tuple[int, int]
+
+
+class Graph(NamedTuple):
+    entry: IndexedFile
+    bootstrap: List[str]                 # files loaded by the entry at file scope, in order
+    includes: List[Include]
+    registrations: List[Registration]
+    symbols: Dict[str, Symbol]           # lower-case function / class name -> definition
+    files: Dict[str, IndexedFile]
+
+
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+
+_CODE: Dict[Tuple[Path, str], str] = {}
+
+
+def _code(f: IndexedFile) -> str:
+    """f's text with comments blanked (cached; offsets preserved)."""
+    key = (f.path, f.digest)
+    code = _CODE.get(key)
+    if code is None:
+        code = _CODE[key] = blank_comments(f.text, php_structure(f).comments)
+    return code
+
+
+def _strip_parens(expr: str) -> str:
+    expr = expr.strip()
+    while expr.startswith('(') and match_bracket(expr, 0) == len(expr):
+        expr = expr[1:-1].strip()
+    return expr
+
+
+def _last_assignment(code: str, var: str, before: int) -> Optional[str]:
+    found = list(re.finditer(re.escape(var) + r'\s*=(?!=)\s*([^;]+);', code[:before]))
+    return found[-1].group(1) if found else None
+
+
+def _resolve_dir(f: IndexedFile, root: Path, code: str, expr: str, at: int, depth: int = 0) -> Optional[Path]:
+    """Directory an include prefix such as `dirname(__DIR__) . '/'` or `$plugin_dir .` evaluates to."""
+    ups = len(DIRNAME_RE.findall(expr))
+    if '__DIR__' in expr:
+        base = f.path.parent
+    elif '__FILE__' in expr:
+        base, ups = f.path.parent, max(ups - 1, 0)
+    else:
+        var = re.search(r'\$\w+', expr)
+        if var is None or depth > 3:
+            return root if 'ABSPATH' not in expr and not expr.strip(' .') else None
+        assigned = _last_assignment(code, var.group(0), at)
+        return _resolve_dir(f, root, code, assigned, at, depth + 1) if assigned is not None else None
+    for _ in range(ups):
+        base = base.parent
+    return base
+
+
+def resolve_include(f: IndexedFile, root: Path, code: str, expr: str, at: int, depth: int = 0) -> Optional[str]:
+    """Root-relative path an include expression evaluates to, or None if it is only known at runtime."""
+    expr = _strip_parens(expr)
+    if re.fullmatch(r'\$\w+', expr):
+        assigned = _last_assignment(code, expr, at)
+        return resolve_include(f, root, code, assigned, at, depth + 1) if assigned and depth < 3 else None
+    literals = list(STRING_RE.finditer(expr))
+    if not literals:
+        return None
+    tail = literals[-1]
+    name = tail.group(1) if tail.group(1) is not None else tail.group(2)
+    if '$' in name or expr[tail.end():].strip():
+        return None
+    base = _resolve_dir(f, root, code, expr[:tail.start()], at)
+    if base is None:
+        return None
+    target = Path(posixpath.normpath((base / name.lstrip('/')).as_posix()))
+    try:
+        return target.relative_to(root).as_posix()
+    except ValueError:
+        return None
+
+
+def find_includes(f: IndexedFile, root: Path) -> List[Include]:
+    php = php_structure(f)
+    code = _code(f)
+    out: List[Include] = []
+    for m in INCLUDE_RE.finditer(code):
+        fn = php.enclosing_function(m.start())
+        target = resolve_include(f, root, code, m.group(2), m.start())
+        out.append(Include(f.rel, f.line_of(m.start()), target, fn.name or '{closure}' if fn else None,
+                           ' '.join(m.group(2).split())))
+    return out
+
+
+def bootstrap_list(f: IndexedFile) -> Optional[Tuple[int, List[str]]]:
+    """(line, files) of the `$pd_plugin_files` array in the entry file, if it has one."""
+    code = _code(f)
+    m = BOOTSTRAP_LIST_RE.search(code)
+    if m is None:
+        return None
+    open_at = m.end() - 1
+    close = match_bracket(code, open_at)
+    files = []
+    for span in split_args(code, open_at + 1, close - 1):
+        lit = STRING_RE.fullmatch(code[span[0]:span[1]].strip())
+        if lit:
+            files.append(lit.group(1) if lit.group(1) is not None else lit.group(2))
+    return f.line_of(m.start()), files
+
+
+def hook_contexts(hook: Optional[str]) -> Tuple[str, ...]:
+    if hook is None:
+        return ('always',)
+    if hook.startswith(('wp_ajax_nopriv_', 'wp_ajax_')):
+        return ('ajax-action',)
+    if hook == 'rest_api_init':
+        return ('rest',)
+    if hook == 'admin_init':
+        return ('admin', 'ajax')
+    if hook in ADMIN_HOOKS or hook.startswith(ADMIN_HOOK_PREFIXES):
+        return ('admin',)
+    if hook in FRONT_HOOKS:
+        return ('front',)
+    return ('always',)
+
+
+def find_registrations(f: IndexedFile) -> List[Registration]:
+    code = _code(f)
+    out: List[Registration] = []
+    for m in REGISTRATION_RE.finditer(code):
+        func = m.group(1)
+        open_paren = m.end() - 1
+        close = match_bracket(code, open_paren)
+        args = split_args(code, open_paren + 1, close - 1)
+        line = f.line_of(m.start())
+        span = (open_paren, close)
+        if func == 'register_rest_route':
+            ns = _argument_value(code, args[0], m.start()) if args else None
+            path = _argument_value(code, args[1], m.start()) if len(args) > 1 else None
+            ns = (ns or '?').strip('/')
+            roots = (args[2][0], args[-1][1]) if len(args) > 2 else (close, close)
+            out.append(Registration(f, line, 'route', f"{ns}/{(path or '?').lstrip('/')}", ('route',), span, roots,
+                                    ns))
+        elif func in PAGE_ARGS:
+            cb, slug = PAGE_ARGS[func]
+            if len(args) <= cb:
+                continue
+            name = _argument_value(code, args[slug], m.start()) or '?'
+            out.append(Registration(f, line, 'admin-page', name, ('admin-page',), span, args[cb]))
+        elif len(args) >= 2:
+            name = _argument_value(code, args[0], m.start())
+            if func == 'add_shortcode':
+                out.append(Registration(f, line, 'shortcode', name or '?', ('always',), span, args[1]))
+            elif func.startswith('register_'):
+                out.append(Registration(f, line, 'activation', func[len('register_'):-len('_hook')], ('admin',),
+                                        span, args[1]))
+            else:
+                out.append(Registration(f, line, 'hook', name or '?', hook_contexts(name), span, args[1]))
+    return out
+
+
+def find_symbols(f: IndexedFile, symbols: Dict[str, Symbol]) -> None:
+    """Add the functions and classes defined in `f` (first definition wins)."""
+    for fn in php_structure(f).functions:
+        if fn.name:
+            symbols.setdefault(fn.name.lower(), Symbol(f, (fn.start, fn.end)))
+    code = _code(f)
+    for m in CLASS_DEF_RE.finditer(code):
+        symbols.setdefault(m.group(1).lower(), Symbol(f, (m.start(), match_bracket(code, m.end() - 1))))
+
+
+def build_graph(root: Path, entry_rel: str) -> Graph:
+    php_files = [f for f in get_index(root).files(('.php',)) if not f.rel.startswith('tools/')]
+    files = {f.rel: f for f in php_files}
+    entry = files.get(entry_rel)
+    if entry is None:
+        raise FileNotFoundError(f'{root / entry_rel}: bootstrap file not found')
+    includes: List[Include] = []
+    registrations: List[Registration] = []
+    symbols: Dict[str, Symbol] = {}
+    for f in php_files:
+        includes.extend(find_includes(f, root))
+        registrations.extend(find_registrations(f))
+        find_symbols(f, symbols)
+
+    listed = bootstrap_list(entry)
+    if listed:
+        # the entry's other file-scope includes (the loader itself) always load; the runtime one is the list's loop
+        base = posixpath.dirname(entry_rel)
+        bootstrap = [posixpath.normpath(posixpath.join(base, p)) for p in listed[1]]
+        includes = [i for i in includes if not (i.source == entry_rel and i.lazy is None and i.target is None)]
+        includes.extend(Include(entry_rel, listed[0], rel, None, f'${BOOTSTRAP_LIST_VAR}') for rel in bootstrap)
+    else:
+        bootstrap = list(dict.fromkeys(i.target for i in includes
+                                       if i.source == entry_rel and i.lazy is None and i.target))
+    return Graph(entry, bootstrap, includes, registrations, symbols, files)
+
+
+# ---------------------------------------------------------------------------
+# Reachability and plans
+# ---------------------------------------------------------------------------
+
+class Reach:
+    """Functions/classes referenced from code, followed through their definitions."""
+
+    def __init__(self, graph: Graph):
+        self.g = graph
+        self._nested: Dict[str, List[Tuple[int, int]]] = {}
+        for r in graph.registrations:
+            self._nested.setdefault(r.file.rel, []).append(r.span)
+        self._symbol_refs: Dict[str, Set[str]] = {}
+        self._file_deps: Dict[str, Set[str]] = {}
+
+    def refs(self, f: IndexedFile, a: int, b: int, keep: Optional[Tuple[int, int]] = None,
+             exclude: Iterable[Tuple[int, int]] = ()) -> Set[str]:
+        """Symbols named in f's code[a:b], leaving out nested registrations (other than `keep`)."""
+        code = _code(f)
+        blanks = [s for s in list(self._nested.get(f.rel, ())) + list(exclude)
+                  if s != keep and a <= s[0] and s[1] <= b and s[0] < s[1] and (keep is None or not
+                                                                            (s[0] <= keep[0] and keep[1] <= s[1]))]
+        parts: List[str] = []
+        pos = a
+        for s, e in sorted(blanks):
+            if s < pos:
+                continue
+            parts.append(code[pos:s])
+            parts.append(' ' * (e - s))
+            pos = e
+        parts.append(code[pos:b])
+        text = ''.join(parts)
+        names = {m.group(1).lower() for m in CALL_SITE_RE.finditer(text)} - NOT_CALLS
+        for m in CLASS_REF_RE.finditer(text):
+            names.add((m.group(1) or m.group(2) or m.group(3)).lower())
+        for m in STRING_RE.finditer(text):
+            lit = m.group(1) if m.group(1) is not None else m.group(2)
+            if IDENTIFIER_RE.fullmatch(lit):
+                names.add(lit.split('::', 1)[0].lower())
+        return {n for n in names if n in self.g.symbols}
+
+    def symbols_from(self, roots: Set[str]) -> Set[str]:
+        seen: Set[str] = set()
+        todo = list(roots)
+        while todo:
+            name = todo.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            refs = self._symbol_refs.get(name)
+            if refs is None:
+                sym = self.g.symbols[name]
+                refs = self._symbol_refs[name] = self.refs(sym.file, sym.span[0], sym.span[1])
+            todo.extend(refs - seen)
+        return seen
+
+    def file_scope_deps(self, rel: str) -> Set[str]:
+        """Files whose definitions the file-scope code of `rel` uses (needed whenever it is loaded)."""
+        deps = self._file_deps.get(rel)
+        if deps is None:
+            f = self.g.files[rel]
+            defined = [s.span for s in self.g.symbols.values() if s.file.rel == rel]
+            names = self.refs(f, 0, len(f.text), exclude=defined)
+            deps = self._file_deps[rel] = {self.g.symbols[n].file.rel for n in self.symbols_from(names)}
+        return deps
+
+    def close(self, files: Set[str]) -> Set[str]:
+        out: Set[str] = set()
+        todo = list(files)
+        while todo:
+            rel = todo.pop()
+            if rel in out or rel not in self.g.files:
+                continue
+            out.add(rel)
+            todo.extend(self.file_scope_deps(rel) - out)
+        return out
+
+    def needs(self, reg: Registration, parents: Iterable[Registration] = ()) -> Set[str]:
+        """Files a registration (and the registrations it is nested in) needs."""
+        files = {reg.file.rel}
+        names = self.refs(reg.file, reg.roots[0], reg.roots[1], keep=reg.roots)
+        for p in parents:
+            files.add(p.file.rel)
+            names |= self.refs(p.file, p.roots[0], p.roots[1], keep=p.roots)
+        files |= {self.g.symbols[n].file.rel for n in self.symbols_from(names)}
+        return self.close(files)
+
+
+def parents_of(reg: Registration, graph: Graph) -> List[Registration]:
+    return [p for p in graph.registrations if p.file.rel == reg.file.rel and p is not reg
+            and p.span[0] < reg.span[0] and reg.span[1] <= p.span[1]]
+
+
+class Plans(NamedTuple):
+    contexts: Dict[str, Set[str]]        # 'always', CONTEXTS, 'rest:all' -> files
+    admin_pages: Dict[str, Set[str]]     # slug -> files beyond 'admin'
+    ajax_actions: Dict[str, Set[str]]    # action -> files beyond 'ajax'
+    rest_routes: Dict[str, Set[str]]     # '/namespace/route' regex -> files beyond 'rest'
+    rest_namespaces: Dict[str, bool]     # plugin namespace -> requests narrowed to the matching route
+    serves: Dict[str, List[str]]         # file -> registrations needing it
+    never_reached: List[str]             # bootstrap files no plan needs
+    unknown: List[str]                   # registrations whose name is only known at runtime
+
+
+def build_plans(graph: Graph) -> Plans:
+    reach = Reach(graph)
+    needs: Dict[int, Set[str]] = {}
+    serves: Dict[str, List[str]] = {}
+    unknown: List[str] = []
+    for i, reg in enumerate(graph.registrations):
+        parents = parents_of(reg, graph) if reg.kind == 'route' else []
+        if reg.kind != 'route' and any(r.kind == 'route' and reg.span[0] < r.span[0] and r.span[1] <= reg.span[1]
+                                       and r.file is reg.file for r in graph.registrations):
+            continue  # an rest_api_init callback registering routes: part of each route's plan
+        needs[i] = reach.needs(reg, parents)
+        for rel in needs[i]:
+            serves.setdefault(rel, []).append(reg.key)
+        if reg.name == '?' or '?' in reg.name.split('/'):
+            unknown.append(f'{reg.file.rel}:{reg.line}: {reg.kind} name is only known at runtime')
+
+    contexts: Dict[str, Set[str]] = {'always': set()}
+    for i, files in needs.items():
+        if 'always' in graph.registrations[i].contexts:
+            contexts['always'] |= files
+    for ctx in CONTEXTS:
+        contexts[ctx] = set(contexts['always'])
+        for i, files in needs.items():
+            if ctx in graph.registrations[i].contexts:
+                contexts[ctx] |= files
+
+    admin_pages: Dict[str, Set[str]] = {}
+    ajax_actions: Dict[str, Set[str]] = {}
+    rest_routes: Dict[str, Set[str]] = {}
+    route_ns: Dict[str, str] = {}
+    namespaces: Dict[str, bool] = {}  # namespace -> every route path in it is a literal
+    contexts['rest:all'] = set(contexts['rest'])
+    for i, files in needs.items():
+        reg = graph.registrations[i]
+        if reg.kind == 'admin-page':
+            admin_pages.setdefault(reg.name, set()).update(files - contexts['admin'])
+        elif 'ajax-action' in reg.contexts:
+            action = re.sub(r'^wp_ajax_(?:nopriv_)?', '', reg.name)
+            ajax_actions.setdefault(action, set()).update(files - contexts['ajax'])
+        elif reg.kind == 'route':
+            contexts['rest:all'] |= files
+            known = not reg.name.endswith('/?')
+            namespaces[reg.namespace] = namespaces.get(reg.namespace, True) and known
+            if known:
+                pattern = '/' + reg.name
+                route_ns[pattern] = reg.namespace
+                rest_routes.setdefault(pattern, set()).update(files - contexts['rest'])
+
+    reached = set().union(*contexts.values(), *admin_pages.values(), *ajax_actions.values(), *rest_routes.values())
+    if '?' in namespaces:
+        contexts['rest'] = set(contexts['rest:all'])  # a route in an unknown namespace may serve any REST request
+    namespaces.pop('?', None)
+    rest_routes = {k: v for k, v in rest_routes.items() if namespaces[route_ns[k]]}
+    # only bootstrap files are planned; the entry is always loaded and lazy includes load themselves
+    loadable = set(graph.bootstrap)
+    for table in (contexts, admin_pages, ajax_actions, rest_routes):
+        for key in table:
+            table[key] &= loadable
+    return Plans(contexts, admin_pages, ajax_actions, rest_routes, dict(sorted(namespaces.items())),
+                 {rel: sorted(set(keys)) for rel, keys in serves.items()},
+                 [rel for rel in graph.bootstrap if rel not in reached], unknown)
+
+
+# ---------------------------------------------------------------------------
+# Manifest and reports
+# ---------------------------------------------------------------------------
+
+def _php_string(value: str) -> str:
+    return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def _php_list(files: Iterable[str], indent: str) -> str:
+    items = [_php_string(f) for f in files]
+    if len(items) <= 2:
+        return '[' + ', '.join(items) + ']'
+    return '[\n' + ''.join(f'{indent}    {item},\n' for item in items) + indent + ']'
+
+
+def render_manifest(graph: Graph, plans: Plans) -> str:
+    def ordered(files: Set[str]) -> List[str]:
+        return [rel for rel in graph.bootstrap if rel in files]
+
+    def section(name: str, table: Dict[str, Set[str]]) -> List[str]:
+        lines = [f"    {_php_string(name)} => ["]
+        for key in sorted(table):
+            lines.append(f"        {_php_string(key)} => {_php_list(ordered(table[key]), ' ' * 8)},")
+        return lines + ['    ],']
+
+    lines = [
+        '<?php',
+        '// includes/load-manifest.php',
+        '// Generated by `python3 tools/include_graph.py --write` (make include-graph); do not edit.',
+        '// The plugin files each request type needs, in bootstrap order (see includes/load-plan.php).',
+        "if (!defined('ABSPATH')) exit;",
+        '',
+        'return [',
+        f"    'version' => {MANIFEST_VERSION},",
+        f"    'files' => {_php_list(graph.bootstrap, ' ' * 4)},",
+    ]
+    lines += section('plans', {k: plans.contexts[k] for k in ('always',) + CONTEXTS + ('rest:all',)})
+    lines += section('admin_pages', plans.admin_pages)
+    lines += section('ajax_actions', plans.ajax_actions)
+    lines.append("    'rest_namespaces' => [")
+    lines += [f"        {_php_string(ns)} => {'true' if ok else 'false'}," for ns, ok in plans.rest_namespaces.items()]
+    lines.append('    ],')
+    lines += section('rest_routes', plans.rest_routes)
+    return '\n'.join(lines + ['];']) + '\n'
+
+
+def write_text(path: Path, text: str) -> None:
+    fd, tmp = tempfile.mkstemp(prefix='.' + path.name + '.', dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as out:
+            out.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def not_loaded(graph: Graph) -> List[str]:
+    """PHP files no include reaches (index.php placeholders, uninstall.php and standalone scripts aside)."""
+    loaded = {graph.entry.rel} | {inc.target for inc in graph.includes if inc.target}
+    out = []
+    for rel, f in sorted(graph.files.items()):
+        if (rel in loaded or posixpath.basename(rel) == 'index.php' or 'wp-load.php' in f.text
+                or 'WP_UNINSTALL_PLUGIN' in f.text):
+            continue
+        out.append(rel)
+    return out
+
+
+def graph_document(graph: Graph, plans: Plans) -> dict:
+    files: Dict[str, dict] = {}
+    bootstrap = set(graph.bootstrap)
+    lazy = {inc.target for inc in graph.includes if inc.lazy is not None}
+    for rel in sorted(graph.files):
+        files[rel] = {
+            'loaded': 'bootstrap' if rel in bootstrap else 'lazy' if rel in lazy else
+                      'entry' if rel == graph.entry.rel else 'no',
+            'includes': [{'line': i.line, 'target': i.target, 'lazy': i.lazy, 'expr': i.expr}
+                         for i in graph.includes if i.source == rel],
+            'registers': [{'line': r.line, 'kind': r.kind, 'name': r.name, 'contexts': list(r.contexts)}
+                          for r in graph.registrations if r.file.rel == rel],
+            'defines': sorted(n for n, s in graph.symbols.items() if s.file.rel == rel),
+            'serves': plans.serves.get(rel, []),
+        }
+    return {'entry': graph.entry.rel, 'bootstrap': graph.bootstrap, 'files': files}
+
+
+def print_summary(graph: Graph, plans: Plans, verbose: bool) -> None:
+    total = len(graph.bootstrap)
+    c = plans.contexts
+
+    def widest(base: Set[str], deltas: Dict[str, Set[str]]) -> int:
+        return max((len(base | d) for d in deltas.values()), default=len(base))
+
+    print(f'Bootstrap loads {total} file(s); with the manifest (PD_LAZY_LOAD) a request loads:')
+    print(f"  front end            {len(c['front']):>3}")
+    print(f"  wp-admin             {len(c['admin']):>3} (up to {widest(c['admin'], plans.admin_pages)} on a plugin page)")
+    print(f"  admin-ajax           {len(c['ajax']):>3} (up to {widest(c['ajax'], plans.ajax_actions)} for a plugin action)")
+    print(f"  REST, plugin route   {widest(c['rest'], plans.rest_routes):>3} at most "
+          f"({len(plans.rest_routes)} route(s) in {', '.join(ns for ns, ok in plans.rest_namespaces.items() if ok)})")
+    print(f"  REST, other routes   {len(c['rest']):>3}")
+    print(f"  REST index           {len(c['rest:all']):>3}")
+    if verbose:
+        for name in ('always',) + CONTEXTS + ('rest:all',):
+            print(f'\n[{name}]')
+            for rel in graph.bootstrap:
+                if rel in c[name]:
+                    print(f'  {rel}')
+        print('\nWhat each bootstrap file serves:')
+        for rel in graph.bootstrap:
+            serves = plans.serves.get(rel, [])
+            print(f"  {rel}: {', '.join(serves[:6]) or '-'}{' ...' if len(serves) > 6 else ''}")
+    for rel in plans.never_reached:
+        print(f'[WARN] {rel}: loaded on every request but no hook, route, shortcode or page reaches it',
+              file=sys.stderr)
+    for problem in plans.unknown:
+        print(f'[WARN] {problem}', file=sys.stderr)
+    for inc in graph.includes:
+        if inc.target is None and inc.lazy is None:
+            print(f'[WARN] {inc.source}:{inc.line}: include path only known at runtime: {inc.expr}', file=sys.stderr)
+    orphans = not_loaded(graph)
+    if orphans:
+        print(f"Not loaded by the plugin: {', '.join(orphans)}")
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('-r', '--root', default=str(PLUGIN_ROOT), help='Plugin root (default: repo root)')
+    ap.add_argument('--entry', default=DEFAULT_ENTRY, help='Bootstrap file relative to the root')
+    ap.add_argument('--manifest', help='Load manifest (default: includes/load-manifest.php under --root)')
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument('--write', action='store_true', help='Regenerate the manifest instead of checking it')
+    mode.add_argument('--graph', nargs='?', const='-', metavar='PATH', help='Print the include graph as JSON')
+    ap.add_argument('-v', '--verbose', action='store_true', help='List the files of each plan')
+    add_profile_arguments(ap)
+    args = ap.parse_args(argv if argv is not None else [])
+    with profile_session(args, 'include_graph'):
+        return run(args)
+
+
+def run(args: argparse.Namespace) -> int:
+    root = Path(args.root).resolve()
+    manifest_path = Path(args.manifest) if args.manifest else root / DEFAULT_MANIFEST.relative_to(PLUGIN_ROOT)
+    try:
+        with phase('index'):
+            graph = build_graph(root, args.entry)
+    except FileNotFoundError as exc:
+        print(f'[ERR] {exc}', file=sys.stderr)
+        return 1
+    with phase('plans'):
+        plans = build_plans(graph)
+
+    if args.graph:
+        text = json.dumps(graph_document(graph, plans), indent=2, sort_keys=True) + '\n'
+        if args.graph == '-':
+            sys.stdout.write(text)
+        else:
+            Path(args.graph).write_text(text, encoding='utf-8')
+        return 0
+
+    print_summary(graph, plans, args.verbose)
+    manifest = render_manifest(graph, plans)
+    if args.write:
+        try:
+            write_text(manifest_path, manifest)
+        except OSError as exc:
+            print(f'[ERR] Cannot write {manifest_path}: {exc}', file=sys.stderr)
+            return 1
+        print(f'Wrote {manifest_path}.')
+        return 0
+
+    try:
+        committed = manifest_path.read_text(encoding='utf-8')
+    except FileNotFoundError:
+        committed = ''
+    except OSError as exc:
+        print(f'[ERR] cannot read manifest {manifest_path}: {exc}', file=sys.stderr)
+        return 1
+    if committed == manifest:
+        print(f'Load manifest {manifest_path.name} is current.')
+        return 0
+    diff = list(difflib.unified_diff(committed.splitlines(), manifest.splitlines(), 'committed', 'generated',
+                                     lineterm='', n=1))
+    for line in diff[2:22]:
+        print(f'[ERR] {line}', file=sys.stderr)
+    if len(diff) > 22:
+        print(f'[ERR] ... {len(diff) - 22} more diff line(s)', file=sys.stderr)
+    print('Load manifest is out of date; regenerate it with `make include-graph`.', file=sys.stderr)
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
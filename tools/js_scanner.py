@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+Small linear-time JavaScript scanner for the tools/ checks.
+
+It walks a file once, skipping strings, template literals (including nested
+`${...}` expressions), comments and regex literals, and matches brackets so
+request call expressions -- fetch(...), jQuery.post(...), $.ajax(...) -- can
+be found together with their argument and option-object spans. This replaces
+chained `[\\s\\S]*?` regexes, which backtrack badly on large bundles.
+
+The same pass records function spans (declarations, methods, function
+expressions and arrow functions, with the call they are passed to, if any)
+for tools/request_waterfall.py.
+
+Usage:
+  from js_scanner import scan_js
+  js = scan_js(text)
+  for call in js.calls:
+      opts = js.options(call)          # top-level keys of the {...} argument
+      fn = js.enclosing_function(call.start)
+      print(call.callee, opts.get('method'), fn.name if fn else None)
+
+`minify_js` uses the same lexing rules to drop comments and indentation for
+tools/asset_weights.py bundles.
+"""
+
+from __future__ import annotations
+import re
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+# Callees treated as HTTP request calls
+REQUEST_CALLEES = ('fetch', 'jQuery.post', '$.post', 'jQuery.ajax', '$.ajax', 'jQuery.get', '$.get',
+                   'wp.apiFetch', 'apiFetch')
+
+
+class JsCall(NamedTuple):
+    callee: str                      # e.g. 'fetch', 'jQuery.post', 'x.post'
+    start: int                       # offset of the callee
+    open_paren: int                  # offset of '('
+    end: int                         # offset just past the matching ')'
+    args: Tuple[Tuple[int, int], ...]  # top-level argument spans (start, end), stripped
+
+
+_SIG_RE = re.compile(r"""'|"|`|//|/\*|/|[()\[\]{},;]|=>|[A-Za-z_$][\w$]*(?:\s*\.\s*[A-Za-z_$][\w$]*)*(?=\s*\()""")
+_SQ_BODY_RE = re.compile(r"(?:[^'\\\n]|\\.)*'?", re.DOTALL)
+_DQ_BODY_RE = re.compile(r'(?:[^"\\\n]|\\.)*"?', re.DOTALL)
+_TPL_CHUNK_RE = re.compile(r'(?:[^`\\$]|\\.|\$(?!\{))*', re.DOTALL)
+_REGEX_BODY_RE = re.compile(r'(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])*/[a-z]*')
+_LINE_COMMENT_END_RE = re.compile(r'\n')
+_KEY_RE = re.compile(r"""\s*(?:(['"])(.*?)\1|([A-Za-z_$][\w$]*))\s*(:)?""", re.DOTALL)
+# After these characters/keywords a '/' starts a regex literal rather than division
+_REGEX_PREV_CHARS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_PREV_WORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void', 'throw', 'yield', 'await'}
+_SPACE_RE = re.compile(r'\s+')
+_LEX_RE = re.compile(r"""'|"|`|//|/\*|/""")
+_LINE_BREAK_RE = re.compile(r'[ \t]*(?:\r?\n[ \t]*)+')
+_BLANKS_RE = re.compile(r'[ \t]+')
+# `name(` that is a declaration or a statement keyword, not a call
+_NOT_CALLEES = {'if', 'for', 'while', 'switch', 'catch', 'function', 'return', 'typeof', 'with'}
+_DECL_BEFORE_RE = re.compile(r'\bfunction\s*\*?\s*$')
+
+
+class JsFunction(NamedTuple):
+    name: str                        # '' for an anonymous function not assigned to a name
+    start: int                       # offset of `async` / `function` / the method name / the parameters
+    params: int                      # offset of '(' (or of the single parameter of `x => ...`)
+    body_start: int                  # offset of '{', or of the expression of `x => expr`
+    end: int                         # offset just past the body
+    is_async: bool
+    # (callee's last name, offset of its '(', argument index) when passed directly as a call argument:
+    # ('addEventListener', 812, 1) for `el.addEventListener('click', () => {...})`
+    arg_of: Optional[Tuple[str, int, int]]
+
+
+_TRAILING_IDENT_RE = re.compile(r'([A-Za-z_$][\w$]*)\s*$')
+# `name: function`, `name = async () =>` before an anonymous function
+_NAME_BEFORE_RE = re.compile(r'([A-Za-z_$][\w$]*)\s*(?::|=(?!=))\s*$')
+_METHOD_PREFIXES = {'get', 'set', 'static'}
+
+
+class JsStructure:
+    """Call expressions (all named calls, sorted by start) and functions of one JS file."""
+
+    def __init__(self, text: str, calls: List[JsCall], functions: Optional[List[JsFunction]] = None,
+                 brackets: Optional[Dict[int, int]] = None):
+        self.text = text
+        self.calls = calls
+        self._starts = [c.start for c in calls]
+        self.functions = functions or []   # sorted by body_start
+        self._bodies = [fn.body_start for fn in self.functions]
+        self.brackets = brackets or {}     # '(' / '[' / '{' offset -> offset just past its closing bracket
+
+    def enclosing_function(self, offset: int) -> Optional[JsFunction]:
+        """Innermost function whose body contains `offset`."""
+        for i in range(bisect_right(self._bodies, offset) - 1, -1, -1):
+            fn = self.functions[i]
+            if offset < fn.end:
+                return fn
+        return None
+
+    def calls_between(self, start: int, end: int) -> List[JsCall]:
+        """Calls whose callee starts in [start, end)."""
+        i = bisect_left(self._starts, start)
+        j = bisect_left(self._starts, end)
+        return self.calls[i:j]
+
+    def request_calls(self) -> List[JsCall]:
+        return [c for c in self.calls if is_request_call(c)]
+
+    def arg_text(self, call: JsCall, i: int) -> str:
+        a, b = call.args[i]
+        return self.text[a:b]
+
+    def options(self, call: JsCall) -> Dict[str, str]:
+        """Top-level `key: value` pairs of the last object-literal argument (value as source text)."""
+        for a, b in reversed(call.args):
+            if self.text.startswith('{', a):
+                return object_entries(self.text, a, b)
+        return {}
+
+
+def is_request_call(call: JsCall) -> bool:
+    return call.callee in REQUEST_CALLEES or call.callee.endswith('.post') or call.callee.endswith('.ajax')
+
+
+def object_entries(text: str, start: int, end: int) -> Dict[str, str]:
+    """Split the object literal text[start:end] ('{...}') into top-level key -> value source."""
+    return {key: text[a:b] for key, (a, b) in object_spans(text, start, end).items()}
+
+
+def object_spans(text: str, start: int, end: int) -> Dict[str, Tuple[int, int]]:
+    """Top-level key -> value span of the object literal text[start:end] ('{...}')."""
+    spans: Dict[str, Tuple[int, int]] = {}
+    for a, b in _split_top_level(text, start + 1, end - 1):
+        m = _KEY_RE.match(text, a, b)
+        if not m:
+            continue
+        key = m.group(2) if m.group(1) else m.group(3)
+        if key is None:
+            continue
+        if m.group(4):
+            spans[key] = _strip(text, m.end(), b)
+        else:
+            g = 2 if m.group(1) else 3
+            spans[key] = (m.start(g), m.end(g))  # shorthand property `{ headers }`
+    return spans
+
+
+def _split_top_level(text: str, start: int, end: int) -> List[Tuple[int, int]]:
+    """Comma-separated top-level spans of text[start:end] (brackets and strings respected)."""
+    spans: List[Tuple[int, int]] = []
+    depth = 0
+    seg = start
+    pos = start
+    while pos < end:
+        m = _SIG_RE.search(text, pos, end)
+        if not m:
+            break
+        tok = m.group(0)
+        s = m.start()
+        if tok in ("'", '"', '`', '//', '/*', '/'):
+            pos = _skip(text, s, tok)
+            continue
+        if tok in '([{':
+            depth += 1
+        elif tok in ')]}':
+            depth -= 1
+        elif tok == ',' and depth == 0:
+            spans.append(_strip(text, seg, s))
+            seg = s + 1
+        pos = m.end()
+    tail = _strip(text, seg, end)
+    if tail[1] > tail[0]:
+        spans.append(tail)
+    return [sp for sp in spans if sp[1] > sp[0]]
+
+
+def _strip(text: str, a: int, b: int) -> Tuple[int, int]:
+    while a < b and text[a].isspace():
+        a += 1
+    while b > a and text[b - 1].isspace():
+        b -= 1
+    return a, b
+
+
+def _regex_allowed(text: str, s: int) -> bool:
+    i = s - 1
+    while i >= 0 and text[i].isspace():
+        i -= 1
+    if i < 0:
+        return True
+    ch = text[i]
+    if ch in _REGEX_PREV_CHARS:
+        return True
+    if ch.isalpha():
+        j = i
+        while j >= 0 and (text[j].isalnum() or text[j] in '_$'):
+            j -= 1
+        return text[j + 1:i + 1] in _REGEX_PREV_WORDS
+    return False
+
+
+def _skip(text: str, s: int, tok: str) -> int:
+    """Offset just past the string/comment/regex/template starting at s."""
+    n = len(text)
+    if tok == "'":
+        return _SQ_BODY_RE.match(text, s + 1).end()
+    if tok == '"':
+        return _DQ_BODY_RE.match(text, s + 1).end()
+    if tok == '//':
+        e = _LINE_COMMENT_END_RE.search(text, s)
+        return n if not e else e.start()
+    if tok == '/*':
+        e = text.find('*/', s + 2)
+        return n if e < 0 else e + 2
+    if tok == '/':
+        if _regex_allowed(text, s):
+            m = _REGEX_BODY_RE.match(text, s + 1)
+            if m:
+                return m.end()
+        return s + 1
+    # template literal: chunks separated by ${ expr } (expressions may nest)
+    pos = s + 1
+    while pos < n:
+        pos = _TPL_CHUNK_RE.match(text, pos).end()
+        if pos >= n:
+            return n
+        if text[pos] == '`':
+            return pos + 1
+        # at '${': skip a balanced expression
+        depth = 0
+        pos += 1
+        while pos < n:
+            m = _SIG_RE.search(text, pos)
+            if not m:
+                return n
+            t = m.group(0)
+            if t in ("'", '"', '`', '//', '/*', '/'):
+                pos = _skip(text, m.start(), t)
+                continue
+            if t == '{':
+                depth += 1
+            elif t == '}':
+                depth -= 1
+                if depth == 0:
+                    pos = m.end()
+                    break
+            pos = m.end()
+    return n
+
+
+def _prev_char(text: str, i: int) -> int:
+    """Offset of the last non-space character before i, or -1."""
+    i -= 1
+    while i >= 0 and text[i].isspace():
+        i -= 1
+    return i
+
+
+def _trailing_word(text: str, end: int) -> Optional['re.Match']:
+    return _TRAILING_IDENT_RE.search(text, max(0, end - 64), end)
+
+
+def _function_header(text: str, name: str, start: int, params: int, stack: list
+                     ) -> Tuple[str, int, int, bool, Optional[Tuple[str, int, int]]]:
+    w = _trailing_word(text, start)
+    is_async = bool(w and w.group(1) == 'async')
+    if is_async:
+        start = w.start(1)
+    if not name:
+        n = _NAME_BEFORE_RE.search(text, max(0, start - 96), start)
+        name = n.group(1) if n else ''
+    arg_of = None
+    if stack and stack[-1][0] == '(' and not text[stack[-1][4][-1]:start].strip():
+        _, callee, _, open_off, arg_starts = stack[-1]
+        if callee is None:
+            # chained `foo().then(` (the scan skips names after '.'), else a grouping paren
+            w = _trailing_word(text, open_off)
+            j = _prev_char(text, w.start(1)) if w else -1
+            callee = w.group(1) if w and j >= 0 and text[j] == '.' else ''
+        arg_of = (callee.rsplit('.', 1)[-1], open_off, len(arg_starts) - 1)
+    return name, start, params, is_async, arg_of
+
+
+def _arrow_header(text: str, arrow: int, closes: Dict[int, int], stack: list):
+    i = _prev_char(text, arrow)
+    if i < 0:
+        return None
+    if text[i] == ')':
+        params = closes.get(i)
+        if params is None:
+            return None
+    else:
+        w = _trailing_word(text, i + 1)
+        if not w:
+            return None
+        params = w.start(1)
+    return _function_header(text, '', params, params, stack)
+
+
+def _block_header(text: str, brace: int, closes: Dict[int, int], stack: list):
+    """Header of the function whose body starts at the '{' at `brace`, or None for other blocks."""
+    i = _prev_char(text, brace)
+    if i < 0 or text[i] != ')':
+        return None
+    params = closes.get(i)
+    if params is None:
+        return None
+    w = _trailing_word(text, params)
+    if not w:
+        return None
+    word, ws = w.group(1), w.start(1)
+    if word == 'function':
+        return _function_header(text, '', ws, params, stack)
+    if word in _NOT_CALLEES:
+        return None
+    d = _DECL_BEFORE_RE.search(text, max(0, ws - 16), ws)
+    if d:
+        return _function_header(text, word, d.start(), params, stack)
+    if ws > 0 and text[ws - 1] == '.':
+        return None
+    # method shorthand: `name() {`, `async name() {`, `get name() {`
+    p = _trailing_word(text, ws)
+    start = p.start(1) if p and p.group(1) in _METHOD_PREFIXES else ws
+    return _function_header(text, word, start, params, stack)
+
+
+def literal_end(text: str, s: int) -> int:
+    """Offset just past the string, template literal, comment or regex literal starting at s."""
+    tok = '/*' if text.startswith('/*', s) else '//' if text.startswith('//', s) else text[s]
+    return _skip(text, s, tok)
+
+
+def blank_comments(text: str) -> str:
+    """`text` with comments replaced by spaces (line breaks kept), so offsets and line numbers still match."""
+    out: List[str] = []
+    pos = 0
+    n = len(text)
+    while pos < n:
+        m = _LEX_RE.search(text, pos)
+        if not m:
+            break
+        s = m.start()
+        end = _skip(text, s, m.group(0))
+        if m.group(0) in ('//', '/*'):
+            out.append(text[pos:s])
+            out.append(''.join(ch if ch == '\n' else ' ' for ch in text[s:end]))
+        else:
+            out.append(text[pos:end])
+        pos = max(end, s + 1)
+    out.append(text[pos:])
+    return ''.join(out)
+
+
+def scan_js(text: str) -> JsStructure:
+    calls: List[JsCall] = []
+    functions: List[JsFunction] = []
+    # bracket stack entries: (char, callee, callee_start, open_offset, arg_starts)
+    stack: List[Tuple[str, Optional[str], int, int, List[int]]] = []
+    closes: Dict[int, int] = {}       # ')' offset -> '(' offset
+    brackets: Dict[int, int] = {}     # any opening bracket -> offset just past its closing one
+    headers: Dict[int, tuple] = {}    # '{' offset -> header of the function it opens
+    arrows: List[Tuple[int, tuple, int]] = []  # open `x => expr` bodies: (stack depth, header, body start)
+    pending: Optional[Tuple[str, int]] = None
+    n = len(text)
+    pos = 0
+
+    def close_arrows(at: int) -> None:
+        depth = len(stack)
+        while arrows and arrows[-1][0] == depth:
+            _, (name, start, params, is_async, arg_of), body = arrows.pop()
+            functions.append(JsFunction(name, start, params, body, at, is_async, arg_of))
+
+    while pos < n:
+        m = _SIG_RE.search(text, pos)
+        if not m:
+            break
+        tok = m.group(0)
+        s = m.start()
+        if tok in ("'", '"', '`', '//', '/*', '/'):
+            pos = _skip(text, s, tok)
+            pending = None
+            continue
+        if tok == '(':
+            if pending is not None:
+                stack.append(('(', pending[0], pending[1], s, [s + 1]))
+                pending = None
+            else:
+                stack.append(('(', None, s, s, [s + 1]))
+        elif tok in '[{':
+            if tok == '{' and s not in headers:
+                header = _block_header(text, s, closes, stack)
+                if header is not None:
+                    headers[s] = header
+            stack.append((tok, None, s, s, []))
+            pending = None
+        elif tok in ')]}':
+            close_arrows(s)
+            if stack:
+                ch, callee, cstart, open_off, arg_starts = stack.pop()
+                brackets[open_off] = s + 1
+                if ch == '(':
+                    closes[s] = open_off
+                    if callee is not None:
+                        bounds = arg_starts + [s + 1]
+                        args = tuple(sp for sp in (_strip(text, a, b - 1) for a, b in zip(bounds, bounds[1:]))
+                                     if sp[1] > sp[0])
+                        calls.append(JsCall(callee, cstart, open_off, s + 1, args))
+                elif ch == '{' and cstart in headers:
+                    name, start, params, is_async, arg_of = headers.pop(cstart)
+                    functions.append(JsFunction(name, start, params, cstart, s + 1, is_async, arg_of))
+            pending = None
+        elif tok == ',':
+            close_arrows(s)
+            if stack and stack[-1][0] == '(':
+                stack[-1][4].append(s + 1)
+        elif tok == ';':
+            close_arrows(s)
+            pending = None
+        elif tok == '=>':
+            header = _arrow_header(text, s, closes, stack)
+            body = s + 2
+            while body < n and text[body].isspace():
+                body += 1
+            if header is not None:
+                if text.startswith('{', body):
+                    headers[body] = header
+                else:
+                    arrows.append((len(stack), header, body))
+            pending = None
+        else:
+            # identifier chain directly followed by '('
+            if s > 0 and text[s - 1] in '.':
+                pos = m.end()
+                continue
+            name = _SPACE_RE.sub('', tok)
+            if name in _NOT_CALLEES or _DECL_BEFORE_RE.search(text, max(0, s - 16), s):
+                pending = None
+            else:
+                pending = (name, s)
+            pos = m.end()
+            continue
+        pos = m.end()
+    for _, (name, start, params, is_async, arg_of), body in arrows:
+        functions.append(JsFunction(name, start, params, body, n, is_async, arg_of))
+
+    calls.sort(key=lambda c: c.start)
+    functions.sort(key=lambda fn: fn.body_start)
+    return JsStructure(text, calls, functions, brackets)
+
+
+def minify_js(text: str) -> str:
+    """Conservative minification: comments, indentation and blank lines removed.
+
+    Line breaks are kept (one per line of code), so automatic semicolon
+    insertion sees the same statements; strings, template literals and regex
+    literals are copied verbatim. /*! ... */ comments (licenses) are kept.
+    """
+    out: List[str] = []
+    n = len(text)
+    pos = 0
+
+    def code(segment: str) -> None:
+        segment = _BLANKS_RE.sub(' ', _LINE_BREAK_RE.sub('\n', segment))
+        if segment.startswith('\n') and out and out[-1].endswith(' '):
+            out[-1] = out[-1].rstrip(' ')
+        if out and out[-1].endswith('\n'):
+            segment = segment.lstrip(' \n')
+        elif not out:
+            segment = segment.lstrip(' \n')
+        if segment:
+            out.append(segment)
+
+    while pos < n:
+        m = _LEX_RE.search(text, pos)
+        if not m:
+            break
+        s = m.start()
+        tok = m.group(0)
+        code(text[pos:s])
+        end = _skip(text, s, tok)
+        if tok == '//':
+            pass
+        elif tok == '/*':
+            if text.startswith('/*!', s):
+                out.append(text[s:end])
+            elif '\n' in text[s:end]:
+                code('\n')
+            else:
+                code(' ')
+        elif tok == '/' and end == s + 1:
+            code('/')  # division
+        else:
+            out.append(text[s:end])
+        pos = end
+    code(text[pos:])
+    result = ''.join(out).rstrip()
+    return result + '\n' if result else ''
@@ -0,0 +1,631 @@
+#!/usr/bin/env python3
+"""
+Static performance lint for the plugin's REST handlers.
+
+Every register_rest_route(...) call in the tree is resolved to its callback
+(a function name, [ $obj, 'method' ] or an inline closure) and the callback's
+body (brace-matched, comments skipped; see tools/php_lexer.py) is checked for:
+
+  full-table-pagination  a procedure called with no filter (`CALL x()` or only
+                         NULL arguments) whose rows are then paged in PHP with
+                         array_slice (usually after usort/array_filter)
+  unbounded-call         the same kind of full-table CALL with no paging at all
+  query-in-loop          CALL / $wpdb / ->query() / aslta_signed_query() inside
+                         a for/foreach/while/do body, directly or through a
+                         function that (transitively) runs one
+  repeated-json-decode   json_decode() of the same payload expression twice
+                         without the payload being reassigned in between
+  missing-per-page-cap   `per_page` read from the request with no upper bound
+                         (no min(), comparison against a constant, or
+                         'maximum' in the route's args schema)
+
+Only code in the callback itself is checked for the CALL and json_decode rules;
+query-in-loop also follows calls to other functions defined in the tree.
+
+Findings already listed in the baseline file are accepted, so the check only
+fails on new ones. Baseline entries are matched by rule, file, function and
+the text of the flagged line (not the line number), so unrelated edits do not
+invalidate them.
+
+Usage:
+  python3 tools/lint_rest_perf.py [--root DIR] [--baseline PATH | --no-baseline] [--all]
+                                  [--format text|jsonl|sarif] [--output PATH]
+                                  [--staged | --since REF] [--profile [PATH]]
+  python3 tools/lint_rest_perf.py --update-baseline
+
+Options:
+  --root DIR, -r DIR   Plugin root to check (default: repo root)
+  --baseline PATH      Accepted findings (default: tools/lint_rest_perf_baseline.json)
+  --no-baseline        Report every finding as new
+  --update-baseline    Rewrite the baseline with the current findings and exit 0
+  --all                Also report findings that are in the baseline
+  --format FMT         text (default), jsonl or sarif (SARIF results carry baselineState)
+  --output PATH        Where to write the findings (default: '-' = stdout)
+  --staged / --since   Only check routes whose registration or callback is in a
+                       changed file (the function table still covers the tree)
+  --profile [PATH]     Per-phase timings as JSON (see tools/tool_profile.py)
+
+Exit code:
+  - 0 if no finding outside the baseline
+  - 1 if new findings were reported or the baseline is unreadable
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import tool_profile
+from git_source import GitError, add_git_arguments, changed_files, overlay
+from php_lexer import FunctionSpan, PhpStructure, parse_php
+from repo_index import DEFAULT_IGNORES, IndexedFile, filter_files, get_index
+from stream_output import add_format_argument, open_writer, sarif_location, sarif_rule
+from tool_profile import add_profile_arguments, phase, profile_session
+
+
+PLUGIN_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'lint_rest_perf_baseline.json'
+BASELINE_VERSION = 1
+
+RULES: Dict[str, str] = {
+    'full-table-pagination': 'Full-table procedure call paged in PHP instead of in SQL',
+    'unbounded-call': 'Procedure call with no filter or LIMIT returns every row',
+    'query-in-loop': 'Database query inside a loop (one round trip per iteration)',
+    'repeated-json-decode': 'Same JSON payload decoded more than once',
+    'missing-per-page-cap': 'per_page request parameter has no upper bound',
+}
+
+REGISTER_RE = re.compile(r'\bregister_rest_route\s*\(')
+CALLBACK_RE = re.compile(r"""['"]callback['"]\s*=>\s*""")
+CALLBACK_NAME_RE = re.compile(r"""(['"])([A-Za-z_\\][\w\\]*)\1""")
+CALLBACK_METHOD_RE = re.compile(r"""(?:\[|array\s*\()\s*[^,\]]+,\s*(['"])([A-Za-z_]\w*)\1""")
+STRING_RE = re.compile(r"""'((?:[^'\\]|\\.)*)'|"((?:[^"\\]|\\.)*)\"""")
+PER_PAGE_ARG_RE = re.compile(r"""['"]per_page['"]\s*=>\s*(?:\[|array\s*\()""")
+METHODS_KEY_RE = re.compile(r"""\s*(['"])methods\1\s*=>\s*""")
+SERVER_CONSTANT_RE = re.compile(r'\bWP_REST_Server\s*::\s*(\w+)')
+# WP_REST_Server method constants
+SERVER_METHODS = {
+    'READABLE': 'GET',
+    'CREATABLE': 'POST',
+    'EDITABLE': 'POST, PUT, PATCH',
+    'DELETABLE': 'DELETE',
+    'ALLMETHODS': 'GET, POST, PUT, PATCH, DELETE',
+}
+HTTP_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+FULL_CALL_RE = re.compile(r'\bCALL\s+(?:[%\w`]+\.)?([\w`]+)\s*\(\s*(?:NULL\s*(?:,\s*NULL\s*)*)?\)')
+QUERY_RE = re.compile(r'\bCALL\s+[%\w.`]+\s*\('
+                      r'|\$wpdb\s*->\s*(?:query|get_results|get_row|get_var|get_col|insert|update|delete|replace)\s*\('
+                      r'|->\s*(?:query|multi_query|real_query)\s*\('
+                      r'|\baslta_signed_query\s*\(')
+CALL_SITE_RE = re.compile(r'(?<![\w$>:\\])([A-Za-z_]\w*)\s*\(')
+NOT_CALLS = {'if', 'elseif', 'for', 'foreach', 'while', 'switch', 'catch', 'function', 'fn', 'array', 'list',
+             'isset', 'empty', 'unset', 'return', 'echo', 'print', 'require', 'require_once', 'include',
+             'include_once', 'new', 'match', 'use', 'and', 'or', 'not', 'exit', 'die'}
+LOOP_RE = re.compile(r'\b(foreach|for|while|do)\b\s*(?=[({:])', re.IGNORECASE)
+ARRAY_SLICE_RE = re.compile(r'\barray_slice\s*\(')
+SORT_RE = re.compile(r'\b(?:usort|uasort|uksort|array_multisort|array_filter)\s*\(')
+JSON_DECODE_RE = re.compile(r'\bjson_decode\s*\(')
+VARIABLE_RE = re.compile(r'\$\w+')
+PER_PAGE_READ_RE = re.compile(r"""->\s*get_param\s*\(\s*['"]per_page['"]\s*\)|\$\w+\s*\[\s*['"]per_page['"]\s*\]""")
+
+
+class Route(NamedTuple):
+    file: IndexedFile
+    line: int
+    route: str        # 'namespace/route'
+    callback: str     # function name, or '{closure}'
+    span: Tuple[int, int]  # register_rest_route(...) argument span in `file`
+    methods: Tuple[str, ...] = ('GET',)  # HTTP methods of the endpoint (WordPress defaults to GET)
+
+
+class Finding(NamedTuple):
+    rule: str
+    path: str         # relative to the root
+    line: int
+    function: str
+    route: str
+    message: str
+    snippet: str      # the flagged line, stripped
+
+    def key(self) -> Tuple[str, str, str, str]:
+        return self.rule, self.path, self.function, self.snippet
+
+
+_PHP_STRUCTURES: Dict[Tuple[Path, str], PhpStructure] = {}
+
+
+def php_structure(f: IndexedFile) -> PhpStructure:
+    key = (f.path, f.digest)
+    php = _PHP_STRUCTURES.get(key)
+    if php is None:
+        prof = tool_profile.ACTIVE
+        t0 = time.perf_counter() if prof is not None else 0.0
+        php = _PHP_STRUCTURES[key] = parse_php(f.text)
+        if prof is not None:
+            prof.pattern('php_lexer.parse_php', time.perf_counter() - t0, len(php.functions))
+            prof.file(str(f.path), time.perf_counter() - t0, f.size)
+    return php
+
+
+def blank_comments(text: str, comments: List[Tuple[int, int]], start: int = 0, end: Optional[int] = None) -> str:
+    """text[start:end] with comments replaced by spaces (offsets preserved)."""
+    end = len(text) if end is None else end
+    parts: List[str] = []
+    pos = start
+    for cs, ce in comments:
+        if ce <= start or cs >= end:
+            continue
+        cs, ce = max(cs, start), min(ce, end)
+        parts.append(text[pos:cs])
+        parts.append(' ' * (ce - cs))
+        pos = ce
+    parts.append(text[pos:end])
+    return ''.join(parts)
+
+
+def match_bracket(code: str, i: int) -> int:
+    """Offset just past the bracket closing the one at code[i]; strings are skipped."""
+    depth = 0
+    n = len(code)
+    while i < n:
+        ch = code[i]
+        if ch in '\'"':
+            m = STRING_RE.match(code, i)
+            i = m.end() if m else i + 1
+            continue
+        if ch in '([{':
+            depth += 1
+        elif ch in ')]}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return n
+
+
+def split_args(code: str, a: int, b: int) -> List[Tuple[int, int]]:
+    """Top-level comma-separated spans of code[a:b]."""
+    spans: List[Tuple[int, int]] = []
+    seg = a
+    i = a
+    while i < b:
+        ch = code[i]
+        if ch in '\'"':
+            m = STRING_RE.match(code, i)
+            i = m.end() if m else i + 1
+            continue
+        if ch in '([{':
+            i = match_bracket(code, i)
+            continue
+        if ch == ',':
+            spans.append((seg, i))
+            seg = i + 1
+        i += 1
+    spans.append((seg, b))
+    return [(s, e) for s, e in spans if code[s:e].strip()]
+
+
+def _literal(code: str, span: Tuple[int, int]) -> Optional[str]:
+    m = STRING_RE.fullmatch(code[span[0]:span[1]].strip())
+    if not m:
+        return None
+    return m.group(1) if m.group(1) is not None else m.group(2)
+
+
+def _argument_value(code: str, span: Tuple[int, int], before: int) -> Optional[str]:
+    """String literal at `span`, or the literal last assigned to the variable there."""
+    value = _literal(code, span)
+    var = code[span[0]:span[1]].strip()
+    if value is None and VARIABLE_RE.fullmatch(var):
+        assigned = list(re.finditer(re.escape(var) + r'\s*=\s*(' + STRING_RE.pattern + ')', code[:before]))
+        if assigned:
+            m = assigned[-1]
+            value = m.group(2) if m.group(2) is not None else m.group(3)
+    return value
+
+
+def _endpoint_spans(code: str, args: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Spans of the endpoint arrays in register_rest_route()'s third argument."""
+    if len(args) < 3:
+        return []
+    s, e = args[2]
+    while s < e and code[s].isspace():
+        s += 1
+    opener = re.match(r'\[|array\s*\(', code[s:e])
+    if not opener:
+        return [(s, e)]
+    inner = split_args(code, s + opener.end(), match_bracket(code, s + opener.end() - 1) - 1)
+    nested = [(a, b) for a, b in inner if re.match(r'\s*(?:\[|array\s*\()', code[a:b])]
+    return nested or [(s, e)]
+
+
+def endpoint_methods(code: str, span: Tuple[int, int]) -> Tuple[str, ...]:
+    """HTTP methods named by the 'methods' key of the endpoint array at `span`."""
+    s, e = span
+    opener = re.match(r'\s*(?:\[|array\s*\()', code[s:e])
+    if opener:
+        s += opener.end()
+        e = match_bracket(code, s - 1) - 1
+    for a, b in split_args(code, s, e):
+        key = METHODS_KEY_RE.match(code, a, b)
+        if not key:
+            continue
+        value = code[key.end():b]
+        names = [SERVER_METHODS.get(c, '') for c in SERVER_CONSTANT_RE.findall(value)]
+        names += [m.group(1) if m.group(1) is not None else m.group(2) for m in STRING_RE.finditer(value)]
+        found = {part.strip().upper() for name in names for part in name.split(',')}
+        methods = tuple(m for m in HTTP_METHODS if m in found)
+        if methods:
+            return methods
+    return ('GET',)
+
+
+# ---------------------------------------------------------------------------
+# Index: routes and functions
+# ---------------------------------------------------------------------------
+
+def find_routes(f: IndexedFile) -> List[Route]:
+    php = php_structure(f)
+    code = blank_comments(f.text, php.comments)
+    routes: List[Route] = []
+    for m in REGISTER_RE.finditer(code):
+        open_paren = m.end() - 1
+        close = match_bracket(code, open_paren)
+        args = split_args(code, open_paren + 1, close - 1)
+        ns = _argument_value(code, args[0], m.start()) if args else None
+        path = _argument_value(code, args[1], m.start()) if len(args) > 1 else None
+        route = f"{ns or '?'}/{(path or '?').lstrip('/')}"
+        endpoints = _endpoint_spans(code, args)
+        # one register_rest_route() may list several endpoints, each with its callback
+        for cb in CALLBACK_RE.finditer(code, open_paren, close):
+            start = cb.end()
+            name = None
+            mn = CALLBACK_NAME_RE.match(code, start)
+            if mn:
+                name = mn.group(2).rsplit('\\', 1)[-1]
+            else:
+                mm = CALLBACK_METHOD_RE.match(code, start)
+                if mm:
+                    name = mm.group(2)
+                elif code.startswith('function', start) or code.startswith('static', start):
+                    name = '{closure}@%d' % start
+            if name is None:
+                continue
+            endpoint = next((span for span in endpoints if span[0] <= cb.start() < span[1]), None)
+            methods = endpoint_methods(code, endpoint) if endpoint else ('GET',)
+            routes.append(Route(f, f.line_of(m.start()), route, name, (open_paren, close), methods))
+    return routes
+
+
+def index_php_files(php_files: List[IndexedFile]) -> Tuple[List[Route], Dict[str, Tuple[IndexedFile, FunctionSpan]]]:
+    """(routes, function table) over every PHP file; first function definition wins."""
+    routes: List[Route] = []
+    functions: Dict[str, Tuple[IndexedFile, FunctionSpan]] = {}
+    for f in php_files:
+        php = php_structure(f)
+        for fn in php.functions:
+            if fn.name:
+                functions.setdefault(fn.name.lower(), (f, fn))
+        if 'register_rest_route' in f.text:
+            routes.extend(find_routes(f))
+    return routes, functions
+
+
+def resolve_callback(route: Route, functions: Dict[str, Tuple[IndexedFile, FunctionSpan]]
+                     ) -> Optional[Tuple[IndexedFile, FunctionSpan]]:
+    if route.callback.startswith('{closure}@'):
+        start = int(route.callback.split('@', 1)[1])
+        php = php_structure(route.file)
+        fn = next((fn for fn in php.functions if fn.start >= start and not fn.name), None)
+        return (route.file, fn) if fn is not None and fn.start < route.span[1] else None
+    return functions.get(route.callback.lower())
+
+
+def querying_functions(functions: Dict[str, Tuple[IndexedFile, FunctionSpan]]) -> Set[str]:
+    """Lower-cased names of functions that run a query themselves or through a callee."""
+    direct: Set[str] = set()
+    callers: Dict[str, Set[str]] = {}
+    for name, (f, fn) in functions.items():
+        code = php_structure(f).code(fn)
+        if QUERY_RE.search(code):
+            direct.add(name)
+        for m in CALL_SITE_RE.finditer(code):
+            callee = m.group(1).lower()
+            if callee not in NOT_CALLS and callee != name:
+                callers.setdefault(callee, set()).add(name)
+    found = set(direct)
+    todo = list(direct)
+    while todo:
+        for caller in callers.get(todo.pop(), ()):
+            if caller not in found:
+                found.add(caller)
+                todo.append(caller)
+    return found
+
+
+# ---------------------------------------------------------------------------
+# Rules
+# ---------------------------------------------------------------------------
+
+def loop_bodies(code: str) -> List[Tuple[int, int, int]]:
+    """(keyword offset, body start, body end) of every loop in `code`."""
+    loops = []
+    for m in LOOP_RE.finditer(code):
+        i = m.end()
+        if m.group(1).lower() != 'do':
+            if i >= len(code) or code[i] != '(':
+                continue
+            i = match_bracket(code, i)
+            while i < len(code) and code[i].isspace():
+                i += 1
+        if i >= len(code):
+            continue
+        if code[i] == '{':
+            loops.append((m.start(), i, match_bracket(code, i)))
+        elif code[i] == ':':
+            end = re.compile(r'\bend' + m.group(1).lower() + r'\b', re.IGNORECASE).search(code, i)
+            loops.append((m.start(), i, end.start() if end else len(code)))
+        else:
+            end = code.find(';', i)
+            loops.append((m.start(), i, len(code) if end < 0 else end))
+    return loops
+
+
+def check_function(f: IndexedFile, fn: FunctionSpan, route: Route, queriers: Set[str],
+                   ) -> Iterator[Tuple[str, int, str]]:
+    """(rule, offset in f.text, message) for one callback."""
+    php = php_structure(f)
+    code = php.code(fn)
+    base = fn.body_start
+
+    # Full-table procedure calls, paged in PHP or not at all
+    slices = [m.start() for m in ARRAY_SLICE_RE.finditer(code)]
+    for m in FULL_CALL_RE.finditer(code):
+        call = re.sub(r'\s+', '', m.group(0)[m.group(0).index(m.group(1)):])
+        later = [s for s in slices if s > m.end()]
+        if later:
+            sorted_in_php = SORT_RE.search(code, m.end(), later[0]) is not None
+            how = 'filters/sorts and pages' if sorted_in_php else 'pages'
+            yield ('full-table-pagination', base + m.start(),
+                   f'{call} fetches every row, then the handler {how} them in PHP '
+                   f'(array_slice at line {f.line_of(base + later[0])}); pass the page, size and sort to the procedure')
+        else:
+            yield ('unbounded-call', base + m.start(),
+                   f'{call} returns every row with no filter or LIMIT; add paging parameters')
+
+    # Queries inside loops (reported once per outermost loop)
+    loops = loop_bodies(code)
+    outer = [lp for lp in loops if not any(o[1] <= lp[0] < o[2] for o in loops if o is not lp)]
+    for kw, a, b in outer:
+        sites: List[Tuple[int, str]] = [(q.start(), q.group(0).rstrip('( ').strip()) for q in QUERY_RE.finditer(code, a, b)]
+        for c in CALL_SITE_RE.finditer(code, a, b):
+            if c.group(1).lower() in queriers:
+                sites.append((c.start(), f'{c.group(1)}() (runs a query)'))
+        if not sites:
+            continue
+        sites.sort()
+        pos, what = sites[0]
+        more = f' and {len(sites) - 1} more' if len(sites) > 1 else ''
+        yield ('query-in-loop', base + pos,
+               f'{what}{more} inside the loop at line {f.line_of(base + kw)}; batch the rows into one query')
+
+    # json_decode of the same payload twice
+    seen: Dict[str, int] = {}
+    for m in JSON_DECODE_RE.finditer(code):
+        open_paren = m.end() - 1
+        close = match_bracket(code, open_paren)
+        args = split_args(code, open_paren + 1, close - 1)
+        if not args:
+            continue
+        payload = re.sub(r'\s+', '', code[args[0][0]:args[0][1]])
+        prev = seen.get(payload)
+        seen[payload] = m.end()
+        if prev is None:
+            continue
+        root = VARIABLE_RE.search(payload)
+        if root and re.search(re.escape(root.group(0)) + r'\s*(?:\[[^\]]*\]\s*)*(?:[.+\-*/]|\?\?)?=(?!=)',
+                              code[prev:m.start()]):
+            continue  # payload reassigned in between
+        yield ('repeated-json-decode', base + m.start(),
+               f'json_decode({payload}) was already decoded at line {f.line_of(base + prev)}; reuse the result')
+
+    # per_page without an upper bound
+    read = PER_PAGE_READ_RE.search(code)
+    if read and not per_page_capped(code, read) and not args_have_maximum(route):
+        yield ('missing-per-page-cap', base + read.start(),
+               "per_page is read from the request without an upper bound; clamp it (min()) "
+               "or add 'maximum' to the route's args")
+
+
+def per_page_capped(code: str, read: 're.Match') -> bool:
+    start = max(code.rfind(c, 0, read.start()) for c in ';{}') + 1
+    end = code.find(';', read.end())
+    statement = code[start:end if end >= 0 else len(code)]
+    if re.search(r'\bmin\s*\(', statement):
+        return True
+    target = re.match(r'\s*(\$\w+)\s*=', statement)
+    if not target:
+        return False
+    var = re.escape(target.group(1))
+    return re.search(r'\bmin\s*\([^;]*' + var + r'\b|' + var + r'\s*>=?\s*\d|\d+\s*<=?\s*' + var + r'\b',
+                     code[read.end():]) is not None
+
+
+def args_have_maximum(route: Route) -> bool:
+    code = route.file.text
+    a, b = route.span
+    m = PER_PAGE_ARG_RE.search(code, a, b)
+    if not m:
+        return False
+    close = match_bracket(code, code.index('(' if code[m.end() - 1] == '(' else '[', m.end() - 1))
+    return re.search(r"""['"]maximum['"]\s*=>""", code[m.end():close]) is not None
+
+
+def lint_routes(routes: List[Route], functions: Dict[str, Tuple[IndexedFile, FunctionSpan]]
+                ) -> Tuple[List[Finding], List[str]]:
+    """(findings sorted by file and line, warnings about unresolved callbacks)."""
+    queriers = querying_functions(functions)
+    findings: Set[Finding] = set()
+    warnings: List[str] = []
+    checked: Set[Tuple[Path, int]] = set()
+    for route in routes:
+        loc = resolve_callback(route, functions)
+        if loc is None:
+            warnings.append(f"{route.file.rel}:{route.line}: callback '{route.callback}' of {route.route} not found")
+            continue
+        f, fn = loc
+        if (f.path, fn.start) in checked:
+            continue  # the same handler registered for several routes
+        checked.add((f.path, fn.start))
+        name = fn.name or '{closure}'
+        for rule, offset, message in check_function(f, fn, route, queriers):
+            line = f.line_of(offset)
+            findings.add(Finding(rule, f.rel, line, name, route.route, message, f.line(line).strip()))
+    return sorted(findings, key=lambda x: (x.path, x.line, x.rule)), warnings
+
+
+# ---------------------------------------------------------------------------
+# Baseline
+# ---------------------------------------------------------------------------
+
+def load_baseline(path: Path) -> Counter:
+    doc = json.loads(path.read_text(encoding='utf-8'))
+    return Counter((e['rule'], e['path'], e['function'], e['snippet']) for e in doc.get('findings', []))
+
+
+def write_baseline(path: Path, findings: List[Finding]) -> None:
+    entries = [{'rule': x.rule, 'path': x.path, 'function': x.function, 'snippet': x.snippet} for x in findings]
+    doc = {'version': BASELINE_VERSION, 'findings': entries}
+    path.write_text(json.dumps(doc, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+
+
+def split_new(findings: List[Finding], baseline: Counter) -> Tuple[List[Tuple[Finding, bool]], int]:
+    """[(finding, is_new)] and the number of baseline entries no longer found."""
+    left = Counter(baseline)
+    out = []
+    for x in findings:
+        if left[x.key()] > 0:
+            left[x.key()] -= 1
+            out.append((x, False))
+        else:
+            out.append((x, True))
+    return out, sum(left.values())
+
+
+def render_text(record: dict) -> str:
+    state = '' if record['baseline'] == 'new' else ' (baseline)'
+    return (f"{record['path']}:{record['line']}: [{record['rule']}] {record['message']}{state}\n"
+            f"    in {record['function']}() for {record['route']}\n")
+
+
+def sarif_result(x: Finding, is_new: bool) -> dict:
+    return {
+        'ruleId': x.rule,
+        'level': 'warning',
+        'message': {'text': f'{x.message} ({x.function}() for {x.route})'},
+        'locations': [sarif_location(x.path, x.line, x.snippet)],
+        'baselineState': 'new' if is_new else 'unchanged',
+    }
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('-r', '--root', default=str(PLUGIN_ROOT), help='Plugin root to check (default: repo root)')
+    ap.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Accepted findings (JSON)')
+    ap.add_argument('--no-baseline', action='store_true', help='Report every finding as new')
+    ap.add_argument('--update-baseline', action='store_true', help='Rewrite the baseline with the current findings')
+    ap.add_argument('--all', action='store_true', help='Also report findings that are in the baseline')
+    add_format_argument(ap)
+    ap.add_argument('--output', default='-', help="Where to write the findings (default: '-' = stdout)")
+    add_git_arguments(ap)
+    add_profile_arguments(ap)
+    args = ap.parse_args(argv if argv is not None else [])
+    if args.update_baseline and (args.staged or args.since or args.no_baseline):
+        ap.error('--update-baseline needs the whole tree and a baseline path')
+    with profile_session(args, 'lint_rest_perf'):
+        return run(args)
+
+
+def run(args: argparse.Namespace) -> int:
+    root = Path(args.root).resolve()
+    with phase('walk'):
+        php_files = get_index(root).files(('.php',))
+
+    changed: Optional[Set[Path]] = None
+    if args.staged or args.since:
+        try:
+            git_files = filter_files(changed_files(root, args.since, args.staged), ('.php',), DEFAULT_IGNORES)
+        except GitError as exc:
+            print(f"[ERR] {exc}", file=sys.stderr)
+            return 1
+        if not git_files:
+            print('No changed PHP files. Nothing to check.')
+            return 0
+        php_files = overlay(php_files, git_files)
+        changed = {f.path for f in git_files}
+
+    with phase('index'):
+        routes, functions = index_php_files(php_files)
+    if changed is not None:
+        def affected(route: Route) -> bool:
+            loc = resolve_callback(route, functions)
+            return route.file.path in changed or (loc is not None and loc[0].path in changed)
+        routes = [r for r in routes if affected(r)]
+
+    with phase('lint'):
+        findings, warnings = lint_routes(routes, functions)
+    for w in warnings:
+        print(f'[WARN] {w}', file=sys.stderr)
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        write_baseline(baseline_path, findings)
+        print(f'Baseline written to {baseline_path} ({len(findings)} finding(s)).')
+        return 0
+    baseline: Counter = Counter()
+    if not args.no_baseline and baseline_path.is_file():
+        try:
+            baseline = load_baseline(baseline_path)
+        except (OSError, ValueError, KeyError) as exc:
+            print(f'[ERR] cannot read baseline {baseline_path}: {exc}', file=sys.stderr)
+            return 1
+    marked, stale = split_new(findings, baseline)
+    if changed is not None:
+        stale = 0  # only part of the tree was checked
+
+    new = 0
+    rules = [sarif_rule(rule, text) for rule, text in RULES.items()]
+    with phase('report'):
+        try:
+            with open_writer(args.format, args.output, 'lint_rest_perf', rules, root, render_text) as writer:
+                for x, is_new in marked:
+                    new += is_new
+                    if not (is_new or args.all):
+                        continue
+                    record = dict(x._asdict(), baseline='new' if is_new else 'unchanged')
+                    writer.write(record, sarif_result(x, is_new) if writer.sarif else None)
+        except OSError as exc:
+            print(f'[ERR] Cannot write {args.output}: {exc}', file=sys.stderr)
+            return 1
+
+    summary = sys.stderr if args.output == '-' and args.format != 'text' else sys.stdout
+    print(f'Checked {len(routes)} REST route(s): {len(findings)} finding(s), '
+          f'{len(findings) - new} in baseline, {new} new.', file=summary)
+    if stale:
+        print(f'{stale} baseline entr{"y is" if stale == 1 else "ies are"} no longer found; '
+              f'refresh with --update-baseline.', file=summary)
+    return 1 if new else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+"""
+Load generator for the profdef REST routes, driven by the OpenAPI documents.
+
+Operations (and their page / per_page / sort / ... parameters) are read from
+includes/REST/new.yaml and old.yaml (see tools/openapi_spec.py); each request
+picks an operation and fills its parameters with values valid for the
+schema: page in 1..--max-page, per_page from the documented default/maximum,
+enum values for sort/order, synthetic ids for path parameters. Optional
+non-paging parameters are sent on about half of the requests.
+
+Requests run on an asyncio worker pool over a bounded pool of keep-alive
+HTTP/1.1 connections (stdlib only; https works too):
+
+  open loop    --rate R: arrivals are scheduled at R requests/s (Poisson or
+               uniform) whether or not earlier requests finished; latency is
+               measured from the scheduled time, so queueing caused by a slow
+               server is included (no coordinated omission)
+  closed loop  --rate 0: each worker sends its next request as soon as the
+               previous one completes
+
+Per route (method + path template) it reports requests, errors, status codes,
+throughput and p50/p95/p99/max latency; --output also writes the full
+log-bucketed latency histograms as JSON.
+
+--stub starts tools/rest_stub_server.py on a free local port and targets it,
+so the tool runs offline (e.g. in CI). Point --base-url at a staging site to
+measure it for real (the spec's server base, /wp-json, is appended).
+
+Only GET operations are sent unless --methods says otherwise; write methods
+get synthetic JSON bodies and will modify a real site.
+
+Usage:
+  python3 tools/load_rest.py --stub [--duration 10] [--rate 50] [--workers 16]
+  python3 tools/load_rest.py --base-url https://staging.example.org --header 'Authorization: Basic ...'
+                             [--match 'v2/'] [--requests 2000] [--output results.json]
+
+Options:
+  --spec PATH          OpenAPI document(s) (repeatable; default: new.yaml and old.yaml)
+  --base-url URL       Site root to load (e.g. http://localhost:8080)
+  --stub               Start the local stub server and load it instead
+  --match REGEX        Only operations whose 'METHOD /path' matches
+  --methods LIST       HTTP methods to send (default: GET)
+  --rate R             Open-loop arrival rate in requests/s (0 = closed loop; default: 20)
+  --arrival KIND       poisson (default) or uniform inter-arrival times
+  --workers N          Concurrent requests in flight (default: 16)
+  --connections N      Keep-alive connections in the pool (default: --workers)
+  --duration S         Stop scheduling after S seconds (default: 10)
+  --requests N         Stop after N requests instead
+  --max-page N         Highest page number requested (default: 5)
+  --timeout S          Per-request timeout (default: 10)
+  --header 'K: V'      Extra request header (repeatable)
+  --seed N             Seed for operation and parameter choice (default: 1)
+  --output PATH        Write results (histograms included) as JSON
+  --max-error-rate X   Exit 1 if more than this fraction of requests failed
+
+Exit code:
+  - 0 when the run completed (and the error rate is within --max-error-rate)
+  - 1 on a setup error or when the error rate is exceeded
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import ssl
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from openapi_spec import (DEFAULT_SPECS, PAGING_PARAMS, Operation, SpecError, example_value, fill_path,
+                          load_spec, operations)
+
+
+TOOLS_DIR = Path(__file__).resolve().parent
+RESULTS_VERSION = 1
+
+# Histogram buckets grow by 2% (relative error of reported percentiles <= 2%)
+BUCKET_GROWTH = 1.02
+_LOG_GROWTH = math.log(BUCKET_GROWTH)
+
+
+class Histogram:
+    """Log-bucketed latency histogram (constant memory, mergeable)."""
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        us = max(seconds * 1e6, 1.0)
+        k = int(math.log(us) / _LOG_GROWTH)
+        self.buckets[k] = self.buckets.get(k, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: 'Histogram') -> None:
+        for k, n in other.buckets.items():
+            self.buckets[k] = self.buckets.get(k, 0) + n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound (seconds) of the bucket holding the q-th percentile."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q / 100.0 * self.count))
+        seen = 0
+        for k in sorted(self.buckets):
+            seen += self.buckets[k]
+            if seen >= rank:
+                return min(BUCKET_GROWTH ** (k + 1) / 1e6, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else None,
+            'p50_ms': round(self.percentile(50) * 1000, 3),
+            'p95_ms': round(self.percentile(95) * 1000, 3),
+            'p99_ms': round(self.percentile(99) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+            # [bucket upper bound in ms, count]
+            'buckets': [[round(BUCKET_GROWTH ** (k + 1) / 1000, 4), n] for k, n in sorted(self.buckets.items())],
+        }
+
+
+class RouteStats:
+    def __init__(self):
+        self.latency = Histogram()   # from the scheduled start (includes queueing)
+        self.service = Histogram()   # from the moment the request was written
+        self.statuses: Dict[str, int] = {}
+        self.errors = 0
+
+    def record(self, status: str, latency: float, service: float) -> None:
+        self.latency.add(latency)
+        self.service.add(service)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not status.isdigit() or int(status) >= 400:
+            self.errors += 1
+
+
+# ---------------------------------------------------------------------------
+# HTTP/1.1 client with keep-alive
+# ---------------------------------------------------------------------------
+
+class HttpError(Exception):
+    pass
+
+
+class Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class ConnectionPool:
+    """At most `size` keep-alive connections to one origin, reused across requests."""
+
+    def __init__(self, base_url: str, size: int):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f'unsupported base URL: {base_url}')
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.prefix = parts.path.rstrip('/')
+        self.host_header = parts.netloc
+        self.idle: List[Connection] = []
+        self.slots = asyncio.Semaphore(size)
+        self.opened = 0
+
+    async def acquire(self) -> Connection:
+        await self.slots.acquire()
+        if self.idle:
+            return self.idle.pop()
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        except BaseException:
+            self.slots.release()
+            raise
+        self.opened += 1
+        return Connection(reader, writer)
+
+    def release(self, conn: Connection, reuse: bool) -> None:
+        if reuse:
+            self.idle.append(conn)
+        else:
+            conn.close()
+        self.slots.release()
+
+    def close(self) -> None:
+        for conn in self.idle:
+            conn.close()
+        self.idle.clear()
+
+    async def request(self, method: str, target: str, headers: Dict[str, str], body: Optional[bytes]) -> Tuple[int, float]:
+        """Send one request; returns (status, seconds since the request was written)."""
+        conn = await self.acquire()
+        reuse = False
+        try:
+            lines = [f'{method} {self.prefix}{target} HTTP/1.1', f'Host: {self.host_header}',
+                     'Connection: keep-alive', 'Accept: application/json']
+            if body is not None:
+                lines += ['Content-Type: application/json', f'Content-Length: {len(body)}']
+            lines += [f'{k}: {v}' for k, v in headers.items()]
+            conn.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + (body or b''))
+            sent = time.perf_counter()
+            await conn.writer.drain()
+            status, keep_alive = await read_response(conn.reader, method)
+            reuse = keep_alive
+            return status, time.perf_counter() - sent
+        finally:
+            self.release(conn, reuse)
+
+
+async def read_response(reader: asyncio.StreamReader, method: str) -> Tuple[int, bool]:
+    """Read one response (body discarded); returns (status, connection reusable)."""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as exc:
+        raise HttpError('connection closed') from exc
+    lines = head.decode('latin-1').split('\r\n')
+    parts = lines[0].split(' ', 2)
+    if len(parts) < 2 or not parts[1].isdigit():
+        raise HttpError(f'bad status line: {lines[0]!r}')
+    status = int(parts[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            k, v = line.split(':', 1)
+            headers[k.strip().lower()] = v.strip().lower()
+    keep_alive = headers.get('connection') != 'close' and parts[0] != 'HTTP/1.0'
+    if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+        return status, keep_alive
+    if 'chunked' in headers.get('transfer-encoding', ''):
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';', 1)[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    else:
+        await reader.read()  # body delimited by close
+        keep_alive = False
+    return status, keep_alive
+
+
+# ---------------------------------------------------------------------------
+# Requests from the spec
+# ---------------------------------------------------------------------------
+
+def param_value(op: Operation, param, rng: random.Random, max_page: int) -> Any:
+    schema = param.schema
+    if param.name == 'page':
+        return rng.randint(1, max(1, max_page))
+    if param.name in ('per_page', 'limit'):
+        choices = [v for v in (schema.get('default'), schema.get('maximum')) if v is not None]
+        return rng.choice(choices) if choices else 20
+    if param.location == 'path' and schema.get('type', 'integer') == 'integer':
+        return rng.randint(1, 50)
+    return example_value(op.spec, schema, rng)
+
+
+def build_request(op: Operation, rng: random.Random, max_page: int) -> Tuple[str, Optional[bytes]]:
+    """(target path with query string, JSON body or None) for one call of `op`."""
+    path_values: Dict[str, Any] = {}
+    query: List[Tuple[str, str]] = []
+    for p in op.params:
+        if p.location == 'path':
+            path_values[p.name] = param_value(op, p, rng, max_page)
+        elif p.location == 'query' and (p.required or p.name in PAGING_PARAMS or rng.random() < 0.5):
+            v = param_value(op, p, rng, max_page)
+            query.append((p.name, str(v).lower() if isinstance(v, bool) else str(v)))
+    target = op.spec.base + fill_path(op.path, path_values)
+    if query:
+        target += '?' + urlencode(query)
+    body = None
+    if op.method in ('POST', 'PUT', 'PATCH'):
+        body = json.dumps(example_value(op.spec, op.body, rng) if op.body else {}).encode('utf-8')
+    return target, body
+
+
+# ---------------------------------------------------------------------------
+# Run
+# ---------------------------------------------------------------------------
+
+async def run_load(ops: List[Operation], pool: ConnectionPool, args: argparse.Namespace
+                   ) -> Tuple[Dict[str, RouteStats], float, int]:
+    """Drive the load; returns (stats per operation key, elapsed seconds, peak backlog)."""
+    rng = random.Random(args.seed)
+    stats: Dict[str, RouteStats] = {op.key: RouteStats() for op in ops}
+    headers = dict(args.headers)
+    queue: asyncio.Queue = asyncio.Queue()
+    peak_backlog = 0
+    started = time.perf_counter()
+    deadline = started + args.duration if args.requests is None else float('inf')
+
+    async def send(op: Operation, scheduled: float) -> None:
+        target, body = build_request(op, rng, args.max_page)
+        try:
+            status, service = await asyncio.wait_for(pool.request(op.method, target, headers, body), args.timeout)
+            label = str(status)
+        except asyncio.TimeoutError:
+            label, service = 'timeout', time.perf_counter() - scheduled
+        except (OSError, HttpError, ValueError) as exc:
+            label, service = type(exc).__name__, time.perf_counter() - scheduled
+        stats[op.key].record(label, time.perf_counter() - scheduled, service)
+
+    async def worker() -> None:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            await send(*item)
+
+    async def closed_worker(budget: List[int]) -> None:
+        while time.perf_counter() < deadline and budget[0] != 0:
+            budget[0] -= 1
+            await send(rng.choice(ops), time.perf_counter())
+
+    if args.rate <= 0:
+        budget = [args.requests if args.requests is not None else -1]
+        await asyncio.gather(*(closed_worker(budget) for _ in range(args.workers)))
+    else:
+        workers = [asyncio.create_task(worker()) for _ in range(args.workers)]
+        next_at = started
+        sent = 0
+        while args.requests is None or sent < args.requests:
+            gap = rng.expovariate(args.rate) if args.arrival == 'poisson' else 1.0 / args.rate
+            next_at += gap
+            if next_at > deadline:
+                break
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            queue.put_nowait((rng.choice(ops), next_at))
+            sent += 1
+            peak_backlog = max(peak_backlog, queue.qsize())
+        for _ in workers:
+            queue.put_nowait(None)
+        await asyncio.gather(*workers)
+    pool.close()
+    return stats, time.perf_counter() - started, peak_backlog
+
+
+def start_stub(spec_paths: List[str]) -> Tuple[subprocess.Popen, str]:
+    argv = [sys.executable, str(TOOLS_DIR / 'rest_stub_server.py'), '--port', '0']
+    for s in spec_paths:
+        argv += ['--spec', s]
+    # The stub's notices (spec warnings) were already printed by this process
+    proc = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    line = proc.stdout.readline()
+    m = re.match(r'Listening on (http://\S+)', line)
+    if not m:
+        proc.kill()
+        raise RuntimeError(f'stub server did not start: {line.strip() or "no output"}')
+    return proc, m.group(1)
+
+
+def report(stats: Dict[str, RouteStats], elapsed: float) -> Tuple[List[str], Dict[str, Any]]:
+    """(text table lines, JSON-able results)."""
+    total = RouteStats()
+    routes: Dict[str, Any] = {}
+    lines = [f"{'route':<58} {'reqs':>6} {'err':>5} {'rps':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"]
+    for key in sorted(stats):
+        s = stats[key]
+        if not s.latency.count:
+            continue
+        total.latency.merge(s.latency)
+        total.service.merge(s.service)
+        total.errors += s.errors
+        for k, n in s.statuses.items():
+            total.statuses[k] = total.statuses.get(k, 0) + n
+        routes[key] = {'requests': s.latency.count, 'errors': s.errors, 'statuses': s.statuses,
+                       'rps': round(s.latency.count / elapsed, 2), 'latency': s.latency.to_dict(),
+                       'service': s.service.to_dict()}
+    for key, r in list(routes.items()) + [('TOTAL', None)]:
+        s = stats.get(key, total)
+        h = s.latency
+        lines.append(f'{key[:58]:<58} {h.count:>6} {s.errors:>5} {h.count / elapsed:>7.1f} '
+                     f'{h.percentile(50) * 1000:>8.2f} {h.percentile(95) * 1000:>8.2f} '
+                     f'{h.percentile(99) * 1000:>8.2f} {h.max * 1000:>8.2f}')
+    summary = {'requests': total.latency.count, 'errors': total.errors, 'statuses': total.statuses,
+               'rps': round(total.latency.count / elapsed, 2) if elapsed > 0 else None,
+               'latency': total.latency.to_dict(), 'service': total.service.to_dict()}
+    return lines, {'total': summary, 'routes': routes}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = ap.add_mutually_exclusive_group(required=True)
+    target.add_argument('--base-url', help='Site root to load (the spec server base is appended)')
+    target.add_argument('--stub', action='store_true', help='Start tools/rest_stub_server.py locally and load it')
+    ap.add_argument('--spec', action='append', help='OpenAPI document(s) (default: new.yaml and old.yaml)')
+    ap.add_argument('--match', help="Only operations whose 'METHOD /path' matches this regex")
+    ap.add_argument('--methods', default='GET', help='Comma-separated HTTP methods to send (default: GET)')
+    ap.add_argument('--rate', type=float, default=20.0, help='Open-loop arrivals per second (0 = closed loop)')
+    ap.add_argument('--arrival', choices=('poisson', 'uniform'), default='poisson', help='Inter-arrival distribution')
+    ap.add_argument('--workers', type=int, default=16, help='Concurrent requests in flight (default: 16)')
+    ap.add_argument('--connections', type=int, help='Keep-alive connections (default: --workers)')
+    ap.add_argument('--duration', type=float, default=10.0, help='Seconds to schedule requests for (default: 10)')
+    ap.add_argument('--requests', type=int, help='Stop after this many requests instead of --duration')
+    ap.add_argument('--max-page', type=int, default=5, help='Highest page number requested (default: 5)')
+    ap.add_argument('--timeout', type=float, default=10.0, help='Per-request timeout in seconds (default: 10)')
+    ap.add_argument('--header', action='append', default=[], help="Extra header 'Name: value' (repeatable)")
+    ap.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+    ap.add_argument('--output', help='Write results (with histograms) as JSON to this file')
+    ap.add_argument('--max-error-rate', type=float, help='Exit 1 if the failed fraction exceeds this')
+    args = ap.parse_args(argv if argv is not None else [])
+    if args.workers < 1 or (args.connections is not None and args.connections < 1):
+        ap.error('--workers and --connections must be at least 1')
+    args.headers = []
+    for h in args.header:
+        name, sep, value = h.partition(':')
+        if not sep or not name.strip():
+            ap.error(f"invalid --header {h!r} (expected 'Name: value')")
+        args.headers.append((name.strip(), value.strip()))
+
+    spec_paths = args.spec or [str(p) for p in DEFAULT_SPECS]
+    methods = {m.strip().upper() for m in args.methods.split(',') if m.strip()}
+    warnings: List[str] = []
+    try:
+        ops = [op for path in spec_paths for op in operations(load_spec(Path(path)), warnings)]
+    except SpecError as exc:
+        print(f'[ERR] {exc}', file=sys.stderr)
+        return 1
+    for w in warnings:
+        print(f'[WARN] {w}', file=sys.stderr)
+    rx = re.compile(args.match) if args.match else None
+    ops = [op for op in ops if op.method in methods and (rx is None or rx.search(op.key))]
+    if not ops:
+        print('[ERR] no operations match --methods / --match', file=sys.stderr)
+        return 1
+
+    stub = None
+    base_url = args.base_url
+    if args.stub:
+        try:
+            stub, base_url = start_stub(spec_paths)
+        except (OSError, RuntimeError) as exc:
+            print(f'[ERR] {exc}', file=sys.stderr)
+            return 1
+    mode = f'open loop at {args.rate:g} req/s ({args.arrival})' if args.rate > 0 else 'closed loop'
+    limit = f'{args.requests} requests' if args.requests is not None else f'{args.duration:g}s'
+    print(f'Loading {len(ops)} operation(s) on {base_url}: {mode}, {args.workers} worker(s), {limit}', flush=True)
+    try:
+        async def go():
+            pool = ConnectionPool(base_url, args.connections or args.workers)
+            return (*await run_load(ops, pool, args), pool.opened)
+        stats, elapsed, backlog, opened = asyncio.run(go())
+    except ValueError as exc:
+        print(f'[ERR] {exc}', file=sys.stderr)
+        return 1
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.wait()
+
+    lines, results = report(stats, elapsed)
+    print('\n'.join(lines))
+    total = results['total']
+    print(f"\n{total['requests']} request(s) in {elapsed:.2f}s over {opened} connection(s); "
+          f"{total['errors']} error(s); peak backlog {backlog}.")
+    if args.output:
+        doc = {
+            'version': RESULTS_VERSION,
+            'base_url': base_url if not args.stub else 'stub',
+            'mode': 'open' if args.rate > 0 else 'closed',
+            'rate': args.rate,
+            'arrival': args.arrival,
+            'workers': args.workers,
+            'connections': args.connections or args.workers,
+            'elapsed_s': round(elapsed, 3),
+            'peak_backlog': backlog,
+            'connections_opened': opened,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            **results,
+        }
+        out = Path(args.output)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(doc, indent=2) + '\n', encoding='utf-8')
+        print(f'Results saved to {out}')
+    if args.max_error_rate is not None and total['requests']:
+        rate = total['errors'] / total['requests']
+        if rate > args.max_error_rate:
+            print(f'[FAIL] error rate {rate:.2%} exceeds {args.max_error_rate:.2%}')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Read the plugin's OpenAPI documents (includes/REST/new.yaml, old.yaml) for the
+tools/ scripts: operations with their parameters, request and response
+schemas, path templates as regexes, and synthetic values built from schemas.
+
+Needs PyYAML (`pip install pyyaml`); `load_spec` raises SpecError without it.
+
+Usage:
+  from openapi_spec import load_spec, operations
+  spec = load_spec(Path('includes/REST/new.yaml'))
+  for op in operations(spec):
+      print(op.key, [p.name for p in op.params])
+"""
+
+from __future__ import annotations
+import random
+import re
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Pattern, Tuple
+
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_SPECS = (ROOT / 'includes' / 'REST' / 'new.yaml', ROOT / 'includes' / 'REST' / 'old.yaml')
+HTTP_METHODS = ('get', 'post', 'put', 'patch', 'delete', 'head', 'options')
+
+# Query parameters that page or order a collection
+PAGING_PARAMS = {'page', 'per_page', 'limit', 'offset', 'sort', 'order', 'orderby', 'dir'}
+
+_PATH_PARAM_RE = re.compile(r'\{([^}/]+)\}')
+_MAX_DEPTH = 6
+
+
+class SpecError(RuntimeError):
+    pass
+
+
+class Spec(NamedTuple):
+    path: Path
+    doc: Dict[str, Any]
+    base: str         # servers[0].url, e.g. '/wp-json'
+
+
+class Param(NamedTuple):
+    name: str
+    location: str     # 'query', 'path', 'header'
+    required: bool
+    schema: Dict[str, Any]
+
+
+class Operation(NamedTuple):
+    spec: Spec
+    method: str                        # upper case
+    path: str                          # template, e.g. '/profdef/v3/sessions/{session_id}'
+    params: Tuple[Param, ...]
+    body: Optional[Dict[str, Any]]     # request body schema (application/json)
+    status: int                        # first documented 2xx status
+    response: Optional[Dict[str, Any]] # its application/json schema
+    # every documented response as (code, schema): '200', '4XX', 'default', ...
+    responses: Tuple[Tuple[str, Optional[Dict[str, Any]]], ...] = ()
+
+    @property
+    def key(self) -> str:
+        return f'{self.method} {self.path}'
+
+    @property
+    def paginated(self) -> bool:
+        return any(p.name in ('page', 'per_page') for p in self.params)
+
+
+def load_spec(path: Path) -> Spec:
+    try:
+        import yaml
+    except ImportError as exc:
+        raise SpecError('PyYAML is required to read OpenAPI documents (pip install pyyaml)') from exc
+    try:
+        doc = yaml.safe_load(Path(path).read_text(encoding='utf-8'))
+    except (OSError, yaml.YAMLError) as exc:
+        raise SpecError(f'cannot read {path}: {exc}') from exc
+    if not isinstance(doc, dict) or not isinstance(doc.get('paths'), dict):
+        raise SpecError(f'{path}: not an OpenAPI document (no paths)')
+    servers = doc.get('servers') or [{}]
+    base = str(servers[0].get('url') or '').rstrip('/')
+    return Spec(Path(path), doc, base)
+
+
+def resolve(spec: Spec, node: Any) -> Any:
+    """Follow local `$ref`s ('#/components/...') until a concrete node."""
+    seen = 0
+    while isinstance(node, dict) and '$ref' in node:
+        ref = node['$ref']
+        if not ref.startswith('#/') or seen > 32:
+            raise SpecError(f'{spec.path}: unsupported $ref {ref}')
+        node = spec.doc
+        try:
+            for part in ref[2:].split('/'):
+                node = node[part.replace('~1', '/').replace('~0', '~')]
+        except (KeyError, TypeError):
+            raise SpecError(f'{spec.path}: unresolved $ref {ref}') from None
+        seen += 1
+    return node
+
+
+def _json_schema(spec: Spec, content: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not content:
+        return None
+    media = content.get('application/json') or next(iter(content.values()), None) or {}
+    schema = media.get('schema')
+    return resolve(spec, schema) if schema is not None else None
+
+
+def _schema_or_none(spec: Spec, node: Any, warnings: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+    try:
+        return _json_schema(spec, resolve(spec, node).get('content'))
+    except SpecError as exc:
+        if warnings is not None:
+            warnings.append(str(exc))
+        return None
+
+
+def operations(spec: Spec, warnings: Optional[List[str]] = None) -> List[Operation]:
+    """Every operation of the document, in file order.
+
+    A request or response whose $ref cannot be resolved is left as None (no
+    schema) and described in `warnings` when a list is given.
+    """
+    ops: List[Operation] = []
+    for path, item in spec.doc['paths'].items():
+        item = resolve(spec, item)
+        shared = [resolve(spec, p) for p in item.get('parameters', [])]
+        for method in HTTP_METHODS:
+            op = item.get(method)
+            if op is None:
+                continue
+            params: Dict[Tuple[str, str], Param] = {}
+            for raw in shared + [resolve(spec, p) for p in op.get('parameters', [])]:
+                p = Param(raw['name'], raw.get('in', 'query'), bool(raw.get('required', raw.get('in') == 'path')),
+                          resolve(spec, raw.get('schema') or {}))
+                params[(p.name, p.location)] = p  # operation-level parameters override path-level ones
+            body = None
+            if op.get('requestBody') is not None:
+                body = _schema_or_none(spec, op['requestBody'], warnings)
+            status, response = 200, None
+            responses: List[Tuple[str, Optional[Dict[str, Any]]]] = []
+            for code, resp in (op.get('responses') or {}).items():
+                code = str(code) if str(code) == 'default' else str(code).upper()
+                schema = _schema_or_none(spec, resp, warnings)
+                if code.isdigit() and code.startswith('2') and not any(c.startswith('2') for c, _ in responses):
+                    status, response = int(code), schema
+                responses.append((code, schema))
+            ops.append(Operation(spec, method.upper(), path, tuple(params.values()), body, status, response,
+                                 tuple(responses)))
+    return ops
+
+
+def path_regex(spec: Spec, template: str) -> Pattern[str]:
+    """Regex matching request paths (server base included) for a path template."""
+    parts = _PATH_PARAM_RE.split(template)
+    out = [re.escape(spec.base)]
+    for i, part in enumerate(parts):
+        out.append(re.escape(part) if i % 2 == 0 else f'(?P<{re.sub(r"[^A-Za-z0-9_]", "_", part)}>[^/]+)')
+    return re.compile(''.join(out) + r'/?')
+
+
+def fill_path(template: str, values: Dict[str, Any]) -> str:
+    return _PATH_PARAM_RE.sub(lambda m: str(values[m.group(1)]), template)
+
+
+def _merge_all_of(spec: Spec, schema: Dict[str, Any]) -> Dict[str, Any]:
+    merged: Dict[str, Any] = {k: v for k, v in schema.items() if k != 'allOf'}
+    props: Dict[str, Any] = dict(merged.get('properties') or {})
+    for part in schema['allOf']:
+        part = resolve(spec, part)
+        if 'allOf' in part:
+            part = _merge_all_of(spec, part)
+        props.update(part.get('properties') or {})
+        for k, v in part.items():
+            if k != 'properties':
+                merged.setdefault(k, v)
+    merged['properties'] = props
+    return merged
+
+
+def example_value(spec: Spec, schema: Optional[Dict[str, Any]], rng: random.Random, depth: int = 0) -> Any:
+    """A value valid for `schema` (documented example/enum/default first, else synthetic)."""
+    schema = resolve(spec, schema or {})
+    if 'allOf' in schema:
+        schema = _merge_all_of(spec, schema)
+    for key in ('oneOf', 'anyOf'):
+        if schema.get(key):
+            return example_value(spec, schema[key][0], rng, depth + 1)
+    if 'example' in schema:
+        return schema['example']
+    if schema.get('enum'):
+        return rng.choice(schema['enum'])
+    kind = schema.get('type') or ('object' if 'properties' in schema else 'string')
+    if kind == 'integer':
+        lo = int(schema.get('minimum', 1))
+        hi = int(schema.get('maximum', lo + 999))
+        return rng.randint(lo, max(lo, hi))
+    if kind == 'number':
+        lo = float(schema.get('minimum', 0))
+        return round(rng.uniform(lo, float(schema.get('maximum', lo + 10))), 2)
+    if kind == 'boolean':
+        return rng.random() < 0.5
+    if kind == 'array':
+        if depth >= _MAX_DEPTH:
+            return []
+        n = max(int(schema.get('minItems', 1)), 1)
+        return [example_value(spec, schema.get('items'), rng, depth + 1) for _ in range(n)]
+    if kind == 'object':
+        if depth >= _MAX_DEPTH:
+            return {}
+        props = schema.get('properties') or {}
+        if not props and schema.get('additionalProperties'):
+            return {'id': rng.randint(1, 9999), 'value': f'value-{rng.randint(1, 9999)}'}
+        return {name: example_value(spec, sub, rng, depth + 1) for name, sub in props.items()}
+    return _string_value(schema, rng)
+
+
+def _string_value(schema: Dict[str, Any], rng: random.Random) -> str:
+    fmt = schema.get('format')
+    if fmt == 'date':
+        return f'2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'
+    if fmt == 'date-time':
+        return f'2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00Z'
+    if fmt == 'email':
+        return f'user{rng.randint(1, 9999)}@example.org'
+    if fmt == 'uri':
+        return f'https://example.org/{rng.randint(1, 9999)}'
+    value = f'text-{rng.randint(1, 9999)}'
+    max_len = schema.get('maxLength')
+    return value[:int(max_len)] if max_len else value
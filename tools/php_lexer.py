@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Small linear-time PHP scanner for the tools/ checks.
+
+It does not build a full token stream. It walks the file once, skipping
+inline HTML, string literals (single/double quoted, heredoc/nowdoc) and
+comments, and matches braces so callers get exact function body spans
+instead of fixed-size windows or lazy `[\\s\\S]*?` regexes.
+
+Each step jumps straight to the next significant character with one compiled
+regex, so the cost is linear in file size no matter how many assertions are
+later run against the result.
+
+Usage:
+  from php_lexer import parse_php
+  php = parse_php(text)
+  fn = php.function('ProfessionalDevelopment_encrypt')
+  if fn and 'derive_key(' in php.code(fn):
+      ...
+"""
+
+from __future__ import annotations
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class FunctionSpan(NamedTuple):
+    name: str        # '' for closures
+    start: int       # offset of the `function` keyword
+    body_start: int  # offset of the opening `{`
+    end: int         # offset just past the matching `}`
+
+
+# Next character sequence that changes lexer state, in PHP mode
+_PHP_SIG_RE = re.compile(r"""'|"|`|//|\#(?!\[)|/\*|<<<|\?>|[{};]|\bfunction\b""", re.IGNORECASE)
+_OPEN_TAG_RE = re.compile(r'<\?(?:php\b|=)?', re.IGNORECASE)
+_SQ_BODY_RE = re.compile(r"(?:[^'\\]|\\.)*'", re.DOTALL)
+_DQ_BODY_RE = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+_BT_BODY_RE = re.compile(r'(?:[^`\\]|\\.)*`', re.DOTALL)
+_LINE_COMMENT_END_RE = re.compile(r'\n|\?>')
+_HEREDOC_START_RE = re.compile(r"""<<<[ \t]*(["']?)([A-Za-z_][A-Za-z0-9_]*)\1\r?\n""")
+_FUNC_NAME_RE = re.compile(r'function\s*&?\s*([A-Za-z_\x80-\uffff][\w\x80-\uffff]*)?\s*\(', re.IGNORECASE)
+
+
+class PhpStructure:
+    """Function spans and comment spans of one PHP file."""
+
+    def __init__(self, text: str, functions: List[FunctionSpan], comments: List[Tuple[int, int]]):
+        self.text = text
+        self.functions = functions
+        self.comments = comments
+        self._by_name: Dict[str, List[FunctionSpan]] = {}
+        for fn in functions:
+            if fn.name:
+                self._by_name.setdefault(fn.name.lower(), []).append(fn)
+
+    def function(self, name: str, start: Optional[int] = None) -> Optional[FunctionSpan]:
+        """Named function (PHP names are case-insensitive); `start` picks one definition."""
+        spans = self._by_name.get(name.lower(), [])
+        if start is not None:
+            for fn in spans:
+                if fn.start == start:
+                    return fn
+        return spans[0] if spans else None
+
+    def body(self, fn: FunctionSpan) -> str:
+        """Raw body text including braces."""
+        return self.text[fn.body_start:fn.end]
+
+    def code(self, fn: FunctionSpan) -> str:
+        """Body text with comments blanked out (offsets preserved)."""
+        a, b = fn.body_start, fn.end
+        parts: List[str] = []
+        pos = a
+        for cs, ce in self.comments:
+            if ce <= a or cs >= b:
+                continue
+            cs, ce = max(cs, a), min(ce, b)
+            parts.append(self.text[pos:cs])
+            parts.append(' ' * (ce - cs))
+            pos = ce
+        parts.append(self.text[pos:b])
+        return ''.join(parts)
+
+    def enclosing_function(self, offset: int) -> Optional[FunctionSpan]:
+        """Innermost function whose body contains `offset`."""
+        best = None
+        for fn in self.functions:
+            if fn.body_start <= offset < fn.end and (best is None or fn.body_start > best.body_start):
+                best = fn
+        return best
+
+
+def parse_php(text: str) -> PhpStructure:
+    functions: List[FunctionSpan] = []
+    comments: List[Tuple[int, int]] = []
+    # brace stack: None for plain blocks, (name, start, body_start) for function bodies
+    stack: List[Optional[Tuple[str, int, int]]] = []
+    pending: Optional[Tuple[str, int]] = None
+    n = len(text)
+
+    m = _OPEN_TAG_RE.search(text)
+    pos = m.end() if m else n
+    while pos < n:
+        m = _PHP_SIG_RE.search(text, pos)
+        if not m:
+            break
+        tok = m.group(0)
+        s = m.start()
+        if tok == "'":
+            e = _SQ_BODY_RE.match(text, s + 1)
+            pos = e.end() if e else n
+        elif tok == '"':
+            e = _DQ_BODY_RE.match(text, s + 1)
+            pos = e.end() if e else n
+        elif tok == '`':
+            e = _BT_BODY_RE.match(text, s + 1)
+            pos = e.end() if e else n
+        elif tok == '/*':
+            e = text.find('*/', s + 2)
+            pos = n if e < 0 else e + 2
+            comments.append((s, pos))
+        elif tok in ('//', '#'):
+            e = _LINE_COMMENT_END_RE.search(text, s)
+            pos = n if not e else e.start()
+            comments.append((s, pos))
+        elif tok == '<<<':
+            h = _HEREDOC_START_RE.match(text, s)
+            if not h:
+                pos = s + 3
+                continue
+            end_re = re.compile(r'\n[ \t]*' + re.escape(h.group(2)) + r'\b')
+            e = end_re.search(text, h.end() - 1)
+            pos = n if not e else e.end()
+        elif tok == '?>':
+            o = _OPEN_TAG_RE.search(text, s + 2)
+            pos = n if not o else o.end()
+        elif tok == '{':
+            if pending is not None:
+                stack.append((pending[0], pending[1], s))
+                pending = None
+            else:
+                stack.append(None)
+            pos = s + 1
+        elif tok == '}':
+            if stack:
+                frame = stack.pop()
+                if frame is not None:
+                    functions.append(FunctionSpan(frame[0], frame[1], frame[2], s + 1))
+            pos = s + 1
+        elif tok == ';':
+            pending = None  # abstract / interface declaration without a body
+            pos = s + 1
+        else:  # function keyword
+            f = _FUNC_NAME_RE.match(text, s)
+            if f and (s == 0 or text[s - 1] not in '$>:'):  # not $function / ->function / ::function
+                pending = (f.group(1) or '', s)
+                pos = f.end()
+            else:
+                pos = m.end()
+
+    functions.sort(key=lambda fn: fn.start)
+    return PhpStructure(text, functions, comments)
@@ -0,0 +1,621 @@
+#!/usr/bin/env python3
+"""
+Re-encrypt ProfessionalDevelopment_encrypt() values stored under the legacy
+hard-coded key with the per-site derived key, straight from a database dump.
+
+The stored format (includes/functions.php) is
+
+  base64( IV[16] . base64( AES-256-CBC(PKCS#7, key, IV, plaintext) ) )
+
+with key = sha256(PS_ENCRYPTION_KEY) when that constant is set, otherwise
+sha256(wp_salt('auth') . '|' . site_url() . '|Professional_Development').
+ProfessionalDevelopment_decrypt() tries that key first and then the legacy key;
+this tool does the same for every targeted row and rewrites only the values
+that need the legacy key, after checking that the new value decrypts back to
+the same plaintext.
+
+Input is a dump of the option/meta rows, detected from the extension or given
+with --format:
+  sql    mysqldump output; INSERT/REPLACE INTO *options, *sitemeta and *meta
+         tables (plain or --complete-insert). Only the rewritten string
+         literals change; every other byte is copied through.
+  csv    RFC 4180 with a header row: option_name/option_value or
+         meta_key/meta_value, and optionally blog_id.
+  jsonl  one object per line with the same fields as csv.
+Rows are targeted by name (--name, default: the plugin's credential options).
+
+Keys: --wp-config reads PS_ENCRYPTION_KEY or the AUTH_KEY/AUTH_SALT family the
+way wp_salt('auth') does; the environment variables PS_ENCRYPTION_KEY and
+WP_AUTH_SALT (the full wp_salt('auth') value) override it. site_url() differs
+per blog on multisite: give --site-url URL for the main site and
+--site-url ID=URL for the others (the blog id comes from wp_ID_options table
+names or the blog_id column). The URL must be exactly what site_url() returned
+when the values were written, including the http/https scheme.
+
+The dump is split into chunks at record boundaries that are processed in
+parallel (--jobs) and checkpointed in a work directory next to --output; an
+interrupted run resumes from the finished chunks when started again with the
+same input and keys (--restart discards them). The output is assembled with
+an atomic rename, so it is either complete or absent. Without --output the
+dump is only analysed.
+
+Usage:
+  python3 tools/reencrypt_values.py DUMP [--output OUT] [--format sql|csv|jsonl]
+                                    [--wp-config wp-config.php] [--site-url [ID=]URL ...]
+                                    [--name OPTION ...] [--jobs N] [--chunk-mb 8]
+                                    [--restart] [--keep-work]
+  python3 tools/reencrypt_values.py --self-test
+
+AES and the storage format live in tools/value_crypto.py, which needs the
+`cryptography` package (or, much slower, the openssl command). --self-test
+checks them and the key derivation against includes/functions.php (the same
+round trip tools/test_encryption_key_derivation.py runs).
+
+Exit code: 0 if every targeted value is current or was migrated; 1 if any was
+undecryptable, had no key for its blog or failed its round trip, or on errors.
+"""
+
+from __future__ import annotations
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+from concurrent.futures import as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from tool_pool import add_jobs_argument, get_executor, resolve_jobs
+from tool_profile import add_profile_arguments, phase, profile_session
+from value_crypto import BACKEND, derive_key, migrate_value, round_trip_errors
+
+
+ROOT = Path(__file__).resolve().parents[1]
+FUNCTIONS_PHP = ROOT / 'includes' / 'functions.php'
+
+DEFAULT_NAMES = ('ProfessionalDevelopment_db_host', 'ProfessionalDevelopment_db_name',
+                 'ProfessionalDevelopment_db_user', 'ProfessionalDevelopment_db_pass',
+                 'ProfessionalDevelopment_DB_password')
+DEFAULT_CHUNK_MB = 8
+# Blog id used for a key that applies to every blog (PS_ENCRYPTION_KEY)
+ALL_BLOGS = 0
+MAX_ISSUES_PER_CHUNK = 100
+STATE_VERSION = 1
+
+# Statuses; everything except these two makes the run fail
+OK_STATUSES = ('current', 'migrated')
+
+# ---------------------------------------------------------------------------
+# Keys
+# ---------------------------------------------------------------------------
+
+_DEFINE_RE = re.compile(r"""define\s*\(\s*(['"])(\w+)\1\s*,\s*(?:'((?:[^'\\]|\\.)*)'|"((?:[^"\\]|\\.)*)"|(true|false))\s*\)""",
+                        re.IGNORECASE | re.DOTALL)
+_SALT_CONSTANTS = ('AUTH', 'SECURE_AUTH', 'LOGGED_IN', 'NONCE', 'SECRET')
+
+
+class KeyConfigError(RuntimeError):
+    pass
+
+
+def read_wp_config(path: Path) -> Dict[str, str]:
+    """String constants define()d in a wp-config.php (single- or double-quoted literals)."""
+    consts: Dict[str, str] = {}
+    for m in _DEFINE_RE.finditer(path.read_text(encoding='utf-8', errors='replace')):
+        if m.group(3) is not None:
+            consts[m.group(2)] = re.sub(r"\\([\\'])", r'\1', m.group(3))
+        elif m.group(4) is not None:
+            consts[m.group(2)] = m.group(4).encode('latin-1', 'backslashreplace').decode('unicode_escape')
+        else:
+            consts[m.group(2)] = '1' if m.group(5).lower() == 'true' else ''
+    return consts
+
+
+def wp_salt_auth(consts: Dict[str, str]) -> Optional[str]:
+    """wp_salt('auth') from wp-config constants, or None if it would come from the database."""
+    duplicated: Dict[str, bool] = {'put your unique phrase here': True}
+    for first in _SALT_CONSTANTS:
+        for second in ('KEY', 'SALT'):
+            value = consts.get(f'{first}_{second}')
+            if value is not None:
+                duplicated[value] = value in duplicated
+    values = {'key': '', 'salt': ''}
+    if consts.get('SECRET_KEY') and not duplicated.get(consts['SECRET_KEY']):
+        values['key'] = consts['SECRET_KEY']
+    if consts.get('SECRET_SALT') and not duplicated.get(consts['SECRET_SALT']):
+        values['salt'] = consts['SECRET_SALT']
+    for kind in ('key', 'salt'):
+        value = consts.get(f'AUTH_{kind.upper()}')
+        if value and not duplicated.get(value):
+            values[kind] = value
+        elif not values[kind]:
+            return None  # WordPress falls back to the auth_key/auth_salt site options
+    return values['key'] + values['salt']
+
+
+def build_keys(args: argparse.Namespace) -> Dict[int, bytes]:
+    """Derived key per blog id (ALL_BLOGS when PS_ENCRYPTION_KEY applies everywhere)."""
+    consts = read_wp_config(Path(args.wp_config)) if args.wp_config else {}
+    explicit = os.environ.get('PS_ENCRYPTION_KEY') or consts.get('PS_ENCRYPTION_KEY')
+    if explicit:
+        return {ALL_BLOGS: hashlib.sha256(explicit.encode('utf-8')).digest()}
+    salt = os.environ.get('WP_AUTH_SALT') or wp_salt_auth(consts)
+    if salt is None:
+        raise KeyConfigError('no PS_ENCRYPTION_KEY and no wp_salt(\'auth\'): pass --wp-config with the '
+                             'AUTH_KEY/AUTH_SALT constants or set WP_AUTH_SALT')
+    if not args.site_url:
+        raise KeyConfigError('the derived key needs --site-url (site_url() of each blog)')
+    keys: Dict[int, bytes] = {}
+    for spec in args.site_url:
+        blog, sep, url = spec.partition('=')
+        if sep and blog.isdigit():
+            keys[int(blog)] = derive_key(salt, url)
+        else:
+            keys[1] = derive_key(salt, spec)
+    return keys
+
+
+def keys_fingerprint(keys: Dict[int, bytes]) -> str:
+    h = hashlib.sha256()
+    for blog in sorted(keys):
+        h.update(f'{blog}:'.encode('ascii') + hashlib.sha256(keys[blog]).digest())
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Dump formats
+# ---------------------------------------------------------------------------
+
+class Job(NamedTuple):
+    """One chunk of the dump for a worker."""
+    index: int
+    path: str
+    fmt: str
+    start: int
+    end: int
+    part: Optional[str]              # output file, None to only analyse
+    keys: Dict[int, bytes]
+    names: Tuple[str, ...]
+    columns: Tuple[str, ...]         # csv header fields
+
+
+_INSERT_RE = re.compile(r'(?:INSERT|REPLACE)\s+(?:IGNORE\s+)?INTO\s+`?([A-Za-z0-9_$]+)`?\s*(?:\(([^)]*)\))?\s*VALUES\s*',
+                        re.IGNORECASE)
+_TABLE_RE = re.compile(r'(?:_(\d+))?_(options|sitemeta|postmeta|usermeta|termmeta|commentmeta)\Z')
+_SQL_TOKEN_RE = re.compile(r"""\s*(?:(?:_\w+\s*)?'((?:[^'\\]|\\.|'')*)'|(NULL|[-+0-9.eE]+|0x[0-9A-Fa-f]*|[bB]'[01]*'))\s*""",
+                           re.DOTALL)
+_SQL_UNESCAPE = {'0': '\0', 'n': '\n', 'r': '\r', 't': '\t', 'b': '\b', 'Z': '\x1a'}
+NAME_COLUMNS = ('option_name', 'meta_key')
+VALUE_COLUMNS = ('option_value', 'meta_value')
+
+
+def _sql_unescape(s: str) -> str:
+    return re.sub(r"\\(.)|''", lambda m: _SQL_UNESCAPE.get(m.group(1), m.group(1)) if m.group(1) else "'", s,
+                  flags=re.DOTALL)
+
+
+def _sql_tuples(line: str, pos: int) -> Iterator[List[Tuple[int, int, Optional[str]]]]:
+    """Rows of a VALUES list: [(start, end, string value or None)] per column."""
+    n = len(line)
+    while pos < n:
+        while pos < n and line[pos] in ' \t\r\n,':
+            pos += 1
+        if pos >= n or line[pos] != '(':
+            return
+        pos += 1
+        row: List[Tuple[int, int, Optional[str]]] = []
+        while True:
+            m = _SQL_TOKEN_RE.match(line, pos)
+            if m is None:
+                return
+            row.append((m.start(1) - 1, m.end(1) + 1, _sql_unescape(m.group(1))) if m.group(1) is not None
+                       else (m.start(2), m.end(2), None))
+            pos = m.end()
+            if pos < n and line[pos] == ',':
+                pos += 1
+                continue
+            if pos < n and line[pos] == ')':
+                pos += 1
+                break
+            return
+        yield row
+
+
+def _sql_columns(table: str, column_list: Optional[str]) -> Optional[Tuple[int, int, int]]:
+    """(blog id, name column, value column) for a targeted table, else None."""
+    m = _TABLE_RE.search(table)
+    if m is None:
+        return None
+    blog = int(m.group(1)) if m.group(1) else 1
+    if column_list:
+        cols = [c.strip().strip('`') for c in column_list.split(',')]
+        name_i = next((cols.index(c) for c in NAME_COLUMNS if c in cols), None)
+        value_i = next((cols.index(c) for c in VALUE_COLUMNS if c in cols), None)
+        if name_i is None or value_i is None:
+            return None
+        return blog, name_i, value_i
+    # WordPress schema: option_id, option_name, option_value, autoload / meta_id, object_id, meta_key, meta_value
+    return (blog, 1, 2) if m.group(2) == 'options' else (blog, 2, 3)
+
+
+class ChunkResult(NamedTuple):
+    counts: Dict[str, int]
+    lines: int                                   # newlines in the chunk (for line numbers)
+    issues: List[Tuple[int, int, str, str]]      # (line in chunk, blog, name, status)
+    size: int                                    # bytes written
+
+
+def _migrate(job: Job, blog: int, name: str, value: str, counts: Dict[str, int],
+             issues: List[Tuple[int, int, str, str]], line: int) -> Optional[str]:
+    key = job.keys.get(blog, job.keys.get(ALL_BLOGS))
+    if key is None:
+        status, new = 'no-key', None
+    else:
+        status, new = migrate_value(value.encode('latin-1', 'replace'), key)
+    counts[status] = counts.get(status, 0) + 1
+    if status not in OK_STATUSES and len(issues) < MAX_ISSUES_PER_CHUNK:
+        issues.append((line, blog, name, status))
+    return new.decode('ascii') if new is not None else None
+
+
+def _records(job: Job, data: bytes) -> Iterator[bytes]:
+    """Raw records of a chunk, terminators included (csv records may span lines)."""
+    if job.fmt != 'csv':
+        yield from data.splitlines(keepends=True)
+        return
+    record: List[bytes] = []
+    quotes = 0
+    for line in data.splitlines(keepends=True):
+        record.append(line)
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            yield b''.join(record)
+            record, quotes = [], 0
+    if record:
+        yield b''.join(record)
+
+
+def _process_record(job: Job, raw: bytes, line: int, counts: Dict[str, int],
+                    issues: List[Tuple[int, int, str, str]]) -> bytes:
+    if job.fmt == 'sql':
+        text = raw.decode('latin-1')
+        m = _INSERT_RE.match(text.lstrip())
+        if m is None:
+            return raw
+        offset = len(text) - len(text.lstrip())
+        cols = _sql_columns(m.group(1), m.group(2))
+        if cols is None:
+            return raw
+        blog, name_i, value_i = cols
+        edits: List[Tuple[int, int, str]] = []
+        for row in _sql_tuples(text, offset + m.end()):
+            if max(name_i, value_i) >= len(row) or row[name_i][2] not in job.names or row[value_i][2] is None:
+                continue
+            new = _migrate(job, blog, row[name_i][2], row[value_i][2], counts, issues, line)
+            if new is not None:
+                edits.append((row[value_i][0], row[value_i][1], f"'{new}'"))
+        for start, end, repl in reversed(edits):
+            text = text[:start] + repl + text[end:]
+        return text.encode('latin-1') if edits else raw
+
+    if job.fmt == 'jsonl':
+        try:
+            obj = json.loads(raw.decode('utf-8', 'surrogateescape'))
+        except ValueError:
+            return raw
+        if not isinstance(obj, dict):
+            return raw
+        name_f = next((c for c in NAME_COLUMNS if c in obj), None)
+        value_f = next((c for c in VALUE_COLUMNS if c in obj), None)
+        if name_f is None or value_f is None or obj[name_f] not in job.names or not isinstance(obj[value_f], str):
+            return raw
+        new = _migrate(job, _blog_id(obj.get('blog_id')), obj[name_f], obj[value_f], counts, issues, line)
+        if new is None:
+            return raw
+        obj[value_f] = new
+        ending = raw[len(raw.rstrip(b'\r\n')):]
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8', 'surrogateescape') + ending
+
+    fields = next(csv.reader(io.StringIO(raw.decode('latin-1'), newline='')), [])
+    row = dict(zip(job.columns, fields))
+    name_f = next((c for c in NAME_COLUMNS if c in row), None)
+    value_f = next((c for c in VALUE_COLUMNS if c in row), None)
+    if name_f is None or value_f is None or row[name_f] not in job.names:
+        return raw
+    new = _migrate(job, _blog_id(row.get('blog_id')), row[name_f], row[value_f], counts, issues, line)
+    if new is None:
+        return raw
+    fields[job.columns.index(value_f)] = new
+    out = io.StringIO()
+    ending = raw[len(raw.rstrip(b'\r\n')):].decode('latin-1') or '\n'
+    csv.writer(out, lineterminator=ending).writerow(fields)
+    return out.getvalue().encode('latin-1')
+
+
+def _blog_id(value: Any) -> int:
+    try:
+        return int(value) if value not in (None, '') else 1
+    except (TypeError, ValueError):
+        return 1
+
+
+def process_chunk(job: Job) -> ChunkResult:
+    """Migrate one chunk; the output (if any) is written to job.part atomically."""
+    with open(job.path, 'rb') as fh:
+        fh.seek(job.start)
+        data = fh.read(job.end - job.start)
+    names = [n.encode('latin-1', 'replace') for n in job.names]
+    counts: Dict[str, int] = {}
+    issues: List[Tuple[int, int, str, str]] = []
+    out: List[bytes] = []
+    line = 0
+    for raw in _records(job, data):
+        # Cheap prefilter: most rows of a dump name none of the targeted options
+        if any(n in raw for n in names):
+            raw_out = _process_record(job, raw, line, counts, issues)
+        else:
+            raw_out = raw
+        out.append(raw_out)
+        line += raw.count(b'\n')
+    size = sum(len(b) for b in out)
+    if job.part is not None:
+        _write_atomic(Path(job.part), out)
+    return ChunkResult(counts, line, issues, size)
+
+
+def _write_atomic(path: Path, blocks: List[bytes]) -> None:
+    fd, tmp = tempfile.mkstemp(prefix=path.name + '.', suffix='.tmp', dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            for b in blocks:
+                fh.write(b)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+# ---------------------------------------------------------------------------
+# Chunking, checkpoints, assembly
+# ---------------------------------------------------------------------------
+
+def detect_format(path: Path, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    suffix = path.suffix.lower()
+    if suffix in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    if suffix == '.csv':
+        return 'csv'
+    return 'sql'
+
+
+def csv_header(path: Path) -> Tuple[int, Tuple[str, ...]]:
+    """(bytes of the header record, its fields)."""
+    with open(path, 'rb') as fh:
+        raw = b''
+        for line in fh:
+            raw += line
+            if raw.count(b'"') % 2 == 0:
+                break
+    fields = next(csv.reader(io.StringIO(raw.decode('latin-1'), newline='')), [])
+    return len(raw), tuple(fields)
+
+
+def chunk_bounds(path: Path, fmt: str, start: int, chunk_bytes: int) -> List[Tuple[int, int]]:
+    """Contiguous [start, end) ranges of about chunk_bytes that end on record boundaries."""
+    size = path.stat().st_size
+    bounds: List[Tuple[int, int]] = []
+    with open(path, 'rb') as fh:
+        if fmt != 'csv':
+            pos = start
+            while pos < size:
+                fh.seek(min(size, pos + chunk_bytes))
+                fh.readline()
+                end = min(size, fh.tell()) if pos + chunk_bytes < size else size
+                bounds.append((pos, end))
+                pos = end
+            return bounds
+        # csv: a newline is a record boundary only outside quotes, so track quote parity from the start
+        fh.seek(start)
+        pos, quotes, chunk_start = start, 0, start
+        for line in fh:
+            pos += len(line)
+            quotes += line.count(b'"')
+            if quotes % 2 == 0 and pos - chunk_start >= chunk_bytes:
+                bounds.append((chunk_start, pos))
+                chunk_start = pos
+        if chunk_start < size:
+            bounds.append((chunk_start, size))
+    return bounds
+
+
+def _load_state(path: Path, identity: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    try:
+        state = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or state.get('identity') != identity:
+        return None
+    return state
+
+
+def _save_state(path: Path, state: Dict[str, Any]) -> None:
+    _write_atomic(path, [json.dumps(state, indent=1, sort_keys=True).encode('utf-8')])
+
+
+def run(args: argparse.Namespace) -> int:
+    if BACKEND is None:
+        print('[ERR] AES needs the cryptography package (pip install cryptography) or openssl', file=sys.stderr)
+        return 1
+    src = Path(args.dump)
+    try:
+        keys = build_keys(args)
+        st = src.stat()
+    except (KeyConfigError, OSError) as exc:
+        print(f'[ERR] {exc}', file=sys.stderr)
+        return 1
+    fmt = detect_format(src, args.format)
+    names = tuple(args.name or DEFAULT_NAMES)
+    header_len, columns = (csv_header(src) if fmt == 'csv' else (0, ()))
+    if fmt == 'csv' and not (set(columns) & set(NAME_COLUMNS) and set(columns) & set(VALUE_COLUMNS)):
+        print(f'[ERR] {src}: csv header needs option_name/option_value or meta_key/meta_value', file=sys.stderr)
+        return 1
+
+    out = Path(args.output) if args.output else None
+    work = Path(args.work_dir) if args.work_dir else (out.with_name(out.name + '.reencrypt-work') if out else None)
+    identity = {'version': STATE_VERSION, 'input': str(src.resolve()), 'size': st.st_size,
+                'mtime_ns': st.st_mtime_ns, 'format': fmt, 'names': list(names), 'keys': keys_fingerprint(keys),
+                'chunk_bytes': args.chunk_mb * 1024 * 1024}
+    state: Optional[Dict[str, Any]] = None
+    if work is not None:
+        if args.restart and work.exists():
+            shutil.rmtree(work)
+        work.mkdir(parents=True, exist_ok=True)
+        state = _load_state(work / 'state.json', identity)
+        if state is not None and state['done']:
+            print(f"Resuming: {len(state['done'])}/{len(state['chunks'])} chunk(s) already done", file=sys.stderr)
+    if state is None:
+        with phase('split'):
+            chunks = chunk_bounds(src, fmt, header_len, identity['chunk_bytes'])
+        state = {'identity': identity, 'chunks': [list(c) for c in chunks], 'done': {}}
+        if work is not None:
+            for stale in work.glob('chunk-*.part'):
+                stale.unlink()
+            _save_state(work / 'state.json', state)
+
+    def part(i: int) -> Optional[str]:
+        return str(work / f'chunk-{i:05d}.part') if work is not None else None
+
+    done: Dict[str, Any] = state['done']
+    for i, info in list(done.items()):
+        p = part(int(i))
+        if p is None or not os.path.exists(p) or os.path.getsize(p) != info['size']:
+            del done[i]  # lost or partial output: redo
+    todo = [Job(i, str(src), fmt, s, e, part(i), keys, names, columns)
+            for i, (s, e) in enumerate(state['chunks']) if str(i) not in done]
+
+    n_jobs = resolve_jobs(args.jobs)
+    with phase('migrate'):
+        try:
+            if n_jobs <= 1 or len(todo) <= 1:
+                results = ((job, process_chunk(job)) for job in todo)
+            else:
+                executor = get_executor(n_jobs)
+                futures = {executor.submit(process_chunk, job): job for job in todo}
+                results = ((futures[f], f.result()) for f in as_completed(futures))
+            for job, res in results:
+                done[str(job.index)] = res._asdict()
+                if work is not None:
+                    _save_state(work / 'state.json', state)
+        except KeyboardInterrupt:
+            print('\n[WARN] interrupted; run again with the same arguments to resume', file=sys.stderr)
+            return 1
+        except OSError as exc:
+            print(f'[ERR] {exc}', file=sys.stderr)
+            return 1
+
+    counts: Dict[str, int] = {}
+    failures = 0
+    line_base = 1 + (1 if fmt == 'csv' else 0)
+    for i in range(len(state['chunks'])):
+        info = done[str(i)]
+        for status, n in info['counts'].items():
+            counts[status] = counts.get(status, 0) + n
+        for line, blog, name, status in info['issues']:
+            print(f'[WARN] {src}:{line_base + line}: blog {blog} {name}: {status}', file=sys.stderr)
+        failures += sum(n for s, n in info['counts'].items() if s not in OK_STATUSES)
+        line_base += info['lines']
+
+    if out is not None and work is not None:
+        with phase('assemble'):
+            try:
+                _assemble(src, header_len, out, [part(i) for i in range(len(state['chunks']))])
+            except OSError as exc:
+                print(f'[ERR] cannot write {out}: {exc}', file=sys.stderr)
+                return 1
+        if not args.keep_work:
+            shutil.rmtree(work, ignore_errors=True)
+
+    summary = ', '.join(f'{n} {s}' for s, n in sorted(counts.items())) or 'no targeted values'
+    print(f"{sum(counts.values())} targeted value(s): {summary} "
+          f"[{len(state['chunks'])} chunk(s), {n_jobs} job(s), {BACKEND} AES]")
+    if out is not None:
+        print(f'Wrote {out}')
+    return 1 if failures else 0
+
+
+def _assemble(src: Path, header_len: int, out: Path, parts: List[Optional[str]]) -> None:
+    fd, tmp = tempfile.mkstemp(prefix=out.name + '.', suffix='.tmp', dir=str(out.parent.resolve()))
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            if header_len:
+                with open(src, 'rb') as head:
+                    fh.write(head.read(header_len))
+            for p in parts:
+                with open(p, 'rb') as chunk:  # type: ignore[arg-type]
+                    shutil.copyfileobj(chunk, fh, 1024 * 1024)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, out)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+# ---------------------------------------------------------------------------
+# Self-test
+# ---------------------------------------------------------------------------
+
+def self_test() -> int:
+    try:
+        text = FUNCTIONS_PHP.read_text(encoding='utf-8')
+    except OSError as exc:
+        print(f'[ERR] {exc}', file=sys.stderr)
+        return 1
+    errors = round_trip_errors(text)
+    if errors:
+        print('Re-encryption self-test FAILED:')
+        for e in errors:
+            print(' -', e)
+        return 1
+    print(f'Re-encryption self-test OK ({BACKEND} AES)')
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('dump', nargs='?', help='SQL, CSV or JSON Lines dump of the option/meta rows')
+    ap.add_argument('--self-test', action='store_true', help='Check the crypto and format against functions.php')
+    ap.add_argument('-o', '--output', help='Write the migrated dump here (default: analyse only)')
+    ap.add_argument('--format', choices=('sql', 'csv', 'jsonl'), help='Dump format (default: from the extension)')
+    ap.add_argument('--wp-config', help='wp-config.php to read PS_ENCRYPTION_KEY / AUTH_KEY / AUTH_SALT from')
+    ap.add_argument('--site-url', action='append', metavar='[ID=]URL', help='site_url() of the main site or blog ID')
+    ap.add_argument('--name', action='append', help='Option/meta name to migrate (default: the plugin credentials)')
+    ap.add_argument('--chunk-mb', type=int, default=DEFAULT_CHUNK_MB,
+                    help=f'Chunk size in MiB (default: {DEFAULT_CHUNK_MB})')
+    ap.add_argument('--work-dir', help='Checkpoint directory (default: OUTPUT.reencrypt-work)')
+    ap.add_argument('--restart', action='store_true', help='Ignore checkpoints from an earlier run')
+    ap.add_argument('--keep-work', action='store_true', help='Keep the checkpoint directory after success')
+    add_jobs_argument(ap)
+    add_profile_arguments(ap)
+    args = ap.parse_args(argv if argv is not None else [])
+    if not args.self_test and not args.dump:
+        ap.error('a dump file or --self-test is required')
+    if args.chunk_mb < 1:
+        ap.error('--chunk-mb must be at least 1')
+    with profile_session(args, 'reencrypt_values'):
+        return self_test() if args.self_test else run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
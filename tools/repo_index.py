@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Shared, single-pass file index for the checks in tools/.
+
+The plugin tree is walked once per process. Each file is read and decoded at
+most once, on first use, and keeps a line-offset table so callers can map a
+match offset to a line number with a bisect instead of rescanning the text.
+Every tool queries the same index, so running several checks in one process
+(see tools/run_checks.py) costs one walk and one read per file.
+
+Usage (from another tool):
+  from repo_index import get_index
+  index = get_index(root)
+  for f in index.files(('.php',)):
+      for m in SOME_RE.finditer(f.text):
+          print(f.path, f.line_of(m.start()))
+
+Scanners that only report a few lines per file can skip the decode: `raw()`
+gives the undecoded contents (memory-mapped for large files), byte patterns
+run on it directly, and RawLines decodes just the lines that are reported:
+
+  with f.raw() as buf:
+      if not is_binary(buf):
+          lines = RawLines(buf)
+          for m in SOME_BYTES_RE.finditer(buf):
+              print(f.path, lines.line_of(m.start()), lines.line(m.start()))
+"""
+
+from __future__ import annotations
+import contextlib
+import hashlib
+import mmap
+import os
+import re
+import stat
+import time
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Union
+
+import tool_profile
+
+
+PLUGIN_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_IGNORES = frozenset({'.git', 'node_modules', '.venv', '__pycache__', '.tools-cache'})
+
+# Files at least this large are memory-mapped by IndexedFile.raw(); smaller ones are read
+MMAP_MIN_BYTES = 256 * 1024
+# A NUL byte in the first 8000 bytes marks a file as binary (git's rule)
+BINARY_SNIFF_BYTES = 8000
+# Longest line RawLines.line() returns whole; longer (minified) lines are cut around the offset
+MAX_LINE_CHARS = 4096
+
+_NEWLINE_RE = re.compile(r'\n')
+_NEWLINE_BYTES_RE = re.compile(rb'\n')
+# The line boundaries of str.splitlines(), in text and in UTF-8
+_LINE_BREAK_RE = re.compile('\r\n|[\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]')
+_LINE_BREAK_BYTES_RE = re.compile(rb'\r\n|[\n\r\x0b\x0c\x1c-\x1e]|\xc2\x85|\xe2\x80[\xa8\xa9]')
+
+Raw = Union[bytes, mmap.mmap]
+
+
+class IndexedFile:
+    """One file of the tree. Contents and line tables are loaded lazily and cached."""
+
+    __slots__ = ('path', 'rel', 'suffix', 'size', 'mtime', 'from_disk',
+                 '_text', '_digest', '_line_starts', '_lines')
+
+    def __init__(self, path: Path, rel: str, size: int, mtime: Optional[float]):
+        self.path = path
+        self.rel = rel
+        self.suffix = path.suffix.lower()
+        self.size = size
+        # None for contents that did not come from the working tree (e.g. git blobs)
+        self.mtime = mtime
+        self.from_disk = True
+        self._text: Optional[str] = None
+        self._digest: Optional[str] = None
+        self._line_starts: Optional[List[int]] = None
+        self._lines: Optional[List[str]] = None
+
+    @classmethod
+    def load(cls, path: Path, root: Optional[Path] = None) -> 'IndexedFile':
+        """Build a standalone entry for `path` (used by worker processes and single-file callers)."""
+        p = Path(path)
+        try:
+            st = p.stat()
+            size, mtime = st.st_size, st.st_mtime
+        except OSError:
+            size, mtime = 0, 0.0
+        rel = p.relative_to(root).as_posix() if root is not None else p.as_posix()
+        return cls(p, rel, size, mtime)
+
+    @classmethod
+    def from_bytes(cls, path: Path, rel: str, data: bytes) -> 'IndexedFile':
+        """Entry whose contents are supplied by the caller instead of read from `path`."""
+        f = cls(Path(path), rel, len(data), None)
+        f.from_disk = False
+        f._digest = hashlib.sha1(data).hexdigest()
+        f._text = data.decode('utf-8', errors='ignore')
+        return f
+
+    @property
+    def text(self) -> str:
+        """Decoded contents (UTF-8, undecodable bytes dropped). Empty if unreadable."""
+        if self._text is None:
+            self._load()
+        return self._text
+
+    @property
+    def digest(self) -> str:
+        """SHA-1 of the raw bytes, taken from the first `raw()` or `text` read (a file not read
+        yet is hashed through `raw()`, without decoding it)."""
+        if self._digest is None:
+            if self._text is None and self.from_disk:
+                with self.raw():
+                    pass
+            else:
+                self._load()
+        return self._digest
+
+    def _load(self) -> None:
+        prof = tool_profile.ACTIVE
+        t0 = time.perf_counter() if prof is not None else 0.0
+        try:
+            data = self.path.read_bytes()
+        except Exception:
+            data = b''
+        if self._digest is None:
+            self._digest = hashlib.sha1(data).hexdigest()
+        if self._text is None:
+            self._text = data.decode('utf-8', errors='ignore')
+        if prof is not None:
+            prof.read(len(data), time.perf_counter() - t0)
+
+    @contextlib.contextmanager
+    def raw(self) -> Iterator[Raw]:
+        """Undecoded contents, valid inside the `with` block: a read-only mapping for files
+        of MMAP_MIN_BYTES or more (nothing is copied until sliced), bytes otherwise.
+
+        Entries not from the working tree give their text re-encoded; unreadable files b''.
+        The first call also records `digest` from the buffer.
+        """
+        if not self.from_disk:
+            yield self.text.encode('utf-8')
+            return
+        prof = tool_profile.ACTIVE
+        t0 = time.perf_counter() if prof is not None else 0.0
+        buf: Raw = b''
+        try:
+            with open(self.path, 'rb') as fh:
+                size = os.fstat(fh.fileno()).st_size
+                buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) if size >= MMAP_MIN_BYTES else fh.read()
+        except (OSError, ValueError):
+            pass
+        if self._digest is None:
+            self._digest = hashlib.sha1(buf).hexdigest()
+        if prof is not None:
+            prof.read(len(buf), time.perf_counter() - t0)
+        try:
+            yield buf
+        finally:
+            if isinstance(buf, mmap.mmap):
+                buf.close()
+
+    def char_offset(self, byte_offset: int) -> int:
+        """Offset in `text` of the character at `byte_offset` in the raw contents."""
+        text = self.text
+        if len(text) == self.size and text.isascii():
+            return byte_offset
+        with self.raw() as buf:
+            return len(buf[:byte_offset].decode('utf-8', errors='ignore'))
+
+    @property
+    def line_starts(self) -> List[int]:
+        """Offsets in `text` where each line begins; index 0 is line 1."""
+        if self._line_starts is None:
+            starts = [0]
+            starts.extend(m.end() for m in _NEWLINE_RE.finditer(self.text))
+            self._line_starts = starts
+        return self._line_starts
+
+    @property
+    def lines(self) -> List[str]:
+        """Lines of `text` without their '\\n' / '\\r\\n' terminators, one per line_starts entry."""
+        if self._lines is None:
+            text = self.text
+            starts = self.line_starts
+            lines = [text[a:b - 1] for a, b in zip(starts, starts[1:])]
+            if starts[-1] < len(text):
+                lines.append(text[starts[-1]:])
+            self._lines = [ln[:-1] if ln.endswith('\r') else ln for ln in lines]
+        return self._lines
+
+    def line_of(self, offset: int) -> int:
+        """1-based line number containing `offset`."""
+        return bisect_right(self.line_starts, offset)
+
+    def line_span(self, line_no: int) -> Tuple[int, int]:
+        """(start, end) offsets of 1-based `line_no`, excluding the newline."""
+        starts = self.line_starts
+        start = starts[line_no - 1]
+        end = starts[line_no] - 1 if line_no < len(starts) else len(self.text)
+        return start, end
+
+    def line(self, line_no: int) -> str:
+        start, end = self.line_span(line_no)
+        return self.text[start:end]
+
+    def drop(self) -> None:
+        """Forget cached contents and re-stat (e.g. after the file was rewritten on disk)."""
+        if not self.from_disk:
+            return
+        try:
+            st = self.path.stat()
+            self.size, self.mtime = st.st_size, st.st_mtime
+        except OSError:
+            pass
+        self._text = None
+        self._digest = None
+        self._line_starts = None
+        self._lines = None
+
+
+def is_binary(buf: Raw) -> bool:
+    return buf.find(b'\0', 0, BINARY_SNIFF_BYTES) != -1
+
+
+def clip_line(line: str, col: int, max_chars: int = MAX_LINE_CHARS,
+              more_before: bool = False, more_after: bool = False) -> str:
+    """`line` cut to `max_chars` characters around column `col`, marked with '...' where cut.
+    `more_before` / `more_after` say `line` is a window of a longer line (see RawLines.line)."""
+    if len(line) <= max_chars and not (more_before or more_after):
+        return line
+    start = max(0, col - max_chars // 2)
+    if not more_after:
+        start = min(start, max(0, len(line) - max_chars))
+    end = start + max_chars
+    return (('...' if start > 0 or more_before else '') + line[start:end]
+            + ('...' if end < len(line) or more_after else ''))
+
+
+class RawLines:
+    """Line numbers and lines at offsets of an undecoded buffer (see IndexedFile.raw) or
+    of a text, without decoding or copying the whole buffer. Line numbers are counted
+    incrementally, so offsets should come in ascending order, as from a scan.
+
+    Lines end at '\n' as in IndexedFile.line_starts, or with `splitlines` at every
+    boundary str.splitlines() uses ('\r', '\f', '\x85', '\u2028', ...).
+    """
+
+    def __init__(self, buf: Union[Raw, str], splitlines: bool = False):
+        self.buf = buf
+        self._text = isinstance(buf, str)
+        if splitlines:
+            self._breaks = _LINE_BREAK_RE if self._text else _LINE_BREAK_BYTES_RE
+        else:
+            self._breaks = _NEWLINE_RE if self._text else _NEWLINE_BYTES_RE
+        # bytes and str count a single separator natively; a mapping has no count()
+        self._sep = None if splitlines or isinstance(buf, mmap.mmap) else ('\n' if self._text else b'\n')
+        self._offset = 0   # the line breaks before _offset are counted in _line
+        self._line = 1
+
+    def line_of(self, offset: int) -> int:
+        """1-based line number containing `offset`."""
+        if offset < self._offset:
+            self._offset, self._line = 0, 1
+        if self._sep is not None:
+            self._line += self.buf.count(self._sep, self._offset, offset)
+        else:
+            self._line += sum(1 for _ in self._breaks.finditer(self.buf, self._offset, offset))
+        self._offset = offset
+        return self._line
+
+    def line(self, offset: int, max_chars: int = MAX_LINE_CHARS) -> str:
+        """The line containing `offset` without its terminator, cut by clip_line(). Only a
+        window of the line around the offset is decoded, however long the line is."""
+        buf = self.buf
+        window = max_chars if self._text else 4 * max_chars + 4  # bytes for max_chars characters
+        lo = max(0, offset - window)
+        start = lo
+        for m in self._breaks.finditer(buf, lo, offset):
+            start = m.end()
+        more_before = start == lo and lo > 0 and not self._breaks.match(buf, lo - 1, lo + 1)
+        hi = min(len(buf), offset + window)
+        m = self._breaks.search(buf, offset, hi)
+        end = m.start() if m else hi
+        more_after = m is None and hi < len(buf)
+        before, after = buf[start:offset], buf[offset:end]
+        if not self._text:
+            before = before.decode('utf-8', errors='ignore')
+            after = after.decode('utf-8', errors='ignore')
+        if after.endswith('\r'):
+            after = after[:-1]
+        return clip_line(before + after, len(before), max_chars, more_before, more_after)
+
+    def next_line(self, offset: int) -> int:
+        """Offset where the line after the one containing `offset` starts, or -1 at the last line."""
+        m = self._breaks.search(self.buf, offset)
+        return m.end() if m else -1
+
+
+class RepoIndex:
+    """All files under `root`, walked once in sorted order."""
+
+    def __init__(self, root: Path, ignores: Iterable[str] = DEFAULT_IGNORES):
+        self.root = Path(root).resolve()
+        self.ignores = frozenset(ignores)
+        self._files: List[IndexedFile] = []
+        self._by_path: Dict[Path, IndexedFile] = {}
+        self._walk()
+
+    def _stat_tree(self) -> Iterator[Tuple[Path, os.stat_result]]:
+        """(path, stat) of every file under root, in sorted walk order."""
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(d for d in dirnames if d not in self.ignores)
+            for fname in sorted(filenames):
+                p = Path(dirpath) / fname
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                if not stat.S_ISREG(st.st_mode):
+                    continue
+                yield p, st
+
+    def _walk(self) -> None:
+        root = self.root
+        for p, st in self._stat_tree():
+            f = IndexedFile(p, p.relative_to(root).as_posix(), st.st_size, st.st_mtime)
+            self._files.append(f)
+            self._by_path[p] = f
+
+    def refresh(self) -> Tuple[List[IndexedFile], List[IndexedFile]]:
+        """Re-walk the tree: (added or modified entries, removed entries).
+
+        Only size and mtime are compared, so no unchanged file is read. Modified
+        entries are updated in place (see IndexedFile.drop), so every holder of
+        an entry sees the new contents on next use.
+        """
+        root = self.root
+        changed: List[IndexedFile] = []
+        files: List[IndexedFile] = []
+        by_path: Dict[Path, IndexedFile] = {}
+        for p, st in self._stat_tree():
+            f = self._by_path.get(p)
+            if f is None:
+                f = IndexedFile(p, p.relative_to(root).as_posix(), st.st_size, st.st_mtime)
+                changed.append(f)
+            elif f.size != st.st_size or f.mtime != st.st_mtime:
+                f.drop()
+                changed.append(f)
+            files.append(f)
+            by_path[p] = f
+        removed = [f for p, f in self._by_path.items() if p not in by_path]
+        self._files = files
+        self._by_path = by_path
+        return changed, removed
+
+    def files(self, suffixes: Optional[Iterable[str]] = None,
+              ignores: Optional[Iterable[str]] = None,
+              skip_suffixes: Optional[Iterable[str]] = None) -> List[IndexedFile]:
+        """Files in walk order, optionally filtered.
+
+        suffixes       keep only these (lower-case, with dot) extensions
+        ignores        extra directory names to exclude, on top of the index's own
+        skip_suffixes  drop these extensions (applied only when `suffixes` is None)
+        """
+        return filter_files(self._files, suffixes, frozenset(ignores or ()) - self.ignores, skip_suffixes)
+
+    def get(self, path: Path) -> Optional[IndexedFile]:
+        return self._by_path.get(Path(path).resolve())
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(f.size for f in self._files)
+
+
+def filter_files(files: Iterable[IndexedFile], suffixes: Optional[Iterable[str]] = None,
+                 ignores: Optional[Iterable[str]] = None,
+                 skip_suffixes: Optional[Iterable[str]] = None) -> List[IndexedFile]:
+    """Filter any list of entries the same way RepoIndex.files() does."""
+    want: Optional[FrozenSet[str]] = frozenset(suffixes) if suffixes is not None else None
+    skip = frozenset(skip_suffixes or ())
+    extra = frozenset(ignores or ())
+    out = []
+    for f in files:
+        if want is not None:
+            if f.suffix not in want:
+                continue
+        elif f.suffix in skip:
+            continue
+        if extra and not extra.isdisjoint(f.rel.split('/')[:-1]):
+            continue
+        out.append(f)
+    return out
+
+
+_INDEXES: Dict[Tuple[Path, FrozenSet[str]], RepoIndex] = {}
+
+
+def get_index(root: Path = PLUGIN_ROOT, ignores: Iterable[str] = DEFAULT_IGNORES) -> RepoIndex:
+    """Return the process-wide index for `root`, building it on first use."""
+    key = (Path(root).resolve(), frozenset(ignores))
+    index = _INDEXES.get(key)
+    if index is None:
+        index = RepoIndex(key[0], key[1])
+        _INDEXES[key] = index
+    return index
+
+
+def indexed_file(path: Path, root: Path = PLUGIN_ROOT) -> Optional[IndexedFile]:
+    """Entry for one file: taken from an index already built for `root` (shared with
+    other checks in the process), otherwise loaded on its own without walking the tree."""
+    root = Path(root).resolve()
+    path = Path(path).resolve()
+    index = _INDEXES.get((root, DEFAULT_IGNORES))
+    if index is not None:
+        return index.get(path)
+    if not path.is_file():
+        return None
+    return IndexedFile.load(path, root)
+
+
+def reset_indexes() -> None:
+    """Drop every cached index so the next get_index() re-walks the tree."""
+    _INDEXES.clear()
@@ -0,0 +1,603 @@
+#!/usr/bin/env python3
+"""
+Server-side verifier for requests signed by includes/ApiRequestSigner.php.
+
+The plugin signs  METHOD "\\n" PATH "\\n" TIMESTAMP "\\n" BODY  (exact bytes, no
+normalisation) with RSASSA-PKCS1-v1_5 / SHA-256 and sends
+
+  X-Timestamp: 2025-01-15T12:00:00Z     (UTC, second precision)
+  X-Signature: <base64 signature>
+  X-Key-Id:    <key id, e.g. wp-plugin>
+
+A request is accepted when, in this order:
+  1) the timestamp parses and is within --skew seconds of the verifier's clock
+  2) the key id is known (public keys are parsed once and cached per key id)
+  3) the signature verifies over the canonical message
+  4) the same (key id, signature) was not accepted before within the window
+     (bounded replay cache; entries older than the window are dropped, and
+     the oldest entries are evicted first when it is full)
+
+Rejections carry one of: bad-timestamp, expired, future, unknown-key,
+malformed-signature, bad-signature, replay.
+
+Signatures are checked with `cryptography` when it is installed, otherwise
+with a pure-Python RSA verifier (public-exponent modexp plus an exact
+EMSA-PKCS1-v1_5 encoding compare). Batches can be spread across a process pool
+(--jobs); the replay cache always lives in the calling process, so batch
+results do not depend on the number of workers.
+
+Usage:
+  from request_verifier import KeyStore, Verifier, from_headers
+  verifier = Verifier(KeyStore.from_dir(Path('keys')), skew=300, jobs=4)
+  results = verifier.verify_batch([from_headers('POST', '/dev/query', headers, body)])
+
+  python3 tools/request_verifier.py --self-test [--vectors tools/signer_vectors.json]
+  python3 tools/request_verifier.py --keys DIR [--jobs N] < requests.jsonl > results.jsonl
+  python3 tools/request_verifier.py --bench [--requests 20000] [--jobs 0]
+
+In --keys mode each input line is a JSON object with method, path, timestamp,
+signature, key_id and body (UTF-8 text) or body_b64; one result object per
+line is written in the same order. Key files in DIR are named <key_id>.pem
+(SubjectPublicKeyInfo "PUBLIC KEY" or PKCS#1 "RSA PUBLIC KEY").
+
+The test vectors in tools/signer_vectors.json are shared with the PHP side:
+tools/signer_vectors.php checks them against ApiRequestSigner::buildMessage()
+and openssl_verify(), and can regenerate them from a private key.
+
+Exit code: 0 on success; 1 if a self-test case fails or input is unreadable.
+"""
+
+from __future__ import annotations
+import argparse
+import base64
+import binascii
+import calendar
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from tool_pool import add_jobs_argument, get_executor, resolve_jobs
+from tool_profile import add_profile_arguments, phase, profile_session
+
+try:  # optional, faster constant-time backend
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding, rsa
+except ImportError:  # pragma: no cover - depends on the environment
+    rsa = None
+
+
+TOOLS_DIR = Path(__file__).resolve().parent
+DEFAULT_VECTORS = TOOLS_DIR / 'signer_vectors.json'
+DEFAULT_SKEW = 300
+DEFAULT_REPLAY_SIZE = 100_000
+# Below this many signatures a batch is verified in-process
+POOL_MIN_BATCH = 256
+POOL_CHUNK = 512
+
+BACKEND = 'cryptography' if rsa is not None else 'python'
+
+_TIMESTAMP_RE = re.compile(r'(\d{4})-(\d\d)-(\d\d)T(\d\d):(\d\d):(\d\d)Z\Z')
+# DER DigestInfo prefix for SHA-256 (RFC 8017, section 9.2)
+_SHA256_PREFIX = bytes.fromhex('3031300d060960864801650304020105000420')
+_RSA_OID = bytes.fromhex('2a864886f70d010101')
+
+
+class SignedRequest(NamedTuple):
+    method: str
+    path: str
+    timestamp: str
+    body: bytes
+    signature: str     # base64, as sent in X-Signature
+    key_id: str
+
+
+class Result(NamedTuple):
+    ok: bool
+    reason: str        # 'ok' or the rejection reason
+
+
+class PublicKey(NamedTuple):
+    n: int
+    e: int
+
+    @property
+    def size(self) -> int:
+        return (self.n.bit_length() + 7) // 8
+
+
+class KeyFormatError(Exception):
+    pass
+
+
+def from_headers(method: str, path: str, headers: Dict[str, str], body: bytes) -> SignedRequest:
+    """SignedRequest from the X-Timestamp / X-Signature / X-Key-Id headers (case-insensitive)."""
+    h = {k.lower(): v for k, v in headers.items()}
+    return SignedRequest(method, path, h.get('x-timestamp', ''), body, h.get('x-signature', ''), h.get('x-key-id', ''))
+
+
+def canonical_message(method: str, path: str, timestamp: str, body: bytes) -> bytes:
+    """The exact bytes ApiRequestSigner::buildMessage() signs."""
+    return f'{method}\n{path}\n{timestamp}\n'.encode('utf-8') + body
+
+
+def parse_timestamp(value: str) -> Optional[int]:
+    """Seconds since the epoch for 'YYYY-MM-DDTHH:MM:SSZ', or None."""
+    m = _TIMESTAMP_RE.match(value)
+    if not m:
+        return None
+    try:
+        fields = tuple(int(g) for g in m.groups())
+        if not (1 <= fields[1] <= 12 and 1 <= fields[2] <= 31 and fields[3] < 24 and fields[4] < 60 and fields[5] < 61):
+            return None
+        return calendar.timegm(fields + (0, 0, 0))
+    except (ValueError, OverflowError):
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Keys
+# ---------------------------------------------------------------------------
+
+def _der_item(data: bytes, pos: int) -> Tuple[int, int, int]:
+    """(tag, content start, content end) of the DER item at `pos`."""
+    if pos + 2 > len(data):
+        raise KeyFormatError('truncated DER')
+    tag = data[pos]
+    length = data[pos + 1]
+    pos += 2
+    if length & 0x80:
+        n = length & 0x7f
+        if n == 0 or n > 4 or pos + n > len(data):
+            raise KeyFormatError('bad DER length')
+        length = int.from_bytes(data[pos:pos + n], 'big')
+        pos += n
+    if pos + length > len(data):
+        raise KeyFormatError('truncated DER')
+    return tag, pos, pos + length
+
+
+def _rsa_public_key(der: bytes) -> PublicKey:
+    tag, a, b = _der_item(der, 0)
+    if tag != 0x30:
+        raise KeyFormatError('expected SEQUENCE')
+    tag, na, nb = _der_item(der, a)
+    if tag == 0x30:
+        # SubjectPublicKeyInfo: SEQUENCE { AlgorithmIdentifier, BIT STRING }
+        otag, oa, ob = _der_item(der, na)
+        if otag != 0x06 or der[oa:ob] != _RSA_OID:
+            raise KeyFormatError('not an RSA key')
+        btag, ba, bb = _der_item(der, nb)
+        if btag != 0x03 or der[ba] != 0:
+            raise KeyFormatError('bad BIT STRING')
+        return _rsa_public_key(der[ba + 1:bb])
+    # PKCS#1 RSAPublicKey: SEQUENCE { INTEGER n, INTEGER e }
+    etag, ea, eb = _der_item(der, nb)
+    if tag != 0x02 or etag != 0x02:
+        raise KeyFormatError('expected INTEGER modulus and exponent')
+    key = PublicKey(int.from_bytes(der[na:nb], 'big'), int.from_bytes(der[ea:eb], 'big'))
+    if key.n.bit_length() < 1024 or key.e < 3 or key.e % 2 == 0:
+        raise KeyFormatError('unsupported RSA key parameters')
+    return key
+
+
+def parse_public_key(pem: str) -> PublicKey:
+    """RSA public key from a PEM "PUBLIC KEY" or "RSA PUBLIC KEY" block."""
+    m = re.search(r'-----BEGIN (RSA )?PUBLIC KEY-----(.*?)-----END (RSA )?PUBLIC KEY-----', pem, re.DOTALL)
+    if not m:
+        raise KeyFormatError('no PEM public key block')
+    try:
+        der = base64.b64decode(''.join(m.group(2).split()), validate=True)
+    except binascii.Error as exc:
+        raise KeyFormatError(f'bad PEM base64: {exc}') from None
+    return _rsa_public_key(der)
+
+
+class KeyStore:
+    """Public keys by key id, parsed once and cached.
+
+    Keys come from an in-memory mapping (key id -> PEM text) and/or a
+    directory of <key_id>.pem files. Directory keys are re-read when the file's
+    mtime changes; unknown ids are remembered for `miss_ttl` seconds so a flood
+    of bogus ids does not turn into a flood of stat() calls.
+    """
+
+    def __init__(self, pems: Optional[Dict[str, str]] = None, directory: Optional[Path] = None,
+                 max_keys: int = 1024, miss_ttl: float = 30.0):
+        self.pems = dict(pems or {})
+        self.directory = directory
+        self.max_keys = max_keys
+        self.miss_ttl = miss_ttl
+        self._cache: 'OrderedDict[str, Tuple[Optional[int], PublicKey]]' = OrderedDict()
+        self._misses: 'OrderedDict[str, float]' = OrderedDict()
+
+    @classmethod
+    def from_dir(cls, directory: Path, **kw: Any) -> 'KeyStore':
+        return cls(directory=Path(directory), **kw)
+
+    def get(self, key_id: str) -> Optional[PublicKey]:
+        cached = self._cache.get(key_id)
+        if cached is not None and cached[0] is None:
+            return cached[1]  # in-memory keys never change
+        now = time.monotonic()
+        missed = self._misses.get(key_id)
+        if missed is not None and now - missed < self.miss_ttl:
+            return None
+        key = self._load(key_id, cached)
+        if key is None:
+            self._misses[key_id] = now
+            self._misses.move_to_end(key_id)
+            while len(self._misses) > self.max_keys:
+                self._misses.popitem(last=False)
+        return key
+
+    def _load(self, key_id: str, cached: Optional[Tuple[Optional[int], PublicKey]]) -> Optional[PublicKey]:
+        if key_id in self.pems:
+            key = parse_public_key(self.pems[key_id])
+            self._remember(key_id, None, key)
+            return key
+        if self.directory is None or not re.fullmatch(r'[A-Za-z0-9_.\-]+', key_id) or key_id.startswith('.'):
+            return None
+        path = self.directory / f'{key_id}.pem'
+        try:
+            mtime = path.stat().st_mtime_ns
+            if cached is not None and cached[0] == mtime:
+                self._cache.move_to_end(key_id)
+                return cached[1]
+            key = parse_public_key(path.read_text(encoding='ascii', errors='replace'))
+        except (OSError, KeyFormatError):
+            self._cache.pop(key_id, None)
+            return None
+        self._remember(key_id, mtime, key)
+        return key
+
+    def _remember(self, key_id: str, mtime: Optional[int], key: PublicKey) -> None:
+        self._cache[key_id] = (mtime, key)
+        self._cache.move_to_end(key_id)
+        self._misses.pop(key_id, None)
+        while len(self._cache) > self.max_keys:
+            self._cache.popitem(last=False)
+
+
+# ---------------------------------------------------------------------------
+# Signatures
+# ---------------------------------------------------------------------------
+
+_BACKEND_KEYS: Dict[PublicKey, Any] = {}
+
+
+def verify_signature(key: PublicKey, message: bytes, signature: bytes) -> bool:
+    """RSASSA-PKCS1-v1_5 / SHA-256 check of `signature` (raw bytes) over `message`."""
+    k = key.size
+    if len(signature) != k:
+        return False
+    if rsa is not None:
+        pub = _BACKEND_KEYS.get(key)
+        if pub is None:
+            pub = _BACKEND_KEYS[key] = rsa.RSAPublicNumbers(key.e, key.n).public_key()
+        try:
+            pub.verify(signature, message, padding.PKCS1v15(), hashes.SHA256())
+            return True
+        except InvalidSignature:
+            return False
+    s = int.from_bytes(signature, 'big')
+    if s >= key.n:
+        return False
+    digest_info = _SHA256_PREFIX + hashlib.sha256(message).digest()
+    pad = k - 3 - len(digest_info)
+    if pad < 8:
+        return False
+    expected = b'\x00\x01' + b'\xff' * pad + b'\x00' + digest_info
+    return pow(s, key.e, key.n) == int.from_bytes(expected, 'big')
+
+
+def decode_signature(value: str) -> Optional[bytes]:
+    try:
+        return base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def _verify_chunk(items: List[Tuple[int, int, bytes, bytes]]) -> List[bool]:
+    """Pool worker: [(n, e, message, signature)] -> [valid]."""
+    return [verify_signature(PublicKey(n, e), message, sig) for n, e, message, sig in items]
+
+
+# ---------------------------------------------------------------------------
+# Verifier
+# ---------------------------------------------------------------------------
+
+class ReplayCache:
+    """(key id, signature) pairs accepted within the skew window, bounded in size."""
+
+    def __init__(self, max_entries: int, window: int):
+        self.max_entries = max_entries
+        self.window = window
+        self._seen: 'OrderedDict[Tuple[str, str], int]' = OrderedDict()
+        self.evicted = 0
+
+    def _expire(self, now: int) -> None:
+        seen = self._seen
+        while seen:
+            key, ts = next(iter(seen.items()))
+            if ts >= now - self.window:
+                break
+            seen.popitem(last=False)
+
+    def add(self, key: Tuple[str, str], ts: int, now: int) -> bool:
+        """Record `key`; False if it was already seen."""
+        if key in self._seen:
+            return False
+        self._expire(now)
+        self._seen[key] = ts
+        if len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+            self.evicted += 1
+        return True
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+
+class Verifier:
+    def __init__(self, keys: KeyStore, skew: int = DEFAULT_SKEW, replay_size: int = DEFAULT_REPLAY_SIZE,
+                 jobs: int = 1):
+        self.keys = keys
+        self.skew = skew
+        self.replay = ReplayCache(replay_size, skew)
+        self.jobs = resolve_jobs(jobs)
+
+    def verify(self, request: SignedRequest, now: Optional[float] = None) -> Result:
+        return self.verify_batch([request], now)[0]
+
+    def verify_batch(self, requests: Iterable[SignedRequest], now: Optional[float] = None) -> List[Result]:
+        """Results in input order. A duplicate inside one batch counts as a replay."""
+        now_s = int(time.time() if now is None else now)
+        results: List[Optional[Result]] = []
+        pending: List[Tuple[int, SignedRequest, int, PublicKey, bytes]] = []
+        for req in requests:
+            ts = parse_timestamp(req.timestamp)
+            if ts is None:
+                results.append(Result(False, 'bad-timestamp'))
+                continue
+            if ts < now_s - self.skew:
+                results.append(Result(False, 'expired'))
+                continue
+            if ts > now_s + self.skew:
+                results.append(Result(False, 'future'))
+                continue
+            key = self.keys.get(req.key_id)
+            if key is None:
+                results.append(Result(False, 'unknown-key'))
+                continue
+            sig = decode_signature(req.signature)
+            if sig is None or len(sig) != key.size:
+                results.append(Result(False, 'malformed-signature'))
+                continue
+            pending.append((len(results), req, ts, key, sig))
+            results.append(None)
+
+        with phase('verify'):
+            valid = self._check(pending)
+        # Replays are decided in input order, after the signature is known to be genuine
+        for (i, req, ts, _, _), ok in zip(pending, valid):
+            if not ok:
+                results[i] = Result(False, 'bad-signature')
+            elif not self.replay.add((req.key_id, req.signature), ts, now_s):
+                results[i] = Result(False, 'replay')
+            else:
+                results[i] = Result(True, 'ok')
+        return results  # type: ignore[return-value]
+
+    def _check(self, pending: List[Tuple[int, SignedRequest, int, PublicKey, bytes]]) -> List[bool]:
+        items = [(key.n, key.e, canonical_message(r.method, r.path, r.timestamp, r.body), sig)
+                 for _, r, _, key, sig in pending]
+        if self.jobs <= 1 or len(items) < POOL_MIN_BATCH:
+            return _verify_chunk(items)
+        executor = get_executor(self.jobs)
+        size = max(1, min(POOL_CHUNK, -(-len(items) // self.jobs)))
+        futures = [executor.submit(_verify_chunk, items[i:i + size]) for i in range(0, len(items), size)]
+        out: List[bool] = []
+        for fut in futures:
+            out.extend(fut.result())
+        return out
+
+
+# ---------------------------------------------------------------------------
+# Test vectors and benchmark
+# ---------------------------------------------------------------------------
+
+def load_vectors(path: Path) -> Dict[str, Any]:
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def self_test(path: Path) -> int:
+    doc = load_vectors(path)
+    keys = KeyStore(doc['keys'])
+    failures = 0
+    for case in doc['cases']:
+        verifier = Verifier(keys, skew=doc.get('skew', DEFAULT_SKEW))
+        req = SignedRequest(case['method'], case['path'], case['timestamp'], case['body'].encode('utf-8'),
+                            case['signature'], case['key_id'])
+        message = canonical_message(req.method, req.path, req.timestamp, req.body)
+        if 'message_b64' in case and base64.b64decode(case['message_b64']) != message:
+            print(f"[FAIL] {case['name']}: canonical message differs from the signer's")
+            failures += 1
+            continue
+        results = verifier.verify_batch([req] * case.get('repeat', 1), now=case['now'])
+        got = results[-1].reason
+        if got == case['expect']:
+            print(f"[OK]   {case['name']}: {got}")
+        else:
+            print(f"[FAIL] {case['name']}: expected {case['expect']}, got {got}")
+            failures += 1
+    print(f"\n{len(doc['cases']) - failures}/{len(doc['cases'])} vector(s) passed ({BACKEND} backend).")
+    return 1 if failures else 0
+
+
+def _probable_prime(bits: int, rng: random.Random) -> int:
+    small = [p for p in range(3, 2000, 2) if all(p % q for q in range(3, int(p ** 0.5) + 1, 2))]
+    while True:
+        c = rng.getrandbits(bits) | (1 << (bits - 1)) | (1 << (bits - 2)) | 1
+        if any(c % p == 0 for p in small):
+            continue
+        d, r = c - 1, 0
+        while d % 2 == 0:
+            d //= 2
+            r += 1
+        for _ in range(24):
+            x = pow(rng.randrange(2, c - 2), d, c)
+            if x in (1, c - 1):
+                continue
+            for _ in range(r - 1):
+                x = pow(x, 2, c)
+                if x == c - 1:
+                    break
+            else:
+                break
+        else:
+            return c
+
+
+def _bench_key(bits: int, seed: int) -> Tuple[PublicKey, Tuple[int, int, int, int, int]]:
+    """Throwaway RSA key for the benchmark: (public key, (p, q, dp, dq, qinv))."""
+    rng = random.Random(seed)
+    e = 65537
+    while True:
+        p, q = _probable_prime(bits // 2, rng), _probable_prime(bits // 2, rng)
+        if p != q and (p - 1) % e and (q - 1) % e:
+            break
+    d = pow(e, -1, (p - 1) * (q - 1))
+    return PublicKey(p * q, e), (p, q, d % (p - 1), d % (q - 1), pow(q, -1, p))
+
+
+def _bench_sign(key: PublicKey, priv: Tuple[int, int, int, int, int], message: bytes) -> str:
+    p, q, dp, dq, qinv = priv
+    digest_info = _SHA256_PREFIX + hashlib.sha256(message).digest()
+    em = b'\x00\x01' + b'\xff' * (key.size - 3 - len(digest_info)) + b'\x00' + digest_info
+    m = int.from_bytes(em, 'big')
+    m1, m2 = pow(m, dp, p), pow(m, dq, q)
+    s = m2 + q * ((qinv * (m1 - m2)) % p)
+    return base64.b64encode(s.to_bytes(key.size, 'big')).decode('ascii')
+
+
+def bench(n_requests: int, jobs: int, bits: int, distinct: int) -> int:
+    print(f'Generating a {bits}-bit key and {distinct} signed requests...', flush=True)
+    key, priv = _bench_key(bits, seed=1)
+    now = int(time.time())
+    stamp = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now))
+    signed = []
+    for i in range(distinct):
+        body = json.dumps({'query': f'CALL get_member_totals({i});'}, separators=(',', ':')).encode('utf-8')
+        signature = _bench_sign(key, priv, canonical_message('POST', '/dev/query', stamp, body))
+        signed.append(SignedRequest('POST', '/dev/query', stamp, body, signature, 'bench'))
+    keys = KeyStore()
+    keys._remember('bench', None, key)
+
+    items = [(key.n, key.e, canonical_message(r.method, r.path, r.timestamp, r.body), decode_signature(r.signature))
+             for r in signed]
+    batch = [items[i % distinct] for i in range(n_requests)]
+    print(f'Backend: {BACKEND}; {n_requests} verifications per run\n')
+    t0 = time.perf_counter()
+    assert all(_verify_chunk(batch))
+    serial = n_requests / (time.perf_counter() - t0)
+    print(f'  signature check, 1 process       {serial:10.0f} verifications/s')
+
+    n = resolve_jobs(jobs)
+    if n > 1:
+        verifier = Verifier(keys, jobs=n)
+        verifier._check([(0, r, 0, key, decode_signature(r.signature)) for r in signed[:n]])  # start the workers
+        reqs = [(0, signed[i % distinct], 0, key, items[i % distinct][3]) for i in range(n_requests)]
+        t0 = time.perf_counter()
+        assert all(verifier._check(reqs))
+        pooled = n_requests / (time.perf_counter() - t0)
+        print(f'  signature check, {n:>2} processes    {pooled:10.0f} verifications/s '
+              f'({pooled / n:.0f}/s per core)')
+
+    verifier = Verifier(keys, jobs=1)
+    t0 = time.perf_counter()
+    results = verifier.verify_batch(signed, now=now)
+    full = distinct / (time.perf_counter() - t0)
+    assert all(r.ok for r in results)
+    print(f'  full check (skew, key, replay)   {full:10.0f} requests/s  ({distinct} distinct requests)')
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _request_from_json(obj: Dict[str, Any]) -> SignedRequest:
+    body = base64.b64decode(obj['body_b64']) if 'body_b64' in obj else str(obj.get('body', '')).encode('utf-8')
+    return SignedRequest(str(obj.get('method', '')), str(obj.get('path', '')), str(obj.get('timestamp', '')),
+                         body, str(obj.get('signature', '')), str(obj.get('key_id', '')))
+
+
+def verify_stream(args: argparse.Namespace) -> int:
+    verifier = Verifier(KeyStore.from_dir(Path(args.keys)), args.skew, args.replay_size, args.jobs)
+    batch: List[SignedRequest] = []
+    bad = 0
+
+    def flush() -> None:
+        for r in verifier.verify_batch(batch):
+            sys.stdout.write(json.dumps({'ok': r.ok, 'reason': r.reason}) + '\n')
+        sys.stdout.flush()
+        batch.clear()
+
+    with phase('read'):
+        for line_no, line in enumerate(sys.stdin, start=1):
+            if not line.strip():
+                continue
+            try:
+                batch.append(_request_from_json(json.loads(line)))
+            except (ValueError, KeyError, TypeError, binascii.Error) as exc:
+                print(f'[ERR] stdin:{line_no}: {exc}', file=sys.stderr)
+                bad += 1
+                batch.append(SignedRequest('', '', '', b'', '', ''))
+            if len(batch) >= args.batch:
+                flush()
+    flush()
+    return 1 if bad else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    mode = ap.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--self-test', action='store_true', help='Check the shared test vectors')
+    mode.add_argument('--keys', metavar='DIR', help='Verify JSON Lines requests from stdin with keys from DIR')
+    mode.add_argument('--bench', action='store_true', help='Measure verification throughput')
+    ap.add_argument('--vectors', default=str(DEFAULT_VECTORS), help='Test vectors (default: tools/signer_vectors.json)')
+    ap.add_argument('--skew', type=int, default=DEFAULT_SKEW, help=f'Allowed clock skew in seconds (default: {DEFAULT_SKEW})')
+    ap.add_argument('--replay-size', type=int, default=DEFAULT_REPLAY_SIZE,
+                    help=f'Replay cache entries (default: {DEFAULT_REPLAY_SIZE})')
+    ap.add_argument('--batch', type=int, default=1024, help='Requests per verify_batch() call (default: 1024)')
+    ap.add_argument('--requests', type=int, default=20000, help='--bench: verifications per run (default: 20000)')
+    ap.add_argument('--distinct', type=int, default=500, help='--bench: distinct signed requests (default: 500)')
+    ap.add_argument('--bits', type=int, default=2048, help='--bench: key size (default: 2048)')
+    add_jobs_argument(ap)
+    add_profile_arguments(ap)
+    args = ap.parse_args(argv if argv is not None else [])
+    with profile_session(args, 'request_verifier'):
+        if args.self_test:
+            try:
+                return self_test(Path(args.vectors))
+            except (OSError, ValueError, KeyError, KeyFormatError) as exc:
+                print(f'[ERR] cannot use vectors {args.vectors}: {exc}', file=sys.stderr)
+                return 1
+        if args.bench:
+            return bench(args.requests, args.jobs, args.bits, args.distinct)
+        if not os.path.isdir(args.keys):
+            print(f'[ERR] {args.keys} is not a directory', file=sys.stderr)
+            return 1
+        return verify_stream(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,1212 @@
+#!/usr/bin/env python3
+"""
+Client request waterfalls in the plugin's admin JS: which REST routes each
+user action requests, in how many round trips, and which of those requests
+wait on each other for no reason.
+
+Every JS file the plugin enqueues (see tools/asset_weights.py), or the files
+given on the command line, is scanned with tools/js_scanner.py for request
+calls -- fetch(), jQuery.ajax/post/get, wp.apiFetch -- and each one is mapped
+to the REST route or admin-ajax action it hits. The URL is evaluated
+statically: string and template literals, `+`, `a || 'default'`, `c ? a : b`,
+local variables, helper functions returning a URL (this.getRestUrl()) and the
+wp_localize_script() objects the PHP side passes (restRoot =>
+rest_url('profdef/v2/'), sessionsRoute => 'sessionhome'). The result is
+matched against every register_rest_route() pattern in the tree.
+
+Inside a function the requests -- direct calls, calls of functions of the
+same file that make requests, and callbacks run in place -- are ordered by
+their await chains:
+
+  await a(); await b();          2 round trips, one after the other
+  a(); await b();                1 round trip, 2 requests
+  await Promise.all([a(), b()])  1 round trip, 2 requests
+  a().then(r => b(r))            b after a
+
+Two awaited requests are independent when the second does not read what the
+first returned (the variables it assigns, and the `this.*` properties the
+called function sets), no `if` between them tests it, and neither request
+writes (a method other than GET/HEAD/OPTIONS, or one that cannot be read). A
+run of independent awaited requests is a waterfall: Promise.all saves all but
+one of its round trips, and an endpoint returning both saves the extra
+requests. An awaited request inside a loop costs a round trip per item.
+Requests in the two branches of an if / else, or on both sides of an early
+return, are alternatives: only the dearer one is counted. Any other request
+behind an `if` counts as sent, so the numbers are an upper bound.
+
+User actions are event listeners (addEventListener, jQuery .on, el.onclick =)
+and page load (file scope, IIFEs, DOMContentLoaded / load listeners, jQuery
+ready). For each action the report gives the round trips on its critical path
+today and with the waterfalls parallelised, the requests it sends, and the
+wait at --rtt-ms per round trip. Routes one action requests without one
+depending on the other are listed last as batch endpoint candidates: the
+places where one combined endpoint (rows + count) removes requests.
+
+Calls into other files (window.PDSessionsTable.refresh()) are not followed;
+a URL the evaluation cannot resolve is reported as '?'.
+
+Usage:
+  python3 tools/request_waterfall.py [FILE ...] [--root DIR] [--rtt-ms 150]
+                                     [--verbose] [--output report.json] [--profile [PATH]]
+
+Options:
+  FILE                 JS files to analyse (default: every JS file the plugin enqueues)
+  --root DIR, -r DIR   Plugin root (default: repo root)
+  --rtt-ms MS          Round-trip time for the wait estimate (default: 150)
+  --verbose, -v        Also list every request call and the actions without requests
+  --output PATH        Also write the report as JSON to this path
+  --profile [PATH]     Per-phase timings as JSON (see tools/tool_profile.py)
+
+Exit code: 0 on success; 1 if a file cannot be read or the report cannot be written.
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import re
+import sys
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from asset_weights import scan_enqueues
+from js_scanner import JsCall, JsFunction, blank_comments, is_request_call, literal_end, object_spans, scan_js
+from lint_rest_perf import STRING_RE, blank_comments as blank_php_comments, find_routes, match_bracket, php_structure, split_args
+from repo_index import IndexedFile, get_index
+from tool_profile import add_profile_arguments, phase, profile_session
+
+
+PLUGIN_ROOT = Path(__file__).resolve().parents[1]
+HOLE = '\x00'           # part of a URL the evaluation cannot know
+MAX_DEPTH = 8           # variable / helper function indirections followed per URL
+READ_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+LISTENER_CALLEES = {'addEventListener', 'on', 'one'}
+LOAD_EVENTS = {'DOMContentLoaded', 'load'}
+PROMISE_GROUPS = {'Promise.all', 'Promise.allSettled', 'Promise.any', 'Promise.race'}
+# array callbacks: the callback runs once per item
+PER_ITEM_CALLEES = {'forEach', 'map', 'flatMap', 'filter', 'reduce', 'some', 'every', 'find', 'findIndex'}
+# callbacks that run later, not while the caller waits
+DEFERRED_CALLEES = {'setTimeout', 'setInterval', 'requestAnimationFrame', 'forEach'}
+# string methods that keep a URL a URL (trailing-slash trimming and the like)
+URL_METHODS = {'replace', 'trim', 'toString', 'toLowerCase', 'toUpperCase'}
+GLOBAL_URLS = {'ajaxurl': '/wp-admin/admin-ajax.php'}
+SELF_NAMES = {'this', 'self', 'that'}
+
+LOCALIZE_RE = re.compile(r'\bwp_localize_script\s*\(')
+ARRAY_KEY_RE = re.compile(r"""\s*(['"])([^'"]+)\1\s*=>\s*""")
+ARRAY_OPEN_RE = re.compile(r'\s*(?:array\s*\(|\[)')
+REST_URL_RE = re.compile(r"""\brest_url\s*\(\s*(?:(['"])([^'"]*)\1)?\s*\)""")
+ADMIN_URL_RE = re.compile(r"""\badmin_url\s*\(\s*(['"])([^'"]*)\1""")
+NUMBER_RE = re.compile(r'-?\d+(?:\.\d+)?')
+IDENT_CHAIN_RE = re.compile(r'[A-Za-z_$][\w$]*(?:\s*\.\s*[A-Za-z_$][\w$]*)*')
+NEW_URL_RE = re.compile(r'new\s+URL\s*\(')
+METHOD_CALL_RE = re.compile(r'\s*\.\s*([A-Za-z_$][\w$]*)\s*\(')
+CHAIN_RE = re.compile(r'\s*\.\s*(then|catch|finally)\s*\(')
+WORD_BEFORE_RE = re.compile(r'([A-Za-z_$][\w$]*)\s*$')
+OBJECT_DEF_RE = re.compile(r'(?:\b(?:const|let|var)\s+|\bwindow\.)([A-Za-z_$][\w$]*)\s*=\s*\{')
+ALIAS_RE = re.compile(r'\b(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=([^;\n]*)')
+BIND_RE = re.compile(r'(?:\b(?:const|let|var)\s+)?([A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*|\{[^{}]*\}|\[[^\[\]]*\])'
+                     r'\s*=\s*$')
+ASSIGN_RE = re.compile(r'(?:\b(?:const|let|var)\s+)?([A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*)\s*=(?![=>])')
+THIS_ASSIGN_RE = re.compile(r'\bthis\.([A-Za-z_$][\w$]*)\s*=(?![=>])')
+IDENT_RE = re.compile(r'[A-Za-z_$][\w$]*')
+COND_RE = re.compile(r'\b(?:if|while)\s*\(')
+LOOP_RE = re.compile(r'\b(?:for|while)\s*\(|\bdo\s*\{')
+RETURN_RE = re.compile(r'\breturn\b')
+EXIT_RE = re.compile(r'\b(?:return|throw)\b')
+ELSE_RE = re.compile(r'\s*else\b')
+IF_RE = re.compile(r'if\s*\(')
+AJAX_ACTION_RE = re.compile(r"""\baction\s*:\s*(['"])([\w-]+)\1|(['"])action\3\s*,\s*(['"])([\w-]+)\4|[?&]action=([\w-]+)""")
+LISTENER_REF_RE = re.compile(r"""\.\s*(?:addEventListener|on)\s*\(\s*(['"])([\w:.-]+)\1\s*,\s*"""
+                             r"""(?:(?:this|self|Module)\s*\.\s*)?([A-Za-z_$][\w$]*)\s*[,)]""")
+HANDLER_PROP_RE = re.compile(r'\.\s*on([a-z]+)\s*=\s*$')
+LISTENER_TARGET_RE = re.compile(r'(?:([A-Za-z_$][\w$]*(?:\s*\.\s*[A-Za-z_$][\w$]*)*)|\(\s*([\'"])([^\'"]+)\2\s*\))'
+                                r'\s*\.\s*(?:addEventListener|on|one)\s*$')
+EVENT_RE = re.compile(r"""\s*(['"])([\w:.-]+)\1""")
+
+
+class RestRoute(NamedTuple):
+    route: str                 # 'profdef/v2/session/(?P<id>\\d+)'
+    methods: Tuple[str, ...]
+    file: str                  # PHP file registering it
+    regex: 're.Pattern[str]'   # the route as WordPress matches it
+    path: 're.Pattern[str]'    # the same without its namespace
+
+
+class Endpoint(NamedTuple):
+    method: str                # 'GET', 'POST', ... or '?' when it cannot be read
+    route: str                 # 'profdef/v2/sessionhome', 'admin-ajax:check_db_connection', or '?'
+    url: str                   # the evaluated URL, unknown parts as '{}'
+
+    @property
+    def label(self) -> str:
+        return f'{self.method} {self.route}'
+
+    @property
+    def writes(self) -> bool:
+        return self.method not in READ_METHODS
+
+
+class Site(NamedTuple):
+    """One place in a function where requests start."""
+    start: int
+    end: int
+    kind: str                           # 'request', 'call' (a function of the file), 'inline' (a callback run here),
+                                        # 'group' (Promise.all)
+    endpoint: Optional[Endpoint]        # kind 'request'
+    function: Optional[JsFunction]      # kinds 'call' and 'inline'
+    awaited: bool                       # the function waits for it before going on
+    per_item: bool                      # in a loop or an array callback
+    then: Tuple[JsFunction, ...]        # .then() / .finally() callbacks, run after it
+    members: Tuple['Site', ...] = ()    # kind 'group'
+
+
+class Cost(NamedTuple):
+    round_trips: int                    # on the critical path
+    requests: int
+    per_item: bool                      # some of them run once per item of a list
+
+    def __add__(self, other: 'Cost') -> 'Cost':  # type: ignore[override]
+        return Cost(self.round_trips + other.round_trips, self.requests + other.requests,
+                    self.per_item or other.per_item)
+
+
+class Step(NamedTuple):
+    sites: List[Site]                   # awaited together (Promise.all), or a single site
+    alternatives: bool                  # only one of the sites runs
+
+
+class Action(NamedTuple):
+    name: str                           # 'page load', 'click on btnOk'
+    line: int
+    context: str                        # function registering the listener
+    handler: JsFunction
+    now: Cost
+    parallel: Cost                      # with every waterfall run through Promise.all
+    endpoints: Tuple[Endpoint, ...]
+
+
+class Waterfall(NamedTuple):
+    line: int
+    function: str
+    sites: Tuple[Tuple[int, str, Tuple[str, ...]], ...]  # (line, what, endpoint labels) in order
+    saved: int                          # round trips Promise.all saves
+    actions: Tuple[str, ...]
+
+
+class PerItem(NamedTuple):
+    line: int
+    function: str
+    what: str
+    labels: Tuple[str, ...]
+    sequential: bool                    # awaited: one round trip per item
+    actions: Tuple[str, ...]
+
+
+class Pair(NamedTuple):
+    first: str                          # endpoint labels, sorted
+    second: str
+    sequential: bool                    # part of a waterfall (else sent concurrently)
+    action: str                         # 'js/x.js: page load'
+
+
+# ---------------------------------------------------------------------------
+# PHP: routes and localized objects
+# ---------------------------------------------------------------------------
+
+def _php_literal(code: str, a: int, b: int) -> Optional[str]:
+    m = STRING_RE.fullmatch(code[a:b].strip())
+    if not m:
+        return None
+    return m.group(1) if m.group(1) is not None else m.group(2)
+
+
+def _php_value(code: str, a: int, b: int) -> str:
+    """Value of a localized entry as the browser sees it; HOLE where it is only known at run time."""
+    value = _php_literal(code, a, b)
+    if value is not None:
+        return value
+    text = code[a:b].strip()
+    m = REST_URL_RE.search(text)
+    if m:
+        return '/wp-json/' + (m.group(2) or '').lstrip('/')
+    m = ADMIN_URL_RE.search(text)
+    if m:
+        return '/wp-admin/' + m.group(2).lstrip('/')
+    return text if NUMBER_RE.fullmatch(text) else HOLE
+
+
+def localized_objects(php_files: List[IndexedFile]) -> Dict[str, Dict[str, str]]:
+    """JS object name -> key -> value of every wp_localize_script() with a literal array."""
+    objects: Dict[str, Dict[str, str]] = {}
+    for f in php_files:
+        if 'wp_localize_script' not in f.text:
+            continue
+        code = blank_php_comments(f.text, php_structure(f).comments)
+        for m in LOCALIZE_RE.finditer(code):
+            open_paren = m.end() - 1
+            args = split_args(code, open_paren + 1, match_bracket(code, open_paren) - 1)
+            name = _php_literal(code, *args[1]) if len(args) > 2 else None
+            arr = ARRAY_OPEN_RE.match(code, args[2][0]) if name else None
+            if not arr:
+                continue
+            close = match_bracket(code, arr.end() - 1)
+            values = objects.setdefault(name, {})
+            for a, b in split_args(code, arr.end(), close - 1):
+                key = ARRAY_KEY_RE.match(code, a, b)
+                if key:
+                    values.setdefault(key.group(2), _php_value(code, key.end(), b))
+    return objects
+
+
+def rest_routes(php_files: List[IndexedFile]) -> List[RestRoute]:
+    out: Dict[str, RestRoute] = {}
+    for f in php_files:
+        if 'register_rest_route' not in f.text:
+            continue
+        for r in find_routes(f):
+            if r.route in out:
+                known = out[r.route]
+                out[r.route] = known._replace(methods=tuple(dict.fromkeys(known.methods + r.methods)))
+                continue
+            path = r.route.split('/', 2)[2] if r.route.count('/') >= 2 else r.route
+            try:
+                regex = re.compile(r.route, re.IGNORECASE)
+                path_regex = re.compile(path, re.IGNORECASE)
+            except re.error:
+                regex = re.compile(re.escape(r.route), re.IGNORECASE)
+                path_regex = re.compile(re.escape(path), re.IGNORECASE)
+            out[r.route] = RestRoute(r.route, r.methods, f.rel, regex, path_regex)
+    return list(out.values())
+
+
+# ---------------------------------------------------------------------------
+# JS: one file
+# ---------------------------------------------------------------------------
+
+class JsFile:
+    """Request sites, await chains and user actions of one JS file."""
+
+    def __init__(self, rel: str, text: str, localized: Dict[str, Dict[str, str]], routes: List[RestRoute]):
+        self.rel = rel
+        self.text = blank_comments(text)
+        self.js = scan_js(self.text)
+        self.localized = localized
+        self.routes = routes
+        self.top = JsFunction('', 0, 0, -1, len(self.text), False, None)  # the file scope
+        self._lines = [i for i, ch in enumerate(self.text) if ch == '\n']
+        self._definitions = {fn.params for fn in self.js.functions}
+        self.named: Dict[str, JsFunction] = {}
+        self.children: Dict[JsFunction, List[JsFunction]] = {}
+        self.arg_functions: Dict[int, List[JsFunction]] = {}
+        for fn in self.js.functions:
+            if fn.name:
+                self.named.setdefault(fn.name, fn)
+            self.children.setdefault(self.owner(fn.start), []).append(fn)
+            if fn.arg_of:
+                self.arg_functions.setdefault(fn.arg_of[1], []).append(fn)
+        self.objects = {m.group(1) for m in OBJECT_DEF_RE.finditer(self.text)}
+        self.aliases: Dict[str, Set[str]] = {}
+        for m in ALIAS_RE.finditer(self.text):
+            for obj in localized:
+                if re.search(r'(?<![\w$.])(?:window\.)?' + re.escape(obj) + r'(?![\w$]|\s*[.\[])', m.group(2)):
+                    self.aliases.setdefault(m.group(1), set()).add(obj)
+        self._sites: Dict[JsFunction, List[Site]] = {}
+        self._endpoints: Dict[JsFunction, Tuple[Endpoint, ...]] = {}
+        self._costs: Dict[Tuple[JsFunction, bool], Cost] = {}
+        self._loops: Dict[JsFunction, List[Tuple[int, int]]] = {}
+        self._blocks: Dict[JsFunction, List[Tuple[int, int]]] = {}
+        self._assignments: Dict[Tuple[str, int], Optional[Tuple[int, int]]] = {}
+
+    # -- positions ----------------------------------------------------------
+
+    def line_of(self, offset: int) -> int:
+        return bisect_right(self._lines, offset - 1) + 1
+
+    def owner(self, offset: int) -> JsFunction:
+        return self.js.enclosing_function(offset) or self.top
+
+    def contains(self, fn: JsFunction, offset: int) -> bool:
+        return fn.body_start <= offset < fn.end
+
+    def describe(self, fn: JsFunction) -> str:
+        if fn is self.top:
+            return '(file scope)'
+        if fn.name:
+            return f'{fn.name}()'
+        owner = self.owner(fn.start)
+        where = f' in {self.describe(owner)}' if owner is not self.top else ''
+        return f'(anonymous function{where}, line {self.line_of(fn.start)})'
+
+    def close_of(self, i: int) -> int:
+        """Offset just past the bracket closing the one at i (also inside template literals)."""
+        end = self.js.brackets.get(i)
+        if end is not None:
+            return end
+        depth = 0
+        text = self.text
+        while i < len(text):
+            ch = text[i]
+            if ch in '\'"`':
+                i = literal_end(text, i)
+                continue
+            if ch in '([{':
+                depth += 1
+            elif ch in ')]}':
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+            i += 1
+        return len(text)
+
+    def _top_level(self, a: int, b: int) -> Iterator[int]:
+        """Offsets in [a, b) outside brackets and literals."""
+        text = self.text
+        i = a
+        while i < b:
+            ch = text[i]
+            if ch in '([{':
+                i = self.close_of(i)
+                continue
+            if ch in '\'"`':
+                i = literal_end(text, i)
+                continue
+            yield i
+            i += 1
+
+    def _strip(self, a: int, b: int) -> Tuple[int, int]:
+        while a < b and self.text[a].isspace():
+            a += 1
+        while b > a and self.text[b - 1].isspace():
+            b -= 1
+        return a, b
+
+    def _operands(self, a: int, b: int, op: str) -> List[Tuple[int, int]]:
+        text = self.text
+        parts: List[Tuple[int, int]] = []
+        seg = a
+        skip_to = a
+        for i in self._top_level(a, b):
+            if i < skip_to or not text.startswith(op, i):
+                continue
+            if op == '+' and (text[i + 1:i + 2] in ('+', '=') or text[i - 1] == '+' or not text[seg:i].strip()):
+                continue
+            parts.append((seg, i))
+            seg = skip_to = i + len(op)
+        parts.append((seg, b))
+        return parts
+
+    def _ternary(self, a: int, b: int) -> Optional[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        text = self.text
+        question = None
+        nested = 0
+        for i in self._top_level(a, b):
+            ch = text[i]
+            if ch == '?' and text[i + 1:i + 2] not in ('.', '?') and text[i - 1] != '?':
+                if question is None:
+                    question = i
+                else:
+                    nested += 1
+            elif ch == ':' and question is not None:
+                if nested == 0:
+                    return (question + 1, i), (i + 1, b)
+                nested -= 1
+        return None
+
+    def statement_end(self, pos: int) -> int:
+        """End of the expression starting at pos: ';', ',' or a closing bracket, or a line break ending it."""
+        text = self.text
+        n = len(text)
+        i = pos
+        while i < n:
+            ch = text[i]
+            if ch in '([{':
+                i = self.close_of(i)
+                continue
+            if ch in '\'"`':
+                i = literal_end(text, i)
+                continue
+            if ch in ';,)]}':
+                return i
+            if ch == '\n':
+                before = text[pos:i].rstrip()
+                after = text[i:].lstrip()[:1]
+                if before and before[-1] not in '+-*/?:|&=,(' and after not in tuple('.+-*/?:|&,'):
+                    return i
+            i += 1
+        return n
+
+    # -- URLs ---------------------------------------------------------------
+
+    def assignment(self, name: str, at: int) -> Optional[Tuple[int, int]]:
+        """Span of the value last assigned to `name` before `at` in a scope enclosing `at`."""
+        key = (name, at)
+        if key not in self._assignments:
+            found = None
+            for m in re.finditer(r'(?<![\w$.])' + re.escape(name) + r'\s*=(?![=>])', self.text[:at]):
+                if self.contains(self.owner(m.start()), at):
+                    found = m
+            self._assignments[key] = (found.end(), self.statement_end(found.end())) if found else None
+        return self._assignments[key]
+
+    def value(self, a: int, b: int, depth: int = 0) -> str:
+        """Static value of the JS expression text[a:b], HOLE where it is unknown."""
+        a, b = self._strip(a, b)
+        if a >= b or depth > MAX_DEPTH:
+            return HOLE
+        for op in ('||', '??'):
+            parts = self._operands(a, b, op)
+            if len(parts) > 1:
+                for p in parts:
+                    v = self.value(*p, depth=depth)
+                    if v.strip(HOLE):
+                        return v
+                return HOLE
+        branches = self._ternary(a, b)
+        if branches:
+            v = self.value(*branches[0], depth=depth)
+            return v if v.strip(HOLE) else self.value(*branches[1], depth=depth)
+        parts = self._operands(a, b, '&&')
+        if len(parts) > 1:
+            return self.value(*parts[-1], depth=depth)
+        parts = self._operands(a, b, '+')
+        if len(parts) > 1:
+            return ''.join(self.value(*p, depth=depth) for p in parts)
+        return self._primary(a, b, depth)
+
+    def _primary(self, a: int, b: int, depth: int) -> str:
+        text = self.text
+        ch = text[a]
+        if ch == '(':
+            i = self.close_of(a)
+            inner = self._strip(a + 1, i - 1)[0]
+            call = re.compile(r'\s*\(').match(text, i)
+            fn = next((f for f in self.js.functions if f.start == inner), None) if call else None
+            if fn:  # (() => {...})()
+                i = self.close_of(call.end() - 1)
+                v = self.return_value(fn, depth + 1)
+            else:
+                v = self.value(a + 1, i - 1, depth)
+        elif ch in '\'"':
+            i = literal_end(text, a)
+            v = re.sub(r'\\(.)', r'\1', text[a + 1:i - 1])
+        elif ch == '`':
+            i = literal_end(text, a)
+            v = self._template(a, i, depth)
+        else:
+            m = NEW_URL_RE.match(text, a)
+            if m:
+                i = self.close_of(m.end() - 1)
+                args = self._operands(m.end(), i - 1, ',')
+                v = self.value(*args[0], depth=depth + 1)
+            else:
+                m = IDENT_CHAIN_RE.match(text, a)
+                if not m:
+                    return HOLE
+                chain = re.sub(r'\s+', '', m.group(0))
+                i = m.end()
+                j = i
+                while j < b and text[j].isspace():
+                    j += 1
+                if j < b and text[j] == '(':
+                    i = self.close_of(j)
+                    v = self._call_value(chain, j, i, depth)
+                else:
+                    v = self._name_value(chain, a, depth)
+        while True:
+            m = METHOD_CALL_RE.match(text, i)
+            if not m or m.end() > b:
+                break
+            if m.group(1) not in URL_METHODS:
+                return HOLE
+            i = self.close_of(m.end() - 1)
+        return v if not text[i:b].strip() else HOLE
+
+    def _template(self, a: int, end: int, depth: int) -> str:
+        text = self.text
+        out: List[str] = []
+        i = a + 1
+        chunk = i
+        while i < end - 1:
+            if text[i] == '\\':
+                i += 2
+                continue
+            if text.startswith('${', i):
+                out.append(re.sub(r'\\(.)', r'\1', text[chunk:i]))
+                close = self.close_of(i + 1)
+                out.append(self.value(i + 2, close - 1, depth + 1))
+                i = chunk = close
+                continue
+            i += 1
+        out.append(re.sub(r'\\(.)', r'\1', text[chunk:end - 1]))
+        return ''.join(out)
+
+    def _call_value(self, chain: str, open_paren: int, close: int, depth: int) -> str:
+        parts = chain.split('.')
+        if len(parts) > 1 and parts[-1] in URL_METHODS:
+            return self._name_value('.'.join(parts[:-1]), open_paren, depth)
+        if chain in ('String', 'decodeURI', 'decodeURIComponent'):
+            args = self._operands(open_paren + 1, close - 1, ',')
+            return self.value(*args[0], depth=depth + 1)
+        fn = self.local_function(chain)
+        return self.return_value(fn, depth + 1) if fn else HOLE
+
+    def _name_value(self, chain: str, at: int, depth: int) -> str:
+        parts = chain.split('.')
+        if parts[0] == 'window' and len(parts) > 1:
+            parts = parts[1:]
+        if len(parts) == 2:
+            objects = ({parts[0]} if parts[0] in self.localized else set()) | self.aliases.get(parts[0], set())
+            for obj in sorted(objects):
+                if parts[1] in self.localized[obj]:
+                    return self.localized[obj][parts[1]]
+            return HOLE
+        if len(parts) != 1 or parts[0] in self.localized:
+            return HOLE
+        if parts[0] in GLOBAL_URLS:
+            return GLOBAL_URLS[parts[0]]
+        span = self.assignment(parts[0], at)
+        return self.value(*span, depth=depth + 1) if span else HOLE
+
+    def return_value(self, fn: JsFunction, depth: int) -> str:
+        if not self.text.startswith('{', fn.body_start):
+            return self.value(fn.body_start, fn.end, depth)
+        for m in RETURN_RE.finditer(self.text, fn.body_start, fn.end):
+            if self.owner(m.start()) == fn:
+                v = self.value(m.end(), self.statement_end(m.end()), depth)
+                if v.strip(HOLE):
+                    return v
+        return HOLE
+
+    def _object_arg(self, call: JsCall, i: int) -> Dict[str, Tuple[int, int]]:
+        if i >= len(call.args):
+            return {}
+        a, b = call.args[i]
+        if not self.text.startswith('{', a):
+            span = self.assignment(self.text[a:b].strip(), call.start) if IDENT_RE.fullmatch(self.text[a:b].strip()) else None
+            if not span or not self.text.startswith('{', span[0]):
+                return {}
+            a, b = span[0], self.close_of(span[0])
+        return object_spans(self.text, a, b)
+
+    def _method(self, opts: Dict[str, Tuple[int, int]], default: str) -> str:
+        span = opts.get('method') or opts.get('type')
+        if span is None:
+            return default
+        v = self.value(*span)
+        return v.upper() if v.isalpha() else '?'
+
+    def match_route(self, url: str, method: str) -> str:
+        path = url.split('?', 1)[0].split('#', 1)[0]
+        anchored = '/wp-json/' in path or 'rest_route=' in url
+        if '/wp-json/' in path:
+            path = path.split('/wp-json/', 1)[1]
+        elif 'rest_route=' in url:
+            path = url.split('rest_route=', 1)[1].split('&', 1)[0]
+        segments = [s for s in path.split('/') if s]
+        for k in range(1 if anchored else len(segments)):
+            if not anchored and not segments[k].strip(HOLE):
+                continue
+            candidate = '/'.join(segments[k:]).replace(HOLE, '1')
+            for attr in (('regex',) if anchored else ('regex', 'path')):
+                found = [r for r in self.routes if getattr(r, attr).fullmatch(candidate)]
+                if found:
+                    found.sort(key=lambda r: method not in r.methods)
+                    return found[0].route
+        if anchored and segments and HOLE not in segments[0]:
+            return '/'.join(s.replace(HOLE, '{}') for s in segments)  # not registered by the plugin (wp/v2/users)
+        return '?'
+
+    def endpoint(self, call: JsCall) -> Endpoint:
+        callee = call.callee
+        url_span: Optional[Tuple[int, int]] = call.args[0] if call.args else None
+        prefix = ''
+        if callee.endswith('apiFetch'):
+            opts = self._object_arg(call, 0)
+            url_span, prefix = opts.get('path') or opts.get('url'), '/wp-json/'
+            method = self._method(opts, 'GET')
+        elif callee == 'fetch':
+            method = self._method(self._object_arg(call, 1), 'GET')
+        elif callee.endswith('.ajax'):
+            opts = self._object_arg(call, 0)
+            if opts:
+                url_span = opts.get('url')
+            else:
+                opts = self._object_arg(call, 1)
+            method = self._method(opts, 'GET')
+        else:
+            method = 'POST' if callee.endswith('.post') else 'GET'
+        url = prefix + self.value(*url_span) if url_span else HOLE
+        shown = url.replace(HOLE, '{}')
+        if 'admin-ajax.php' in url:
+            fn = self.owner(call.start)
+            found = list(AJAX_ACTION_RE.finditer(self.text, max(fn.body_start, 0), call.end)) + \
+                list(AJAX_ACTION_RE.finditer(url))
+            action = next((m.group(2) or m.group(5) or m.group(6) for m in reversed(found)), '?')
+            return Endpoint(method, f'admin-ajax:{action}', shown)
+        return Endpoint(method, self.match_route(url, method), shown)
+
+    # -- await chains -------------------------------------------------------
+
+    def local_function(self, callee: str) -> Optional[JsFunction]:
+        parts = callee.split('.')
+        if parts[0] == 'window':
+            parts = parts[1:]
+        if len(parts) > 2 or (len(parts) == 2 and parts[0] not in SELF_NAMES and parts[0] not in self.objects):
+            return None
+        return self.named.get(parts[-1])
+
+    def awaited(self, offset: int) -> bool:
+        w = WORD_BEFORE_RE.search(self.text, max(0, offset - 40), offset)
+        while w and w.group(1) == 'new':
+            w = WORD_BEFORE_RE.search(self.text, max(0, w.start(1) - 40), w.start(1))
+        if w and w.group(1) in ('await', 'return', 'yield'):
+            return True
+        return self.text[:offset].rstrip().endswith('=>')
+
+    def loops(self, fn: JsFunction) -> List[Tuple[int, int]]:
+        if fn not in self._loops:
+            spans = []
+            for m in LOOP_RE.finditer(self.text, max(fn.body_start, 0), fn.end):
+                if self.owner(m.start()) != fn:
+                    continue
+                i = m.end() - 1 if m.group(0).startswith('do') else self.close_of(m.end() - 1)
+                while i < fn.end and self.text[i].isspace():
+                    i += 1
+                end = self.close_of(i) if self.text.startswith('{', i) else self.statement_end(i)
+                spans.append((i, end))
+            self._loops[fn] = spans
+        return self._loops[fn]
+
+    def role(self, fn: JsFunction) -> str:
+        """'action' (an event handler), 'load' (a page load handler) or 'inline' (runs where it is written)."""
+        if fn.arg_of:
+            callee, open_paren, index = fn.arg_of
+            if callee in LISTENER_CALLEES and index >= 1:
+                event = EVENT_RE.match(self.text, open_paren + 1)
+                return 'load' if event and event.group(2) in LOAD_EVENTS else 'action'
+            if callee == 'ready' or (callee in ('jQuery', '$') and index == 0):
+                return 'load'
+            return 'inline'
+        if HANDLER_PROP_RE.search(self.text, max(0, fn.start - 64), fn.start):
+            return 'action'
+        return 'inline' if not fn.name else 'definition'
+
+    def _chained(self, end: int) -> Tuple[Tuple[JsFunction, ...], Tuple[JsFunction, ...]]:
+        """(.then / .finally callbacks, every chained callback) of the promise ending at `end`."""
+        run: List[JsFunction] = []
+        every: List[JsFunction] = []
+        pos = end
+        while True:
+            m = CHAIN_RE.match(self.text, pos)
+            if not m:
+                break
+            fns = self.arg_functions.get(m.end() - 1, [])
+            every.extend(fns)
+            if m.group(1) != 'catch':
+                run.extend(fns)
+            pos = self.close_of(m.end() - 1)
+        return tuple(run), tuple(every)
+
+    def sites(self, fn: JsFunction) -> List[Site]:
+        if fn in self._sites:
+            return self._sites[fn]
+        self._sites[fn] = []  # recursion guard
+        text = self.text
+        loops = self.loops(fn)
+        in_loop = lambda offset: any(a <= offset < b for a, b in loops)  # noqa: E731
+        out: List[Site] = []
+        groups: List[JsCall] = []
+        chained: Set[JsFunction] = set()
+        calls = {c.open_paren: c for c in self.js.calls}
+        for call in self.js.calls_between(max(fn.body_start, 0), fn.end):
+            if self.owner(call.start) != fn or call.open_paren in self._definitions:
+                continue
+            if call.callee in PROMISE_GROUPS:
+                groups.append(call)
+                continue
+            then, every = self._chained(call.end)
+            if is_request_call(call):
+                site = Site(call.start, call.end, 'request', self.endpoint(call), None,
+                            self.awaited(call.start), in_loop(call.start), then)
+            else:
+                target = self.local_function(call.callee)
+                if target is None or not self.endpoints(target):
+                    continue
+                site = Site(call.start, call.end, 'call', None, target, self.awaited(call.start),
+                            in_loop(call.start), then)
+            chained.update(every)
+            out.append(site)
+        for m in LISTENER_REF_RE.finditer(text, max(fn.body_start, 0), fn.end):
+            target = self.named.get(m.group(3))
+            if m.group(2) in LOAD_EVENTS and self.owner(m.start()) == fn and target and self.endpoints(target):
+                out.append(Site(m.start(), m.end(), 'call', None, target, False, False, ()))
+        for child in self.children.get(fn, []):
+            if child in chained or self.role(child) not in ('inline', 'load') or not self.endpoints(child):
+                continue
+            callee = child.arg_of[0] if child.arg_of else ''
+            call = calls.get(child.arg_of[1]) if child.arg_of else None
+            start = call.start if call else (child.arg_of[1] if child.arg_of else child.start)
+            awaited = callee not in DEFERRED_CALLEES and self.role(child) == 'inline' and self.awaited(start)
+            out.append(Site(child.start, child.end, 'inline', None, child, awaited,
+                            callee in PER_ITEM_CALLEES or in_loop(child.start), ()))
+        for g in groups:
+            members = tuple(s for s in out if g.open_paren < s.start < g.end)
+            if members:
+                out = [s for s in out if s not in members]
+                then, _ = self._chained(g.end)
+                out.append(Site(g.start, g.end, 'group', None, None, self.awaited(g.start), in_loop(g.start),
+                                then, members))
+        out.sort(key=lambda s: s.start)
+        self._sites[fn] = out
+        return out
+
+    def endpoints(self, fn: JsFunction) -> Tuple[Endpoint, ...]:
+        """Every endpoint `fn` can request, directly or through the functions it calls."""
+        if fn not in self._endpoints:
+            self._endpoints[fn] = ()  # recursion guard
+            found: Dict[Endpoint, None] = {}
+            if self._has_requests(fn):
+                for site in self.sites(fn):
+                    found.update(dict.fromkeys(self.site_endpoints(site)))
+            self._endpoints[fn] = tuple(found)
+        return self._endpoints[fn]
+
+    def _has_requests(self, fn: JsFunction) -> bool:
+        """Cheap pre-check: any request call or call of a named function inside fn's text."""
+        return any(is_request_call(c) or self.local_function(c.callee) is not None
+                   for c in self.js.calls_between(max(fn.body_start, 0), fn.end)) or \
+            LISTENER_REF_RE.search(self.text, max(fn.body_start, 0), fn.end) is not None
+
+    def site_endpoints(self, site: Site) -> Tuple[Endpoint, ...]:
+        found: List[Endpoint] = []
+        if site.endpoint:
+            found.append(site.endpoint)
+        if site.function:
+            found.extend(self.endpoints(site.function))
+        for m in site.members:
+            found.extend(self.site_endpoints(m))
+        for cb in site.then:
+            found.extend(self.endpoints(cb))
+        return tuple(dict.fromkeys(found))
+
+    def writes(self, site: Site) -> bool:
+        return any(e.writes for e in self.site_endpoints(site))
+
+    def site_cost(self, site: Site, parallel: bool) -> Cost:
+        if site.kind == 'request':
+            cost = Cost(1, 1, False)
+        elif site.kind == 'group':
+            costs = [self.site_cost(m, parallel) for m in site.members]
+            cost = Cost(max(c.round_trips for c in costs), sum(c.requests for c in costs),
+                        any(c.per_item for c in costs))
+        else:
+            cost = self.cost(site.function, parallel)  # type: ignore[arg-type]
+        for cb in site.then:
+            cost = cost + self.cost(cb, parallel)
+        if site.per_item and cost.requests:
+            cost = cost._replace(per_item=True)
+        return cost
+
+    def cost(self, fn: JsFunction, parallel: bool) -> Cost:
+        """Round trips and requests of one run of `fn`; with `parallel`, waterfalls run through Promise.all."""
+        key = (fn, parallel)
+        if key in self._costs:
+            return self._costs[key]
+        self._costs[key] = Cost(0, 0, False)  # recursion guard
+        done = 0         # round trips of the awaited groups finished so far
+        branches = 0     # latest end of a request nobody waits for
+        requests = 0
+        per_item = False
+        for step in self.steps(fn, parallel):
+            costs = [self.site_cost(s, parallel) for s in step.sites]
+            if step.alternatives:
+                costs = [max(costs, key=lambda c: (c.round_trips, c.requests))]
+            requests += sum(c.requests for c in costs)
+            per_item = per_item or any(c.per_item for c in costs)
+            if step.sites[0].awaited:
+                done += max(c.round_trips for c in costs)
+            else:
+                branches = max(branches, done + max(c.round_trips for c in costs))
+        cost = self._costs[key] = Cost(max(done, branches), requests, per_item)
+        return cost
+
+    def steps(self, fn: JsFunction, parallel: bool) -> List[Step]:
+        """fn's sites in order, awaited ones grouped: one step per round trip today, or per
+        independent run with `parallel`. Sites nobody waits for are steps of their own; sites
+        of which only one runs (if / else, or an early return) are one step of alternatives."""
+        steps: List[Step] = []
+        for site in self.sites(fn):
+            current = steps[-1] if steps else None
+            if current and (len(current.sites) == 1 or current.alternatives) \
+                    and all(self.exclusive(fn, earlier, site) for earlier in current.sites):
+                steps[-1] = Step(current.sites + [site], True)
+            elif (parallel and site.awaited and current and not current.alternatives and current.sites[0].awaited
+                    and not any(self.depends(earlier, site) for earlier in current.sites)):
+                current.sites.append(site)
+            else:
+                steps.append(Step([site], False))
+        return steps
+
+    def blocks(self, fn: JsFunction) -> List[Tuple[int, int]]:
+        """(offset of '{', offset past '}') of the blocks directly in fn's body."""
+        if fn not in self._blocks:
+            self._blocks[fn] = [(o, c) for o, c in self.js.brackets.items()
+                                if fn.body_start < o < fn.end and self.text[o] == '{' and self.owner(o + 1) == fn]
+        return self._blocks[fn]
+
+    def exclusive(self, fn: JsFunction, a: Site, b: Site) -> bool:
+        """Whether at most one of a and b (after a) runs: they sit in the two branches of an
+        if / else, or a sits in a block that returns or throws before b."""
+        text = self.text
+        blocks = self.blocks(fn)
+        for open_, close in blocks:
+            if not (open_ < a.start and a.end <= close <= b.start):
+                continue
+            m = ELSE_RE.match(text, close)
+            if m and b.start < self._else_end(m.end()):
+                return True
+            for x in EXIT_RE.finditer(text, open_ + 1, close - 1):
+                inner = max((o for o, c in blocks if o < x.start() < c), default=-1)
+                if inner == open_ and self.owner(x.start()) == fn:
+                    return True
+        return False
+
+    def _else_end(self, i: int) -> int:
+        """End of the else branch starting at i (after `else`), through `else if` chains."""
+        text = self.text
+        while i < len(text) and text[i].isspace():
+            i += 1
+        m = IF_RE.match(text, i)
+        if not m:
+            return self.close_of(i) if text.startswith('{', i) else self.statement_end(i)
+        i = self.close_of(m.end() - 1)
+        while i < len(text) and text[i].isspace():
+            i += 1
+        end = self.close_of(i) if text.startswith('{', i) else self.statement_end(i)
+        m = ELSE_RE.match(text, end)
+        return self._else_end(m.end()) if m else end
+
+    def _binds(self, site: Site) -> Set[str]:
+        """Names the result of an awaited site is assigned to, and `this.*` properties its function sets."""
+        text = self.text
+        start = max(text.rfind(c, 0, site.start) for c in ';{}\n') + 1
+        before = re.sub(r'\b(?:await|return)\s*$', '', text[start:site.start].rstrip()).rstrip()
+        names: Set[str] = set()
+        m = BIND_RE.search(before + ' ')
+        if m:
+            target = m.group(1)
+            names.update(IDENT_RE.findall(target) if target[0] in '{[' else [target])
+        fns = ([site.function] if site.function else []) + [f for m in site.members for f in [m.function] if f]
+        for f in fns:
+            names.update('this.' + p for p in THIS_ASSIGN_RE.findall(text, max(f.body_start, 0), f.end))
+        return names
+
+    def depends(self, a: Site, b: Site) -> bool:
+        """Whether site b (after a) needs a's result, or their order matters."""
+        if self.writes(a) or self.writes(b):
+            return True
+        names = self._binds(a)
+        if not names:
+            return False
+        text = self.text
+        for m in ASSIGN_RE.finditer(text, a.end, b.start):
+            if _mentions(names, text[m.end():self.statement_end(m.end())]):
+                names.add(m.group(1))
+        reads = [text[b.start:b.end]]
+        for m in COND_RE.finditer(text, a.end, b.start):
+            reads.append(text[m.end():self.close_of(m.end() - 1)])
+        fns = ([b.function] if b.function else []) + [f for m in b.members for f in [m.function] if f]
+        if any(n.startswith('this.') for n in names):
+            reads.extend(text[max(f.body_start, 0):f.end] for f in fns)
+        return _mentions(names, ''.join(reads))
+
+    def describe_site(self, site: Site) -> str:
+        if site.kind == 'request':
+            return site.endpoint.label  # type: ignore[union-attr]
+        if site.kind == 'group':
+            return 'Promise.all(' + ', '.join(self.describe_site(m) for m in site.members) + ')'
+        return self.describe(site.function)  # type: ignore[arg-type]
+
+    # -- actions ------------------------------------------------------------
+
+    def _listener_name(self, event: str, open_paren: int) -> str:
+        m = LISTENER_TARGET_RE.search(self.text, max(0, open_paren - 120), open_paren)
+        if not m:
+            return event
+        target = re.sub(r'\s+', '', m.group(1)) if m.group(1) else f"'{m.group(3)}'"
+        return f'{event} on {target}'
+
+    def actions(self) -> List[Action]:
+        handlers: List[Tuple[str, int, JsFunction]] = [('page load', 0, self.top)]
+        for fn in self.js.functions:
+            if self.role(fn) != 'action':
+                continue
+            if fn.arg_of:
+                event = EVENT_RE.match(self.text, fn.arg_of[1] + 1)
+                name = self._listener_name(event.group(2) if event else 'event', fn.arg_of[1])
+            else:
+                prop = HANDLER_PROP_RE.search(self.text, max(0, fn.start - 64), fn.start)
+                target = WORD_BEFORE_RE.search(self.text, max(0, prop.start() - 64), prop.start())  # type: ignore[union-attr]
+                name = f"{prop.group(1)} on {target.group(1) if target else 'element'}"  # type: ignore[union-attr]
+            handlers.append((name, fn.start, fn))
+        for m in LISTENER_REF_RE.finditer(self.text):
+            target = self.named.get(m.group(3))
+            if target and m.group(2) not in LOAD_EVENTS:
+                handlers.append((self._listener_name(m.group(2), m.start() + m.group(0).index('(')), m.start(), target))
+        out = []
+        for name, offset, fn in handlers:
+            context = self.owner(offset) if fn is not self.top else self.top
+            out.append(Action(name, self.line_of(offset), self.describe(context), fn,
+                              self.cost(fn, False), self.cost(fn, True), self.endpoints(fn)))
+        return out
+
+    def reached(self, fn: JsFunction) -> Set[JsFunction]:
+        """Functions run by one run of fn (itself included)."""
+        seen: Set[JsFunction] = set()
+        todo = [fn]
+        while todo:
+            f = todo.pop()
+            if f in seen:
+                continue
+            seen.add(f)
+            for s in self.sites(f):
+                for sub in [s] + list(s.members):
+                    todo.extend(([sub.function] if sub.function else []) + list(sub.then))
+        return seen
+
+
+def _mentions(names: Set[str], text: str) -> bool:
+    pattern = '|'.join(re.escape(n) for n in sorted(names, key=len, reverse=True))
+    return re.search(r'(?<![\w$.])(?:' + pattern + r')(?![\w$])', text) is not None
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+class FileReport(NamedTuple):
+    file: str
+    pages: Tuple[str, ...]
+    requests: List[Tuple[int, str, Endpoint]]         # (line, function, endpoint)
+    actions: List[Action]
+    waterfalls: List[Waterfall]
+    per_item: List[PerItem]
+    pairs: List[Pair]
+
+
+def analyse(jf: JsFile, pages: Tuple[str, ...]) -> FileReport:
+    requests = []
+    for call in jf.js.request_calls():
+        if call.open_paren not in jf._definitions:
+            requests.append((jf.line_of(call.start), jf.describe(jf.owner(call.start)), jf.endpoint(call)))
+    actions = jf.actions()
+    reach: Dict[JsFunction, List[str]] = {}
+    for a in actions:
+        if a.now.requests:
+            for fn in jf.reached(a.handler):
+                reach.setdefault(fn, []).append(a.name)
+    functions = [jf.top] + jf.js.functions
+    waterfalls: List[Waterfall] = []
+    per_item: List[PerItem] = []
+    pairs: List[Pair] = []
+    for fn in functions:
+        sites = jf.sites(fn) if jf.endpoints(fn) or fn is jf.top else []
+        if not sites:
+            continue
+        names = tuple(dict.fromkeys(reach.get(fn, [])))
+        labels = lambda s: tuple(e.label for e in jf.site_endpoints(s))  # noqa: E731
+        for step in jf.steps(fn, True):
+            group = step.sites
+            if len(group) > 1 and not step.alternatives:
+                costs = [jf.site_cost(s, False).round_trips for s in group]
+                waterfalls.append(Waterfall(jf.line_of(group[0].start), jf.describe(fn),
+                                            tuple((jf.line_of(s.start), jf.describe_site(s), labels(s)) for s in group),
+                                            sum(costs) - max(costs), names))
+                for i, x in enumerate(group):
+                    for y in group[i + 1:]:
+                        pairs.extend(_pairs(jf, x, y, True, names or (jf.describe(fn),)))
+        for s in sites:
+            if s.per_item and jf.site_endpoints(s):
+                per_item.append(PerItem(jf.line_of(s.start), jf.describe(fn), jf.describe_site(s), labels(s),
+                                        s.awaited, names))
+        for i, x in enumerate(sites):
+            if x.awaited:
+                continue
+            for y in sites[i + 1:]:
+                if not jf.exclusive(fn, x, y):
+                    pairs.extend(_pairs(jf, x, y, False, names or (jf.describe(fn),)))
+    return FileReport(jf.rel, pages, requests, actions, waterfalls, per_item,
+                      [p._replace(action=f'{jf.rel}: {p.action}') for p in pairs])
+
+
+def _pairs(jf: JsFile, x: Site, y: Site, sequential: bool, actions: Tuple[str, ...]) -> List[Pair]:
+    if jf.writes(x) or jf.writes(y):
+        return []
+    out = []
+    for ex in jf.site_endpoints(x):
+        for ey in jf.site_endpoints(y):
+            if ex.label != ey.label and '?' not in (ex.route, ey.route):
+                first, second = sorted((ex.label, ey.label))
+                out.extend(Pair(first, second, sequential, a) for a in actions)
+    return out
+
+
+def batch_candidates(reports: List[FileReport], routes: List[RestRoute]) -> List[dict]:
+    handlers = {r.route: r.file for r in routes}
+    found: Dict[Tuple[str, str], Dict[str, Set[str]]] = {}
+    for r in reports:
+        for p in r.pairs:
+            entry = found.setdefault((p.first, p.second), {'sequential': set(), 'parallel': set()})
+            entry['sequential' if p.sequential else 'parallel'].add(p.action)
+    out = []
+    for (first, second), seen in found.items():
+        actions = sorted(seen['sequential'] | seen['parallel'])
+        out.append({'endpoints': [first, second],
+                    'handlers': [handlers.get(label.split(' ', 1)[1], '') for label in (first, second)],
+                    'actions': actions, 'sequential_in': sorted(seen['sequential']),
+                    'parallel_in': sorted(seen['parallel'] - seen['sequential'])})
+    out.sort(key=lambda c: (-len(c['actions']), -len(c['sequential_in']), c['endpoints']))
+    return out
+
+
+def _cost_text(now: Cost, parallel: Cost) -> str:
+    rt = f'{now.round_trips}' if now.round_trips == parallel.round_trips else f'{now.round_trips} -> {parallel.round_trips}'
+    return rt + ('+/item' if now.per_item else '')
+
+
+def render_report(reports: List[FileReport], candidates: List[dict], rtt_ms: float, verbose: bool) -> None:
+    for r in reports:
+        actions = [a for a in r.actions if a.now.requests or verbose]
+        if not (actions or r.requests):
+            continue
+        print(f"{r.file}" + (f"  ({', '.join(r.pages)})" if r.pages else ''))
+        if verbose:
+            for line, function, e in r.requests:
+                print(f'  {line:>5}  {function:<40} {e.label:<44} {e.url}')
+        if actions:
+            head = f"  {'Action':<44} {'line':>5} {'round trips':>12} {'requests':>8} {'wait ms':>8}  endpoints"
+            print(head)
+            for a in actions:
+                wait = f'{a.now.round_trips * rtt_ms:.0f}'
+                labels = ', '.join(e.label for e in a.endpoints)
+                print(f'  {a.name[:44]:<44} {a.line:>5} {_cost_text(a.now, a.parallel):>12} {a.now.requests:>8} '
+                      f'{wait:>8}  {labels}')
+        for w in r.waterfalls:
+            steps = ' -> '.join(f'{what} [{", ".join(labels)}]' if what not in labels else what
+                                for _, what, labels in w.sites)
+            reached = f" ({', '.join(w.actions)})" if w.actions else ''
+            print(f'  [WATERFALL] {r.file}:{w.line} {w.function}: {steps} do not depend on each other; '
+                  f'Promise.all saves {w.saved} round trip(s){reached}')
+        for p in r.per_item:
+            kind = 'one round trip per item' if p.sequential else 'one request per item'
+            reached = f" ({', '.join(p.actions)})" if p.actions else ''
+            print(f"  [PER-ITEM] {r.file}:{p.line} {p.function}: {p.what} [{', '.join(p.labels)}]: {kind}{reached}")
+        print()
+    if candidates:
+        print('Batch endpoint candidates (requested by one action, neither needing the other):')
+        for c in candidates:
+            how = []
+            if c['sequential_in']:
+                how.append(f"sequential in {len(c['sequential_in'])}")
+            if c['parallel_in']:
+                how.append(f"concurrent in {len(c['parallel_in'])}")
+            print(f"  {' + '.join(c['endpoints'])}  {len(c['actions'])} action(s), {', '.join(how)}")
+            print(f"      handlers: {', '.join(h or '?' for h in c['handlers'])}")
+            if verbose:
+                for a in c['actions']:
+                    print(f'      {a}')
+    total = sum(len(r.requests) for r in reports)
+    resolved = sum(1 for r in reports for _, _, e in r.requests if not e.route.endswith('?'))
+    print(f"\n{total} request call(s) in {len(reports)} file(s), {resolved} mapped to an endpoint; "
+          f"{sum(len(r.waterfalls) for r in reports)} waterfall(s) costing "
+          f"{sum(w.saved for r in reports for w in r.waterfalls)} extra round trip(s); "
+          f"{sum(len(r.per_item) for r in reports)} per-item request(s).")
+
+
+def report_document(reports: List[FileReport], candidates: List[dict], rtt_ms: float) -> dict:
+    def cost(c: Cost) -> dict:
+        return {'round_trips': c.round_trips, 'requests': c.requests, 'per_item': c.per_item,
+                'wait_ms': round(c.round_trips * rtt_ms)}
+    return {
+        'rtt_ms': rtt_ms,
+        'files': {r.file: {
+            'pages': list(r.pages),
+            'requests': [{'line': line, 'function': fn, 'method': e.method, 'route': e.route, 'url': e.url}
+                         for line, fn, e in r.requests],
+            'actions': [{'name': a.name, 'line': a.line, 'registered_in': a.context, 'now': cost(a.now),
+                         'parallel': cost(a.parallel), 'endpoints': [e.label for e in a.endpoints]}
+                        for a in r.actions if a.now.requests],
+            'waterfalls': [{'line': w.line, 'function': w.function, 'saved_round_trips': w.saved,
+                            'actions': list(w.actions),
+                            'steps': [{'line': line, 'call': what, 'endpoints': list(labels)}
+                                      for line, what, labels in w.sites]} for w in r.waterfalls],
+            'per_item': [p._asdict() for p in r.per_item],
+        } for r in reports},
+        'batch_candidates': candidates,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('files', nargs='*', help='JS files (default: every JS file the plugin enqueues)')
+    ap.add_argument('-r', '--root', default=str(PLUGIN_ROOT), help='Plugin root (default: repo root)')
+    ap.add_argument('--rtt-ms', type=float, default=150.0, help='Round-trip time for the wait estimate (default: 150)')
+    ap.add_argument('-v', '--verbose', action='store_true',
+                    help='List every request call and the actions without requests')
+    ap.add_argument('--output', help='Also write the report as JSON to this path')
+    add_profile_arguments(ap)
+    args = ap.parse_args(argv if argv is not None else [])
+    with profile_session(args, 'request_waterfall'):
+        return run(args)
+
+
+def run(args: argparse.Namespace) -> int:
+    root = Path(args.root).resolve()
+    with phase('walk'):
+        php_files = get_index(root).files(('.php',))
+    with phase('php'):
+        routes = rest_routes(php_files)
+        localized = localized_objects(php_files)
+        assets, _, _ = scan_enqueues(php_files, root)
+    pages: Dict[str, Tuple[str, ...]] = {}
+    for a in assets:
+        if a.kind == 'js' and a.src:
+            pages[a.src] = tuple(dict.fromkeys(pages.get(a.src, ()) + a.contexts))
+    if args.files:
+        targets = []
+        for name in args.files:
+            path = Path(name).resolve()
+            try:
+                targets.append(path.relative_to(root).as_posix())
+            except ValueError:
+                targets.append(str(path))
+    else:
+        targets = sorted(pages)
+
+    reports: List[FileReport] = []
+    with phase('analyse'):
+        for rel in targets:
+            try:
+                text = (root / rel).read_text(encoding='utf-8', errors='replace')
+            except OSError as exc:
+                print(f'[ERR] cannot read {rel}: {exc}', file=sys.stderr)
+                return 1
+            reports.append(analyse(JsFile(rel, text, localized, routes), pages.get(rel, ())))
+        candidates = batch_candidates(reports, routes)
+    render_report(reports, candidates, args.rtt_ms, args.verbose)
+
+    if args.output:
+        try:
+            Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+            Path(args.output).write_text(json.dumps(report_document(reports, candidates, args.rtt_ms), indent=2) + '\n',
+                                         encoding='utf-8')
+        except OSError as exc:
+            print(f'[ERR] cannot write {args.output}: {exc}', file=sys.stderr)
+            return 1
+        print(f'Report saved to {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
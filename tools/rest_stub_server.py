@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Local stub of the profdef REST API, generated from the OpenAPI documents, so
+tools/load_rest.py (and anything else) can run offline, e.g. in CI.
+
+Every operation in the specs is served under the documented server base
+(/wp-json). Responses are synthesized from the response schema and are
+deterministic for a given request:
+
+  - Collections with page/per_page parameters return `per_page` rows of page
+    `page` out of --rows in total (fewer on the last page, none past it),
+    with `meta` filled in when the schema has one and X-WP-Total /
+    X-WP-TotalPages headers, as WordPress does.
+  - Other GETs return one synthetic object or a short array.
+  - Writes answer with the documented 2xx status and a synthetic body (no body
+    for 204). Request bodies are read and discarded.
+  - Unknown paths get 404, known paths with another method 405.
+
+The server speaks HTTP/1.1 with keep-alive (one asyncio task per connection).
+--latency-ms / --jitter-ms add a per-request delay to imitate a backend.
+
+Usage:
+  python3 tools/rest_stub_server.py [--spec PATH ...] [--host 127.0.0.1] [--port 8089]
+                                    [--rows 500] [--latency-ms 0] [--jitter-ms 0]
+
+--port 0 picks a free port. The first line printed is always
+`Listening on http://HOST:PORT`, so a parent process can read the address.
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import random
+import sys
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from openapi_spec import (DEFAULT_SPECS, Operation, SpecError, example_value, load_spec, operations, path_regex,
+                          resolve)
+
+
+DEFAULT_ROWS = 500
+MAX_HEADER_BYTES = 64 * 1024
+REASONS = {200: 'OK', 201: 'Created', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 413: 'Payload Too Large'}
+
+
+class StubApi:
+    """Routes requests to operations and builds their synthetic responses."""
+
+    def __init__(self, ops: List[Operation], rows: int = DEFAULT_ROWS):
+        self.rows = rows
+        # path regex -> {method: operation}
+        self.routes: List[Tuple[Pattern[str], Dict[str, Operation]]] = []
+        by_pattern: Dict[str, Dict[str, Operation]] = {}
+        for op in ops:
+            rx = path_regex(op.spec, op.path)
+            if rx.pattern not in by_pattern:
+                by_pattern[rx.pattern] = {}
+                self.routes.append((rx, by_pattern[rx.pattern]))
+            by_pattern[rx.pattern][op.method] = op
+        # literal segments first, so '/sessions/{id}' does not shadow '/sessions/{id}/attendees:bulk'
+        self.routes.sort(key=lambda r: (r[0].pattern.count('(?P<'), -len(r[0].pattern)))
+
+    def match(self, method: str, path: str) -> Tuple[int, Optional[Operation]]:
+        allowed = False
+        for rx, methods in self.routes:
+            if rx.fullmatch(path):
+                op = methods.get(method)
+                if op is not None:
+                    return 200, op
+                allowed = True
+        return (405 if allowed else 404), None
+
+    def respond(self, method: str, target: str) -> Tuple[int, Dict[str, str], Optional[bytes]]:
+        parts = urlsplit(target)
+        code, op = self.match(method, parts.path)
+        if op is None:
+            body = {'code': 'rest_no_route' if code == 404 else 'rest_method_not_allowed',
+                    'message': 'No route was found matching the URL and request method.'}
+            return code, {}, _json(body)
+        query = dict(parse_qsl(parts.query))
+        # Same request, same response
+        rng = random.Random(zlib.crc32(f'{method} {target}'.encode('utf-8')))
+        headers: Dict[str, str] = {}
+        if op.status == 204 or method == 'HEAD':
+            return op.status, headers, None
+        if method == 'GET' and op.paginated:
+            body, headers = self._page(op, query, rng)
+        else:
+            body = example_value(op.spec, op.response, rng) if op.response else {'ok': True}
+        return op.status, headers, _json(body)
+
+    def _page(self, op: Operation, query: Dict[str, str], rng: random.Random) -> Tuple[Any, Dict[str, str]]:
+        per_param = next((p for p in op.params if p.name == 'per_page'), None)
+        default = int((per_param.schema.get('default') if per_param else None) or 20)
+        maximum = int((per_param.schema.get('maximum') if per_param else None) or 100)
+        page = max(1, _int(query.get('page'), 1))
+        per_page = min(maximum, max(1, _int(query.get('per_page'), default)))
+        total_pages = max(1, -(-self.rows // per_page))
+        count = max(0, min(per_page, self.rows - (page - 1) * per_page))
+        schema = op.response or {'type': 'array', 'items': {'type': 'object', 'additionalProperties': True}}
+        schema = resolve(op.spec, schema)
+        headers = {'X-WP-Total': str(self.rows), 'X-WP-TotalPages': str(total_pages)}
+        meta = {'page': page, 'per_page': per_page, 'total': self.rows, 'total_pages': total_pages}
+        if schema.get('type') == 'array':
+            return [example_value(op.spec, schema.get('items'), rng) for _ in range(count)], headers
+        body: Dict[str, Any] = {}
+        for name, sub in (schema.get('properties') or {}).items():
+            sub = resolve(op.spec, sub)
+            if sub.get('type') == 'array':
+                body[name] = [example_value(op.spec, sub.get('items'), rng) for _ in range(count)]
+            elif name == 'meta':
+                body[name] = meta
+            else:
+                body[name] = example_value(op.spec, sub, rng)
+        return body, headers
+
+
+def _int(value: Optional[str], default: int) -> int:
+    try:
+        return int(value) if value not in (None, '') else default
+    except ValueError:
+        return default
+
+
+def _json(body: Any) -> bytes:
+    return json.dumps(body, separators=(',', ':')).encode('utf-8')
+
+
+async def handle_connection(api: StubApi, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                            latency: float = 0.0, jitter: float = 0.0) -> None:
+    """Serve requests on one keep-alive connection until the client closes it."""
+    rng = random.Random()
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                return
+            lines = head.decode('latin-1').split('\r\n')
+            try:
+                method, target, version = lines[0].split(' ', 2)
+            except ValueError:
+                await _send(writer, 400, {}, None, close=True)
+                return
+            headers = {}
+            for line in lines[1:]:
+                if ':' in line:
+                    k, v = line.split(':', 1)
+                    headers[k.strip().lower()] = v.strip()
+            length = _int(headers.get('content-length'), 0)
+            if length:
+                await reader.readexactly(length)
+            close = headers.get('connection', '').lower() == 'close' or version == 'HTTP/1.0'
+            if latency or jitter:
+                await asyncio.sleep(max(0.0, latency + rng.uniform(-jitter, jitter)))
+            status, extra, body = api.respond(method.upper(), target)
+            await _send(writer, status, extra, body, close)
+            if close:
+                return
+    except (ConnectionError, asyncio.IncompleteReadError):
+        return
+    finally:
+        writer.close()
+
+
+async def _send(writer: asyncio.StreamWriter, status: int, headers: Dict[str, str], body: Optional[bytes],
+                close: bool) -> None:
+    out = [f'HTTP/1.1 {status} {REASONS.get(status, "OK")}']
+    if body is not None:
+        out.append('Content-Type: application/json; charset=UTF-8')
+    out.append(f'Content-Length: {len(body) if body is not None else 0}')
+    out.extend(f'{k}: {v}' for k, v in headers.items())
+    out.append('Connection: close' if close else 'Connection: keep-alive')
+    writer.write(('\r\n'.join(out) + '\r\n\r\n').encode('latin-1') + (body or b''))
+    await writer.drain()
+
+
+async def start_stub(api: StubApi, host: str, port: int, latency: float = 0.0, jitter: float = 0.0):
+    """Start serving; returns the asyncio server (its sockets give the bound port)."""
+    return await asyncio.start_server(lambda r, w: handle_connection(api, r, w, latency, jitter),
+                                      host, port, limit=MAX_HEADER_BYTES)
+
+
+def load_api(spec_paths: List[str], rows: int) -> StubApi:
+    ops: List[Operation] = []
+    warnings: List[str] = []
+    for path in spec_paths:
+        ops.extend(operations(load_spec(Path(path)), warnings))
+    for w in warnings:
+        print(f'[WARN] {w}', file=sys.stderr)
+    return StubApi(ops, rows)
+
+
+async def serve(args: argparse.Namespace, api: StubApi) -> None:
+    server = await start_stub(api, args.host, args.port, args.latency_ms / 1000.0, args.jitter_ms / 1000.0)
+    port = server.sockets[0].getsockname()[1]
+    print(f'Listening on http://{args.host}:{port}', flush=True)
+    print(f'Serving {sum(len(m) for _, m in api.routes)} operation(s), {api.rows} rows per collection',
+          file=sys.stderr, flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--spec', action='append', help='OpenAPI document(s) to serve (default: new.yaml and old.yaml)')
+    ap.add_argument('--host', default='127.0.0.1', help='Address to bind (default: 127.0.0.1)')
+    ap.add_argument('--port', type=int, default=8089, help='Port (default: 8089; 0 = any free port)')
+    ap.add_argument('--rows', type=int, default=DEFAULT_ROWS, help=f'Rows per collection (default: {DEFAULT_ROWS})')
+    ap.add_argument('--latency-ms', type=float, default=0.0, help='Delay added to every response (default: 0)')
+    ap.add_argument('--jitter-ms', type=float, default=0.0, help='Uniform +/- jitter on that delay (default: 0)')
+    args = ap.parse_args(argv if argv is not None else [])
+    try:
+        api = load_api(args.spec or [str(p) for p in DEFAULT_SPECS], args.rows)
+    except SpecError as exc:
+        print(f'[ERR] {exc}', file=sys.stderr)
+        return 1
+    try:
+        asyncio.run(serve(args, api))
+    except KeyboardInterrupt:
+        pass
+    except OSError as exc:
+        print(f'[ERR] cannot listen on {args.host}:{args.port}: {exc}', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
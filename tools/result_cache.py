@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Persistent per-file result cache for the tools/ checks.
+
+Each entry is keyed on (tool, file path) and stores the file's size, mtime
+and SHA-1 together with a version fingerprint of whatever produced the
+result (tool version, rule set, pattern set, ...). An entry is reused when
+the fingerprint matches and either size+mtime are unchanged (no read needed)
+or the content hash still matches. Changing CURATED_RULES or the scan
+patterns changes that tool's fingerprint and so invalidates only its entries.
+
+The cache is a small SQLite file, bounded to `max_entries` rows with
+least-recently-used eviction when it is closed.
+
+Location: .tools-cache/results.sqlite under the plugin root, or the path in
+PD_TOOLS_CACHE. Set PD_TOOLS_CACHE=0 or pass --no-cache to disable.
+"""
+
+from __future__ import annotations
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from repo_index import PLUGIN_ROOT, IndexedFile
+from tool_pool import FileRef, load_files, map_chunks, windows
+from tool_profile import phase
+
+
+SCHEMA_VERSION = 1
+DEFAULT_CACHE_PATH = PLUGIN_ROOT / '.tools-cache' / 'results.sqlite'
+DEFAULT_MAX_ENTRIES = 50000
+_INSERT = ('INSERT OR REPLACE INTO results (tool, path, version, size, mtime, digest, payload, last_used)'
+           ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)')
+
+
+# (size, mtime, digest) of the contents a cached result was computed from
+FileStamp = Tuple[int, Optional[float], str]
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable short hash of the JSON form of `parts` (rule sets, patterns, versions)."""
+    blob = json.dumps(parts, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha1(blob).hexdigest()[:16]
+
+
+def file_stamp(f: IndexedFile) -> FileStamp:
+    return f.size, f.mtime, f.digest
+
+
+class ResultCache:
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._rows: Dict[str, Dict[str, Tuple[str, int, float, str, str]]] = {}
+        self._touched: Dict[Tuple[str, str], float] = {}
+        # with buffer_writes(): rows written by close() instead of put()
+        self._pending: Optional[Dict[Tuple[str, str], Tuple[Any, ...]]] = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path))
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        db = self._db
+        db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        row = db.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+        if row is None or row[0] != str(SCHEMA_VERSION):
+            db.execute('DROP TABLE IF EXISTS results')
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            ' tool TEXT, path TEXT, version TEXT, size INTEGER, mtime REAL,'
+            ' digest TEXT, payload TEXT, last_used REAL,'
+            ' PRIMARY KEY (tool, path))'
+        )
+        db.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+        db.commit()
+
+    def _tool_rows(self, tool: str) -> Dict[str, Tuple[str, int, float, str, str]]:
+        rows = self._rows.get(tool)
+        if rows is None:
+            cur = self._db.execute('SELECT path, version, size, mtime, digest, payload FROM results WHERE tool = ?', (tool,))
+            rows = {r[0]: (r[1], r[2], r[3], r[4], r[5]) for r in cur}
+            self._rows[tool] = rows
+        return rows
+
+    def get(self, tool: str, version: str, f: IndexedFile) -> Optional[Any]:
+        """Cached result for `f`, or None if absent or stale."""
+        key = str(f.path)
+        row = self._tool_rows(tool).get(key)
+        if row is None or row[0] != version:
+            self.misses += 1
+            return None
+        _, size, mtime, digest, payload = row
+        if size != f.size or ((f.mtime is None or mtime != f.mtime) and digest != f.digest):
+            self.misses += 1
+            return None
+        self.hits += 1
+        if f.mtime is not None and mtime != f.mtime:
+            # Touched but identical content: remember the new mtime for the fast path
+            if self._pending is not None:
+                self._pending[(tool, key)] = (tool, key, version, size, f.mtime, digest, payload, time.time())
+            else:
+                self._db.execute('UPDATE results SET mtime = ? WHERE tool = ? AND path = ?', (f.mtime, tool, key))
+            self._tool_rows(tool)[key] = (version, size, f.mtime, digest, payload)
+        self._touched[(tool, key)] = time.time()
+        return json.loads(payload)
+
+    def put(self, tool: str, version: str, f: IndexedFile, value: Any,
+            stamp: Optional[FileStamp] = None) -> None:
+        """Store `value` for `f` under `stamp`, the (size, mtime, digest) of the contents the
+        value was computed from (see file_stamp); taken from `f` when not given."""
+        if not f.from_disk:
+            # Keep the rows describing the working tree; blob results are only served by hash
+            return
+        key = str(f.path)
+        payload = json.dumps(value)
+        size, mtime, digest = stamp if stamp is not None else file_stamp(f)
+        row = (tool, key, version, size, mtime, digest, payload, time.time())
+        if self._pending is not None:
+            self._pending[(tool, key)] = row
+        else:
+            self._db.execute(_INSERT, row)
+        self._tool_rows(tool)[key] = (version, size, mtime, digest, payload)
+        self._touched.pop((tool, key), None)
+
+    def buffer_writes(self) -> None:
+        """Keep new and updated rows in memory until close(). For long-running callers
+        (tools/watch_checks.py): an open write transaction would lock other runs out."""
+        if self._pending is None:
+            self._pending = {}
+
+    def close(self) -> None:
+        """Write buffered rows, record hits, evict least-recently-used rows beyond max_entries and commit."""
+        db = self._db
+        if self._pending:
+            db.executemany(_INSERT, list(self._pending.values()))
+            self._pending.clear()
+        if self._touched:
+            db.executemany('UPDATE results SET last_used = ? WHERE tool = ? AND path = ?',
+                           [(ts, tool, key) for (tool, key), ts in self._touched.items()])
+            self._touched.clear()
+        (count,) = db.execute('SELECT COUNT(*) FROM results').fetchone()
+        if count > self.max_entries:
+            db.execute(
+                'DELETE FROM results WHERE rowid IN ('
+                ' SELECT rowid FROM results ORDER BY last_used ASC LIMIT ?)',
+                (count - self.max_entries,),
+            )
+        db.commit()
+        db.close()
+
+
+_CACHES: Dict[Path, ResultCache] = {}
+
+
+def add_cache_arguments(ap) -> None:
+    ap.add_argument('--no-cache', action='store_true', help='Ignore and do not update the per-file result cache')
+    ap.add_argument('--cache', help=f'Result cache file (default: $PD_TOOLS_CACHE or {DEFAULT_CACHE_PATH})')
+
+
+def open_cache(no_cache: bool = False, path: Optional[str] = None) -> Optional[ResultCache]:
+    """Return the process-wide cache for `path`, or None when caching is disabled."""
+    env = os.environ.get('PD_TOOLS_CACHE', '')
+    if no_cache or env == '0':
+        return None
+    cache_path = Path(path or env or DEFAULT_CACHE_PATH).resolve()
+    cache = _CACHES.get(cache_path)
+    if cache is None:
+        max_entries = int(os.environ.get('PD_TOOLS_CACHE_MAX', DEFAULT_MAX_ENTRIES))
+        try:
+            cache = ResultCache(cache_path, max_entries)
+        except (OSError, sqlite3.Error):
+            return None
+        _CACHES[cache_path] = cache
+    return cache
+
+
+def close_caches() -> None:
+    for cache in _CACHES.values():
+        cache.close()
+    _CACHES.clear()
+
+
+atexit.register(close_caches)
+
+
+def stamped(refs: List[FileRef], func: Callable[..., List[Any]], *args: Any) -> List[Tuple[Any, FileStamp]]:
+    """Chunk function: (func's result, file_stamp) per file, so the cache key of a file
+    scanned in a worker comes from the worker's read instead of a second one in the parent."""
+    files = load_files(refs)
+    return list(zip(func(files, *args), map(file_stamp, files)))
+
+
+def cached_map_chunks(cache: Optional[ResultCache], tool: str, version: str,
+                      func: Callable[..., List[Any]], files: Sequence[IndexedFile], *args: Any,
+                      jobs: Optional[int] = 1,
+                      reusable: Callable[[Any], bool] = lambda result: True) -> List[Any]:
+    """tool_pool.map_chunks with per-file results served from / stored into `cache`.
+
+    Only files without a valid entry are processed. `reusable(result)` decides
+    whether a result may be served from or stored into the cache (e.g. only
+    files needing no edits when renames are applied).
+    """
+    if cache is None:
+        return map_chunks(func, files, *args, jobs=jobs)
+    results: List[Any] = [None] * len(files)
+    pending: List[int] = []
+    with phase('cache lookup'):
+        for i, f in enumerate(files):
+            hit = cache.get(tool, version, f)
+            if hit is None or not reusable(hit):
+                pending.append(i)
+            else:
+                results[i] = hit
+    if pending:
+        fresh = map_chunks(stamped, [files[i] for i in pending], func, *args, jobs=jobs)
+        with phase('cache store'):
+            for i, (value, stamp) in zip(pending, fresh):
+                results[i] = value
+                if reusable(value):
+                    cache.put(tool, version, files[i], value, stamp)
+    return results
+
+
+def cached_imap_chunks(cache: Optional[ResultCache], tool: str, version: str,
+                       func: Callable[..., List[Any]], files: Sequence[IndexedFile], *args: Any,
+                       jobs: Optional[int] = 1,
+                       reusable: Callable[[Any], bool] = lambda result: True) -> Iterator[Any]:
+    """cached_map_chunks over tool_pool.windows(), yielding per-file results in input order
+    (see tool_pool.imap_chunks)."""
+    for window in windows(files):
+        yield from cached_map_chunks(cache, tool, version, func, window, *args, jobs=jobs, reusable=reusable)
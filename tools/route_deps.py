@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Route -> stored procedure / table dependency graph and the response cache
+invalidation manifest derived from it.
+
+Every register_rest_route(...) endpoint is resolved to its callback (see
+tools/lint_rest_perf.py) and the SQL the callback can run is read from its
+string literals, following calls into other functions defined in the tree:
+
+  CALL x(...)                              procedure call
+  SELECT ... FROM x / JOIN x               read of a table or view
+  INSERT INTO x / UPDATE x / DELETE FROM x write to a table
+
+Concatenated pieces ('FROM ' . $schema . '.person') are joined first; a
+literal passed as the default of apply_filters('hook', 'CALL x()') is kept
+with the hook name, since a filter may replace the procedure at runtime.
+
+What a procedure or view touches lives in the database, not in this tree, so
+tools/route_deps_catalog.json lists the tables each procedure reads and
+writes and the tables behind each view. With it every endpoint gets a set of
+read and written tables:
+
+  - a GET endpoint that writes nothing is cacheable; its cache tags are the
+    tables it reads, and the key varies by user when the callback reads the
+    current user
+  - every other endpoint purges the cached GET routes reading a table it
+    writes (and the matching tags)
+
+The manifest (includes/REST/cache-manifest.json) is generated with --write
+and checked in; the check fails when an endpoint is missing from it or its
+entry is out of date, and when an endpoint runs SQL the catalogue does not
+cover (unknown procedure, table or view, or a table name only known at
+runtime) unless the catalogue's "routes" section excludes it from caching.
+
+Usage:
+  python3 tools/route_deps.py [--root DIR] [--catalog PATH] [--manifest PATH]
+                              [--write | --graph [PATH]] [--profile [PATH]]
+
+Options:
+  --root DIR, -r DIR   Plugin root (default: repo root)
+  --catalog PATH       Procedure/view catalogue (default: tools/route_deps_catalog.json)
+  --manifest PATH      Cache manifest (default: includes/REST/cache-manifest.json)
+  --write              Regenerate the manifest instead of checking it
+  --graph [PATH]       Print the route -> procedure/table graph as JSON ('-' = stdout)
+  --profile [PATH]     Per-phase timings as JSON (see tools/tool_profile.py)
+
+Exit code:
+  - 0 if every endpoint is covered and the manifest is current
+  - 1 otherwise, or if the catalogue or manifest cannot be read
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from lint_rest_perf import (CALL_SITE_RE, NOT_CALLS, STRING_RE, Route, blank_comments, index_php_files,
+                            php_structure, resolve_callback)
+from php_lexer import FunctionSpan
+from repo_index import IndexedFile, get_index
+from tool_profile import add_profile_arguments, phase, profile_session
+
+
+PLUGIN_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CATALOG = Path(__file__).resolve().parent / 'route_deps_catalog.json'
+DEFAULT_MANIFEST = PLUGIN_ROOT / 'includes' / 'REST' / 'cache-manifest.json'
+MANIFEST_VERSION = 1
+CACHE_KEY_PREFIX = 'pd_rest'
+
+SQL_START_RE = re.compile(r'\s*(?:CALL|SELECT|INSERT|UPDATE|DELETE|REPLACE|WITH)\b')
+# the code between two literals of one concatenation: `' . $schema . '`, `' . (int) $limit . '`
+CONCAT_GAP_RE = re.compile(r"""\s*\.(?:[^;,'"]*\.)?\s*""")
+TRAILING_CONCAT_RE = re.compile(r'\s*\.(?!=)')
+# optional schema qualifier: Test_Database., `db`., %s., %1$s., {$schema}.
+_QUALIFIER = r'(?:(?:`?[\w%$]+`?|\{[^}]*\})\.)?'
+_NAME = r'`?([A-Za-z_]\w*)`?'
+SQL_CALL_RE = re.compile(r'\bCALL\s+' + _QUALIFIER + _NAME + r'\s*\(')
+SQL_WRITE_RE = re.compile(r'^\s*(?:INSERT\s+(?:IGNORE\s+)?INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM)\s+'
+                          + _QUALIFIER + _NAME)
+SQL_READ_RE = re.compile(r'\b(?:FROM|JOIN)\s+' + _QUALIFIER + _NAME)
+SQL_DYNAMIC_RE = re.compile(r'\b(?:CALL|FROM|JOIN|INTO|UPDATE)\s+(?:%(?:\d+\$)?s|\?)(?![\w.])')
+FILTER_DEFAULT_RE = re.compile(r"""\bapply_filters\s*\(\s*(['"])([\w\-/.]+)\1\s*,\s*$""")
+CURRENT_USER_RE = re.compile(r'\b(?:get_current_user_id|wp_get_current_user)\s*\(')
+
+
+class SqlUse(NamedTuple):
+    kind: str         # 'call', 'read' or 'write'
+    name: str         # procedure, table or view name as written
+    path: str         # file relative to the root
+    line: int
+    hook: Optional[str] = None  # apply_filters() hook the literal is the default of
+
+
+class Endpoint(NamedTuple):
+    route: Route
+    uses: List[SqlUse]
+    dynamic: List[Tuple[str, int]]  # (path, line) of SQL whose table is only known at runtime
+    per_user: bool
+
+    @property
+    def key(self) -> str:
+        return f"{','.join(self.route.methods)} {self.route.route}"
+
+
+class CatalogError(ValueError):
+    pass
+
+
+class Catalog(NamedTuple):
+    tables: Set[str]
+    views: Dict[str, List[str]]
+    procedures: Dict[str, Dict[str, List[str]]]  # name -> {'reads': [...], 'writes': [...]}
+    routes: Dict[str, Dict[str, str]]            # endpoint key -> {'cache': false, 'reason': ...}
+
+
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+
+def sql_statements(code: str) -> List[Tuple[int, str, Optional[str]]]:
+    """(offset, SQL text, filter hook) for each SQL string built in `code`.
+
+    Literals joined by `.` are one statement; the code in between becomes %s.
+    """
+    out: List[Tuple[int, str, Optional[str]]] = []
+    literals = list(STRING_RE.finditer(code))
+    i = 0
+    while i < len(literals):
+        m = literals[i]
+        text = m.group(1) if m.group(1) is not None else m.group(2)
+        if not SQL_START_RE.match(text):
+            i += 1
+            continue
+        hook = FILTER_DEFAULT_RE.search(code, max(0, m.start() - 200), m.start())
+        parts = [text]
+        j = i + 1
+        while j < len(literals):
+            gap = code[literals[j - 1].end():literals[j].start()]
+            if not CONCAT_GAP_RE.fullmatch(gap):
+                break
+            nxt = literals[j]
+            if gap.strip() != '.':
+                parts.append('%s')
+            parts.append(nxt.group(1) if nxt.group(1) is not None else nxt.group(2))
+            j += 1
+        if TRAILING_CONCAT_RE.match(code, literals[j - 1].end()):
+            parts.append('%s')  # trailing `. $value`
+        out.append((m.start(), ''.join(parts), hook.group(2) if hook else None))
+        i = j
+    return out
+
+
+def statement_uses(sql: str) -> Tuple[List[Tuple[str, str]], bool]:
+    """([(kind, name)], dynamic) for one SQL statement."""
+    uses: List[Tuple[str, str]] = []
+    write = SQL_WRITE_RE.match(sql)
+    if write:
+        uses.append(('write', write.group(1)))
+    for m in SQL_CALL_RE.finditer(sql):
+        uses.append(('call', m.group(1)))
+    for m in SQL_READ_RE.finditer(sql):
+        if write and m.start(1) == write.start(1):
+            continue  # DELETE FROM target
+        uses.append(('read', m.group(1)))
+    return uses, bool(SQL_DYNAMIC_RE.search(sql))
+
+
+def reachable_functions(start: Tuple[IndexedFile, FunctionSpan],
+                        functions: Dict[str, Tuple[IndexedFile, FunctionSpan]]
+                        ) -> List[Tuple[IndexedFile, FunctionSpan]]:
+    """The callback and every tree-defined function it (transitively) calls."""
+    seen: Set[Tuple[Path, int]] = set()
+    out: List[Tuple[IndexedFile, FunctionSpan]] = []
+    todo = [start]
+    while todo:
+        f, fn = todo.pop()
+        if (f.path, fn.start) in seen:
+            continue
+        seen.add((f.path, fn.start))
+        out.append((f, fn))
+        for m in CALL_SITE_RE.finditer(php_structure(f).code(fn)):
+            callee = m.group(1).lower()
+            if callee not in NOT_CALLS and callee in functions:
+                todo.append(functions[callee])
+    return out
+
+
+def endpoint_dependencies(route: Route, functions: Dict[str, Tuple[IndexedFile, FunctionSpan]]
+                          ) -> Optional[Endpoint]:
+    loc = resolve_callback(route, functions)
+    if loc is None:
+        return None
+    uses: List[SqlUse] = []
+    dynamic: List[Tuple[str, int]] = []
+    per_user = False
+    for f, fn in reachable_functions(loc, functions):
+        php = php_structure(f)
+        code = blank_comments(f.text, php.comments, fn.start, fn.end)
+        base = fn.start
+        per_user = per_user or bool(CURRENT_USER_RE.search(code))
+        for offset, sql, hook in sql_statements(code):
+            line = f.line_of(base + offset)
+            found, is_dynamic = statement_uses(sql)
+            uses.extend(SqlUse(kind, name, f.rel, line, hook) for kind, name in found)
+            if is_dynamic:
+                dynamic.append((f.rel, line))
+    uses = sorted(set(uses), key=lambda u: (u.path, u.line, u.kind, u.name))
+    return Endpoint(route, uses, sorted(set(dynamic)), per_user)
+
+
+# ---------------------------------------------------------------------------
+# Catalogue and manifest
+# ---------------------------------------------------------------------------
+
+def load_catalog(path: Path) -> Catalog:
+    try:
+        doc = json.loads(path.read_text(encoding='utf-8'))
+        procedures = {name.lower(): {'reads': [t.lower() for t in spec.get('reads', [])],
+                                     'writes': [t.lower() for t in spec.get('writes', [])]}
+                      for name, spec in doc['procedures'].items()}
+        views = {name.lower(): [t.lower() for t in tables] for name, tables in doc['views'].items()}
+        tables = {t.lower() for t in doc['tables']}
+        routes = dict(doc.get('routes', {}))
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as exc:
+        raise CatalogError(f'cannot read catalogue {path}: {exc}') from exc
+    referenced = {t for spec in procedures.values() for t in spec['reads'] + spec['writes']}
+    referenced.update(t for ts in views.values() for t in ts)
+    unknown = sorted(referenced - tables)
+    if unknown:
+        raise CatalogError(f"catalogue {path} refers to undeclared table(s): {', '.join(unknown)}")
+    return Catalog(tables, views, procedures, routes)
+
+
+def table_access(ep: Endpoint, catalog: Catalog) -> Tuple[Set[str], Set[str], List[str]]:
+    """(tables read, tables written, problems) of one endpoint."""
+    reads: Set[str] = set()
+    writes: Set[str] = set()
+    problems: List[str] = []
+    for use in ep.uses:
+        name = use.name.lower()
+        where = f'{use.path}:{use.line}'
+        if use.kind == 'call':
+            spec = catalog.procedures.get(name)
+            if spec is None:
+                problems.append(f"{where}: procedure '{use.name}' is not in the catalogue")
+                continue
+            reads.update(spec['reads'])
+            writes.update(spec['writes'])
+        elif name in catalog.views:
+            if use.kind == 'write':
+                problems.append(f"{where}: write to view '{use.name}'")
+            reads.update(catalog.views[name])
+        elif name in catalog.tables:
+            (writes if use.kind == 'write' else reads).add(name)
+        else:
+            problems.append(f"{where}: table or view '{use.name}' is not in the catalogue")
+    for path, line in ep.dynamic:
+        problems.append(f'{path}:{line}: table or procedure name only known at runtime')
+    return reads, writes, problems
+
+
+def build_manifest(endpoints: List[Endpoint], catalog: Catalog) -> Tuple[dict, List[str]]:
+    """(manifest document, problems); problems are endpoints the catalogue does not cover."""
+    problems: List[str] = []
+    access: Dict[str, Tuple[Set[str], Set[str]]] = {}
+    entries: Dict[str, dict] = {}
+    for ep in sorted(endpoints, key=lambda e: e.key):
+        reads, writes, issues = table_access(ep, catalog)
+        override = catalog.routes.get(ep.key)
+        entry: dict = {
+            'file': ep.route.file.rel,
+            'callback': ep.route.callback if not ep.route.callback.startswith('{closure}') else '{closure}',
+            'procedures': sorted({u.name for u in ep.uses if u.kind == 'call'}),
+            'hooks': sorted({u.hook for u in ep.uses if u.hook}),
+            'reads': sorted(reads),
+            'writes': sorted(writes),
+        }
+        if override is not None and override.get('cache') is False:
+            entry['cache'] = False
+            entry['reason'] = override.get('reason', '')
+            if issues and not writes:
+                # not cached and writes nothing known: nothing to purge for it either
+                issues = []
+        elif ep.route.methods == ('GET',) and not writes:
+            if not reads and not issues:
+                issues = [f'{ep.route.file.rel}:{ep.route.line}: no SQL found for {ep.key}; '
+                          f'exclude it in the catalogue\'s "routes" section if that is expected']
+            entry['cache'] = {
+                'key': f'{CACHE_KEY_PREFIX}:{ep.route.route}',
+                'vary': ['params', 'user'] if ep.per_user else ['params'],
+                'tags': sorted(reads),
+            }
+        else:
+            entry['cache'] = False
+            entry['reason'] = 'not a GET endpoint' if ep.route.methods != ('GET',) else 'GET with side effects'
+        problems.extend(f'{ep.key}: {issue}' for issue in issues)
+        access[ep.key] = (reads, writes)
+        entries[ep.key] = entry
+    for key, entry in entries.items():
+        written = access[key][1]
+        if not written:
+            continue
+        entry['purge'] = sorted(other for other, e in entries.items()
+                                if isinstance(e['cache'], dict) and written & set(e['cache']['tags']))
+        entry['purge_tags'] = sorted(written)
+    return {'version': MANIFEST_VERSION, 'generated_by': 'tools/route_deps.py', 'routes': entries}, problems
+
+
+def graph_document(endpoints: List[Endpoint]) -> dict:
+    return {'routes': {ep.key: {'file': ep.route.file.rel, 'line': ep.route.line, 'callback': ep.route.callback,
+                                'uses': [u._asdict() for u in ep.uses],
+                                'dynamic': [f'{p}:{ln}' for p, ln in ep.dynamic]}
+                       for ep in sorted(endpoints, key=lambda e: e.key)}}
+
+
+def write_json(path: Path, doc: dict) -> None:
+    fd, tmp = tempfile.mkstemp(prefix='.' + path.name + '.', dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as out:
+            json.dump(doc, out, indent=2, sort_keys=True)
+            out.write('\n')
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def manifest_drift(current: dict, committed: dict) -> List[str]:
+    """Human-readable differences between the generated and the checked-in manifest."""
+    drift: List[str] = []
+    if committed.get('version') != current['version']:
+        return [f"manifest version {committed.get('version')!r}, expected {current['version']}"]
+    old = committed.get('routes', {})
+    new = current['routes']
+    for key in sorted(new.keys() - old.keys()):
+        drift.append(f'{key}: not in the manifest')
+    for key in sorted(old.keys() - new.keys()):
+        drift.append(f'{key}: in the manifest but no longer registered')
+    for key in sorted(new.keys() & old.keys()):
+        changed = sorted(k for k in new[key].keys() | old[key].keys() if new[key].get(k) != old[key].get(k))
+        if changed:
+            drift.append(f"{key}: {', '.join(changed)} changed")
+    return drift
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('-r', '--root', default=str(PLUGIN_ROOT), help='Plugin root (default: repo root)')
+    ap.add_argument('--catalog', default=str(DEFAULT_CATALOG), help='Procedure/view catalogue (JSON)')
+    ap.add_argument('--manifest', help='Cache manifest (default: includes/REST/cache-manifest.json under --root)')
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument('--write', action='store_true', help='Regenerate the manifest instead of checking it')
+    mode.add_argument('--graph', nargs='?', const='-', metavar='PATH', help="Print the dependency graph as JSON")
+    add_profile_arguments(ap)
+    args = ap.parse_args(argv if argv is not None else [])
+    with profile_session(args, 'route_deps'):
+        return run(args)
+
+
+def run(args: argparse.Namespace) -> int:
+    root = Path(args.root).resolve()
+    manifest_path = Path(args.manifest) if args.manifest else root / DEFAULT_MANIFEST.relative_to(PLUGIN_ROOT)
+    with phase('walk'):
+        php_files = get_index(root).files(('.php',))
+    with phase('index'):
+        routes, functions = index_php_files(php_files)
+
+    endpoints: List[Endpoint] = []
+    with phase('extract'):
+        for route in routes:
+            ep = endpoint_dependencies(route, functions)
+            if ep is None:
+                print(f"[WARN] {route.file.rel}:{route.line}: callback '{route.callback}' of {route.route} not found",
+                      file=sys.stderr)
+                continue
+            endpoints.append(ep)
+
+    if args.graph:
+        text = json.dumps(graph_document(endpoints), indent=2, sort_keys=True) + '\n'
+        if args.graph == '-':
+            sys.stdout.write(text)
+        else:
+            Path(args.graph).write_text(text, encoding='utf-8')
+        return 0
+
+    try:
+        catalog = load_catalog(Path(args.catalog))
+    except CatalogError as exc:
+        print(f'[ERR] {exc}', file=sys.stderr)
+        return 1
+    with phase('manifest'):
+        manifest, problems = build_manifest(endpoints, catalog)
+    for problem in problems:
+        print(f'[ERR] {problem}', file=sys.stderr)
+
+    cacheable = sum(isinstance(e['cache'], dict) for e in manifest['routes'].values())
+    if args.write:
+        try:
+            write_json(manifest_path, manifest)
+        except OSError as exc:
+            print(f'[ERR] Cannot write {manifest_path}: {exc}', file=sys.stderr)
+            return 1
+        print(f'Wrote {manifest_path} ({len(endpoints)} endpoint(s), {cacheable} cacheable).')
+        return 1 if problems else 0
+
+    try:
+        committed = json.loads(manifest_path.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        committed = {'version': MANIFEST_VERSION, 'routes': {}}
+    except (OSError, ValueError) as exc:
+        print(f'[ERR] cannot read manifest {manifest_path}: {exc}', file=sys.stderr)
+        return 1
+    drift = manifest_drift(manifest, committed)
+    for d in drift:
+        print(f'[ERR] {d}', file=sys.stderr)
+    if drift:
+        print('Cache manifest is out of date; regenerate it with `make route-deps`.', file=sys.stderr)
+    print(f'Checked {len(endpoints)} REST endpoint(s): {cacheable} cacheable, '
+          f'{len(problems)} not covered by the catalogue, {len(drift)} manifest difference(s).')
+    return 1 if problems or drift else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Run every static check in one Python process so they share a single walk and
+read of the plugin tree (see tools/repo_index.py).
+
+Checks, in order:
+  1) AJAX nonce checks            (tools/check_ajax_nonces.py)
+  2) Encryption key derivation    (tools/test_encryption_key_derivation.py)
+  3) Terminology scan             (tools/scan_bad_keywords.py)
+  4) REST handler performance     (tools/lint_rest_perf.py, against its baseline)
+  5) Route cache dependencies     (tools/route_deps.py, against includes/REST/cache-manifest.json)
+  6) Bootstrap load manifest      (tools/include_graph.py, against includes/load-manifest.php)
+
+Usage:
+  python3 tools/run_checks.py [--expected N] [--output PATH] [-e EXTS] [--jobs N] [--no-cache]
+                              [--staged | --since REF] [--profile [PATH]] [--cprofile PATH]
+
+The scan options are forwarded to scan_bad_keywords.py unchanged. --jobs is
+forwarded to both the nonce check and the scan, which then share one process
+pool (see tools/tool_pool.py). --no-cache disables the per-file result cache
+(see tools/result_cache.py) for both. --staged / --since are forwarded to the
+first four checks (see tools/git_source.py); the route dependency and load
+manifest checks always cover the whole tree, since one changed handler can
+affect any other route's purge list or load plan. --profile / PD_TOOLS_PROFILE=1 writes one
+JSON document in which each check is a phase (see tools/tool_profile.py).
+
+Exit code: 0 if every check passed, otherwise 1.
+"""
+
+from __future__ import annotations
+import argparse
+import sys
+from typing import List
+
+import check_ajax_nonces
+import include_graph
+import lint_rest_perf
+import route_deps
+import scan_bad_keywords
+import test_encryption_key_derivation
+from git_source import add_git_arguments
+from tool_pool import add_jobs_argument
+from tool_profile import add_profile_arguments, profile_session
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--expected', type=int, help='Forwarded to scan_bad_keywords.py')
+    ap.add_argument('--output', default='tofix.txt', help='Forwarded to scan_bad_keywords.py (default: tofix.txt)')
+    ap.add_argument('-e', '--only-ext', help='Forwarded to scan_bad_keywords.py')
+    add_jobs_argument(ap)
+    ap.add_argument('--no-cache', action='store_true', help='Forwarded to the nonce check and the scan')
+    add_git_arguments(ap)
+    add_profile_arguments(ap)
+    args = ap.parse_args(argv)
+    with profile_session(args, 'run_checks'):
+        return run(args)
+
+
+def run(args: argparse.Namespace) -> int:
+    git_argv = ['--staged'] if args.staged else (['--since', args.since] if args.since else [])
+    jobs_argv = ['--jobs', str(args.jobs)] + (['--no-cache'] if args.no_cache else []) + git_argv
+    scan_argv = ['--output', args.output] + jobs_argv
+    if args.expected is not None:
+        scan_argv += ['--expected', str(args.expected)]
+    if args.only_ext:
+        scan_argv += ['-e', args.only_ext]
+
+    rc = 0
+    print('Running AJAX nonce checks...')
+    rc |= check_ajax_nonces.main(jobs_argv)
+    print('Running encryption key derivation checks...')
+    rc |= test_encryption_key_derivation.main(git_argv)
+    print('Running terminology scan...')
+    rc |= scan_bad_keywords.main(scan_argv)
+    print('Running REST handler performance lint...')
+    rc |= lint_rest_perf.main(git_argv)
+    print('Running route cache dependency check...')
+    rc |= route_deps.main([])
+    print('Running bootstrap load manifest check...')
+    rc |= include_graph.main([])
+    return 1 if rc else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -17,7 +17,22 @@ Options:
   --only-ext EXT, -e EXT     Only scan files with these extensions (comma-separated).
                               Overrides default Python exclusion.
   --expected N               Expect N matches; fails if the count differs.
-  --output PATH              Write matches to PATH (default: tofix.txt)
+  --output PATH              Write matches to PATH, '-' for stdout (default: tofix.txt,
+                              tofix.jsonl or tofix.sarif depending on --format)
+  --format FMT               text (default), jsonl (one JSON object per match) or sarif
+                              (SARIF 2.1.0). Matches are streamed as files are scanned.
+  --jobs N, -j N             Scan with N worker processes (0 = one per CPU).
+                              Output is identical to a serial run.
+  --no-cache                 Rescan every file instead of reusing cached per-file hits
+  --cache PATH               Result cache file (default: .tools-cache/results.sqlite)
+  --staged                   Only scan files staged for commit (contents from the git index)
+  --since REF                Only scan files changed between REF and HEAD (HEAD contents)
+  --profile [PATH]           Write per-phase timings, slowest files and regex time as JSON
+                              (see tools/tool_profile.py; also PD_TOOLS_PROFILE=1)
+  --cprofile PATH            Also dump a cProfile of the run
+  --self-test                Check that the byte and decoded-text scans report the same lines
+                              as str.splitlines() and a line-by-line search (form feeds, CR,
+                              U+2028, a minified line, non-ASCII case variants)
 
 Exit code:
   - With --expected: 0 if found == expected, else 1
@@ -26,10 +41,21 @@ Exit code:
 
 from __future__ import annotations
 import argparse
-import os
+from functools import lru_cache
 from pathlib import Path
+from typing import Iterable, Iterator
 import sys
 import re
+import time
+
+import tool_profile
+from git_source import GitError, add_git_arguments, changed_files
+from repo_index import (BINARY_SNIFF_BYTES, DEFAULT_IGNORES, MAX_LINE_CHARS, IndexedFile, Raw, RawLines, clip_line,
+                        filter_files, get_index, is_binary)
+from result_cache import add_cache_arguments, cached_imap_chunks, fingerprint, open_cache
+from stream_output import add_format_argument, open_writer, sarif_location, sarif_rule
+from tool_pool import FileRef, add_jobs_argument, load_files
+from tool_profile import add_profile_arguments, phase, profile_session
 
 
 DEFAULT_PATTERNS = [
@@ -39,44 +65,234 @@ DEFAULT_PATTERNS = [
     'attendee',      # preferred to be renamed to member in this project
 ]
 
-DEFAULT_IGNORES = {'.git', 'node_modules', '.venv', '__pycache__'}
 DEFAULT_SKIP_EXTS = {'.py'}  # skip Python files unless explicitly requested
 
+# Default --output per --format
+DEFAULT_OUTPUTS = {'text': 'tofix.txt', 'jsonl': 'tofix.jsonl', 'sarif': 'tofix.sarif'}
 
-def iter_files(root: Path, only_ext: set[str] | None, ignores: set[str]):
-    for dirpath, dirnames, filenames in os.walk(root):
-        # prune ignored directories
-        dirnames[:] = [d for d in dirnames if d not in ignores]
-        for fname in filenames:
-            p = Path(dirpath) / fname
-            suffix = p.suffix.lower()
-            if only_ext:
-                if suffix not in only_ext:
-                    continue
-            else:
-                if suffix in DEFAULT_SKIP_EXTS:
-                    continue
-            yield p
+# Bump when scan_file's output format or matching semantics change (invalidates cached hits)
+SCAN_CACHE_VERSION = 4
 
 
-def compile_patterns(patterns: list[str], case_sensitive: bool) -> list[re.Pattern]:
-    flags = 0 if case_sensitive else re.IGNORECASE
-    return [re.compile(re.escape(p), flags) for p in patterns if p]
+def iter_files(root: Path, only_ext: set[str] | None, ignores: set[str],
+               since: str | None = None, staged: bool = False) -> list[IndexedFile]:
+    """Files to scan: the whole tree, or only git-changed files with --since/--staged."""
+    if since or staged:
+        changed = changed_files(root, since, staged)
+        return filter_files(changed, only_ext or None, DEFAULT_IGNORES | ignores,
+                            None if only_ext else DEFAULT_SKIP_EXTS)
+    index = get_index(root)
+    if only_ext:
+        return index.files(only_ext, ignores=ignores)
+    return index.files(ignores=ignores, skip_suffixes=DEFAULT_SKIP_EXTS)
 
 
-def scan_file(path: Path, regexes: list[re.Pattern]) -> list[tuple[int, str, str]]:
-    results: list[tuple[int, str, str]] = []
-    try:
-        text = path.read_text(encoding='utf-8', errors='ignore')
-    except Exception:
-        return results
-    for i, line in enumerate(text.splitlines(), start=1):
-        for rgx in regexes:
-            m = rgx.search(line)
-            if m:
-                results.append((i, rgx.pattern, line.rstrip('\n')))
-                break  # one report per line is enough
-    return results
+def _trie_regex(words: list[str]) -> str:
+    """Compile literal words into one prefix-factored alternation.
+
+    Shared prefixes are matched once, so the regex engine's work at each text
+    position is bounded by the longest word rather than the number of words.
+    """
+    trie: dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def emit(node: dict) -> str:
+        end = '' in node
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if end:
+            body = ('(?:' + body + ')' if len(branches) == 1 else body) + '?'
+        return body
+
+    return emit(trie)
+
+
+class KeywordMatcher:
+    """All patterns compiled into a single matcher run over a whole file buffer.
+
+    Case-sensitive matching runs as a byte pattern on the undecoded file (see
+    IndexedFile.raw; large files are memory-mapped), and only the reported
+    lines are decoded. Case-insensitive matching (the default) decodes the file
+    and uses re.IGNORECASE: byte patterns fold ASCII case only, and text.lower()
+    differs from Unicode case-insensitive matching too (the Kelvin sign matches
+    'k', 'ſ' matches 's'), so either would miss spellings a per-line
+    re.IGNORECASE search finds. Both paths split and cut lines the same way
+    (RawLines with str.splitlines() boundaries), so they report identical hits.
+    """
+
+    def __init__(self, patterns: list[str], case_sensitive: bool):
+        self.case_sensitive = case_sensitive
+        self.patterns = [p for p in patterns if p]
+        self._lookup: dict[str, str] = {}
+        for p in self.patterns:
+            self._lookup.setdefault(p if case_sensitive else p.lower(), p)
+        source = _trie_regex(list(self._lookup)) if self._lookup else r'(?!)'
+        self.regex = re.compile(source, 0 if case_sensitive else re.IGNORECASE)
+        self.byte_regex: re.Pattern | None = re.compile(source.encode('utf-8')) if case_sensitive else None
+
+    def pattern_for(self, matched: str) -> str:
+        key = matched if self.case_sensitive else matched.lower()
+        pat = self._lookup.get(key)
+        if pat is None:
+            # A case variant lower() does not map back (e.g. 'preſentor')
+            pat = next((p for p in self._lookup.values() if re.fullmatch(re.escape(p), matched, re.IGNORECASE)),
+                       matched)
+            self._lookup[key] = pat
+        return pat
+
+    def scan_raw(self, buf: Raw) -> Iterator[tuple[int, str, str]]:
+        """Yield (line_no, pattern, line) for the first hit on each matching line of an
+        undecoded buffer, decoding only those lines (requires byte_regex)."""
+        return self._scan(buf, buf, self.byte_regex)
+
+    def scan_text(self, text: str) -> Iterator[tuple[int, str, str]]:
+        """scan_raw() on decoded text (case-insensitive matching)."""
+        return self._scan(text, text, self.regex)
+
+    def _scan(self, buf, haystack, regex: re.Pattern) -> Iterator[tuple[int, str, str]]:
+        # Lines split as str.splitlines() does and long lines cut by clip_line, whichever
+        # path runs, so tofix.txt does not depend on the patterns
+        lines = RawLines(buf, splitlines=True)
+        pos = 0
+        while pos != -1:
+            m = regex.search(haystack, pos)
+            if not m:
+                return
+            matched = m.group(0)
+            if isinstance(matched, bytes):
+                matched = matched.decode('utf-8', errors='ignore')
+            yield lines.line_of(m.start()), self.pattern_for(matched), lines.line(m.start())
+            pos = lines.next_line(m.end())  # one report per line is enough
+
+
+def compile_patterns(patterns: list[str], case_sensitive: bool) -> KeywordMatcher:
+    return KeywordMatcher(patterns, case_sensitive)
+
+
+def scan_file(f: IndexedFile, matcher: KeywordMatcher) -> list[tuple[int, str, str]]:
+    """(line_no, pattern, line) for the first hit on each matching line; none for binary files."""
+    if matcher.byte_regex is not None:
+        with f.raw() as buf:
+            return [] if is_binary(buf) else list(matcher.scan_raw(buf))
+    if '\0' in f.text[:BINARY_SNIFF_BYTES]:
+        return []
+    return list(matcher.scan_text(f.text))
+
+
+def iter_matches(files: Iterable[IndexedFile], results: Iterable[list[tuple[int, str, str]]]
+                 ) -> Iterator[tuple[IndexedFile, int, str, str]]:
+    """(file, line_no, pattern, line) per hit, in file order, as per-file results arrive."""
+    for f, hits in zip(files, results):
+        for line_no, pat, line in hits:
+            yield f, line_no, pat, line
+
+
+def rule_id(pattern: str) -> str:
+    return f'keyword/{pattern}'
+
+
+def match_record(f: IndexedFile, line_no: int, pat: str, line: str) -> dict:
+    return {'path': str(f.path), 'line': line_no, 'pattern': pat, 'text': line}
+
+
+def render_text(record: dict) -> str:
+    return f"{record['path']}:{record['line']}: {record['text']}\n"
+
+
+def sarif_result(f: IndexedFile, line_no: int, pat: str, line: str) -> dict:
+    return {
+        'ruleId': rule_id(pat),
+        'level': 'warning',
+        'message': {'text': f"Disallowed term '{pat}'"},
+        'locations': [sarif_location(f.rel, line_no, line)],
+    }
+
+
+@lru_cache(maxsize=8)
+def _cached_matcher(patterns: tuple[str, ...], case_sensitive: bool) -> KeywordMatcher:
+    return compile_patterns(list(patterns), case_sensitive)
+
+
+def scan_files(refs: list[FileRef], patterns: tuple[str, ...], case_sensitive: bool) -> list[list[tuple[int, str, str]]]:
+    """Chunk function for tool_pool.map_chunks: hits for each file, in order."""
+    matcher = _cached_matcher(patterns, case_sensitive)
+    prof = tool_profile.ACTIVE
+    if prof is None:
+        return [scan_file(f, matcher) for f in load_files(refs)]
+    # Profiled: time the match alone (the read is recorded by the index) per file.
+    # The patterns share one compiled alternation, so they are timed together.
+    name = 'keywords: ' + '|'.join(patterns)
+    out = []
+    for f in load_files(refs):
+        if matcher.byte_regex is None:
+            f.text
+        t0 = time.perf_counter()
+        hits = scan_file(f, matcher)
+        elapsed = time.perf_counter() - t0
+        prof.file(str(f.path), elapsed, f.size)
+        prof.pattern(name, elapsed, len(hits))
+        out.append(hits)
+    return out
+
+
+def reference_lines(text: str, patterns: list[str], case_sensitive: bool) -> list[int]:
+    """Line numbers with a hit, searched line by line with one regex per pattern."""
+    regexes = [re.compile(re.escape(p), 0 if case_sensitive else re.IGNORECASE) for p in patterns if p]
+    return [n for n, line in enumerate(text.splitlines(), 1) if any(r.search(line) for r in regexes)]
+
+
+def self_test() -> int:
+    """Both scan paths on awkward line breaks, a minified line and non-ASCII case variants,
+    against str.splitlines() and a line-by-line search."""
+    minified = 'x' * 20000 + ' presentor ' + 'y' * 20000
+    cases = [
+        ('form feed', 'a\fpresentor\nb Presentor\n',
+         [(2, 'presentor', 'presentor'), (3, 'presentor', 'b Presentor')]),
+        ('CR and CRLF', 'a\rb\r\nattendee\r\n\rattende\n',
+         [(3, 'attendee', 'attendee'), (5, 'attende', 'attende')]),
+        ('unicode separators', 'é\u2028attendee\x85x\u2029presentors é\n',
+         [(2, 'attendee', 'attendee'), (4, 'presentors', 'presentors é')]),
+        ('minified line', 'ok\n' + minified + '\n',
+         [(2, 'presentor', clip_line(minified, minified.index('presentor')))]),
+        # U+017F folds to 's' and U+212A to 'k' under re.IGNORECASE, but not in byte patterns
+        ('non-ASCII case variants', 'pre\u017fentor\nPRE\u017fENTORS é\nattendée\nPresentor \u212a\n',
+         [(1, 'presentor', 'pre\u017fentor'), (2, 'presentors', 'PRE\u017fENTORS é'),
+          (4, 'presentor', 'Presentor \u212a')]),
+    ]
+    matcher = KeywordMatcher(DEFAULT_PATTERNS, False)
+    exact = KeywordMatcher(DEFAULT_PATTERNS + ['Pre\u017fentor', '\u212a'], True)
+    exact_text = KeywordMatcher(exact.patterns, True)
+    exact_text.byte_regex = None  # force the decoded-text path
+    failures = 0
+    checks = 0
+    for name, text, expected in cases:
+        assert [n for n, _, _ in expected] == reference_lines(text, DEFAULT_PATTERNS, False), name
+        f = IndexedFile.from_bytes(Path(name), name, text.encode('utf-8'))
+        got = scan_file(f, matcher)
+        by_bytes, by_text = scan_file(f, exact), scan_file(f, exact_text)
+        reference = reference_lines(text, exact.patterns, True)
+        for mode, ok, detail in (
+                ('case-insensitive', got == expected, f'expected {expected!r:.200}, got {got!r:.200}'),
+                ('case-sensitive, bytes = text', by_bytes == by_text and [n for n, _, _ in by_text] == reference,
+                 f'bytes {by_bytes!r:.200}, text {by_text!r:.200}, lines {reference}')):
+            checks += 1
+            if ok:
+                print(f'[OK]   {name} ({mode})')
+            else:
+                print(f'[FAIL] {name} ({mode}): {detail}')
+                failures += 1
+    long_line = cases[3][2][0][2]
+    if len(long_line) != MAX_LINE_CHARS + 6:
+        print(f'[FAIL] minified line: {len(long_line)} characters reported, expected {MAX_LINE_CHARS} and two markers')
+        failures += 1
+    print(f'\n{checks - failures}/{checks} case(s) passed.')
+    return 1 if failures else 0
 
 
 def main(argv: list[str]) -> int:
@@ -87,10 +303,23 @@ def main(argv: list[str]) -> int:
     ap.add_argument('-i', '--ignore', action='append', default=[], help='Directory to ignore (repeatable)')
     ap.add_argument('-e', '--only-ext', help='Comma-separated list of file extensions to include (e.g., .php,.js,.css). Overrides default Python exclusion.')
     ap.add_argument('--expected', type=int, help='Fail if the number of matches does not equal EXPECTED')
-    ap.add_argument('--output', default='tofix.txt', help='Write matches to this file (default: tofix.txt)')
+    ap.add_argument('--output', help="Write matches to this file, '-' for stdout "
+                                     '(default: tofix.txt, tofix.jsonl or tofix.sarif by --format)')
+    add_format_argument(ap)
+    add_jobs_argument(ap)
+    add_cache_arguments(ap)
+    add_git_arguments(ap)
+    add_profile_arguments(ap)
+    ap.add_argument('--self-test', action='store_true', help='Check both scan paths on line-break and case-folding edge cases')
 
     args = ap.parse_args(argv)
+    if args.self_test:
+        return self_test()
+    with profile_session(args, 'scan_bad_keywords'):
+        return run(args)
 
+
+def run(args: argparse.Namespace) -> int:
     patterns: list[str] = []
     if args.patterns:
         for chunk in args.patterns:
@@ -102,35 +331,48 @@ def main(argv: list[str]) -> int:
     if args.only_ext:
         only_ext = set(e.strip().lower() for e in args.only_ext.split(',') if e.strip())
 
-    ignores = DEFAULT_IGNORES | set(args.ignore or [])
+    ignores = set(args.ignore or [])
     root = Path(args.root).resolve()
-    regexes = compile_patterns(patterns, args.case_sensitive)
-
-    matches: list[str] = []
-    for p in iter_files(root, only_ext, ignores):
-        hits = scan_file(p, regexes)
-        for line_no, pat, line in hits:
-            matches.append(f"{p}:{line_no}: {line}")
 
-    found = len(matches)
-
-    output_path = Path(args.output).resolve()
     try:
-        output_path.write_text('\n'.join(matches) + ('\n' if matches else ''), encoding='utf-8')
-    except Exception as exc:
-        print(f"[ERR] Could not write output file {output_path}: {exc}", file=sys.stderr)
+        with phase('walk'):
+            files = iter_files(root, only_ext, ignores, args.since, args.staged)
+    except GitError as exc:
+        print(f"[ERR] {exc}", file=sys.stderr)
         return 1
+    cache = open_cache(args.no_cache, args.cache)
+    version = fingerprint(SCAN_CACHE_VERSION, patterns, args.case_sensitive)
+    results = cached_imap_chunks(cache, 'scan_bad_keywords', version, scan_files, files,
+                                 tuple(patterns), args.case_sensitive, jobs=args.jobs)
+
+    output = args.output or DEFAULT_OUTPUTS[args.format]
+    output_path = 'stdout' if output == '-' else Path(output).resolve()
+    rules = [sarif_rule(rule_id(p), f"Disallowed term '{p}'") for p in patterns]
+    # Matches are written as each window of files is scanned, never collected
+    with phase('match'):
+        try:
+            with open_writer(args.format, output, 'scan_bad_keywords', rules, root, render_text) as writer:
+                for f, line_no, pat, line in iter_matches(files, results):
+                    writer.write(match_record(f, line_no, pat, line),
+                                 sarif_result(f, line_no, pat, line) if writer.sarif else None)
+        except OSError as exc:
+            print(f"[ERR] Could not write output file {output_path}: {exc}", file=sys.stderr)
+            return 1
+    found = writer.count
+    # Keep stdout for the results when they are streamed there
+    summary = sys.stderr if output == '-' else sys.stdout
 
     if args.expected is not None:
         status = 'PASS' if found == args.expected else 'FAIL'
-        print(f"Terminology scan: found {found}, expected {args.expected} ({status}). Results saved to {output_path}")
+        print(f"Terminology scan: found {found}, expected {args.expected} ({status}). Results saved to {output_path}",
+              file=summary)
         return 0 if found == args.expected else 1
 
     if found:
-        print(f"Terminology scan: found {found} matches. Results saved to {output_path}")
+        print(f"Terminology scan: found {found} matches. Results saved to {output_path}", file=summary)
         return 1
 
-    print(f"Terminology scan: no matches found. Results saved to {output_path}")
+    print(f"Terminology scan: no matches found. Results saved to {output_path}", file=summary)
     return 0
 
 
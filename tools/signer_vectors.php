@@ -0,0 +1,74 @@
+<?php
+/**
+ * Check (or regenerate) tools/signer_vectors.json against the PHP signer.
+ *
+ * The same vectors are verified by tools/request_verifier.py --self-test, so
+ * both sides agree on the canonical message and the signature scheme.
+ *
+ * Usage:
+ *   php tools/signer_vectors.php [--vectors tools/signer_vectors.json]
+ *   php tools/signer_vectors.php --generate PRIVATE_KEY.pem [--vectors ...]
+ *
+ * Check mode compares ApiRequestSigner::buildMessage() with each case's
+ * message_b64 and openssl_verify() with its expected outcome (cases expected
+ * to fail before the signature check are only message-checked).
+ *
+ * --generate re-signs every case with PRIVATE_KEY.pem through
+ * ApiRequestSigner::signMessage() and rewrites the public key. Cases whose
+ * expectation is bad-signature keep their existing signature (they are
+ * signed over a different message or by another key on purpose).
+ *
+ * Exit code: 0 if every case matches, 1 otherwise.
+ */
+
+require_once __DIR__ . '/../includes/ApiRequestSigner.php';
+
+$opts = getopt('', ['vectors:', 'generate:']);
+$vectorsPath = $opts['vectors'] ?? __DIR__ . '/signer_vectors.json';
+$doc = json_decode((string) @file_get_contents($vectorsPath), true);
+if (!is_array($doc) || !isset($doc['cases'])) {
+    fwrite(STDERR, "[ERR] cannot read {$vectorsPath}\n");
+    exit(1);
+}
+
+if (isset($opts['generate'])) {
+    $signer = new ApiRequestSigner($opts['generate'], 'wp-plugin');
+    $details = openssl_pkey_get_details(openssl_pkey_get_private(file_get_contents($opts['generate'])));
+    $doc['keys']['wp-plugin'] = $details['key'];
+    foreach ($doc['cases'] as &$case) {
+        $message = $signer->buildMessage($case['method'], $case['path'], $case['timestamp'], $case['body']);
+        $case['message_b64'] = base64_encode($message);
+        if ($case['expect'] !== 'bad-signature') {
+            $case['signature'] = $signer->signMessage($message);
+        }
+    }
+    unset($case);
+    file_put_contents($vectorsPath, json_encode($doc, JSON_PRETTY_PRINT | JSON_UNESCAPED_SLASHES | JSON_UNESCAPED_UNICODE) . "\n");
+    echo "Rewrote {$vectorsPath}\n";
+    exit(0);
+}
+
+// Only buildMessage() is needed, which does not touch the private key
+$signer = (new ReflectionClass(ApiRequestSigner::class))->newInstanceWithoutConstructor();
+$failures = 0;
+foreach ($doc['cases'] as $case) {
+    $message = $signer->buildMessage($case['method'], $case['path'], $case['timestamp'], $case['body']);
+    if (base64_encode($message) !== $case['message_b64']) {
+        echo "[FAIL] {$case['name']}: buildMessage() differs from message_b64\n";
+        $failures++;
+        continue;
+    }
+    $pem = $doc['keys'][$case['key_id']] ?? null;
+    if ($pem === null || in_array($case['expect'], ['bad-timestamp', 'expired', 'future', 'replay'], true)) {
+        echo "[OK]   {$case['name']}: message\n";
+        continue;
+    }
+    $valid = openssl_verify($message, base64_decode($case['signature']), $pem, OPENSSL_ALGO_SHA256) === 1;
+    if ($valid === ($case['expect'] === 'ok')) {
+        echo "[OK]   {$case['name']}: " . ($valid ? 'valid' : 'invalid') . " signature\n";
+    } else {
+        echo "[FAIL] {$case['name']}: openssl_verify() disagrees with '{$case['expect']}'\n";
+        $failures++;
+    }
+}
+exit($failures ? 1 : 0);
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Streaming result writers for the tools/ scripts (--format text|jsonl|sarif).
+
+Findings are written one at a time as they are produced, so a consumer (a CI
+annotator, `jq`, ...) can start reading before the run finishes and the
+writer never holds the full result set:
+
+  text   each tool's historical line layout, rendered by a function it passes in
+  jsonl  one JSON object per line
+  sarif  a SARIF 2.1.0 log; the header (tool, rules) is written first, then
+         each result as it arrives, and the closing brackets on close()
+
+Usage:
+  from stream_output import open_writer
+  with open_writer('jsonl', path, tool='scan_bad_keywords', root=root) as w:
+      w.write({'path': ..., 'line': 3, ...}, sarif_result if w.sarif else None)
+"""
+
+from __future__ import annotations
+import json
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+
+FORMATS = ('text', 'jsonl', 'sarif')
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+
+
+def add_format_argument(ap) -> None:
+    ap.add_argument('--format', choices=FORMATS, default='text',
+                    help='Output format (default: text). jsonl/sarif are streamed as results arrive')
+
+
+def open_stream(path: Optional[str]) -> TextIO:
+    """Text stream for `path`; '-' or None is stdout (left open on close)."""
+    if path in (None, '-'):
+        return sys.stdout
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    return p.open('w', encoding='utf-8', newline='\n')
+
+
+class StreamWriter:
+    """Base writer: owns the output stream and counts results."""
+
+    # True when write() uses its `sarif_result` argument (callers may skip building it otherwise)
+    sarif = False
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.count = 0
+
+    def write(self, record: Dict[str, Any], sarif_result: Optional[Dict[str, Any]] = None) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        self.stream.flush()
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+    def __enter__(self) -> 'StreamWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class TextWriter(StreamWriter):
+    def __init__(self, stream: TextIO, render: Callable[[Dict[str, Any]], str]):
+        super().__init__(stream)
+        self.render = render
+
+    def write(self, record: Dict[str, Any], sarif_result: Optional[Dict[str, Any]] = None) -> None:
+        self.stream.write(self.render(record))
+        self.count += 1
+
+
+class JsonlWriter(StreamWriter):
+    def write(self, record: Dict[str, Any], sarif_result: Optional[Dict[str, Any]] = None) -> None:
+        self.stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.count += 1
+        self.stream.flush()
+
+
+class SarifWriter(StreamWriter):
+    sarif = True
+
+    def __init__(self, stream: TextIO, tool: str, rules: List[Dict[str, Any]], root: Optional[Path] = None):
+        super().__init__(stream)
+        run: Dict[str, Any] = {'tool': {'driver': {'name': tool, 'rules': rules}}}
+        if root is not None:
+            run['originalUriBaseIds'] = {'SRCROOT': {'uri': Path(root).resolve().as_uri() + '/'}}
+        head = json.dumps({'$schema': SARIF_SCHEMA, 'version': '2.1.0', 'runs': [run]}, ensure_ascii=False)
+        # Split before the run's closing brackets and open the results array there
+        assert head.endswith('}]}')
+        self.stream.write(head[:-3] + ', "results": [\n')
+        self.stream.flush()
+
+    def write(self, record: Dict[str, Any], sarif_result: Optional[Dict[str, Any]] = None) -> None:
+        if sarif_result is None:
+            return
+        if self.count:
+            self.stream.write(',\n')
+        self.stream.write(json.dumps(sarif_result, ensure_ascii=False))
+        self.count += 1
+        self.stream.flush()
+
+    def close(self) -> None:
+        self.stream.write('\n]}]}\n')
+        super().close()
+
+
+def open_writer(fmt: str, path: Optional[str], tool: str, rules: Optional[List[Dict[str, Any]]] = None,
+                root: Optional[Path] = None,
+                render: Optional[Callable[[Dict[str, Any]], str]] = None) -> StreamWriter:
+    """Writer for `fmt`; `render` formats one record as text (required for 'text')."""
+    if fmt not in FORMATS or (fmt == 'text' and render is None):
+        raise ValueError(f'no stream writer for format {fmt!r}')
+    stream = open_stream(path)
+    if fmt == 'sarif':
+        return SarifWriter(stream, tool, rules or [], root)
+    if fmt == 'jsonl':
+        return JsonlWriter(stream)
+    return TextWriter(stream, render)
+
+
+def sarif_rule(rule_id: str, description: str) -> Dict[str, Any]:
+    return {'id': rule_id, 'shortDescription': {'text': description}}
+
+
+def sarif_location(rel: str, line: int, snippet: Optional[str] = None) -> Dict[str, Any]:
+    region: Dict[str, Any] = {'startLine': line}
+    if snippet is not None:
+        region['snippet'] = {'text': snippet}
+    return {'physicalLocation': {'artifactLocation': {'uri': rel, 'uriBaseId': 'SRCROOT'}, 'region': region}}
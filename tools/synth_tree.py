@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic plugin tree shaped like this one, for benchmarking the
+tools/ checks at scales from tens to tens of thousands of files.
+
+The tree contains:
+ - Professional_Development.php with a wp_ajax_ hook and its nonce-checked callback
+ - includes/functions.php with the per-site key derivation (passes
+   tools/test_encryption_key_derivation.py)
+ - includes/REST/*.php route files with register_rest_route() calls, handlers
+   and, for a share of them, wp_ajax_ hooks
+ - js/*.js admin scripts issuing fetch()/jQuery.post() requests, plus a few
+   large minified-style bundles
+ - css/*.css stylesheets
+ - deliberate terminology hits (presentor/attendee and quoted "Attendees" copy)
+   in a fixed share of files, so the scan and the renames have work to do
+
+Output is deterministic for a given --files/--seed.
+
+Usage:
+  python3 tools/synth_tree.py OUT_DIR --files 5000 [--seed 1] [--force]
+
+Options:
+  --files N    Approximate number of files to generate (default: 500)
+  --seed S     Random seed (default: 1)
+  --force      Remove OUT_DIR first if it exists
+
+Exit code:
+  - 0 on success, 1 if OUT_DIR exists and is not empty (without --force)
+"""
+
+from __future__ import annotations
+import argparse
+import random
+import shutil
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+
+# Bump when the generated content changes (cached trees in tools/bench_tools.py are rebuilt)
+GENERATOR_VERSION = 1
+
+# Share of generated files per kind; the remainder are admin/*.php pages
+REST_SHARE = 0.55
+JS_SHARE = 0.25
+CSS_SHARE = 0.10
+# One in BUNDLE_EVERY JS files is a large bundle of BUNDLE_KB kilobytes
+BUNDLE_EVERY = 40
+BUNDLE_KB = 256
+# One in HIT_EVERY files carries terminology hits
+HIT_EVERY = 7
+
+WORDS = ['session', 'member', 'presenter', 'report', 'credit', 'hours', 'table', 'status', 'profile',
+         'certificate', 'course', 'event', 'invoice', 'payment', 'search', 'export']
+
+MAIN_PLUGIN = """<?php
+/**
+ * Plugin Name: Professional Development (synthetic)
+ */
+
+if ( ! defined( 'ABSPATH' ) ) {
+    exit;
+}
+
+require_once plugin_dir_path( __FILE__ ) . 'includes/functions.php';
+
+add_action('wp_ajax_check_db_connection', 'pd_check_db_connection_callback');
+
+function pd_check_db_connection_callback() {
+    check_ajax_referer('pd_check_db', 'nonce');
+    wp_send_json_success( [ 'ok' => true ] );
+}
+"""
+
+FUNCTIONS_PHP = """<?php
+if ( ! defined( 'ABSPATH' ) ) {
+    exit;
+}
+
+function ProfessionalDevelopment_derive_key() {
+    if (defined('PS_ENCRYPTION_KEY') && PS_ENCRYPTION_KEY) {
+        $material = (string) PS_ENCRYPTION_KEY;
+    } else {
+        $salt = function_exists('wp_salt') ? wp_salt('auth') : '';
+        $site = function_exists('site_url') ? site_url() : '';
+        $material = $salt . '|' . $site . '|Professional_Development';
+    }
+    return hash('sha256', $material, true);
+}
+
+function ProfessionalDevelopment_encrypt($data) {
+    $key = ProfessionalDevelopment_derive_key();
+    $iv = openssl_random_pseudo_bytes(16);
+    $encrypted = openssl_encrypt($data, 'AES-256-CBC', $key, 0, $iv);
+    return base64_encode($iv . $encrypted);
+}
+
+function ProfessionalDevelopment_decrypt($encrypted) {
+    $data = base64_decode($encrypted);
+    if ($data === false || strlen($data) <= 16) return false;
+    $iv = substr($data, 0, 16);
+    $ciphertext = substr($data, 16);
+    $key = ProfessionalDevelopment_derive_key();
+    $plain = openssl_decrypt($ciphertext, 'AES-256-CBC', $key, 0, $iv);
+    if ($plain !== false && $plain !== null) return $plain;
+    $legacy_key = 'hT4vaqdf3FLZePEyMfNbNn1M4SJf7Smm';
+    return openssl_decrypt($ciphertext, 'AES-256-CBC', $legacy_key, 0, $iv);
+}
+"""
+
+
+def _name(rng: random.Random, i: int) -> str:
+    return f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{i}"
+
+
+def rest_php(rng: random.Random, name: str, i: int, hit: bool) -> str:
+    method = rng.choice(['GET', 'POST', 'PUT', 'PATCH'])
+    readable = 'WP_REST_Server::READABLE' if method == 'GET' else 'WP_REST_Server::EDITABLE'
+    proc = f"{'presentor' if hit else 'member'}_{rng.choice(WORDS)}_view"
+    parts = [f"""<?php
+/**
+ * ProfDef REST: {method}_{name}
+ * Endpoint: {method} /wp-json/profdef/v2/{name}
+ */
+
+if ( ! defined( 'ABSPATH' ) ) {{
+    exit;
+}}
+
+add_action( 'rest_api_init', function () {{
+    register_rest_route(
+        'profdef/v2',
+        '/{name}',
+        [
+            'methods'             => {readable},
+            'permission_callback' => 'pd_sessions_permission',
+            'callback'            => 'pd_{name}_handler',
+        ]
+    );
+}} );
+
+/**
+ * Handler: {method} /profdef/v2/{name}
+ */
+function pd_{name}_handler( WP_REST_Request $request ) {{
+    $schema = defined('PD_DB_SCHEMA') ? PD_DB_SCHEMA : 'beta_2';
+    $id = (int) $request->get_param( 'id' );
+    $sql = sprintf( 'CALL %1$s.{proc}(%2$d);', $schema, $id );
+    try {{
+        $rows = aslta_signed_query( $sql );
+    }} catch ( Exception $e ) {{
+        return new WP_Error( 'db_error', $e->getMessage(), [ 'status' => 500 ] );
+    }}
+"""]
+    for k in range(rng.randint(4, 30)):
+        parts.append(f"    // normalise column {k}: trims, casts and defaults for the response\n"
+                     f"    foreach ( $rows as &$row ) {{ $row['c{k}'] = isset( $row['c{k}'] ) ? trim( (string) $row['c{k}'] ) : ''; }}\n")
+    if hit:
+        parts.append("    $label = __( 'Attendees', 'professional-development' ); // attendee count label\n")
+    parts.append("    return rest_ensure_response( $rows );\n}\n")
+    if i % 5 == 0:
+        parts.append(f"""
+add_action('wp_ajax_pd_{name}', 'pd_{name}_ajax');
+
+function pd_{name}_ajax() {{
+    check_ajax_referer('pd_{name}', 'nonce');
+    wp_send_json_success( pd_{name}_handler( new WP_REST_Request() ) );
+}}
+""")
+    return ''.join(parts)
+
+
+def admin_js(rng: random.Random, i: int, hit: bool, ajax: List[str]) -> str:
+    name = _name(rng, i)
+    parts = [f"""(function () {{
+  'use strict';
+  const cfg = window.PDSessions || {{}};
+  const root = (cfg.root || '/wp-json/profdef/v2').replace(/\\/+$/, '');
+
+  async function load_{name}(id) {{
+    const res = await fetch(`${{root}}/{name}?id=${{encodeURIComponent(id)}}`, {{
+      method: 'GET',
+      headers: {{ 'Accept': 'application/json', 'X-WP-Nonce': cfg.nonce || '' }},
+      credentials: 'same-origin',
+    }});
+    if (!res.ok) throw new Error('{name} failed: ' + res.status);
+    return res.json();
+  }}
+"""]
+    for k in range(rng.randint(3, 20)):
+        parts.append(f"""
+  function render_{k}(rows) {{
+    const tbody = document.querySelector('#pd-{name}-{k} tbody');
+    if (!tbody) return;
+    tbody.innerHTML = rows.map((r) => `<tr><td>${{r.c{k} || ''}}</td></tr>`).join('');
+  }}
+""")
+    if ajax:
+        slug = ajax[i % len(ajax)]
+        parts.append(f"""
+  function save_{name}(payload) {{
+    const params = new URLSearchParams();
+    params.set('action', '{slug}');
+    params.set('nonce', cfg.ajaxNonce || '');
+    const body = {{ action: '{slug}', nonce: cfg.ajaxNonce }};
+    return fetch(cfg.ajaxUrl, {{
+      method: 'POST',
+      headers: {{ 'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8' }},
+      body: params,
+    }});
+  }}
+""")
+    if hit:
+        parts.append("  // TODO: rename PDPresentors / attendee ids once the API is migrated\n"
+                     "  const heading = \"Attendees\";\n")
+    parts.append(f"  window.PD_{name} = {{ load_{name} }};\n}})();\n")
+    return ''.join(parts)
+
+
+def bundle_js(rng: random.Random, i: int) -> str:
+    """Large single-line-heavy bundle, similar to a vendored minified script."""
+    out: List[str] = []
+    size = 0
+    k = 0
+    while size < BUNDLE_KB * 1024:
+        w = rng.choice(WORDS)
+        chunk = (f"var {w}{k}=function(a,b){{return a&&b?'{w}'+(a/b|0):/{w}\\d+/.test(String(a))}};"
+                 f"fetch('/wp-json/profdef/v2/{w}',{{method:'GET',headers:{{'Accept':'application/json'}}}});")
+        out.append(chunk)
+        size += len(chunk)
+        k += 1
+        if k % 50 == 0:
+            out.append('\n')
+    return ''.join(out) + '\n'
+
+
+def css(rng: random.Random, i: int, hit: bool) -> str:
+    name = _name(rng, i)
+    rules = [f".pd-{name}-{k} {{ padding: {k % 8}px; color: #{rng.randrange(0x1000000):06x}; }}\n"
+             for k in range(rng.randint(5, 40))]
+    if hit:
+        rules.append("/* shared with the presentor table */\n.pd-attendee-row { font-weight: 600; }\n")
+    return ''.join(rules)
+
+
+def admin_php(rng: random.Random, i: int, hit: bool) -> str:
+    name = _name(rng, i)
+    label = 'Presentors' if hit else 'Presenters'
+    return f"""<?php
+if ( ! defined( 'ABSPATH' ) ) {{
+    exit;
+}}
+
+function profdef_{name}_page() {{
+    echo '<div class="wrap"><h1>' . esc_html__( '{label}', 'professional-development' ) . '</h1>';
+    echo '<table id="pd-{name}" class="widefat"><tbody></tbody></table></div>';
+}}
+"""
+
+
+def generate(out: Path, n_files: int, seed: int = 1) -> Dict[str, int]:
+    """Write the tree under `out` and return file counts per kind."""
+    rng = random.Random(seed)
+    n_rest = max(1, int(n_files * REST_SHARE))
+    n_js = max(1, int(n_files * JS_SHARE))
+    n_css = max(1, int(n_files * CSS_SHARE))
+    n_admin = max(0, n_files - n_rest - n_js - n_css - 2)
+    counts = {'php': 2, 'js': 0, 'css': 0}
+
+    def write(rel: str, text: str) -> None:
+        path = out / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+
+    write('Professional_Development.php', MAIN_PLUGIN)
+    write('includes/functions.php', FUNCTIONS_PHP)
+
+    ajax: List[str] = []
+    for i in range(n_rest):
+        name = _name(rng, i)
+        if i % 5 == 0:
+            ajax.append(f'pd_{name}')
+        write(f'includes/REST/route_{i:05d}.php', rest_php(rng, name, i, i % HIT_EVERY == 0))
+    counts['php'] += n_rest
+
+    for i in range(n_js):
+        if i % BUNDLE_EVERY == BUNDLE_EVERY - 1:
+            write(f'js/vendor/bundle_{i:05d}.min.js', bundle_js(rng, i))
+        else:
+            write(f'js/PD-admin-{i:05d}.js', admin_js(rng, i, i % HIT_EVERY == 3, ajax))
+    counts['js'] = n_js
+
+    for i in range(n_css):
+        write(f'css/PD-{i:05d}.css', css(rng, i, i % HIT_EVERY == 5))
+    counts['css'] = n_css
+
+    for i in range(n_admin):
+        write(f'admin/pages/page_{i:05d}.php', admin_php(rng, i, i % HIT_EVERY == 1))
+    counts['php'] += n_admin
+    return counts
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('out', help='Directory to create')
+    ap.add_argument('--files', type=int, default=500, help='Approximate number of files (default: 500)')
+    ap.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+    ap.add_argument('--force', action='store_true', help='Remove OUT_DIR first if it exists')
+    args = ap.parse_args(argv)
+
+    out = Path(args.out)
+    if out.exists() and any(out.iterdir()):
+        if not args.force:
+            print(f'[ERR] {out} exists and is not empty (use --force)', file=sys.stderr)
+            return 1
+        shutil.rmtree(out)
+    counts = generate(out, args.files, args.seed)
+    print(f"Generated {sum(counts.values())} files in {out} "
+          f"({counts['php']} PHP, {counts['js']} JS, {counts['css']} CSS)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -1,47 +1,119 @@
 #!/usr/bin/env python3
+"""
+Check that includes/functions.php derives its encryption key per site and only
+keeps the legacy hard-coded key as a decrypt() fallback.
+
+Each assertion runs against the exact body of the function it is about (see
+tools/php_lexer.py), so the cost is one linear scan of the file.
+"""
 from __future__ import annotations
+import argparse
 import re
 import sys
 from pathlib import Path
+from typing import List, Optional
+
+from git_source import GitError, add_git_arguments, changed_files
+from php_lexer import parse_php
+from repo_index import IndexedFile, indexed_file
+from tool_profile import add_profile_arguments, phase, profile_session
+from value_crypto import BACKEND, LEGACY_KEY, round_trip_errors
 
 ROOT = Path(__file__).resolve().parents[1]
 F = ROOT / 'includes' / 'functions.php'
 
-text = F.read_text(encoding='utf-8', errors='ignore')
 
-errors = []
+def check_encryption(text: str) -> list[str]:
+    errors = []
+    php = parse_php(text)
+    derive = php.function('ProfessionalDevelopment_derive_key')
+    encrypt = php.function('ProfessionalDevelopment_encrypt')
+    decrypt = php.function('ProfessionalDevelopment_decrypt')
+
+    # 1) derive_key exists and uses wp_salt/site_url
+    if derive is None:
+        errors.append('derive_key function not found')
+    else:
+        derive_code = php.code(derive)
+        if 'wp_salt' not in derive_code or 'site_url' not in derive_code:
+            errors.append('derive_key does not reference wp_salt/site_url')
+
+    # 2) encrypt uses derive_key
+    encrypt_code = php.code(encrypt) if encrypt else ''
+    if re.search(r'ProfessionalDevelopment_derive_key\s*\(', encrypt_code) is None:
+        errors.append('encrypt() does not use ProfessionalDevelopment_derive_key')
+
+    # 3) decrypt uses derive_key first
+    decrypt_code = php.code(decrypt) if decrypt else ''
+    first_key = re.search(r'\$\w*key\s*=\s*([^;]*)', decrypt_code)
+    if first_key is None or not re.match(r'ProfessionalDevelopment_derive_key\s*\(', first_key.group(1)):
+        errors.append('decrypt() does not try derive_key first')
+
+    # 4) No hardcoded fallback assignment in encrypt
+    if LEGACY_KEY in encrypt_code:
+        errors.append('encrypt() still assigns hardcoded fallback key')
 
-# 1) derive_key exists and uses wp_salt/site_url
-if 'function ProfessionalDevelopment_derive_key' not in text:
-    errors.append('derive_key function not found')
+    # 5) Legacy fallback allowed only in decrypt
+    for m in re.finditer(re.escape(LEGACY_KEY), text):
+        if decrypt is None or not (decrypt.body_start <= m.start() < decrypt.end):
+            errors.append('legacy fallback key appears outside decrypt()')
+            break
 
-if 'wp_salt' not in text or 'site_url' not in text:
-    errors.append('derive_key does not reference wp_salt/site_url')
+    # 6) tools/value_crypto.py reproduces encrypt()/decrypt() and migrates legacy values
+    if derive is not None and decrypt is not None:
+        errors.extend(round_trip_errors(text))
 
-# 2) encrypt uses derive_key
-if re.search(r'function\s+ProfessionalDevelopment_encrypt\s*\(.*?\)\s*{[\s\S]*?ProfessionalDevelopment_derive_key\s*\(', text) is None:
-    errors.append('encrypt() does not use ProfessionalDevelopment_derive_key')
+    return errors
 
-# 3) decrypt uses derive_key first
-if re.search(r'function\s+ProfessionalDevelopment_decrypt[\s\S]*?\$key\s*=\s*ProfessionalDevelopment_derive_key\s*\(', text) is None:
-    errors.append('decrypt() does not try derive_key first')
 
-# 4) No hardcoded fallback assignment in encrypt
-if re.search(r"encrypt\([\s\S]*?\$key\s*=\s*defined\(\'PS_ENCRYPTION_KEY\'\).*?\'hT4vaqdf3FLZePEyMfNbNn1M4SJf7Smm\'", text):
-    errors.append('encrypt() still assigns hardcoded fallback key')
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description='Check the encryption key derivation in includes/functions.php')
+    ap.add_argument('-r', '--root', default=str(ROOT), help='Plugin root to check (default: repo root)')
+    add_git_arguments(ap)
+    add_profile_arguments(ap)
+    args = ap.parse_args(argv if argv is not None else [])
+    with profile_session(args, 'test_encryption_key_derivation'):
+        return run(args)
 
-# 5) Legacy fallback allowed only in decrypt
-if 'hT4vaqdf3FLZePEyMfNbNn1M4SJf7Smm' in text:
-    # ensure it appears only in decrypt block
-    decrypt_section = re.search(r'function\s+ProfessionalDevelopment_decrypt[\s\S]*?}', text)
-    if not decrypt_section or 'hT4vaqdf3FLZePEyMfNbNn1M4SJf7Smm' not in decrypt_section.group(0):
-        errors.append('legacy fallback key appears outside decrypt()')
 
-if errors:
-    print('Encryption key derivation test FAILED:')
-    for e in errors:
-        print(' -', e)
-    sys.exit(1)
-else:
+def run(args: argparse.Namespace) -> int:
+    root = Path(args.root).resolve()
+    target = root / F.relative_to(ROOT)
+
+    if args.staged or args.since:
+        try:
+            indexed = next((f for f in changed_files(root, args.since, args.staged) if f.path == target), None)
+        except GitError as exc:
+            print(f'[ERR] {exc}', file=sys.stderr)
+            return 1
+        if indexed is None:
+            print('Encryption key derivation test skipped (includes/functions.php unchanged)')
+            return 0
+    else:
+        indexed = indexed_file(target, root)
+        if indexed is None:
+            print(f'[ERR] {target} not found', file=sys.stderr)
+            return 1
+    return check_file(indexed)
+
+
+def check_file(indexed: IndexedFile) -> int:
+    with phase('read'):
+        text = indexed.text
+
+    with phase('match'):
+        errors = check_encryption(text)
+    if BACKEND is None:
+        print('[WARN] stored-format round trip skipped: neither the cryptography package nor openssl '
+              'is available', file=sys.stderr)
+    if errors:
+        print('Encryption key derivation test FAILED:')
+        for e in errors:
+            print(' -', e)
+        return 1
     print('Encryption key derivation test OK')
+    return 0
+
 
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Shared process pool for the tools/ checks (--jobs N).
+
+Work is split into contiguous chunks of roughly equal byte size, run on one
+process-pool executor shared by every tool in the process (see
+tools/run_checks.py), and merged back in input order. Because the input is the
+index's sorted walk order, parallel output is byte-identical to a serial run.
+
+Chunk functions take a list of file references and return one result per
+reference, in order. A reference is either an IndexedFile (serial runs reuse
+the in-process index; contents not taken from the working tree, such as git
+blobs, are shipped to workers as-is) or a path string (worker processes load
+the file themselves); `load_files` normalises both.
+"""
+
+from __future__ import annotations
+import atexit
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Union
+
+import tool_profile
+from repo_index import IndexedFile
+
+
+FileRef = Union[IndexedFile, str]
+
+# Chunks per worker; more chunks smooth out uneven file sizes.
+CHUNKS_PER_JOB = 4
+# imap_chunks works through the input in windows of about this many bytes
+STREAM_WINDOW_BYTES = 16 * 1024 * 1024
+
+_EXECUTOR: Optional[ProcessPoolExecutor] = None
+_EXECUTOR_JOBS = 0
+
+
+def resolve_jobs(jobs: Optional[int]) -> int:
+    """Normalise a --jobs value: None/1 -> 1, 0 or negative -> CPU count."""
+    if jobs is None:
+        return 1
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def add_jobs_argument(ap) -> None:
+    ap.add_argument('-j', '--jobs', type=int, default=1,
+                    help='Worker processes (default: 1 = serial; 0 = one per CPU)')
+
+
+def get_executor(jobs: int) -> ProcessPoolExecutor:
+    """Return the process-wide executor, created on first use with `jobs` workers."""
+    global _EXECUTOR, _EXECUTOR_JOBS
+    if _EXECUTOR is None:
+        _EXECUTOR = ProcessPoolExecutor(max_workers=jobs)
+        _EXECUTOR_JOBS = jobs
+    return _EXECUTOR
+
+
+def shutdown() -> None:
+    global _EXECUTOR, _EXECUTOR_JOBS
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown()
+        _EXECUTOR = None
+        _EXECUTOR_JOBS = 0
+
+
+atexit.register(shutdown)
+
+
+def load_files(refs: Sequence[FileRef]) -> List[IndexedFile]:
+    return [r if isinstance(r, IndexedFile) else IndexedFile.load(r) for r in refs]
+
+
+def chunk_by_size(files: Sequence[IndexedFile], n_chunks: int) -> List[List[IndexedFile]]:
+    """Split `files` into at most `n_chunks` contiguous runs of roughly equal total size."""
+    if n_chunks <= 1 or len(files) <= 1:
+        return [list(files)] if files else []
+    total = sum(max(f.size, 1) for f in files)
+    target = total / n_chunks
+    chunks: List[List[IndexedFile]] = []
+    current: List[IndexedFile] = []
+    acc = 0
+    for f in files:
+        current.append(f)
+        acc += max(f.size, 1)
+        if acc >= target and len(chunks) < n_chunks - 1:
+            chunks.append(current)
+            current, acc = [], 0
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def map_chunks(func: Callable[..., List[Any]], files: Sequence[IndexedFile], *args: Any,
+               jobs: Optional[int] = 1) -> List[Any]:
+    """Apply `func(refs, *args)` over `files` and return per-file results in input order.
+
+    With jobs <= 1 (after resolve_jobs) the call runs in-process on the
+    IndexedFile objects themselves; otherwise chunks of path strings are sent
+    to the shared executor. `func` must be a module-level function. While
+    profiling, workers run `func` under their own profiler and the data is
+    merged into the parent's (see tools/tool_profile.py).
+    """
+    n = resolve_jobs(jobs)
+    if n <= 1 or len(files) <= 1:
+        return list(func(list(files), *args))
+    executor = get_executor(n)
+    chunks = chunk_by_size(files, n * CHUNKS_PER_JOB)
+    prof = tool_profile.ACTIVE
+    payloads = [[str(f.path) if f.from_disk else f for f in chunk] for chunk in chunks]
+    if prof is not None:
+        futures = [executor.submit(tool_profile.run_profiled, func, refs, *args) for refs in payloads]
+    else:
+        futures = [executor.submit(func, refs, *args) for refs in payloads]
+    results: List[Any] = []
+    for fut in futures:
+        if prof is not None:
+            chunk_results, data = fut.result()
+            prof.merge(data)
+            results.extend(chunk_results)
+        else:
+            results.extend(fut.result())
+    return results
+
+
+def windows(files: Sequence[IndexedFile], max_bytes: int = STREAM_WINDOW_BYTES) -> Iterator[List[IndexedFile]]:
+    """Contiguous runs of `files` of at most `max_bytes` each (a larger file is a run of its own)."""
+    window: List[IndexedFile] = []
+    acc = 0
+    for f in files:
+        if window and acc + f.size > max_bytes:
+            yield window
+            window, acc = [], 0
+        window.append(f)
+        acc += f.size
+    if window:
+        yield window
+
+
+def imap_chunks(func: Callable[..., List[Any]], files: Sequence[IndexedFile], *args: Any,
+                jobs: Optional[int] = 1) -> Iterator[Any]:
+    """map_chunks over windows of STREAM_WINDOW_BYTES, yielding per-file results in input order.
+
+    Results of a window are yielded as soon as it completes, so callers can
+    stream output while later windows are still being processed, holding at
+    most one window of results at a time.
+    """
+    for window in windows(files):
+        yield from map_chunks(func, window, *args, jobs=jobs)
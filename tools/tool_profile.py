@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Opt-in profiling for the tools/ checks (--profile / PD_TOOLS_PROFILE=1).
+
+When enabled, a run records:
+ - wall time per phase (walk, read, match, report, ...), exclusive of nested
+   phases, so the phase times add up to the run's wall time
+ - files and bytes read, and files/s and bytes/s over the whole run
+ - the slowest N files (time spent matching each one)
+ - time, calls and hits per regex pattern or rule
+and writes it as one JSON document. --cprofile PATH additionally dumps a
+cProfile of the main process (load it with `python3 -m pstats PATH`).
+
+Work done in --jobs worker processes is profiled there and merged back:
+files, patterns and bytes are added to the run's totals, and worker phase
+times are reported separately under `worker_phases` (CPU spent in other
+processes does not add up to the parent's wall time).
+
+When disabled (the default), `ACTIVE` is None; hot paths check that once per
+file or call and do nothing else, and `phase()` returns a shared no-op context.
+
+Environment:
+  PD_TOOLS_PROFILE=1          Enable profiling without passing --profile
+  PD_TOOLS_PROFILE_OUT=PATH   Where to write the JSON ('-' = stderr)
+  PD_TOOLS_CPROFILE=PATH      Also dump a cProfile to PATH
+"""
+
+from __future__ import annotations
+import contextlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+DEFAULT_PROFILE_DIR = Path(__file__).resolve().parents[1] / '.tools-cache' / 'profile'
+DEFAULT_TOP = 10
+
+_NULL = contextlib.nullcontext()
+
+
+class Profiler:
+    def __init__(self, tool: str, top: int = DEFAULT_TOP):
+        self.tool = tool
+        self.top = top
+        self.started = time.perf_counter()
+        # phase path ('a > b') -> [exclusive seconds, calls]
+        self.phases: Dict[str, List[float]] = {}
+        self.worker_phases: Dict[str, List[float]] = {}
+        # open phases: [path, start, seconds spent in nested phases]
+        self._stack: List[List[Any]] = []
+        self.files: List[Tuple[float, str, int]] = []
+        # pattern -> [seconds, calls, hits]
+        self.patterns: Dict[str, List[float]] = {}
+        self.files_read = 0
+        self.bytes_read = 0
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        path = f'{self._stack[-1][0]} > {name}' if self._stack else name
+        frame = [path, time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame[1]
+            self._add_phase(path, elapsed - frame[2], 1)
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+    def _add_phase(self, path: str, seconds: float, calls: int) -> None:
+        entry = self.phases.setdefault(path, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += calls
+
+    def read(self, nbytes: int, seconds: float) -> None:
+        """One file read and decoded; counted as a nested 'read' phase of the current one."""
+        self.files_read += 1
+        self.bytes_read += nbytes
+        if self._stack and self._stack[-1][0].rsplit(' > ', 1)[-1] == 'read':
+            return  # already inside an explicit 'read' phase, which times it
+        path = f'{self._stack[-1][0]} > read' if self._stack else 'read'
+        self._add_phase(path, seconds, 1)
+        if self._stack:
+            self._stack[-1][2] += seconds
+
+    def file(self, path: str, seconds: float, nbytes: int) -> None:
+        self.files.append((seconds, path, nbytes))
+
+    def pattern(self, name: str, seconds: float, hits: int = 0, calls: int = 1) -> None:
+        entry = self.patterns.setdefault(name, [0.0, 0, 0])
+        entry[0] += seconds
+        entry[1] += calls
+        entry[2] += hits
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Raw, mergeable data (sent back from worker processes)."""
+        return {
+            'phases': self.phases,
+            'files': self.files,
+            'patterns': self.patterns,
+            'files_read': self.files_read,
+            'bytes_read': self.bytes_read,
+        }
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        for path, (seconds, calls) in data['phases'].items():
+            entry = self.worker_phases.setdefault(path, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += calls
+        self.files.extend(tuple(f) for f in data['files'])
+        for name, (seconds, calls, hits) in data['patterns'].items():
+            self.pattern(name, seconds, hits, calls)
+        self.files_read += data['files_read']
+        self.bytes_read += data['bytes_read']
+
+    def report(self) -> Dict[str, Any]:
+        wall = time.perf_counter() - self.started
+
+        def phases(table: Dict[str, List[float]]) -> Dict[str, Dict[str, Any]]:
+            return {p: {'seconds': round(s, 6), 'calls': int(c)} for p, (s, c) in table.items()}
+
+        slowest = sorted(self.files, key=lambda f: (-f[0], f[1]))[:self.top]
+        return {
+            'tool': self.tool,
+            'argv': sys.argv,
+            'wall_s': round(wall, 6),
+            'phases': phases(self.phases),
+            'worker_phases': phases(self.worker_phases),
+            'files_read': self.files_read,
+            'bytes_read': self.bytes_read,
+            'files_per_s': round(self.files_read / wall, 1) if wall > 0 else None,
+            'bytes_per_s': round(self.bytes_read / wall, 1) if wall > 0 else None,
+            'files_matched': len(self.files),
+            'slowest_files': [{'path': p, 'seconds': round(s, 6), 'bytes': b} for s, p, b in slowest],
+            'patterns': sorted(({'pattern': n, 'seconds': round(s, 6), 'calls': int(c), 'hits': int(h)}
+                                for n, (s, c, h) in self.patterns.items()),
+                               key=lambda p: (-p['seconds'], p['pattern'])),
+        }
+
+
+# The profiler of the current process, or None when profiling is off
+ACTIVE: Optional[Profiler] = None
+
+
+def phase(name: str):
+    """Context manager timing a phase of the active profile (no-op when disabled)."""
+    return ACTIVE.phase(name) if ACTIVE is not None else _NULL
+
+
+def add_profile_arguments(ap) -> None:
+    ap.add_argument('--profile', nargs='?', const='', metavar='PATH',
+                    help=f'Write per-phase timings as JSON to PATH (default: {DEFAULT_PROFILE_DIR}/<tool>.json; '
+                         "'-' = stderr). Also enabled by PD_TOOLS_PROFILE=1")
+    ap.add_argument('--profile-top', type=int, default=DEFAULT_TOP, metavar='N',
+                    help=f'Slowest files to report (default: {DEFAULT_TOP})')
+    ap.add_argument('--cprofile', metavar='PATH', help='Also dump a cProfile of the run to PATH')
+
+
+def _env_enabled() -> bool:
+    return os.environ.get('PD_TOOLS_PROFILE', '').lower() in ('1', 'true', 'yes', 'on')
+
+
+@contextlib.contextmanager
+def profile_session(args, tool: str) -> Iterator[Optional[Profiler]]:
+    """Profile the body for `tool` when --profile / PD_TOOLS_PROFILE asks for it.
+
+    Inside an already active session (tools run together by run_checks.py) the
+    body becomes a phase named after the tool instead of a separate document.
+    """
+    global ACTIVE
+    if ACTIVE is not None:
+        with ACTIVE.phase(tool):
+            yield ACTIVE
+        return
+    out = getattr(args, 'profile', None)
+    cprofile_path = getattr(args, 'cprofile', None) or os.environ.get('PD_TOOLS_CPROFILE')
+    if out is None and not _env_enabled() and not cprofile_path:
+        yield None
+        return
+
+    prof = Profiler(tool, getattr(args, 'profile_top', DEFAULT_TOP))
+    cprof = None
+    if cprofile_path:
+        import cProfile
+        cprof = cProfile.Profile()
+    ACTIVE = prof
+    if cprof is not None:
+        cprof.enable()
+    try:
+        yield prof
+    finally:
+        if cprof is not None:
+            cprof.disable()
+        ACTIVE = None
+        if cprof is not None:
+            Path(cprofile_path).parent.mkdir(parents=True, exist_ok=True)
+            cprof.dump_stats(cprofile_path)
+            print(f'cProfile written to {cprofile_path}', file=sys.stderr)
+        if out is not None or _env_enabled():
+            write_report(prof, out or os.environ.get('PD_TOOLS_PROFILE_OUT') or '')
+
+
+def write_report(prof: Profiler, out: str) -> None:
+    doc = json.dumps(prof.report(), indent=2) + '\n'
+    if out == '-':
+        sys.stderr.write(doc)
+        return
+    path = Path(out) if out else DEFAULT_PROFILE_DIR / f'{prof.tool}.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(doc, encoding='utf-8')
+    print(f'Profile written to {path}', file=sys.stderr)
+
+
+def run_profiled(func: Callable[..., List[Any]], refs: List[Any], *args: Any) -> Tuple[List[Any], Dict[str, Any]]:
+    """Worker-side wrapper: run a chunk function under a fresh profiler and return its data too."""
+    global ACTIVE
+    prof = Profiler('worker')
+    ACTIVE = prof
+    try:
+        results = func(refs, *args)
+    finally:
+        ACTIVE = None
+    return results, prof.snapshot()
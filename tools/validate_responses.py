@@ -0,0 +1,895 @@
+#!/usr/bin/env python3
+"""
+Validate captured REST traffic against the response schemas of the proposed
+v3 contract (includes/REST/new.yaml).
+
+Each documented response schema (see tools/openapi_spec.py) is compiled once
+into a specialised Python function: every keyword becomes a few inline type,
+key and range tests, $refs are inlined (only recursive ones become calls), and
+the JSON path of a failing value is only built when it fails. A JSONL
+capture of request/response pairs is then streamed through those functions,
+one record per line, in either shape:
+
+  {"method": "GET", "path": "/wp-json/profdef/v3/sessions?page=2", "status": 200, "body": {...}}
+  {"request": {"method": "GET", "url": "https://site/wp-json/..."}, "response": {"status": 200, "body": "..."}}
+
+The body may be the decoded JSON or its raw text; ?rest_route=/... requests
+are matched like pretty permalinks. The schema is picked by status code
+(exact, then 4XX-style ranges, then 'default'); a status the operation does
+not document is a violation, and so is a body that is not JSON when a
+schema is documented.
+
+The capture is split into byte ranges that end on line boundaries and each
+range is read line by line by a worker process (--jobs), so memory stays flat
+whatever the file size. Violations are grouped by operation, status, keyword
+and schema path (array indices folded to []), with counts and the first
+--samples line numbers per group.
+
+Usage:
+  python3 tools/validate_responses.py CAPTURE.jsonl [--jobs N] [--spec PATH ...] [--match REGEX]
+                                      [--samples 3] [--top 20] [--output report.json] [--profile [PATH]]
+  python3 tools/validate_responses.py - < capture.jsonl
+  python3 tools/validate_responses.py --synthesize N CAPTURE.jsonl [--corrupt 0.01] [--seed 1]
+  python3 tools/validate_responses.py --emit-code [--match REGEX]
+
+Options:
+  --spec PATH          OpenAPI document(s) (repeatable; default: includes/REST/new.yaml)
+  --match REGEX        Only operations whose 'METHOD /path' matches; other records count as unmatched
+  --jobs N, -j N       Worker processes (default: 1; 0 = one per CPU); stdin is always read serially
+  --chunk-mb N         Bytes per work unit (default: 8)
+  --samples N          Example line numbers kept per violation group (default: 3)
+  --top N              Violation groups printed (default: 20; all are in --output)
+  --output PATH        Write the full report as JSON
+  --synthesize N       Write N synthetic records (valid responses from the schemas) to CAPTURE
+  --corrupt X          With --synthesize: fraction of records given a schema violation (default: 0)
+  --seed N             With --synthesize: random seed (default: 1)
+  --emit-code          Print the generated validator source and exit
+  --profile [PATH]     Per-phase timings as JSON (see tools/tool_profile.py)
+
+Exit code:
+  - 0 if every matched record is valid and every line parsed
+  - 1 if a record violates its schema or a line is not JSON, or on a setup error
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import time
+from concurrent.futures import as_completed
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, NamedTuple, Optional, Pattern, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from openapi_spec import (Operation, Spec, SpecError, example_value, fill_path, load_spec, operations, path_regex,
+                          resolve)
+from tool_pool import add_jobs_argument, get_executor, resolve_jobs
+from tool_profile import add_profile_arguments, phase, profile_session
+
+try:
+    import orjson
+    _loads: Callable[[Any], Any] = orjson.loads
+    JSON_BACKEND = 'orjson'
+except ImportError:  # stdlib json (accepts bytes too)
+    _loads = json.loads
+    JSON_BACKEND = 'json'
+
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_SPEC = ROOT / 'includes' / 'REST' / 'new.yaml'
+DEFAULT_CHUNK_MB = 8
+# violations kept per record; one bad array can otherwise report every item
+MAX_ERRORS_PER_RECORD = 10
+# distinct unmatched 'METHOD path' keys counted per chunk before they are lumped together
+MAX_UNMATCHED_KEYS = 50
+ROUTE_CACHE_SIZE = 4096
+
+FORMAT_RES: Dict[str, str] = {
+    'date': r'\d{4}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12]\d|3[01])\Z',
+    'date-time': r'\d{4}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12]\d|3[01])[Tt ]'
+                 r'(?:[01]\d|2[0-3]):[0-5]\d:(?:[0-5]\d|60)(?:\.\d+)?(?:[Zz]|[+-](?:[01]\d|2[0-3]):?[0-5]\d)\Z',
+    'email': r'[^@\s]+@[^@\s]+\.[^@\s]+\Z',
+    'uuid': r'[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}\Z',
+    'uri': r'[A-Za-z][A-Za-z0-9+.\-]*:\S*\Z',
+}
+TYPE_TESTS = {
+    'object': 'type({v}) is dict',
+    'array': 'type({v}) is list',
+    'string': 'type({v}) is str',
+    'integer': '(type({v}) is int or type({v}) is float and {v}.is_integer())',  # 3.0 is an integer (draft 6+)
+    'number': 'type({v}) in NUM',
+    'boolean': 'type({v}) is bool',
+}
+# keywords that carry no constraint (or none for responses)
+IGNORED_KEYWORDS = {'description', 'title', 'example', 'examples', 'default', 'readOnly', 'writeOnly', 'deprecated',
+                    'externalDocs', 'xml', 'discriminator', 'format', 'nullable', 'type', '$ref'}
+HANDLED_KEYWORDS = {'properties', 'required', 'additionalProperties', 'minProperties', 'maxProperties', 'items',
+                    'minItems', 'maxItems', 'uniqueItems', 'minLength', 'maxLength', 'pattern', 'minimum',
+                    'maximum', 'exclusiveMinimum', 'exclusiveMaximum', 'multipleOf', 'enum', 'const', 'allOf',
+                    'anyOf', 'oneOf', 'not'}
+_INDEX_RE = re.compile(r'\[\d+\]')
+_IDENT_RE = re.compile(r'[A-Za-z_]\w*')
+
+
+# ---------------------------------------------------------------------------
+# Schema compiler
+# ---------------------------------------------------------------------------
+
+_MISSING = object()
+
+
+def _kind(v: Any) -> str:
+    if v is None:
+        return 'null'
+    return {bool: 'boolean', int: 'integer', float: 'number', str: 'string', list: 'array',
+            dict: 'object'}.get(type(v), type(v).__name__)
+
+
+def _number(schema: Dict[str, Any], key: str, where: str) -> Any:
+    """schema[key], which is spliced into the generated code: a finite number or SpecError."""
+    value = schema[key]
+    if type(value) not in (int, float) or not math.isfinite(value):
+        raise SpecError(f'{where}: {key} must be a number, got {_kind(value)} {_short(value)}')
+    return value
+
+
+def _count(schema: Dict[str, Any], key: str, where: str) -> int:
+    """schema[key] for the length keywords (minItems, maxLength, ...): a non-negative integer."""
+    value = schema[key]
+    if type(value) not in (int, float) or not math.isfinite(value) or value < 0 or value != int(value):
+        raise SpecError(f'{where}: {key} must be a non-negative integer, got {_kind(value)} {_short(value)}')
+    return int(value)
+
+
+def _same(a: Any, b: Any) -> bool:
+    """JSON equality for enum/const: numbers compare by value (1 == 1.0), but booleans are
+    not numbers (True != 1), unlike Python's ==."""
+    ta, tb = type(a), type(b)
+    if ta is not tb and not (ta in (int, float) and tb in (int, float)):
+        return False
+    if ta is list:
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    if ta is dict:
+        return a.keys() == b.keys() and all(_same(x, b[k]) for k, x in a.items())
+    return a == b
+
+
+def _in_enum(v: Any, values: List[Any]) -> bool:
+    return any(_same(v, e) for e in values)
+
+
+def _short(v: Any) -> str:
+    text = json.dumps(v, ensure_ascii=False, default=str)
+    return text if len(text) <= 40 else text[:37] + '...'
+
+
+def _unique(items: List[Any]) -> bool:
+    return len({json.dumps(i, sort_keys=True) for i in items}) == len(items)
+
+
+def _multiple(v: Any, n: Any) -> bool:
+    q = v / n
+    return abs(q - round(q)) < 1e-9
+
+
+class SchemaCompiler:
+    """Generates one Python module of validator functions for a spec.
+
+    A validator is `f(x, e, p='$')`: it appends (path, keyword, message)
+    tuples to the list `e` for every violation in `x`.
+    """
+
+    def __init__(self, spec: Spec):
+        self.spec = spec
+        self.consts: List[Any] = []
+        self.defs: List[str] = []
+        self.ref_functions: Dict[str, str] = {}
+        self.warnings: List[str] = []
+        self._n = 0
+
+    def _fresh(self, prefix: str) -> str:
+        self._n += 1
+        return f'{prefix}{self._n}'
+
+    def _const(self, value: Any) -> str:
+        self.consts.append(value)
+        return f'K[{len(self.consts) - 1}]'
+
+    def function(self, schema: Dict[str, Any], name: str, where: str) -> None:
+        body: List[str] = []
+        self._emit(schema, 'x', 'p', body, 1, (), where)
+        self.defs.append(f"def {name}(x, e, p='$'):\n" + ('\n'.join(body) if body else '    pass') + '\n')
+
+    def _ref_function(self, ref: str) -> str:
+        name = self.ref_functions.get(ref)
+        if name is None:
+            name = self.ref_functions[ref] = self._fresh('ref')
+            body: List[str] = []
+            self._emit(resolve(self.spec, {'$ref': ref}), 'x', 'p', body, 1, (ref,), ref)
+            self.defs.append(f'def {name}(x, e, p):\n' + ('\n'.join(body) if body else '    pass') + '\n')
+        return name
+
+    def _predicate(self, schema: Any, stack: Tuple[str, ...], where: str) -> str:
+        """Name of a function returning True when a value matches `schema` (for anyOf/oneOf/not)."""
+        name = self._fresh('match')
+        body: List[str] = []
+        self._emit(schema, 'x', "''", body, 1, stack, where)
+        self.defs.append(f'def {name}(x):\n    e = []\n' + '\n'.join(body) + '\n    return not e\n')
+        return name
+
+    @staticmethod
+    def _error(out: List[str], ind: int, path: str, keyword: str, message: str) -> None:
+        out.append(f"{'    ' * ind}e.append(({path}, {keyword!r}, {message}))")
+
+    def _emit(self, schema: Any, v: str, path: str, out: List[str], ind: int,
+              stack: Tuple[str, ...], where: str) -> None:
+        """Append the checks of `schema` on the value named `v`; `path` is an expression for its JSON path."""
+        if not isinstance(schema, dict):
+            return
+        if '$ref' in schema:
+            ref = schema['$ref']
+            if ref in stack:
+                out.append(f"{'    ' * ind}{self._ref_function(ref)}({v}, e, {path})")
+                return
+            schema = resolve(self.spec, schema)
+            stack, where = stack + (ref,), ref
+            if not isinstance(schema, dict):
+                return
+        for key in schema:
+            if key not in HANDLED_KEYWORDS and key not in IGNORED_KEYWORDS and not key.startswith('x-'):
+                self.warnings.append(f"{self.spec.path.name}: {where}: keyword '{key}' is not checked")
+
+        types = schema.get('type')
+        types = [types] if isinstance(types, str) else list(types or [])
+        nullable = schema.get('nullable') is True or 'null' in types
+        types = [t for t in types if t != 'null']
+        for t in types:
+            if t not in TYPE_TESTS:
+                self.warnings.append(f"{self.spec.path.name}: {where}: unknown type '{t}' is not checked")
+        types = [t for t in types if t in TYPE_TESTS]
+        base = ind + 1 if nullable else ind
+        lines: List[str] = []
+
+        shared: List[str] = []
+        if 'enum' in schema:
+            self._error_if(shared, base + (1 if types else 0), f'not ENUM({v}, {self._const(list(schema["enum"]))})',
+                           path, 'enum', f"'value ' + SHORT({v}) + ' is not one of the enum values'")
+        if 'const' in schema:
+            self._error_if(shared, base + (1 if types else 0), f'not SAME({v}, {self._const(schema["const"])})',
+                           path, 'const', f"'value ' + SHORT({v}) + ' is not the constant'")
+
+        if types:
+            expected = ' or '.join(types + (['null'] if nullable else []))
+            bodies = [self._type_checks(t, schema, v, path, base + 1, stack, where) + shared for t in types]
+            if not any(bodies):
+                tests = ' or '.join(TYPE_TESTS[t].format(v=v) for t in types)
+                self._error_if(lines, base, f'not ({tests})', path, 'type', f"'expected {expected}, got ' + KIND({v})")
+            else:
+                for i, (t, body) in enumerate(zip(types, bodies)):
+                    lines.append(f"{'    ' * base}{'if' if i == 0 else 'elif'} {TYPE_TESTS[t].format(v=v)}:")
+                    lines.extend(body or [f"{'    ' * (base + 1)}pass"])
+                lines.append(f"{'    ' * base}else:")
+                self._error(lines, base + 1, path, 'type', f"'expected {expected}, got ' + KIND({v})")
+        else:
+            lines.extend(shared)
+            for t in ('object', 'array', 'string', 'number'):
+                body = self._type_checks(t, schema, v, path, base + 1, stack, where)
+                if body:
+                    lines.append(f"{'    ' * base}if {TYPE_TESTS[t].format(v=v)}:")
+                    lines.extend(body)
+
+        for sub in schema.get('allOf') or []:
+            self._emit(sub, v, path, lines, base, stack, where + '/allOf')
+        if schema.get('anyOf'):
+            calls = [f'{self._predicate(s, stack, where + "/anyOf")}({v})' for s in schema['anyOf']]
+            self._error_if(lines, base, 'not (' + ' or '.join(calls) + ')', path, 'anyOf',
+                           repr(f"matches none of the {len(calls)} anyOf schemas"))
+        if schema.get('oneOf'):
+            calls = [f'{self._predicate(s, stack, where + "/oneOf")}({v})' for s in schema['oneOf']]
+            count = '(' + ' + '.join(calls) + ')'
+            self._error_if(lines, base, f'{count} != 1', path, 'oneOf',
+                           f"'matches ' + str({count}) + ' of the {len(calls)} oneOf schemas (expected 1)'")
+        if isinstance(schema.get('not'), dict):
+            self._error_if(lines, base, f'{self._predicate(schema["not"], stack, where + "/not")}({v})',
+                           path, 'not', repr('matches the schema under not'))
+
+        if nullable and lines:
+            out.append(f"{'    ' * ind}if {v} is not None:")
+        out.extend(lines)
+
+    def _error_if(self, out: List[str], ind: int, condition: str, path: str, keyword: str, message: str) -> None:
+        out.append(f"{'    ' * ind}if {condition}:")
+        self._error(out, ind + 1, path, keyword, message)
+
+    def _type_checks(self, t: str, schema: Dict[str, Any], v: str, path: str, ind: int,
+                     stack: Tuple[str, ...], where: str) -> List[str]:
+        out: List[str] = []
+        if t == 'object':
+            self._object_checks(schema, v, path, out, ind, stack, where)
+        elif t == 'array':
+            if 'minItems' in schema:
+                self._error_if(out, ind, f'len({v}) < {_count(schema, "minItems", where)}', path, 'minItems',
+                               repr(f'fewer than {schema["minItems"]} items'))
+            if 'maxItems' in schema:
+                self._error_if(out, ind, f'len({v}) > {_count(schema, "maxItems", where)}', path, 'maxItems',
+                               repr(f'more than {schema["maxItems"]} items'))
+            if schema.get('uniqueItems') is True:
+                self._error_if(out, ind, f'not UNIQUE({v})', path, 'uniqueItems', repr('items are not unique'))
+            if isinstance(schema.get('items'), dict):
+                i, y = self._fresh('i'), self._fresh('y')
+                body: List[str] = []
+                self._emit(schema['items'], y, f"{path} + '[' + str({i}) + ']'", body, ind + 1, stack,
+                           where + '/items')
+                if body:
+                    out.append(f"{'    ' * ind}for {i}, {y} in enumerate({v}):")
+                    out.extend(body)
+        elif t == 'string':
+            if 'minLength' in schema:
+                self._error_if(out, ind, f'len({v}) < {_count(schema, "minLength", where)}', path, 'minLength',
+                               repr(f'shorter than {schema["minLength"]} characters'))
+            if 'maxLength' in schema:
+                self._error_if(out, ind, f'len({v}) > {_count(schema, "maxLength", where)}', path, 'maxLength',
+                               repr(f'longer than {schema["maxLength"]} characters'))
+            if 'pattern' in schema:
+                rx = self._const(re.compile(schema['pattern']))
+                self._error_if(out, ind, f'not {rx}.search({v})', path, 'pattern',
+                               f"'value ' + SHORT({v}) + ' does not match ' + {schema['pattern']!r}")
+            fmt = schema.get('format')
+            if fmt in FORMAT_RES:
+                rx = self._const(re.compile(FORMAT_RES[fmt]))
+                self._error_if(out, ind, f'not {rx}.match({v})', path, 'format',
+                               f"'value ' + SHORT({v}) + ' is not a valid {fmt}'")
+        elif t in ('integer', 'number'):
+            for key, op, exclusive_op in (('minimum', '<', '<='), ('maximum', '>', '>=')):
+                if key in schema:
+                    limit = _number(schema, key, where)
+                    exclusive = schema.get('exclusive' + key.capitalize()) is True
+                    self._error_if(out, ind, f'{v} {exclusive_op if exclusive else op} {limit!r}', path, key,
+                                   f"'value ' + SHORT({v}) + ' is {'at or ' if exclusive else ''}"
+                                   f"{'below' if key == 'minimum' else 'above'} {limit}'")
+            for key, op in (('exclusiveMinimum', '<='), ('exclusiveMaximum', '>=')):
+                # a boolean is the OpenAPI 3.0 form, applied to minimum/maximum above
+                if key in schema and not isinstance(schema[key], bool):
+                    limit = _number(schema, key, where)
+                    self._error_if(out, ind, f'{v} {op} {limit!r}', path, key,
+                                   f"'value ' + SHORT({v}) + ' is not strictly within {limit}'")
+            if 'multipleOf' in schema:
+                step = _number(schema, 'multipleOf', where)
+                if step <= 0:
+                    raise SpecError(f'{where}: multipleOf must be greater than 0, got {step}')
+                self._error_if(out, ind, f'not MULTIPLE({v}, {step!r})', path, 'multipleOf',
+                               f"'value ' + SHORT({v}) + ' is not a multiple of {step}'")
+        return out
+
+    def _object_checks(self, schema: Dict[str, Any], v: str, path: str, out: List[str], ind: int,
+                       stack: Tuple[str, ...], where: str) -> None:
+        pad = '    ' * ind
+        props: Dict[str, Any] = schema.get('properties') or {}
+        required = [r for r in schema.get('required') or [] if isinstance(r, str)]
+        for name in list(props) + [r for r in required if r not in props]:
+            y = self._fresh('y')
+            step = '.' + name if _IDENT_RE.fullmatch(name) else '[' + json.dumps(name) + ']'
+            sub_path = f'{path} + {step!r}'
+            body: List[str] = []
+            if name in props:
+                self._emit(props[name], y, sub_path, body, ind + 1, stack, f'{where}/properties/{name}')
+            if name in required:
+                out.append(f'{pad}{y} = {v}.get({name!r}, MISSING)')
+                self._error_if(out, ind, f'{y} is MISSING', path, 'required',
+                               repr(f"missing required property '{name}'"))
+                if body:
+                    out.append(f'{pad}else:')
+                    out.extend(body)
+            elif body:
+                out.append(f'{pad}{y} = {v}.get({name!r}, MISSING)')
+                out.append(f'{pad}if {y} is not MISSING:')
+                out.extend(body)
+        if 'minProperties' in schema:
+            self._error_if(out, ind, f'len({v}) < {_count(schema, "minProperties", where)}', path, 'minProperties',
+                           repr(f'fewer than {schema["minProperties"]} properties'))
+        if 'maxProperties' in schema:
+            self._error_if(out, ind, f'len({v}) > {_count(schema, "maxProperties", where)}', path, 'maxProperties',
+                           repr(f'more than {schema["maxProperties"]} properties'))
+        extra = schema.get('additionalProperties', True)
+        if extra is False or (isinstance(extra, dict) and extra):
+            k, y = self._fresh('k'), self._fresh('y')
+            known = self._const(frozenset(props))
+            out.append(f'{pad}for {k}, {y} in {v}.items():')
+            if extra is False:
+                self._error_if(out, ind + 1, f'{k} not in {known}', path, 'additionalProperties',
+                               f"'unexpected property ' + SHORT({k})")
+            else:
+                body = []
+                self._emit(extra, y, f"{path} + '.' + str({k})", body, ind + 2, stack,
+                           where + '/additionalProperties')
+                out.append(f"{pad}    if {k} not in {known}:")
+                out.extend(body or [f'{pad}        pass'])
+
+    def build(self) -> Tuple[str, Dict[str, Any]]:
+        """(module source, namespace with the definitions executed)."""
+        source = '\n'.join(self.defs)
+        namespace: Dict[str, Any] = {'K': self.consts, 'MISSING': _MISSING, 'NUM': (int, float), 'KIND': _kind,
+                                     'SHORT': _short, 'UNIQUE': _unique, 'MULTIPLE': _multiple,
+                                     'SAME': _same, 'ENUM': _in_enum}
+        exec(compile(source, f'<validators:{self.spec.path.name}>', 'exec'), namespace)
+        return source, namespace
+
+
+# ---------------------------------------------------------------------------
+# Operations and routing
+# ---------------------------------------------------------------------------
+
+class CompiledOp(NamedTuple):
+    key: str
+    responses: Dict[str, Optional[Callable[..., None]]]  # status code / 'NXX' / 'default' -> validator
+
+    def validator_for(self, status: int) -> Tuple[bool, Optional[Callable[..., None]]]:
+        """(documented, validator) for a response status."""
+        code = str(status)
+        for candidate in (code, code[:1] + 'XX', 'default'):
+            if candidate in self.responses:
+                return True, self.responses[candidate]
+        return False, None
+
+
+class Validators(NamedTuple):
+    ops: List[CompiledOp]
+    static: Dict[Tuple[str, str], CompiledOp]                    # (METHOD, path) without parameters
+    templated: Dict[str, List[Tuple[Pattern[str], CompiledOp]]]  # METHOD -> path regexes
+    bases: Tuple[str, ...]                                       # server bases, for ?rest_route=
+    sources: List[str]
+    warnings: List[str]
+
+
+def compile_validators(spec_paths: Tuple[str, ...], match: Optional[str]) -> Validators:
+    rx = re.compile(match) if match else None
+    ops: List[CompiledOp] = []
+    static: Dict[Tuple[str, str], CompiledOp] = {}
+    templated: Dict[str, List[Tuple[Pattern[str], CompiledOp]]] = {}
+    sources: List[str] = []
+    warnings: List[str] = []
+    bases: List[str] = []
+    for spec_path in spec_paths:
+        spec = load_spec(Path(spec_path))
+        bases.append(spec.base)
+        compiler = SchemaCompiler(spec)
+        names: List[Tuple[Operation, Dict[str, Optional[str]]]] = []
+        for n, op in enumerate(operations(spec, warnings)):
+            if rx is not None and not rx.search(op.key):
+                continue
+            fns: Dict[str, Optional[str]] = {}
+            for code, schema in op.responses:
+                if schema is None:
+                    fns[code] = None
+                    continue
+                fns[code] = f"op{n}_{code if code.isalnum() else 'x'}"
+                compiler.function(schema, fns[code], f'{op.key} {code}')
+            names.append((op, fns))
+        source, namespace = compiler.build()
+        sources.append(f'# {spec.path}\n{source}')
+        warnings.extend(dict.fromkeys(compiler.warnings))
+        for op, fns in names:
+            compiled = CompiledOp(op.key, {code: namespace[fn] if fn else None for code, fn in fns.items()})
+            ops.append(compiled)
+            if '{' in op.path:
+                templated.setdefault(op.method, []).append((path_regex(spec, op.path), compiled))
+            else:
+                static.setdefault((op.method, spec.base + op.path), compiled)
+    return Validators(ops, static, templated, tuple(dict.fromkeys(bases)), sources, warnings)
+
+
+def request_path(target: str, bases: Tuple[str, ...]) -> str:
+    """Path of a captured request target (URL or path), with ?rest_route= turned into a pretty path."""
+    parts = urlsplit(target)
+    path = unquote(parts.path) or '/'
+    if parts.query and 'rest_route=' in parts.query:
+        route = parse_qs(parts.query).get('rest_route')
+        if route:
+            path = (bases[0] if bases else '') + '/' + route[0].lstrip('/')
+    return path.rstrip('/') or '/'
+
+
+class Router:
+    def __init__(self, validators: Validators):
+        self.v = validators
+        self.cache: Dict[Tuple[str, str], Optional[CompiledOp]] = {}
+
+    def find(self, method: str, target: str) -> Optional[CompiledOp]:
+        key = (method, target)
+        try:
+            return self.cache[key]
+        except KeyError:
+            pass
+        path = request_path(target, self.v.bases)
+        op = self.v.static.get((method, path))
+        if op is None:
+            for rx, candidate in self.v.templated.get(method, ()):
+                if rx.fullmatch(path):
+                    op = candidate
+                    break
+        if len(self.cache) >= ROUTE_CACHE_SIZE:
+            self.cache.clear()
+        self.cache[key] = op
+        return op
+
+
+# ---------------------------------------------------------------------------
+# Streaming validation
+# ---------------------------------------------------------------------------
+
+# (operation key, status, path with indices as [], keyword)
+Group = Tuple[str, str, str, str]
+
+
+class Job(NamedTuple):
+    index: int
+    path: str         # capture file ('-' = stdin)
+    start: int
+    end: int
+    specs: Tuple[str, ...]
+    match: Optional[str]
+    samples: int
+
+
+class ChunkResult(NamedTuple):
+    lines: int
+    bytes: int
+    counts: Dict[str, int]                   # records, valid, invalid, no-schema, unmatched, malformed
+    per_op: Dict[str, List[int]]             # op key -> [records, invalid]
+    groups: Dict[Group, int]                 # -> violations
+    samples: Dict[Group, List[Tuple[int, str, str]]]  # -> [(line in chunk, path, message)]
+    unmatched: Dict[str, int]                # 'METHOD /path' -> records ('...' = the rest)
+
+
+_VALIDATORS: Dict[Tuple[Tuple[str, ...], Optional[str]], Validators] = {}
+
+
+def get_validators(specs: Tuple[str, ...], match: Optional[str]) -> Validators:
+    """Compiled once per process (worker processes compile their own copy on first use)."""
+    key = (specs, match)
+    if key not in _VALIDATORS:
+        _VALIDATORS[key] = compile_validators(specs, match)
+    return _VALIDATORS[key]
+
+
+def _record_fields(rec: Any) -> Optional[Tuple[str, str, int, bool, Any]]:
+    """(method, target, status, has body, body) of a capture record, or None if it is not one."""
+    if not isinstance(rec, dict):
+        return None
+    req = rec['request'] if isinstance(rec.get('request'), dict) else rec
+    resp = rec['response'] if isinstance(rec.get('response'), dict) else rec
+    method = req.get('method')
+    target = req.get('path') or req.get('url') or req.get('uri')
+    status = resp.get('status')
+    if not isinstance(method, str) or not isinstance(target, str) or type(status) is not int:
+        return None
+    return method.upper(), target, status, 'body' in resp, resp.get('body')
+
+
+def validate_stream(fh: BinaryIO, limit: Optional[int], validators: Validators, samples: int) -> ChunkResult:
+    """Validate the records in the next `limit` bytes of `fh` (all of it when None)."""
+    router = Router(validators)
+    counts = dict.fromkeys(('records', 'valid', 'invalid', 'no-schema', 'unmatched', 'malformed'), 0)
+    per_op: Dict[str, List[int]] = {}
+    groups: Dict[Group, int] = {}
+    kept: Dict[Group, List[Tuple[int, str, str]]] = {}
+    unmatched: Dict[str, int] = {}
+    line = consumed = 0
+
+    def violation(op_key: str, status: Any, path: str, keyword: str, message: str) -> None:
+        group = (op_key, str(status), _INDEX_RE.sub('[]', path), keyword)
+        groups[group] = groups.get(group, 0) + 1
+        examples = kept.setdefault(group, [])
+        if len(examples) < samples:
+            examples.append((line, path, message))
+
+    for raw in fh:
+        line += 1
+        consumed += len(raw)
+        if not raw.isspace():
+            try:
+                fields = _record_fields(_loads(raw))
+            except ValueError:
+                fields = None
+            if fields is None:
+                counts['malformed'] += 1
+                violation('-', '-', '$', 'record', 'not a JSON capture record (method, path/url, status)')
+            else:
+                method, target, status, has_body, body = fields
+                counts['records'] += 1
+                op = router.find(method, target)
+                if op is None:
+                    counts['unmatched'] += 1
+                    key = f'{method} {request_path(target, validators.bases)}'
+                    if key not in unmatched and len(unmatched) >= MAX_UNMATCHED_KEYS:
+                        key = '...'
+                    unmatched[key] = unmatched.get(key, 0) + 1
+                else:
+                    stats = per_op.get(op.key)
+                    if stats is None:
+                        stats = per_op[op.key] = [0, 0]
+                    stats[0] += 1
+                    documented, check = op.validator_for(status)
+                    errors: List[Tuple[str, str, str]] = []
+                    if not documented:
+                        errors.append(('$', 'status', f'status {status} is not documented'))
+                    elif check is None:
+                        counts['no-schema'] += 1
+                    elif not has_body:
+                        errors.append(('$', 'body', 'no response body captured'))
+                    else:
+                        if isinstance(body, str):
+                            try:
+                                body = _loads(body)
+                            except ValueError:
+                                errors.append(('$', 'json', 'response body is not JSON'))
+                                check = None
+                        if check is not None:
+                            check(body, errors)
+                    if errors:
+                        counts['invalid'] += 1
+                        stats[1] += 1
+                        for path, keyword, message in errors[:MAX_ERRORS_PER_RECORD]:
+                            violation(op.key, status, path, keyword, message)
+                    elif documented and check is not None:
+                        counts['valid'] += 1
+        if limit is not None and consumed >= limit:
+            break
+    return ChunkResult(line, consumed, counts, per_op, groups, kept, unmatched)
+
+
+def process_chunk(job: Job) -> ChunkResult:
+    validators = get_validators(job.specs, job.match)
+    with open(job.path, 'rb') as fh:
+        fh.seek(job.start)
+        return validate_stream(fh, job.end - job.start, validators, job.samples)
+
+
+def chunk_bounds(path: Path, chunk_bytes: int) -> List[Tuple[int, int]]:
+    """Contiguous [start, end) ranges of about chunk_bytes that end on line boundaries."""
+    size = path.stat().st_size
+    bounds: List[Tuple[int, int]] = []
+    with open(path, 'rb') as fh:
+        pos = 0
+        while pos < size:
+            fh.seek(min(size, pos + chunk_bytes))
+            fh.readline()
+            end = min(size, fh.tell()) if pos + chunk_bytes < size else size
+            bounds.append((pos, end))
+            pos = end
+    return bounds
+
+
+class Report:
+    """Merges chunk results; samples get absolute line numbers once every chunk is in."""
+
+    def __init__(self, samples: int):
+        self.samples = samples
+        self.lines = self.bytes = 0
+        self.counts: Dict[str, int] = {}
+        self.per_op: Dict[str, List[int]] = {}
+        self.groups: Dict[Group, int] = {}
+        self.unmatched: Dict[str, int] = {}
+        self._chunks: Dict[int, Tuple[int, Dict[Group, List[Tuple[int, str, str]]]]] = {}
+
+    def add(self, index: int, res: ChunkResult) -> None:
+        self.lines += res.lines
+        self.bytes += res.bytes
+        for table, update in ((self.counts, res.counts), (self.groups, res.groups), (self.unmatched, res.unmatched)):
+            for k, n in update.items():
+                table[k] = table.get(k, 0) + n
+        for k, (records, invalid) in res.per_op.items():
+            stats = self.per_op.setdefault(k, [0, 0])
+            stats[0] += records
+            stats[1] += invalid
+        self._chunks[index] = (res.lines, res.samples)
+
+    def examples(self) -> Dict[Group, List[Dict[str, Any]]]:
+        out: Dict[Group, List[Dict[str, Any]]] = {}
+        base = 0
+        for index in sorted(self._chunks):
+            lines, samples = self._chunks[index]
+            for group, items in samples.items():
+                kept = out.setdefault(group, [])
+                for line, path, message in items:
+                    if len(kept) < self.samples:
+                        kept.append({'line': base + line, 'path': path, 'message': message})
+            base += lines
+        return out
+
+    def to_dict(self, elapsed: float, jobs: int, chunks: int) -> Dict[str, Any]:
+        examples = self.examples()
+        return {
+            'lines': self.lines, 'bytes': self.bytes, 'seconds': round(elapsed, 3),
+            'records_per_second': round(self.counts.get('records', 0) / elapsed, 1) if elapsed > 0 else None,
+            'jobs': jobs, 'chunks': chunks, 'json': JSON_BACKEND,
+            'counts': self.counts,
+            'operations': {k: {'records': r, 'invalid': i} for k, (r, i) in sorted(self.per_op.items())},
+            'violations': [dict(zip(('operation', 'status', 'path', 'keyword'), group), count=n,
+                                examples=examples.get(group, []))
+                           for group, n in sorted(self.groups.items(), key=lambda kv: (-kv[1], kv[0]))],
+            'unmatched': dict(sorted(self.unmatched.items(), key=lambda kv: -kv[1])),
+        }
+
+
+def print_report(doc: Dict[str, Any], top: int, elapsed: float) -> None:
+    """Print `doc` (Report.to_dict); rates use the unrounded `elapsed` seconds."""
+    c = doc['counts']
+    mb = doc['bytes'] / 1e6
+    rates = f"{c.get('records', 0) / elapsed:,.0f} records/s, {mb / elapsed:.1f} MB/s" if elapsed > 0 else 'n/a'
+    print(f"Validated {c.get('records', 0)} record(s), {mb:.1f} MB in {doc['seconds']:.2f}s: {rates} "
+          f"[{doc['chunks']} chunk(s), {doc['jobs']} job(s), {doc['json']}]")
+    print(f"  valid {c.get('valid', 0)}, invalid {c.get('invalid', 0)}, no schema {c.get('no-schema', 0)}, "
+          f"unmatched {c.get('unmatched', 0)}, malformed lines {c.get('malformed', 0)}")
+    if doc['operations']:
+        print(f"\n{'operation':<64} {'records':>9} {'invalid':>9}")
+        for key, s in doc['operations'].items():
+            print(f"{key[:64]:<64} {s['records']:>9} {s['invalid']:>9}")
+    if doc['violations']:
+        print(f"\nViolations ({len(doc['violations'])} group(s)):")
+        for v in doc['violations'][:top]:
+            ex = v['examples'][0] if v['examples'] else None
+            lines = ', '.join(str(e['line']) for e in v['examples'])
+            print(f"  {v['count']:>8}  {v['operation']} {v['status']} {v['path']} [{v['keyword']}]")
+            if ex is not None:
+                print(f"            {ex['message']} (line {lines})")
+        if len(doc['violations']) > top:
+            print(f"  ... {len(doc['violations']) - top} more group(s) (see --output)")
+    if doc['unmatched']:
+        print('\nUnmatched requests (not in the spec):')
+        for key, n in list(doc['unmatched'].items())[:10]:
+            print(f'  {n:>8}  {key}')
+
+
+# ---------------------------------------------------------------------------
+# Synthetic captures
+# ---------------------------------------------------------------------------
+
+def _corrupt(body: Any, rng: random.Random) -> Any:
+    """Turn one integer in `body` into a string (the usual PHP/MySQL drift), or replace the body."""
+    stack = [body]
+    while stack:
+        node = stack.pop()
+        items = list(node.items()) if isinstance(node, dict) else list(enumerate(node)) if isinstance(node, list) else []
+        for k, value in items:
+            if type(value) is int:
+                node[k] = str(value)
+                return body
+            stack.append(value)
+    return [] if isinstance(body, dict) else {'unexpected': True}
+
+
+def synthesize(path: str, n: int, spec_paths: Tuple[str, ...], match: Optional[str], corrupt: float,
+               seed: int) -> int:
+    rng = random.Random(seed)
+    rx = re.compile(match) if match else None
+    ops = [op for p in spec_paths for op in operations(load_spec(Path(p)))
+           if rx is None or rx.search(op.key)]
+    if not ops:
+        raise SpecError('no operations match --match')
+    out = sys.stdout if path == '-' else open(path, 'w', encoding='utf-8')
+    try:
+        for _ in range(n):
+            op = rng.choice(ops)
+            values = {name: rng.randint(1, 9999) for name in re.findall(r'\{([^}/]+)\}', op.path)}
+            body = example_value(op.spec, op.response, rng) if op.response else None
+            if isinstance(body, dict) and isinstance(body.get('data'), list) and body['data']:
+                body['data'] = body['data'] * rng.randint(1, 25)
+                body = json.loads(json.dumps(body))  # independent copies of the repeated item
+            if op.response and rng.random() < corrupt:
+                body = _corrupt(body, rng)
+            rec: Dict[str, Any] = {'method': op.method, 'path': op.spec.base + fill_path(op.path, values),
+                                   'status': op.status}
+            if op.response:
+                rec['body'] = body
+            out.write(json.dumps(rec, separators=(',', ':')) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return len(ops)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('capture', nargs='?', help="JSONL capture ('-' = stdin)")
+    ap.add_argument('--spec', action='append', help='OpenAPI document(s) (default: includes/REST/new.yaml)')
+    ap.add_argument('--match', help="Only operations whose 'METHOD /path' matches this regex")
+    add_jobs_argument(ap)
+    ap.add_argument('--chunk-mb', type=int, default=DEFAULT_CHUNK_MB, help='Bytes per work unit, in MB (default: 8)')
+    ap.add_argument('--samples', type=int, default=3, help='Example lines kept per violation group (default: 3)')
+    ap.add_argument('--top', type=int, default=20, help='Violation groups printed (default: 20)')
+    ap.add_argument('--output', help='Write the full report as JSON to this file')
+    ap.add_argument('--synthesize', type=int, metavar='N', help='Write N synthetic records to CAPTURE and exit')
+    ap.add_argument('--corrupt', type=float, default=0.0, help='With --synthesize: fraction of invalid records')
+    ap.add_argument('--seed', type=int, default=1, help='With --synthesize: random seed (default: 1)')
+    ap.add_argument('--emit-code', action='store_true', help='Print the generated validator source and exit')
+    add_profile_arguments(ap)
+    args = ap.parse_args(argv if argv is not None else [])
+    if args.capture is None and not args.emit_code:
+        ap.error('a capture file is required (or --emit-code)')
+    if args.chunk_mb < 1 or args.samples < 0:
+        ap.error('--chunk-mb must be at least 1 and --samples not negative')
+    with profile_session(args, 'validate_responses'):
+        return run(args)
+
+
+def run(args: argparse.Namespace) -> int:
+    specs = tuple(args.spec or [str(DEFAULT_SPEC)])
+    if args.synthesize is not None:
+        try:
+            with phase('synthesize'):
+                n_ops = synthesize(args.capture, args.synthesize, specs, args.match, args.corrupt, args.seed)
+        except (SpecError, OSError) as exc:
+            print(f'[ERR] {exc}', file=sys.stderr)
+            return 1
+        print(f'Wrote {args.synthesize} record(s) over {n_ops} operation(s) to {args.capture}', file=sys.stderr)
+        return 0
+
+    try:
+        with phase('compile'):
+            validators = get_validators(specs, args.match)
+    except (SpecError, re.error) as exc:
+        print(f'[ERR] {exc}', file=sys.stderr)
+        return 1
+    for w in validators.warnings:
+        print(f'[WARN] {w}', file=sys.stderr)
+    if args.emit_code:
+        print('\n'.join(validators.sources))
+        return 0
+    if not validators.ops:
+        print('[ERR] no operations match --match', file=sys.stderr)
+        return 1
+
+    report = Report(args.samples)
+    n_jobs = resolve_jobs(args.jobs)
+    t0 = time.perf_counter()
+    with phase('validate'):
+        try:
+            if args.capture == '-':
+                n_jobs, n_chunks = 1, 1
+                report.add(0, validate_stream(sys.stdin.buffer, None, validators, args.samples))
+            else:
+                src = Path(args.capture)
+                bounds = chunk_bounds(src, args.chunk_mb * 1024 * 1024)
+                n_chunks = len(bounds)
+                jobs = [Job(i, str(src), s, e, specs, args.match, args.samples) for i, (s, e) in enumerate(bounds)]
+                if n_jobs <= 1 or len(jobs) <= 1:
+                    n_jobs = 1
+                    for job in jobs:
+                        report.add(job.index, process_chunk(job))
+                else:
+                    executor = get_executor(n_jobs)
+                    futures = {executor.submit(process_chunk, job): job for job in jobs}
+                    for fut in as_completed(futures):
+                        report.add(futures[fut].index, fut.result())
+        except OSError as exc:
+            print(f'[ERR] {exc}', file=sys.stderr)
+            return 1
+        except KeyboardInterrupt:
+            print('\n[WARN] interrupted', file=sys.stderr)
+            return 1
+    elapsed = time.perf_counter() - t0
+
+    doc = report.to_dict(elapsed, n_jobs, n_chunks)
+    print_report(doc, args.top, elapsed)
+    if args.output:
+        out = Path(args.output)
+        try:
+            out.parent.mkdir(parents=True, exist_ok=True)
+            out.write_text(json.dumps(doc, indent=2) + '\n', encoding='utf-8')
+        except OSError as exc:
+            print(f'[ERR] Cannot write {out}: {exc}', file=sys.stderr)
+            return 1
+        print(f'Report saved to {out}')
+    return 1 if doc['counts'].get('invalid') or doc['counts'].get('malformed') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+ProfessionalDevelopment_encrypt()/decrypt() (includes/functions.php) in Python,
+shared by the key derivation check (tools/test_encryption_key_derivation.py)
+and the re-encryption tool (tools/reencrypt_values.py).
+
+The stored format is
+
+  base64( IV[16] . base64( AES-256-CBC(PKCS#7, key, IV, plaintext) ) )
+
+AES comes from the `cryptography` package, or from the `openssl enc` command
+when the package is not installed (one process per value: fine for the
+checks and for the few credential rows per blog, but install `cryptography`
+for large dumps; the command line also shows keys to other local users in
+`ps`). With neither, the functions raise CryptoUnavailable.
+
+Usage:
+  from value_crypto import LEGACY_KEY, derive_key, decrypt_value
+  plain = decrypt_value(stored, derive_key(salt, site_url))
+"""
+
+from __future__ import annotations
+import base64
+import binascii
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+from typing import List, Optional, Tuple
+
+from php_lexer import parse_php
+
+try:  # optional, much faster than the openssl command
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+except ImportError:  # pragma: no cover - depends on the environment
+    Cipher = None
+
+
+# The hard-coded key of older releases; decrypt() still falls back to it
+LEGACY_KEY = 'hT4vaqdf3FLZePEyMfNbNn1M4SJf7Smm'
+KEY_SUFFIX = '|Professional_Development'
+
+OPENSSL = shutil.which('openssl')
+BACKEND = 'cryptography' if Cipher is not None else ('openssl' if OPENSSL else None)
+
+
+class CryptoUnavailable(RuntimeError):
+    pass
+
+
+def _aes_cbc(key: bytes, iv: bytes, data: bytes, decrypt: bool) -> bytes:
+    """Unpadded AES-256-CBC over whole blocks."""
+    if Cipher is not None:
+        cipher = Cipher(algorithms.AES(key), modes.CBC(iv))
+        ctx = cipher.decryptor() if decrypt else cipher.encryptor()
+        return ctx.update(data) + ctx.finalize()
+    if OPENSSL is None:
+        raise CryptoUnavailable('AES needs the cryptography package or the openssl command')
+    argv = [OPENSSL, 'enc', '-aes-256-cbc', '-nopad', '-K', key.hex(), '-iv', iv.hex()]
+    proc = subprocess.run(argv + (['-d'] if decrypt else []), input=data, capture_output=True)
+    if proc.returncode != 0:
+        raise CryptoUnavailable(f"openssl enc failed: {proc.stderr.decode('utf-8', 'replace').strip()}")
+    return proc.stdout
+
+
+def openssl_key(key: bytes) -> bytes:
+    """The 32 key bytes OpenSSL uses for AES-256 (shorter keys are NUL-padded, longer ones cut)."""
+    return key[:32].ljust(32, b'\0')
+
+
+def cbc_encrypt(key: bytes, iv: bytes, plain: bytes) -> bytes:
+    pad = 16 - len(plain) % 16
+    return _aes_cbc(openssl_key(key), iv, plain + bytes([pad]) * pad, decrypt=False)
+
+
+def cbc_decrypt(key: bytes, iv: bytes, data: bytes) -> Optional[bytes]:
+    """Plaintext, or None when the length or PKCS#7 padding is invalid (openssl_decrypt() === false)."""
+    if not data or len(data) % 16:
+        return None
+    plain = _aes_cbc(openssl_key(key), iv, data, decrypt=True)
+    pad = plain[-1]
+    if not 1 <= pad <= 16 or plain[-pad:] != bytes([pad]) * pad:
+        return None
+    return plain[:-pad]
+
+
+_B64_JUNK = re.compile(rb'[^A-Za-z0-9+/]')
+
+
+def php_base64_decode(value: bytes) -> Optional[bytes]:
+    """base64_decode() in non-strict mode: characters outside the alphabet are skipped."""
+    data = _B64_JUNK.sub(b'', value.split(b'=', 1)[0])
+    if len(data) % 4 == 1:
+        return None
+    try:
+        return base64.b64decode(data + b'=' * (-len(data) % 4))
+    except binascii.Error:
+        return None
+
+
+def derive_key(salt: str, site_url: str) -> bytes:
+    """ProfessionalDevelopment_derive_key() without PS_ENCRYPTION_KEY."""
+    return hashlib.sha256(f'{salt}|{site_url}{KEY_SUFFIX}'.encode('utf-8')).digest()
+
+
+def encrypt_value(plain: bytes, key: bytes, iv: Optional[bytes] = None) -> bytes:
+    """ProfessionalDevelopment_encrypt()."""
+    iv = os.urandom(16) if iv is None else iv
+    return base64.b64encode(iv + base64.b64encode(cbc_encrypt(key, iv, plain)))
+
+
+def _split_value(value: bytes) -> Optional[Tuple[bytes, bytes]]:
+    data = php_base64_decode(value)
+    if data is None or len(data) <= 16:
+        return None
+    ct = php_base64_decode(data[16:])
+    if ct is None:
+        return None
+    return data[:16], ct
+
+
+def decrypt_value(value: bytes, key: bytes) -> Optional[bytes]:
+    """ProfessionalDevelopment_decrypt(): the derived key first, then the legacy key."""
+    parts = _split_value(value)
+    if parts is None:
+        return None
+    iv, ct = parts
+    plain = cbc_decrypt(key, iv, ct)
+    return plain if plain is not None else cbc_decrypt(LEGACY_KEY.encode('ascii'), iv, ct)
+
+
+def _printable(data: bytes) -> bool:
+    try:
+        text = data.decode('utf-8')
+    except UnicodeDecodeError:
+        return False
+    return text.isprintable()
+
+
+def migrate_value(value: bytes, key: bytes) -> Tuple[str, Optional[bytes]]:
+    """(status, new value or None). Status is one of
+
+    current          decrypts with `key` (what decrypt() would use; left as is)
+    migrated         needs the legacy key; re-encrypted with `key`. This includes
+                     values where `key` only "works" by a 1-in-256 padding
+                     accident and yields binary instead of the legacy text
+                     (decrypt() returns that garbage today)
+    undecryptable    neither key works
+    not-encrypted    not in the stored format at all
+    roundtrip-failed the new value did not decrypt back to the plaintext
+    """
+    parts = _split_value(value)
+    if parts is None or not parts[1] or len(parts[1]) % 16:
+        return 'not-encrypted', None
+    iv, ct = parts
+    current = cbc_decrypt(key, iv, ct)
+    if current is not None and _printable(current):
+        return 'current', None
+    legacy = cbc_decrypt(LEGACY_KEY.encode('ascii'), iv, ct)
+    if legacy is None or (current is not None and not _printable(legacy)):
+        return ('current' if current is not None else 'undecryptable'), None
+    new = encrypt_value(legacy, key)
+    if decrypt_value(new, key) != legacy or _split_value(new) is None:
+        return 'roundtrip-failed', None
+    return 'migrated', new
+
+
+# ProfessionalDevelopment_encrypt() output for IV 00..0f, produced with `openssl enc -aes-256-cbc`
+_LEGACY_SAMPLE = (b'db.example.org', b'AAECAwQFBgcICQoLDA0OD1FjK2tYOXFIaXhjMWFlOWRZa3UwVkE9PQ==')
+_DERIVED_SAMPLE = ('salt', 'https://example.org', b's3cret-pass!',
+                   b'AAECAwQFBgcICQoLDA0OD0dLMjBTeEIrbU9mK25FM0xUOXRLT3c9PQ==')
+
+
+def round_trip_errors(php_text: str) -> List[str]:
+    """Check this module against ProfessionalDevelopment_* in `php_text` (includes/functions.php).
+    Without an AES backend (BACKEND is None) only the static checks run."""
+    errors: List[str] = []
+    php = parse_php(php_text)
+    derive = php.function('ProfessionalDevelopment_derive_key')
+    decrypt = php.function('ProfessionalDevelopment_decrypt')
+    if derive is not None:
+        code = php.code(derive)
+        if not re.search(r"\$salt\s*\.\s*'\|'\s*\.\s*\$site\s*\.\s*'" + re.escape(KEY_SUFFIX) + "'", code):
+            errors.append(f"derive_key material is no longer $salt . '|' . $site . '{KEY_SUFFIX}'")
+        if not re.search(r"hash\(\s*'sha256'\s*,\s*\$material\s*,\s*true\s*\)", code):
+            errors.append("derive_key no longer returns hash('sha256', $material, true)")
+    if decrypt is not None and LEGACY_KEY not in php.code(decrypt):
+        errors.append('decrypt() legacy key differs from the one the re-encryption tool uses')
+    if BACKEND is None:
+        return errors  # the stored-format checks need AES; callers report the skip
+
+    key, iv = bytes(range(32)), bytes(range(16))
+    if cbc_decrypt(key, iv, cbc_encrypt(key, iv, b'x' * 33)) != b'x' * 33:
+        errors.append('AES-256-CBC round trip failed')
+    if encrypt_value(_LEGACY_SAMPLE[0], LEGACY_KEY.encode('ascii'), iv) != _LEGACY_SAMPLE[1]:
+        errors.append('encrypt() storage format differs from the openssl reference value')
+    salt, site, secret, stored = _DERIVED_SAMPLE
+    derived = derive_key(salt, site)
+    if decrypt_value(stored, derived) != secret:
+        errors.append('derived-key reference value does not decrypt')
+
+    # legacy -> derived -> decrypt() as PHP would, plus idempotence
+    status, new = migrate_value(_LEGACY_SAMPLE[1], derived)
+    if status != 'migrated' or new is None or decrypt_value(new, derived) != _LEGACY_SAMPLE[0]:
+        errors.append(f'legacy value did not round-trip to the derived key ({status})')
+    elif migrate_value(new, derived)[0] != 'current':
+        errors.append('re-encrypted value is not recognised as current')
+    if migrate_value(stored, derived)[0] != 'current':
+        errors.append('derived-key value is not recognised as current')
+    if migrate_value(_LEGACY_SAMPLE[1], derive_key(salt, 'http://example.org'))[0] != 'migrated':
+        errors.append('legacy value is not migrated for another site URL')
+    if migrate_value(b'plain text', derived)[0] != 'not-encrypted':
+        errors.append('unencrypted value is not reported as such')
+    return errors
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Watch mode for the AJAX nonce, encryption key derivation and terminology
+checks: one long-running process that re-checks the plugin tree on every save.
+
+The tree index (tools/repo_index.py), the compiled keyword matcher, the
+per-file facts of the nonce check and the parsed PHP/JS structures stay in
+memory between runs. The tree is polled every --interval seconds by size and
+mtime (a stat per file, no reads); after a change only the affected checks
+run, on only the affected files:
+
+  nonce check        when a PHP or JS file changed: the hooks whose
+                     registration, callback or JS usage is in a changed file
+                     (the whole check when a PHP or JS file was deleted)
+  encryption check   when includes/functions.php changed
+  terminology scan   the changed files, added to the hits kept for the others
+
+Each run prints the checks' usual output, then one status line with every
+check's last result and the time since the save.
+
+Per-file results are served from the result cache (tools/result_cache.py)
+at start-up. New ones are kept in memory while watching and written to the
+cache on a clean shutdown (Ctrl-C or SIGTERM), so the next `make check` or
+watch session starts from them. Restart the watcher after editing tools/.
+
+Usage:
+  python3 tools/watch_checks.py [--interval 0.2] [--expected N] [-e EXTS] [--jobs N]
+                                [--root DIR] [--no-cache] [--cache PATH] [--profile [PATH]]
+
+Options:
+  --interval S          Seconds between polls (default: 0.2)
+  --expected N          Expected terminology matches, as in scan_bad_keywords.py
+  -e EXTS, --only-ext   Extensions the terminology scan covers (default: all but .py)
+  --jobs N              Worker processes for the first full run
+  --root DIR, -r DIR    Plugin root (default: repo root)
+  --no-cache            Neither read nor write the result cache
+  --cache PATH          Result cache file (default: .tools-cache/results.sqlite)
+  --profile [PATH]      Per-phase timings as JSON on exit (see tools/tool_profile.py)
+
+Exit code: 0 after a clean shutdown; 1 if the root cannot be read.
+"""
+
+from __future__ import annotations
+import argparse
+import signal
+import sys
+import time
+import traceback
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import check_ajax_nonces
+import scan_bad_keywords
+import test_encryption_key_derivation
+from repo_index import DEFAULT_IGNORES, IndexedFile, RepoIndex, filter_files, get_index
+from result_cache import ResultCache, add_cache_arguments, cached_map_chunks, close_caches, fingerprint, open_cache
+from tool_pool import add_jobs_argument
+from tool_profile import add_profile_arguments, phase, profile_session
+
+
+PLUGIN_ROOT = Path(__file__).resolve().parents[1]
+ENCRYPTION_FILE = 'includes/functions.php'
+CODE_SUFFIXES = ('.php', '.js')    # files the nonce check reads
+# after a change is seen, poll again this long before running, so the several
+# writes of one save (temp file, rename, touch) are checked once
+SETTLE_SECONDS = 0.05
+
+
+class Watcher:
+    def __init__(self, root: Path, cache: Optional[ResultCache], expected: Optional[int],
+                 only_ext: Optional[Set[str]], jobs: int):
+        self.root = root
+        self.cache = cache
+        self.expected = expected
+        self.only_ext = only_ext
+        self.jobs = jobs
+        self.index: RepoIndex = get_index(root)
+        self.patterns = tuple(scan_bad_keywords.DEFAULT_PATTERNS)
+        self.scan_version = fingerprint(scan_bad_keywords.SCAN_CACHE_VERSION, list(self.patterns), False)
+        self.hits: Dict[Path, List[Tuple[int, str, str]]] = {}  # terminology hits of every scanned file
+        self.status: Dict[str, str] = {}  # check -> 'ok' / 'FAIL' / 'ERR'
+
+    def scan_targets(self, files: List[IndexedFile]) -> List[IndexedFile]:
+        """The files among `files` the terminology scan covers (as scan_bad_keywords.iter_files)."""
+        return filter_files(files, self.only_ext or None, DEFAULT_IGNORES,
+                            None if self.only_ext else scan_bad_keywords.DEFAULT_SKIP_EXTS)
+
+    def _run(self, name: str, check: Callable[[], int]) -> None:
+        try:
+            rc = check()
+        except Exception:  # a half-saved file must not stop the watcher
+            traceback.print_exc()
+            self.status[name] = 'ERR'
+            return
+        self.status[name] = 'FAIL' if rc else 'ok'
+
+    def check_nonces(self, changed: Optional[Set[Path]]) -> None:
+        php_files = self.index.files(('.php',))
+        js_files = self.index.files(('.js',))
+        self._run('nonces', lambda: check_ajax_nonces.check(php_files, js_files, changed, self.jobs, self.cache))
+
+    def check_encryption(self) -> None:
+        def check() -> int:
+            f = self.index.get(self.root / ENCRYPTION_FILE)
+            if f is None:
+                print(f'[ERR] {ENCRYPTION_FILE} not found', file=sys.stderr)
+                return 1
+            return test_encryption_key_derivation.check_file(f)
+        self._run('encryption', check)
+
+    def scan_terms(self, files: List[IndexedFile], removed: List[IndexedFile], listed: bool = True) -> None:
+        """Scan `files` and drop the hits of `removed`; `listed` prints the hits found in `files`."""
+        def check() -> int:
+            for f in removed:
+                self.hits.pop(f.path, None)
+            results = cached_map_chunks(self.cache, 'scan_bad_keywords', self.scan_version,
+                                        scan_bad_keywords.scan_files, files, self.patterns, False, jobs=self.jobs)
+            for f, hits in zip(files, results):
+                self.hits[f.path] = hits
+                for line_no, _, line in (hits if listed else ()):
+                    print(f'{f.path}:{line_no}: {line}')
+            found = sum(len(h) for h in self.hits.values())
+            if self.expected is not None:
+                ok = found == self.expected
+                print(f"Terminology scan: found {found}, expected {self.expected} ({'PASS' if ok else 'FAIL'})")
+                return 0 if ok else 1
+            print(f'Terminology scan: found {found} matches' if found else 'Terminology scan: no matches found')
+            return 1 if found else 0
+        self._run('terminology', check)
+
+    def full_run(self) -> None:
+        with phase('initial'):
+            print('Running AJAX nonce checks...')
+            self.check_nonces(None)
+            print('Running encryption key derivation checks...')
+            self.check_encryption()
+            print('Running terminology scan...')
+            self.scan_terms(self.scan_targets(self.index.files()), [], listed=False)
+
+    def affected(self, changed: List[IndexedFile], removed: List[IndexedFile]) -> bool:
+        """Whether any check covers one of the changed or removed files."""
+        files = changed + removed
+        return (any(f.suffix in CODE_SUFFIXES for f in files) or bool(self.scan_targets(files))
+                or any(f.rel == ENCRYPTION_FILE for f in files))
+
+    def recheck(self, changed: List[IndexedFile], removed: List[IndexedFile]) -> None:
+        with phase('recheck'):
+            paths = {f.path for f in changed} | {f.path for f in removed}
+            check_ajax_nonces.forget(paths)
+            if any(f.suffix in CODE_SUFFIXES for f in removed):
+                self.check_nonces(None)
+            elif any(f.suffix in CODE_SUFFIXES for f in changed):
+                self.check_nonces({f.path for f in changed})
+            if (self.root / ENCRYPTION_FILE) in paths:
+                self.check_encryption()
+            targets = self.scan_targets(changed)
+            if targets or self.scan_targets(removed):
+                self.scan_terms(targets, removed)
+
+    def status_line(self) -> str:
+        return '  '.join(f'{name}: {self.status[name]}' for name in ('nonces', 'encryption', 'terminology')
+                         if name in self.status)
+
+    def poll(self) -> Tuple[List[IndexedFile], List[IndexedFile]]:
+        """(changed, removed) entries since the last poll, settled over SETTLE_SECONDS."""
+        with phase('poll'):
+            changed, removed = self.index.refresh()
+            if not (changed or removed):
+                return changed, removed
+            time.sleep(SETTLE_SECONDS)
+            more_changed, more_removed = self.index.refresh()
+        by_path = {f.path: f for f in changed}
+        gone = {f.path: f for f in removed}
+        for f in more_changed:
+            by_path[f.path] = f
+            gone.pop(f.path, None)
+        for f in more_removed:
+            gone[f.path] = f
+            by_path.pop(f.path, None)
+        return list(by_path.values()), list(gone.values())
+
+    def watch(self, interval: float) -> None:
+        while True:
+            time.sleep(interval)
+            changed, removed = self.poll()
+            if not self.affected(changed, removed):
+                continue
+            started = time.perf_counter()
+            names = [f.rel for f in changed] + [f'{f.rel} (deleted)' for f in removed]
+            more = f' (+{len(names) - 1} more)' if len(names) > 1 else ''
+            print(f"\n--- {time.strftime('%H:%M:%S')} {names[0]}{more} ---")
+            self.recheck(changed, removed)
+            took = (time.perf_counter() - started) * 1000
+            saved = max((f.mtime for f in changed if f.mtime is not None), default=None)
+            since = f', {(time.time() - saved) * 1000:.0f} ms after the save' if saved is not None else ''
+            print(f'[watch] {self.status_line()}  (checked in {took:.0f} ms{since})', flush=True)
+
+
+_STOPPING = False
+
+
+def _interrupt(signum, frame) -> None:
+    """Ctrl-C and SIGTERM both stop the watcher; a second one must not interrupt saving the state."""
+    global _STOPPING
+    if not _STOPPING:
+        _STOPPING = True
+        raise KeyboardInterrupt
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('-r', '--root', default=str(PLUGIN_ROOT), help='Plugin root (default: repo root)')
+    ap.add_argument('--interval', type=float, default=0.2, help='Seconds between polls (default: 0.2)')
+    ap.add_argument('--expected', type=int, help='Expected terminology matches')
+    ap.add_argument('-e', '--only-ext', help='Comma-separated extensions the terminology scan covers')
+    add_jobs_argument(ap)
+    add_cache_arguments(ap)
+    add_profile_arguments(ap)
+    args = ap.parse_args(argv if argv is not None else [])
+    with profile_session(args, 'watch_checks'):
+        return run(args)
+
+
+def run(args: argparse.Namespace) -> int:
+    root = Path(args.root).resolve()
+    if not root.is_dir():
+        print(f'[ERR] {root} is not a directory', file=sys.stderr)
+        return 1
+    only_ext = None
+    if args.only_ext:
+        only_ext = set(e.strip().lower() for e in args.only_ext.split(',') if e.strip())
+    cache = open_cache(args.no_cache, args.cache)
+    if cache is not None:
+        cache.buffer_writes()
+    signal.signal(signal.SIGINT, _interrupt)
+    signal.signal(signal.SIGTERM, _interrupt)
+
+    watcher = Watcher(root, cache, args.expected, only_ext, args.jobs)
+    try:
+        watcher.full_run()
+        print(f'\n[watch] {watcher.status_line()}')
+        print(f'[watch] watching {root} every {args.interval:g}s (Ctrl-C to stop)', flush=True)
+        watcher.watch(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_caches()
+    print('\n[watch] stopped' + ('; results saved to the result cache' if cache is not None else ''))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))